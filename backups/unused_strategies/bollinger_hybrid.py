@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 import numpy as np
 
@@ -20,30 +19,15 @@ class BollingerHybridStrategy(Strategy):
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
             
-        agg_dict = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
-        df_4h = df.resample('4h').agg(agg_dict).dropna()
-        
-        st = ta.supertrend(df_4h['high'], df_4h['low'], df_4h['close'], length=st_len, multiplier=st_mult)
-        st_dir_col = f"SUPERTd_{st_len}_{st_mult}"
-        if st_dir_col not in st.columns:
-             cols = [c for c in st.columns if c.startswith('SUPERTd')]
-             if cols: st_dir_col = cols[0]
-        
-        trend_series = st[st_dir_col].reindex(df.index).ffill()
+        # Cached: computed once per dataset and (st_len, st_mult), shared by every combination
+        trend_series = self.indicator(df, 'htf_trend', rule='4h', length=st_len, multiplier=st_mult)
         
         # 2. Indicators
-        bb = ta.bbands(df['close'], length=bb_len, std=bb_std)
-        rsi = ta.rsi(df['close'], length=rsi_len)
-        
-        # Dynamic Column Finding
-        # pandas_ta column names: BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
-        # But sometimes std is formatted differently.
-        cols = bb.columns
-        lower_col = [c for c in cols if c.startswith('BBL')][0]
-        upper_col = [c for c in cols if c.startswith('BBU')][0]
+        bb = self.indicator(df, 'bbands', length=bb_len, std=bb_std)
+        rsi = self.indicator(df, 'rsi', length=rsi_len)
         
-        lower_band = bb[lower_col].values
-        upper_band = bb[upper_col].values
+        lower_band = bb['lower'].values
+        upper_band = bb['upper'].values
         rsi_vals = rsi.values
         trend_vals = trend_series.values
         close_vals = df['close'].values
@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 
 class BreakoutStrategy(Strategy):
@@ -13,17 +12,12 @@ class BreakoutStrategy(Strategy):
         # We need previous N highs/lows (excluding current to avoid lookahead bias if using High/Low of current)
         # But typically breakout is: if Current Price > Max(Previous N Highs)
         
-        df['high_max'] = df['high'].rolling(window=window).max().shift(1)
-        df['low_min'] = df['low'].rolling(window=window).min().shift(1)
+        df['high_max'] = self.indicator(df, 'rolling_high', window=window)
+        df['low_min'] = self.indicator(df, 'rolling_low', window=window)
         
         # ADX
-        adx = ta.adx(df['high'], df['low'], df['close'], length=14)
-        # adx returns ADX_14, DMP_14, DMN_14. We need ADX_14
-        adx_col = f"ADX_14"
-        if adx_col not in adx.columns:
-            adx_col = adx.columns[0]
-        
-        df = pd.concat([df, adx], axis=1)
+        adx_col = "ADX_14"
+        df[adx_col] = self.indicator(df, 'adx', length=14)
         
         signals = pd.Series(0, index=df.index)
         
@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 import numpy as np
 
@@ -20,24 +19,16 @@ class HybridStrategy(Strategy):
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
             
-        agg_dict = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
-        df_4h = df.resample('4h').agg(agg_dict).dropna()
-        
-        st = ta.supertrend(df_4h['high'], df_4h['low'], df_4h['close'], length=st_len, multiplier=st_mult)
-        st_dir_col = f"SUPERTd_{st_len}_{st_mult}"
-        if st_dir_col not in st.columns:
-             cols = [c for c in st.columns if c.startswith('SUPERTd')]
-             if cols: st_dir_col = cols[0]
-        
-        trend_series = st[st_dir_col].reindex(df.index).ffill()
+        # Cached: computed once per dataset and (st_len, st_mult), shared by every combination
+        trend_series = self.indicator(df, 'htf_trend', rule='4h', length=st_len, multiplier=st_mult)
         
         # 2. Pullback Indicators
-        rsi = ta.rsi(df['close'], length=rsi_len)
+        rsi = self.indicator(df, 'rsi', length=rsi_len)
         
         # 3. Breakout Indicators
         # Donchian Channel High/Low (Previous N candles)
-        high_rolling = df['high'].rolling(window=breakout_window).max().shift(1)
-        low_rolling = df['low'].rolling(window=breakout_window).min().shift(1)
+        high_rolling = self.indicator(df, 'rolling_high', window=breakout_window)
+        low_rolling = self.indicator(df, 'rolling_low', window=breakout_window)
         
         position = np.zeros(len(df))
         curr_pos = 0
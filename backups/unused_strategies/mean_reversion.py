@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 
 class MeanReversionStrategy(Strategy):
@@ -9,20 +8,13 @@ class MeanReversionStrategy(Strategy):
         std = self.params.get('bb_std', 2.0)
         
         # Indicators
-        bb = ta.bbands(df['close'], length=length, std=std)
-        # Returns columns like BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
-        # Column names depend on pandas_ta version, usually:
-        # BBL_{length}_{std}, BBM_..., BBU_...
+        # Cached bands with lower/mid/upper columns
+        bb = self.indicator(df, 'bbands', length=length, std=std)
         
-        lower_col = f"BBL_{length}_{std}"
-        upper_col = f"BBU_{length}_{std}"
-        
-        if lower_col not in bb.columns:
-             # Fallback or check columns
-             lower_col = bb.columns[0]
-             upper_col = bb.columns[2]
-        
-        df = pd.concat([df, bb], axis=1)
+        lower_col = 'bb_lower'
+        upper_col = 'bb_upper'
+        df[lower_col] = bb['lower']
+        df[upper_col] = bb['upper']
         
         signals = pd.Series(0, index=df.index)
         
@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 import numpy as np
 
@@ -11,25 +10,18 @@ class MeanReversionFilteredStrategy(Strategy):
         adx_thres = self.params.get('adx_threshold', 25)
         
         # Indicators
-        bb = ta.bbands(df['close'], length=bb_len, std=bb_std)
+        bb = self.indicator(df, 'bbands', length=bb_len, std=bb_std)
         if bb is None: return pd.Series(0, index=df.index)
         
-        lower_col = bb.columns[0] 
-        mid_col = bb.columns[1]
-        upper_col = bb.columns[2] 
-        
         # ADX
-        adx = ta.adx(df['high'], df['low'], df['close'], length=14)
-        adx_col = adx.columns[0]
-        
-        df = pd.concat([df, bb, adx], axis=1)
+        adx = self.indicator(df, 'adx', length=14)
         
         # Logic with State
         close = df['close'].values
-        lower = df[lower_col].values
-        upper = df[upper_col].values
-        mid = df[mid_col].values
-        adx_vals = df[adx_col].values
+        lower = bb['lower'].values
+        upper = bb['upper'].values
+        mid = bb['mid'].values
+        adx_vals = adx.values
         
         position = np.zeros(len(df))
         curr_pos = 0
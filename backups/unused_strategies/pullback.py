@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 
 class PullbackStrategy(Strategy):
@@ -11,8 +10,8 @@ class PullbackStrategy(Strategy):
         rsi_sell_lvl = self.params.get('rsi_sell', 60) # Sell if RSI > 60 in Downtrend
         
         # Indicators
-        df['ema_trend'] = ta.ema(df['close'], length=ema_trend_len)
-        df['rsi'] = ta.rsi(df['close'], length=rsi_len)
+        df['ema_trend'] = self.indicator(df, 'ema', length=ema_trend_len)
+        df['rsi'] = self.indicator(df, 'rsi', length=rsi_len)
         
         signals = pd.Series(0, index=df.index)
         
@@ -1,5 +1,5 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
+from tools.kernels import positions_from_signals
 import pandas as pd
 import numpy as np
 
@@ -12,47 +12,26 @@ class RSI2Strategy(Strategy):
         ma_len = self.params.get('exit_ma', 5)
         
         # Indicators
-        df['rsi'] = ta.rsi(df['close'], length=rsi_len)
-        df['ma_exit'] = ta.sma(df['close'], length=ma_len)
+        df['rsi'] = self.indicator(df, 'rsi', length=rsi_len)
+        df['ma_exit'] = self.indicator(df, 'sma', length=ma_len)
         # Trend Filter (200 SMA) - Only buy if price > 200 SMA?
         # For high freq, maybe we skip trend filter or make it optional.
-        df['ma_trend'] = ta.sma(df['close'], length=200)
+        df['ma_trend'] = self.indicator(df, 'sma', length=200)
         
         rsi = df['rsi'].values
         close = df['close'].values
         ma_exit = df['ma_exit'].values
         ma_trend = df['ma_trend'].values
         
-        position = np.zeros(len(df))
-        curr_pos = 0
-        
-        for i in range(1, len(df)):
-            if np.isnan(rsi[i]) or np.isnan(ma_exit[i]) or np.isnan(ma_trend[i]):
-                continue
-            
-            # Trend Filter: Only Long if Price > SMA 200
-            uptrend = close[i] > ma_trend[i]
-            
-            if curr_pos == 0:
-                # Long Entry
-                if rsi[i] < buy_lvl and uptrend:
-                    curr_pos = 1
-                # Short Entry (Inverse) - Optional, usually RSI2 is Long Only in stocks, but Crypto allows both.
-                # Let's try Long Only first as it's safer? 
-                # Or Short if downtrend?
-                elif rsi[i] > sell_lvl and not uptrend:
-                    curr_pos = -1
-            
-            elif curr_pos == 1:
-                # Exit Long: Price > MA Exit
-                if close[i] > ma_exit[i]:
-                    curr_pos = 0
-            
-            elif curr_pos == -1:
-                # Exit Short: Price < MA Exit
-                if close[i] < ma_exit[i]:
-                    curr_pos = 0
-            
-            position[i] = curr_pos
+        # Trend Filter: Only Long if Price > SMA 200, short the inverse setup below it.
+        # Exits: long when price > MA Exit, short when price < MA Exit.
+        uptrend = close > ma_trend
+        position = positions_from_signals(
+            long_entry=(rsi < buy_lvl) & uptrend,
+            short_entry=(rsi > sell_lvl) & ~uptrend,
+            long_exit=close > ma_exit,
+            short_exit=close < ma_exit,
+            skip=np.isnan(rsi) | np.isnan(ma_exit) | np.isnan(ma_trend)
+        )
             
         return pd.Series(position, index=df.index)
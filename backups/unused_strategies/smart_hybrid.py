@@ -1,5 +1,5 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
+from tools.kernels import positions_from_signals, entry_levels
 import pandas as pd
 import numpy as np
 
@@ -21,72 +21,34 @@ class SmartHybridStrategy(Strategy):
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
             
-        agg_dict = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
-        df_4h = df.resample('4h').agg(agg_dict).dropna()
-        
-        st = ta.supertrend(df_4h['high'], df_4h['low'], df_4h['close'], length=st_len, multiplier=st_mult)
-        st_dir_col = f"SUPERTd_{st_len}_{st_mult}"
-        if st_dir_col not in st.columns:
-             cols = [c for c in st.columns if c.startswith('SUPERTd')]
-             if cols: st_dir_col = cols[0]
-        
-        trend_series = st[st_dir_col].reindex(df.index).ffill()
+        # Cached: computed once per dataset and (st_len, st_mult), shared by every combination
+        trend_series = self.indicator(df, 'htf_trend', rule='4h', length=st_len, multiplier=st_mult)
         
         # 2. Indicators
-        rsi = ta.rsi(df['close'], length=rsi_len)
-        atr = ta.atr(df['high'], df['low'], df['close'], length=atr_len)
-        
-        position = np.zeros(len(df))
-        curr_pos = 0
-        entry_price = 0.0
+        rsi = self.indicator(df, 'rsi', length=rsi_len)
+        atr = self.indicator(df, 'atr', length=atr_len)
         
         trend_vals = trend_series.values
         rsi_vals = rsi.values
-        atr_vals = atr.values
-        close_vals = df['close'].values
-        high_vals = df['high'].values
-        low_vals = df['low'].values
         
-        for i in range(1, len(df)):
-            trend_dir = trend_vals[i]
-            
-            if curr_pos == 0:
-                # --- LONG Logic ---
-                if trend_dir == 1:
-                    # Pullback Entry
-                    if rsi_vals[i] < rsi_buy:
-                        curr_pos = 1
-                        entry_price = close_vals[i]
-                        
-                # --- SHORT Logic ---
-                elif trend_dir == -1:
-                    rsi_sell_lvl = 100 - rsi_buy
-                    if rsi_vals[i] > rsi_sell_lvl:
-                        curr_pos = -1
-                        entry_price = close_vals[i]
-                    
-            elif curr_pos == 1:
-                # 1. Trend Reversal (Stop Loss / Exit)
-                if trend_dir == -1:
-                    curr_pos = 0
-                
-                # 2. Take Profit (ATR based)
-                elif tp_mult > 0:
-                    tp_price = entry_price + (atr_vals[i] * tp_mult)
-                    if high_vals[i] >= tp_price:
-                        curr_pos = 0 # TP Hit
-            
-            elif curr_pos == -1:
-                # 1. Trend Reversal
-                if trend_dir == 1:
-                    curr_pos = 0
-                
-                # 2. Take Profit
-                elif tp_mult > 0:
-                    tp_price = entry_price - (atr_vals[i] * tp_mult)
-                    if low_vals[i] <= tp_price:
-                        curr_pos = 0 # TP Hit
-            
-            position[i] = curr_pos
+        # The TP is a resting order: the distance is fixed at the previous close, so the bar the
+        # position exits on is the bar the engine fills the take_profit level on
+        tp_dist = atr.values * tp_mult if tp_mult > 0 else None
+        resting_tp = np.concatenate(([np.nan], tp_dist[:-1])) if tp_dist is not None else None
+        
+        # Long: pullback in a 4h uptrend, out on trend reversal or ATR take-profit (mirror for shorts)
+        position = positions_from_signals(
+            long_entry=(trend_vals == 1) & (rsi_vals < rsi_buy),
+            short_entry=(trend_vals == -1) & (rsi_vals > 100 - rsi_buy),
+            long_exit=(trend_vals == -1),
+            short_exit=(trend_vals == 1),
+            entry_price=df['close'].values,
+            tp_dist=resting_tp,
+            high=df['high'].values,
+            low=df['low'].values
+        )
             
-        return pd.Series(position, index=df.index)
+        signals = pd.DataFrame({'position': position}, index=df.index)
+        if tp_dist is not None:
+            signals['take_profit'] = entry_levels(position, df['close'].values, tp_dist)
+        return signals
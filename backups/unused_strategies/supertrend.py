@@ -1,5 +1,4 @@
 from tools.wfo import Strategy
-import pandas_ta as ta
 import pandas as pd
 import numpy as np
 
@@ -10,24 +9,8 @@ class SuperTrendStrategy(Strategy):
         multiplier = self.params.get('multiplier', 3.0)
         
         # Indicator
-        st = ta.supertrend(df['high'], df['low'], df['close'], length=length, multiplier=multiplier)
-        
-        # Supertrend returns 4 columns: SUPERT_l_m, SUPERTd_l_m, SUPERTl_l_m, SUPERTs_l_m
-        # We need the direction column (SUPERTd) or the trend line (SUPERT)
-        # Usually column 1 is direction (1 for Up, -1 for Down)
-        
-        st_dir_col = f"SUPERTd_{length}_{multiplier}"
-        if st_dir_col not in st.columns:
-            # Fallback: try to find the direction column by name pattern
-            cols = [c for c in st.columns if c.startswith('SUPERTd')]
-            if cols:
-                st_dir_col = cols[0]
-            else:
-                return pd.Series(0, index=df.index)
-                
-        df = pd.concat([df, st], axis=1)
-        
-        direction = df[st_dir_col].values
+        # Cached Supertrend direction (1 for Up, -1 for Down)
+        direction = self.indicator(df, 'supertrend', length=length, multiplier=multiplier).values
         
         # Logic: 
         # If Direction == 1 -> Long
@@ -0,0 +1,192 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from threading import Lock
+from .config import ANALYTICS_FILE, LOG_FILE
+
+# --- MATERIALISED TRADE ANALYTICS ---
+# Maintained by the bot as fills are logged, so the dashboard reads finished numbers
+# instead of re-aggregating trades_log.csv on every rerun.
+
+# Holding-time histogram bucket upper edges (minutes). Last bucket is open-ended.
+HOLDING_BUCKETS = [5, 15, 30, 60, 120, 240, 480]
+MAX_DAILY_DAYS = 365 # Keep one year of daily equity
+RECENT_CLOSES = 50 # Closed trades behind the live bot's adaptive ADX filter
+EQUITY_FLUSH_SECONDS = 300 # Intraday close updates are written at most this often
+
+_lock = Lock()
+_analytics = None
+_dirty = False # In-memory aggregates ahead of ANALYTICS_FILE
+_last_flush = 0.0
+
+def _empty_bucket():
+    return {'fills': 0, 'closes': 0, 'wins': 0, 'volume': 0.0, 'pnl': 0.0, 'fees': 0.0, 'gross_profit': 0.0, 'gross_loss': 0.0}
+
+def _holding_labels():
+    labels = []
+    lower = 0
+    for upper in HOLDING_BUCKETS:
+        labels.append(f"{lower}-{upper}m")
+        lower = upper
+    labels.append(f">{lower}m")
+    return labels
+
+def empty_analytics():
+    return {
+        'updated': None,
+        'totals': _empty_bucket(),
+        'by_symbol': {},
+        'by_reason': {},
+        'holding_hist': {label: 0 for label in _holding_labels()},
+        'daily_equity': {},
+        'recent_closes': [] # 1 (win) / 0 per close, newest last
+    }
+
+def reason_key(reason):
+    """'EXIT_TRAIL_STOP (ROI 1.2%)' -> 'EXIT_TRAIL_STOP' so reasons aggregate."""
+    return str(reason).split(' (')[0].strip() or 'UNKNOWN'
+
+def holding_label(minutes):
+    labels = _holding_labels()
+    for upper, label in zip(HOLDING_BUCKETS, labels):
+        if minutes < upper:
+            return label
+    return labels[-1]
+
+def _apply_fill(bucket, notional, pnl, fees, is_close):
+    bucket['fills'] += 1
+    bucket['volume'] += notional
+    bucket['fees'] += fees
+    if is_close:
+        bucket['closes'] += 1
+        bucket['pnl'] += pnl
+        if pnl > 0:
+            bucket['wins'] += 1
+            bucket['gross_profit'] += pnl
+        elif pnl < 0:
+            bucket['gross_loss'] += -pnl
+
+def _apply_trade(data, symbol, amount, price, reason, pnl, fees, holding_minutes, is_close):
+    notional = abs(float(amount) * float(price))
+    pnl = float(pnl or 0.0)
+    _apply_fill(data['totals'], notional, pnl, fees, is_close)
+    _apply_fill(data['by_symbol'].setdefault(symbol, _empty_bucket()), notional, pnl, fees, is_close)
+    _apply_fill(data['by_reason'].setdefault(reason_key(reason), _empty_bucket()), notional, pnl, fees, is_close)
+    if is_close:
+        recent = data.setdefault('recent_closes', [])
+        recent.append(1 if pnl > 0 else 0)
+        del recent[:-RECENT_CLOSES]
+    if is_close and holding_minutes is not None:
+        label = holding_label(holding_minutes)
+        data['holding_hist'][label] = data['holding_hist'].get(label, 0) + 1
+
+def rebuild_from_log(log_file=LOG_FILE):
+    """
+    Backfills aggregates from trades_log.csv (used once when no analytics file exists).
+    Holding times are not in the log, so the histogram starts empty.
+    """
+    data = empty_analytics()
+    if not os.path.exists(log_file):
+        return data
+    with open(log_file, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            if 'FILLED' not in str(row.get('status', '')):
+                continue
+            try:
+                pnl = float(row.get('pnl') or 0.0)
+                _apply_trade(data, row['symbol'], row['amount'], row['price'], row.get('reason', ''), pnl, 0.0, None, pnl != 0.0)
+            except (ValueError, KeyError):
+                continue
+    data['updated'] = datetime.now().isoformat()
+    return data
+
+def load_analytics():
+    global _analytics
+    with _lock:
+        if _analytics is None:
+            if os.path.exists(ANALYTICS_FILE):
+                try:
+                    with open(ANALYTICS_FILE, 'r') as f:
+                        _analytics = json.load(f)
+                except Exception as e:
+                    print(f"Analytics Load Error: {e}. Rebuilding from trade log...")
+            if _analytics is None:
+                _analytics = rebuild_from_log()
+                _save_unlocked()
+        return _analytics
+
+def _save_unlocked():
+    global _dirty, _last_flush
+    _dirty = False
+    _last_flush = time.monotonic()
+    try:
+        temp_file = f"{ANALYTICS_FILE}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(_analytics, f)
+        os.replace(temp_file, ANALYTICS_FILE)
+    except Exception as e:
+        print(f"Analytics Save Error: {e}")
+
+def record_trade(symbol, side, amount, price, reason, pnl=0.0, fees=0.0, holding_minutes=None, is_close=False):
+    """Folds one FILLED order into the aggregates and persists them."""
+    load_analytics()
+    with _lock:
+        _apply_trade(_analytics, symbol, amount, price, reason, pnl, fees, holding_minutes, is_close)
+        _analytics['updated'] = datetime.now().isoformat()
+        _save_unlocked()
+
+def record_equity(balance, timestamp=None):
+    """
+    Tracks first/last balance per day for daily equity returns. Called every cycle, so only
+    a new day's bucket is written straight away; close updates stay in memory (which is
+    authoritative) and reach disk every EQUITY_FLUSH_SECONDS, with the next trade, or on
+    flush_analytics().
+    """
+    global _dirty
+    load_analytics()
+    day = (timestamp or datetime.now()).strftime('%Y-%m-%d')
+    with _lock:
+        daily = _analytics['daily_equity']
+        new_day = day not in daily
+        if new_day:
+            daily[day] = {'open': balance, 'close': balance}
+            # Trim to the retention window
+            for old in sorted(daily)[:-MAX_DAILY_DAYS]:
+                del daily[old]
+        elif daily[day]['close'] == balance:
+            return
+        else:
+            daily[day]['close'] = balance
+        _dirty = True
+        _analytics['updated'] = datetime.now().isoformat()
+        if new_day or time.monotonic() - _last_flush >= EQUITY_FLUSH_SECONDS:
+            _save_unlocked()
+
+def flush_analytics():
+    """Writes aggregates still pending from record_equity (on shutdown)."""
+    with _lock:
+        if _analytics is not None and _dirty:
+            _save_unlocked()
+
+def daily_returns(data):
+    """[(day, return)] using the previous day's close as the base (first day uses its open)."""
+    out = []
+    prev_close = None
+    for day in sorted(data.get('daily_equity', {})):
+        d = data['daily_equity'][day]
+        base = prev_close if prev_close else d['open']
+        out.append((day, (d['close'] / base - 1) if base else 0.0))
+        prev_close = d['close']
+    return out
+
+def recent_performance():
+    """(closes, win rate %) over the last RECENT_CLOSES closed trades, from the in-memory aggregates."""
+    data = load_analytics()
+    with _lock:
+        recent = list(data.get('recent_closes', []))
+    return len(recent), (sum(recent) / len(recent) * 100 if recent else 0.0)
+
+def win_rate(bucket):
+    return bucket['wins'] / bucket['closes'] if bucket.get('closes') else 0.0
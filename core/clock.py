@@ -0,0 +1,30 @@
+from datetime import datetime
+
+# --- CLOCK ---
+# Decision code asks this module for the time instead of calling datetime.now() directly,
+# so the replay simulator (tools/replay.py) can drive it with historical bar times.
+
+_source = None
+
+def now():
+    return _source() if _source is not None else datetime.now()
+
+def set_clock(source):
+    """`source` is a zero-argument callable returning a datetime (None restores wall time)."""
+    global _source
+    _source = source
+
+def reset_clock():
+    set_clock(None)
+
+
+class SimClock:
+    """Settable clock for simulations: `clock.set(ts)` then `set_clock(clock)`."""
+    def __init__(self, start=None):
+        self.current = start or datetime(1970, 1, 1)
+
+    def set(self, ts):
+        self.current = ts
+
+    def __call__(self):
+        return self.current
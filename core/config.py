@@ -6,6 +6,7 @@ load_dotenv(override=True)
 
 # Configuration
 USE_TESTNET = os.getenv('TESTNET', 'True').lower() == 'true'
+MOCK_EXCHANGE = os.getenv('MOCK_EXCHANGE', 'False').lower() == 'true' # Local stand-in (tools/mock_exchange.py), no network
 API_KEY = os.getenv('Binanceapikey', '').strip()
 SECRET_KEY = os.getenv('BinanceSecretkey', '').strip()
 LOG_FILE = "logs/trades_log.csv"
@@ -14,6 +15,10 @@ STATE_FILE = "state/dashboard_state.json"
 HISTORY_FILE = "logs/balance_history.csv"
 COMMAND_FILE = "state/bot_commands.json"
 BOT_OUTPUT_LOG = "logs/bot_output.log"
+ANALYTICS_FILE = "state/trade_analytics.json" # Materialised trade aggregates (see core/analytics.py)
+LIVE_STATE_FILE = "state/live_state.mmap" # Shared-memory channel read by the dashboard
+METRICS_FILE = "state/metrics.prom" # Loop phase timings, Prometheus text format (see core/telemetry.py)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0')) # Serve the same text on 127.0.0.1:<port>/metrics (0 = off)
 
 # Top 35 Liquid Futures Pairs (Cleaned)
 SYMBOLS = [
@@ -32,6 +37,7 @@ SYMBOLS = [
 ]
 
 # Strategy Config
+LIVE_STRATEGY = "Hybrid_Futures_2x_LongShort" # run_live.py trades config/strategies/{LIVE_STRATEGY}_config.txt
 DEFAULT_STRATEGY_CONFIG = {
     'st_len': 10, 
     'st_mult': 3.0, 
@@ -46,3 +52,8 @@ LEVERAGE_CAP = 12 # High Leverage for fast growth
 RISK_PER_TRADE = 0.025 # Aggressive sizing (2.5%)
 COOLDOWN_MINUTES = 5 # Fast re-entry
 CIRCUIT_BREAKER_DRAWDOWN = 0.30 # Strict safety net
+
+# Live Data Quality (core/data_quality.py policy for the 500-bar frames analyze_symbol fetches)
+# Spikes are only logged: clamping would evaluate stops and TPs on prices the exchange never printed
+LIVE_DATA_QUALITY = {'spikes': 'flag', 'gaps': 'flag', 'wick_limit': 0.5, 'spike_z': 12.0}
+MAX_MISSING_BARS = 12 # No new entries on a symbol whose recent 5m history has more holes than this (1h)
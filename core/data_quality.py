@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+# --- OHLCV DATA QUALITY ---
+# One vectorised pass over a bar series (int64 ns open times + a (5, n) open/high/low/close/volume
+# block) that finds and optionally repairs what exchange feeds get wrong:
+#   duplicates   same open time twice (overlapping pages); the last copy wins
+#   gaps         consecutive bars further apart than the interval (missing candles)
+#   misaligned   open times off the interval grid
+#   zero volume  bars without trades, and the longest run of them (halted / dead market)
+#   invalid      NaN prices, non-positive prices, high / low not containing open and close
+#   wick spikes  high > body * (1 + wick_limit) or low < body * (1 - wick_limit) (bad ticks)
+#   close spikes a close that jumps > spike_z robust deviations and the next bar undoes it
+# Policies: spikes 'flag' (report only) | 'clamp' (repair in place) | 'drop' (remove the bars),
+# gaps 'flag' | 'fill' (flat bars at the previous close, zero volume). Every call returns a
+# per-series report dict; report_frame() turns a list of them into a table.
+
+SPIKE_POLICIES = ('flag', 'clamp', 'drop')
+GAP_POLICIES = ('flag', 'fill')
+DEFAULT_POLICY = {'spikes': 'clamp', 'gaps': 'flag', 'wick_limit': 0.5, 'spike_z': 12.0}
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+UNIT_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+CLAMP_MARGIN = 0.1 # Clamped wicks end 10% past the body (the old downloader rule)
+
+def interval_ns(timeframe):
+    """'5m' / '4h' / 300000 (ms) -> bar width in ns."""
+    if isinstance(timeframe, str):
+        if timeframe[-1] not in UNIT_MS:
+            raise ValueError(f"Unsupported timeframe {timeframe!r}")
+        return int(timeframe[:-1]) * UNIT_MS[timeframe[-1]] * 1_000_000
+    return int(timeframe) * 1_000_000
+
+def _longest_run(mask):
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.r_[0, mask.view(np.int8), 0]))
+    return int((edges[1::2] - edges[::2]).max())
+
+def scan(ts, values, timeframe, spikes='flag', gaps='flag', wick_limit=0.5, spike_z=12.0):
+    """
+    Validates / repairs one series. ts: int64 ns open times (any order), values: (5, n) float64.
+    Returns (ts, values, report) with ts sorted and unique; inputs are never modified.
+    """
+    if spikes not in SPIKE_POLICIES:
+        raise ValueError(f"spikes must be one of {SPIKE_POLICIES}, got {spikes!r}")
+    if gaps not in GAP_POLICIES:
+        raise ValueError(f"gaps must be one of {GAP_POLICIES}, got {gaps!r}")
+    step = interval_ns(timeframe)
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    report = {'rows': int(len(ts))}
+
+    # Sort (only when needed) and dedupe, last copy wins
+    unsorted = bool(len(ts) > 1 and (ts[1:] < ts[:-1]).any())
+    if unsorted:
+        order = np.argsort(ts, kind='stable')
+        ts, values = ts[order], values[:, order]
+    keep = np.append(ts[1:] != ts[:-1], True) if len(ts) else np.ones(0, dtype=bool)
+    report['unsorted'] = unsorted
+    report['duplicates'] = int(len(ts) - keep.sum())
+    if not keep.all():
+        ts, values = ts[keep], values[:, keep]
+    values = values.copy()
+    o, h, l, c, v = values
+
+    # Spacing
+    diff = np.diff(ts)
+    gap = diff > step
+    report['misaligned'] = int(np.count_nonzero(ts % step))
+    report['gaps'] = int(gap.sum())
+    report['missing_bars'] = int((diff[gap] // step - 1).sum())
+    report['largest_gap_bars'] = int(diff[gap].max() // step - 1) if gap.any() else 0
+
+    # Volume
+    zero = v == 0
+    report['zero_volume'] = int(zero.sum())
+    report['zero_volume_run'] = _longest_run(zero)
+
+    # Bar consistency
+    with np.errstate(invalid='ignore', divide='ignore'):
+        nan = ~np.isfinite(values).all(axis=0)
+        body_max = np.fmax(o, c)
+        body_min = np.fmin(o, c)
+        inverted = ~nan & ((h < body_max) | (l > body_min) | (np.fmin(l, body_min) <= 0) | (v < 0))
+        wick_high = ~nan & (h > body_max * (1 + wick_limit))
+        wick_low = ~nan & (l < body_min * (1 - wick_limit))
+
+        # Close spikes: a big move that immediately reverts (robust scale = 1.4826 * MAD of log returns)
+        close_spike = np.zeros(len(ts), dtype=bool)
+        if len(ts) >= 3:
+            r = np.diff(np.log(np.where(c > 0, c, np.nan)))
+            finite = np.isfinite(r)
+            if finite.sum() >= 3:
+                centre = np.median(r[finite])
+                scale = 1.4826 * np.median(np.abs(r[finite] - centre))
+                if scale > 0:
+                    big = np.abs(r - centre) > spike_z * scale
+                    # ... and the next bar gives back at least 75% of it (a crash that bounces isn't a bad tick)
+                    reverts = np.abs(r[:-1] + r[1:]) < 0.25 * np.fmin(np.abs(r[:-1]), np.abs(r[1:]))
+                    close_spike[1:-1] = big[:-1] & big[1:] & reverts
+    report['nan'] = int(nan.sum())
+    report['invalid'] = int(inverted.sum())
+    report['wick_spikes'] = int((wick_high | wick_low).sum())
+    report['close_spikes'] = int(close_spike.sum())
+
+    # Repairs
+    repaired = dropped = filled = 0
+    bad = wick_high | wick_low | close_spike | inverted
+    if spikes == 'clamp' and bad.any():
+        if close_spike.any():
+            i = np.flatnonzero(close_spike)
+            c[i] = np.sqrt(c[i - 1] * c[i + 1]) # Geometric midpoint of the neighbours
+            h[i] = np.fmax(o[i], c[i])
+            l[i] = np.fmin(o[i], c[i])
+        body_max = np.fmax(o, c)
+        body_min = np.fmin(o, c)
+        h[wick_high] = body_max[wick_high] * (1 + CLAMP_MARGIN)
+        l[wick_low] = body_min[wick_low] * (1 - CLAMP_MARGIN)
+        np.fmax(h, body_max, out=h)
+        np.fmin(l, body_min, out=l)
+        np.fmax(v, 0, out=v)
+        repaired = int(bad.sum())
+    if spikes != 'flag' and (nan.any() or (spikes == 'drop' and bad.any())):
+        drop = nan | (bad if spikes == 'drop' else False)
+        ts, values = ts[~drop], values[:, ~drop]
+        dropped = int(drop.sum())
+
+    if gaps == 'fill' and len(ts) > 1:
+        width = np.maximum(np.diff(ts) // step, 1)
+        if (width > 1).any():
+            counts = np.append(width, 1)
+            source = np.repeat(np.arange(len(ts)), counts)
+            offset = np.arange(len(source)) - np.repeat(np.cumsum(counts) - counts, counts)
+            new_ts = ts[source] + offset * step
+            new_values = values[:, source]
+            fill = offset > 0
+            new_values[:4, fill] = values[3, source[fill]] # Flat at the previous close
+            new_values[4, fill] = 0.0
+            filled = int(fill.sum())
+            ts, values = new_ts, new_values
+
+    report['repaired'] = repaired
+    report['dropped'] = dropped
+    report['filled'] = filled
+    report['rows_out'] = int(len(ts))
+    return ts, np.ascontiguousarray(values), report
+
+
+def validate_ohlcv(df, timeframe, symbol=None, **policy):
+    """
+    scan() for a DataFrame: ccxt rows, a 'timestamp' column (epoch ms or datetimes) or a
+    DatetimeIndex. Returns (clean frame in the same layout, report).
+    """
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df, columns=['timestamp'] + COLUMNS)
+    options = dict(DEFAULT_POLICY, **policy)
+    raw = df['timestamp'] if 'timestamp' in df.columns else df.index
+    epoch_ms = np.asarray(raw).dtype.kind in 'iuf' # ccxt / klines rows carry epoch ms
+    if epoch_ms:
+        ts = np.asarray(raw, dtype=np.int64) * 1_000_000
+    else:
+        index = pd.DatetimeIndex(pd.to_datetime(raw))
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        ts = index.as_unit('ns').asi8
+    values = np.vstack([df[col].to_numpy(dtype=np.float64) for col in COLUMNS])
+    ts, values, report = scan(ts, values, timeframe, **options)
+    report = {'symbol': symbol, 'timeframe': timeframe, **report}
+
+    times = ts // 1_000_000 if epoch_ms else pd.DatetimeIndex(ts.view('datetime64[ns]'), name='timestamp')
+    clean = pd.DataFrame(values.T, columns=COLUMNS)
+    if 'timestamp' in df.columns:
+        clean.insert(0, 'timestamp', times)
+    else:
+        clean.index = times
+    return clean, report
+
+
+def issues(report):
+    """Short human summary of what a report found ('' when the series is clean)."""
+    parts = [f"{report['missing_bars']} missing bars in {report['gaps']} gaps"] if report.get('gaps') else []
+    for key, label in (('duplicates', 'duplicates'), ('misaligned', 'misaligned'), ('nan', 'NaN bars'),
+                       ('invalid', 'invalid bars'), ('wick_spikes', 'wick spikes'), ('close_spikes', 'close spikes'),
+                       ('zero_volume', 'zero-volume bars')):
+        if report.get(key):
+            parts.append(f"{report[key]} {label}")
+    return ', '.join(parts)
+
+
+def report_frame(reports):
+    """List of scan / validate_ohlcv reports -> one row per series."""
+    return pd.DataFrame(list(reports))
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+# --- DOWNSAMPLING ---
+# Charts only need about one point per horizontal pixel. Everything here works on numpy
+# arrays so a week of 2s balance samples reduces to a chart-sized series in milliseconds.
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets. Returns the indices of the `n_out` points that best
+    preserve the visual shape of (x, y). First and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    # Bucket edges for the n - 2 interior points
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average of the NEXT bucket (the last bucket looks at the final point)
+        n_start = end
+        n_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[n_start:n_end].mean()
+        avg_y = y[n_start:n_end].mean()
+
+        # Point in the current bucket forming the largest triangle with A and the next average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+
+    return idx
+
+def minmax_indices(y, n_buckets):
+    """
+    Min/Max bucketing: keeps the extreme points of each bucket (2 per bucket). Cheaper than
+    LTTB and never hides spikes, at the cost of a slightly noisier line.
+    """
+    n = len(y)
+    if n <= n_buckets * 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lo = np.empty(n_buckets, dtype=np.int64)
+    hi = np.empty(n_buckets, dtype=np.int64)
+    for i, (s, e) in enumerate(zip(starts, edges[1:])):
+        seg = y[s:e]
+        lo[i] = s + int(np.argmin(seg))
+        hi[i] = s + int(np.argmax(seg))
+    return np.unique(np.concatenate([lo, hi, [0, n - 1]]))
+
+def downsample_frame(df, x_col, y_cols, n_out, method='lttb'):
+    """
+    Downsamples `df` for plotting. With several y columns the union of each column's
+    selected points is kept, so every series retains its shape.
+    """
+    if len(df) <= n_out:
+        return df
+
+    x = df[x_col].values.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(df[x_col].dtype, np.datetime64) else df[x_col].values
+    keep = []
+    for col in y_cols:
+        y = df[col].values
+        if method == 'minmax':
+            keep.append(minmax_indices(y, max(n_out // 2, 1)))
+        else:
+            keep.append(lttb_indices(x, y, n_out))
+    return df.iloc[np.unique(np.concatenate(keep))]
+
+
+class Rollup:
+    """
+    Last-value-per-bucket rollup of a level series (balance, open PnL), maintained
+    incrementally. Timestamps are int64 ns; bucket starts are aligned to the epoch.
+    """
+    def __init__(self, width_seconds, columns):
+        self.width = int(width_seconds * 1e9)
+        self.columns = list(columns)
+        self.reset()
+
+    def reset(self):
+        self.size = 0
+        self._ts = np.empty(1024, dtype=np.int64)
+        self._vals = {c: np.empty(1024, dtype=np.float64) for c in self.columns}
+
+    def _grow(self, needed):
+        cap = len(self._ts)
+        if needed <= cap:
+            return
+        new_cap = max(needed, cap * 2)
+        self._ts = np.resize(self._ts, new_cap)
+        for c in self.columns:
+            self._vals[c] = np.resize(self._vals[c], new_cap)
+
+    def ingest(self, ts_ns, values):
+        """Adds rows (must be appended in time order). `values` maps column -> array."""
+        if len(ts_ns) == 0:
+            return
+        buckets = (np.asarray(ts_ns, dtype=np.int64) // self.width) * self.width
+
+        # Last row of each bucket in this chunk
+        last = np.r_[np.nonzero(np.diff(buckets))[0], len(buckets) - 1]
+        b = buckets[last]
+
+        # First bucket may continue the last stored one: overwrite instead of append
+        start = self.size
+        if self.size and b[0] == self._ts[self.size - 1]:
+            start = self.size - 1
+
+        self._grow(start + len(b))
+        self._ts[start:start + len(b)] = b
+        for c in self.columns:
+            self._vals[c][start:start + len(b)] = np.asarray(values[c], dtype=np.float64)[last]
+        self.size = start + len(b)
+
+    def count_since(self, since_ns):
+        return self.size - int(np.searchsorted(self._ts[:self.size], since_ns, side='left'))
+
+    def frame(self, since_ns=None):
+        i = 0 if since_ns is None else int(np.searchsorted(self._ts[:self.size], since_ns, side='left'))
+        data = {'timestamp': pd.to_datetime(self._ts[i:self.size])}
+        for c in self.columns:
+            data[c] = self._vals[c][i:self.size]
+        return pd.DataFrame(data)
+
+
+class RollupSet:
+    """
+    Raw series plus a ladder of coarser rollups. `select()` picks the finest resolution that
+    fits the requested time range within a few multiples of the point budget, then LTTB
+    trims it to the budget exactly.
+    """
+    def __init__(self, columns, widths_seconds=(60, 900, 3600, 4 * 3600), oversample=4):
+        self.columns = list(columns)
+        self.rollups = [Rollup(w, columns) for w in widths_seconds]
+        self.oversample = oversample
+
+    def reset(self):
+        for r in self.rollups:
+            r.reset()
+
+    def update(self, chunk, ts_col='timestamp'):
+        # Same interface as RunningSums, so it can ride along an IncrementalCSV reader
+        if chunk is None or len(chunk) == 0:
+            return
+        ts = chunk[ts_col].values.astype('datetime64[ns]').astype(np.int64)
+        values = {c: chunk[c].values for c in self.columns}
+        for r in self.rollups:
+            r.ingest(ts, values)
+
+    def select(self, raw, since, n_out, ts_col='timestamp'):
+        """
+        `raw` is the full-resolution DataFrame, or just its last n_out * oversample + 1 rows:
+        a range denser than that is served from the rollups either way. `since` is a
+        Timestamp (or None for all). Returns a DataFrame with at most ~n_out rows.
+        """
+        since_ns = None if since is None else pd.Timestamp(since).value
+        budget = n_out * self.oversample
+
+        if since_ns is None:
+            raw_view = raw
+        else:
+            i = int(np.searchsorted(raw[ts_col].values.astype('datetime64[ns]').astype(np.int64), since_ns, side='left'))
+            raw_view = raw.iloc[i:]
+
+        source = raw_view
+        if len(raw_view) > budget:
+            source = None
+            for r in self.rollups:
+                if r.count_since(since_ns if since_ns is not None else np.iinfo(np.int64).min) <= budget:
+                    source = r.frame(since_ns)
+                    break
+            if source is None:
+                source = self.rollups[-1].frame(since_ns)
+
+        return downsample_frame(source, ts_col, self.columns, n_out)
@@ -1,6 +1,13 @@
 import ccxt
 import time
-from .config import API_KEY, SECRET_KEY, USE_TESTNET, SYMBOLS, LEVERAGE_CAP
+from .config import API_KEY, SECRET_KEY, USE_TESTNET, MOCK_EXCHANGE, SYMBOLS, LEVERAGE_CAP
+
+_override = None
+
+def use_exchange(exchange):
+    """get_exchange() returns `exchange` (a stand-in such as tools/mock_exchange.MockExchange) until reset with None."""
+    global _override
+    _override = exchange
 
 def apply_monkey_patches(exchange):
     # FORCE OVERRIDE CAPABILITIES TO PREVENT MARGIN CALLS
@@ -46,6 +53,12 @@ def get_exchange():
     Initializes the CCXT exchange with necessary configurations and monkey patches
     for Binance Futures Testnet compatibility.
     """
+    if _override is not None:
+        return _override
+    if MOCK_EXCHANGE:
+        from tools.mock_exchange import from_env
+        return from_env()
+    
     # Explicitly configure for Binance Futures Testnet based on RAW SUCCESS
     exchange = ccxt.binance({
         'apiKey': API_KEY,
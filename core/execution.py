@@ -2,15 +2,24 @@ import csv
 import os
 import time
 from datetime import datetime
+from . import clock
 from .config import LOG_FILE, LEVERAGE_CAP
+from .analytics import record_trade
 
-def log_trade(timestamp, symbol, side, amount, price, reason, status, pnl=0.0):
+def log_trade(timestamp, symbol, side, amount, price, reason, status, pnl=0.0, fees=0.0, holding_minutes=None, is_close=False):
     file_exists = os.path.isfile(LOG_FILE)
     with open(LOG_FILE, mode='a', newline='') as file:
         writer = csv.writer(file)
         if not file_exists:
             writer.writerow(['timestamp', 'symbol', 'side', 'amount', 'price', 'reason', 'status', 'pnl'])
         writer.writerow([timestamp, symbol, side, amount, price, reason, status, pnl])
+    
+    # Keep materialised aggregates in step with the log
+    if status == "FILLED":
+        try:
+            record_trade(symbol, side, amount, price, reason, pnl, fees, holding_minutes, is_close)
+        except Exception as e:
+            print(f"      ⚠️ Analytics Update Error: {e}")
 
 def execute_trade_safely(exchange, symbol, side, amount, price, params, current_margin, active_positions, blacklist, signal_msg):
     """
@@ -23,6 +32,8 @@ def execute_trade_safely(exchange, symbol, side, amount, price, params, current_
     leverage = LEVERAGE_CAP # Synced with Config
     max_attempts = 5
     realized_pnl = 0.0 # Track PnL for this trade
+    total_fees = 0.0
+    holding_minutes = None
     
     # Ensure symbol is uppercase to match CCXT keys
     symbol = symbol.upper()
@@ -164,6 +175,13 @@ def execute_trade_safely(exchange, symbol, side, amount, price, params, current_
                     
                     realized_pnl = gross_pnl - total_fees
                     
+                    # Holding time for analytics
+                    try:
+                        entry_dt = datetime.fromisoformat(active_positions[symbol]['entry_time'])
+                        holding_minutes = (clock.now() - entry_dt).total_seconds() / 60
+                    except (KeyError, TypeError, ValueError):
+                        holding_minutes = None
+                    
                     # Update or Delete Position
                     # If remaining is tiny (dust), treat as closed
                     if remaining < (final_amount * 0.01) or remaining < 0.0001:
@@ -195,7 +213,7 @@ def execute_trade_safely(exchange, symbol, side, amount, price, params, current_
                 else:
                     # New Position
                     amt_signed = final_amount if side == 'buy' else -final_amount
-                    active_positions[symbol] = {'amt': amt_signed, 'entry': price, 'pnl': 0.0, 'entry_time': datetime.now().isoformat(), 'dca_count': 0, 'tp_count': 0}
+                    active_positions[symbol] = {'amt': amt_signed, 'entry': price, 'pnl': 0.0, 'entry_time': clock.now().isoformat(), 'dca_count': 0, 'tp_count': 0}
             
             # Handle Partial Take Profit State Update
             if params.get('is_tp', False) and symbol in active_positions:
@@ -203,7 +221,8 @@ def execute_trade_safely(exchange, symbol, side, amount, price, params, current_
                  print(f"      💰 Partial TP Executed. Count: {active_positions[symbol]['tp_count']}")
             
             # Log Trade with PnL
-            log_trade(datetime.now().isoformat(), symbol, side, final_amount, price, signal_msg, "FILLED", realized_pnl)
+            log_trade(clock.now().isoformat(), symbol, side, final_amount, price, signal_msg, "FILLED", realized_pnl,
+                      fees=total_fees, holding_minutes=holding_minutes, is_close=params.get('reduceOnly', False))
             print(f"      ✅ FILLED: {order['orderId']} | PnL: ${realized_pnl:.2f}")
 
             # Update Local Margin (only if opening/increasing risk)
@@ -310,7 +329,7 @@ def execute_trade_safely(exchange, symbol, side, amount, price, params, current_
     
     if not executed:
         print(f"   ❌ Order Failed for {symbol} after {attempts} retries. Last Error: {last_error}")
-        log_trade(datetime.now().isoformat(), symbol, side, amount, price, signal_msg, f"FAILED: {last_error}", 0.0)
+        log_trade(clock.now().isoformat(), symbol, side, amount, price, signal_msg, f"FAILED: {last_error}", 0.0)
         
         # Auto-Blacklist on persistent unknown failures
         if attempts >= max_attempts:
@@ -0,0 +1,192 @@
+import io
+import os
+from bisect import bisect_left, bisect_right
+from threading import Lock
+
+import pandas as pd
+
+
+def file_signature(path):
+    """(path, mtime_ns, size) - cheap cache key for derived data. None if the file is missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+BLOCK_ROWS = 4096 # Appended chunks are merged into blocks of about this size
+
+
+# --- LOG TRANSFORMS (run once per appended chunk) ---
+def prepare_history(chunk):
+    chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format='mixed', errors='coerce')
+    
+    # Ensure numeric columns
+    for col in ['balance', 'open_pnl']:
+        if col in chunk.columns:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+    
+    # Drop rows with invalid timestamp or critical data
+    return chunk.dropna(subset=['timestamp', 'balance', 'open_pnl'])
+
+def prepare_trades(chunk):
+    # Filter for FILLED trades
+    filled = chunk[chunk['status'].astype(str).str.contains('FILLED', na=False)].copy()
+    
+    # Ensure PnL column exists (for backward compatibility)
+    if 'pnl' not in filled.columns:
+        filled['pnl'] = 0.0
+    
+    for col in ['price', 'amount', 'pnl']:
+        filled[col] = pd.to_numeric(filled[col], errors='coerce').fillna(0.0)
+    
+    # Format Timestamp once, at ingest
+    filled['timestamp'] = pd.to_datetime(filled['timestamp'], format='mixed', errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+    return filled
+
+
+class RunningSums:
+    """
+    Aggregates maintained chunk by chunk, so totals never rescan the whole log.
+    Usage: RunningSums(volume=lambda c: (c['price'] * c['amount']).sum())
+    """
+    def __init__(self, **funcs):
+        self.funcs = funcs
+        self.reset()
+
+    def reset(self):
+        self.rows = 0
+        self.values = {name: 0.0 for name in self.funcs}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for name, fn in self.funcs.items():
+            self.values[name] += float(fn(chunk))
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+
+class IncrementalCSV:
+    """
+    Append-aware CSV reader for the bot's logs (trades_log.csv, balance_history.csv).
+
+    Remembers the byte offset of the last complete line it parsed; each refresh() only reads
+    and parses the bytes appended since then. A shrunk or replaced file (truncate, rotation,
+    restore_history.py) triggers a full reload.
+
+    `transform(chunk)` runs once per new chunk (type coercion, filtering, formatting) so the
+    cached rows are already display-ready. Aggregators (e.g. RunningSums) receive each
+    transformed chunk and are reset on reload.
+
+    Rows are kept as blocks of ~BLOCK_ROWS (small appends are merged into the last block), so
+    tail() / rows_between() only touch the blocks they overlap. `frame` materialises everything
+    and is meant for one-off use, not per rerun.
+    """
+    def __init__(self, path, transform=None, aggregators=None):
+        self.path = path
+        self.transform = transform
+        self.aggregators = list(aggregators or [])
+        self._lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.columns = None
+        self._inode = None
+        self._chunks = []
+        self._starts = [] # First row number of each block
+        self.rows = 0
+        for agg in self.aggregators:
+            agg.reset()
+
+    def add_aggregator(self, agg):
+        with self._lock:
+            self.aggregators.append(agg)
+            if self.rows:
+                agg.update(self._rows_unlocked(0, self.rows))
+
+    def refresh(self):
+        """
+        Reads whatever was appended since the last call.
+        Returns (new_rows, reloaded). `new_rows` is an empty DataFrame when nothing changed.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        reloaded = False
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self.offset or self.columns is not None:
+                self._reset()
+                reloaded = True
+            return pd.DataFrame(), reloaded
+
+        # Rotation / truncation: start over
+        if (self._inode is not None and st.st_ino != self._inode) or st.st_size < self.offset:
+            self._reset()
+            reloaded = True
+        self._inode = st.st_ino
+
+        if st.st_size == self.offset:
+            return pd.DataFrame(columns=self.columns or []), reloaded
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+
+        # Only consume complete lines; a half-written row waits for the next refresh
+        end = data.rfind(b'\n')
+        if end < 0:
+            return pd.DataFrame(columns=self.columns or []), reloaded
+        data = data[:end + 1]
+        self.offset += len(data)
+
+        if self.columns is None:
+            header, _, data = data.partition(b'\n')
+            self.columns = header.decode('utf-8', errors='replace').strip().split(',')
+            if not data:
+                return pd.DataFrame(columns=self.columns), reloaded
+
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=self.columns, on_bad_lines='skip')
+        if self.transform is not None:
+            chunk = self.transform(chunk)
+
+        if len(chunk):
+            if self._chunks and len(self._chunks[-1]) < BLOCK_ROWS:
+                self._chunks[-1] = pd.concat([self._chunks[-1], chunk], ignore_index=True)
+            else:
+                self._starts.append(self.rows)
+                self._chunks.append(chunk.reset_index(drop=True))
+            self.rows += len(chunk)
+            for agg in self.aggregators:
+                agg.update(chunk)
+
+        return chunk, reloaded
+
+    def _rows_unlocked(self, start, stop):
+        start, stop = max(start, 0), min(stop, self.rows)
+        if start >= stop:
+            return self._chunks[0].iloc[:0] if self._chunks else pd.DataFrame(columns=self.columns or [])
+        first = bisect_right(self._starts, start) - 1
+        last = bisect_left(self._starts, stop)
+        parts = [block.iloc[max(start - s, 0):stop - s] for s, block in zip(self._starts[first:last], self._chunks[first:last])]
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    def rows_between(self, start, stop):
+        """Rows [start, stop) in file order (transformed); only the overlapping blocks are copied."""
+        with self._lock:
+            return self._rows_unlocked(start, stop)
+
+    def tail(self, n):
+        """The last `n` rows."""
+        with self._lock:
+            return self._rows_unlocked(self.rows - n, self.rows)
+
+    @property
+    def frame(self):
+        """All rows parsed so far (transformed). Concatenates every block: prefer tail()."""
+        with self._lock:
+            return self._rows_unlocked(0, self.rows)
@@ -5,7 +5,16 @@ import numpy as np
 def calculate_indicators(df, params):
     """
     Calculates technical indicators using pandas_ta.
-    Returns a dictionary of the latest indicator values and the processed DataFrame.
+    Returns a dictionary of the latest indicator values (the DataFrame gains the indicator columns).
+    """
+    compute_indicator_frame(df, params)
+    return indicators_at(indicator_columns(df), len(df) - 1)
+
+def compute_indicator_frame(df, params):
+    """
+    Adds every indicator column to `df` in one vectorised pass. All columns are causal
+    (row i only uses rows <= i), so a full history can be computed once and read bar by
+    bar with indicators_at() - that's how tools/replay.py runs the live logic.
     """
     # --- SMART CONFIG ---
     USE_HEIKIN_ASHI = True
@@ -15,9 +24,6 @@ def calculate_indicators(df, params):
     df['donchian_high'] = df['high'].rolling(window=window).max()
     df['donchian_low'] = df['low'].rolling(window=window).min()
     
-    donchian_high = df['donchian_high'].iloc[-2] # Previous candle to avoid lookahead
-    donchian_low = df['donchian_low'].iloc[-2]
-    
     # --- DATA PREPARATION ---
     # Heikin Ashi Smoothing (Mathematically Precise)
     if USE_HEIKIN_ASHI:
@@ -26,14 +32,15 @@ def calculate_indicators(df, params):
         
         # HA Open = (Prev HA Open + Prev HA Close) / 2
         # Initialize first HA Open as the first raw Open (standard convention)
-        ha_open = [df['open'].iloc[0]]
+        ha_close_values = df['ha_close'].values
+        ha_open = np.empty(len(df))
+        if len(df):
+            ha_open[0] = df['open'].iloc[0]
         
         # Iterate to calculate HA Open (Recursive dependency)
         # Optimization: Use values array for speed
-        ha_close_values = df['ha_close'].values
-        
         for i in range(1, len(df)):
-            ha_open.append((ha_open[-1] + ha_close_values[i-1]) / 2)
+            ha_open[i] = (ha_open[i-1] + ha_close_values[i-1]) / 2
             
         df['ha_open'] = ha_open
         
@@ -50,80 +57,58 @@ def calculate_indicators(df, params):
 
     # --- INDICATORS (Using Smoothed or Raw) ---
     # ATR (Always use raw for true volatility)
-    atr = ta.atr(df['high'], df['low'], df['close'], length=14)
-    current_atr = atr.iloc[-1] if not atr.empty and not pd.isna(atr.iloc[-1]) else 0.0
+    df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
     
     # RSI
     rsi = ta.rsi(calc_close, length=14)
     df['rsi'] = rsi # Assign to DataFrame for later use
-    rsi_value = rsi.iloc[-1] if not rsi.empty and not pd.isna(rsi.iloc[-1]) else 50.0 # Default to Neutral
-    confirmed_rsi = rsi.iloc[-2] if len(rsi) > 1 and not pd.isna(rsi.iloc[-2]) else rsi_value
     
     # Smoothed RSI (Signal Noise Reduction)
-    rsi_sma = ta.sma(rsi, length=3)
-    rsi_smooth = rsi_sma.iloc[-1] if not rsi_sma.empty and not pd.isna(rsi_sma.iloc[-1]) else rsi_value
+    df['rsi_sma'] = ta.sma(rsi, length=3)
     
     # ADX
     adx = ta.adx(calc_high, calc_low, calc_close, length=14)
     if adx is not None and not adx.empty:
         adx_col = [c for c in adx.columns if c.startswith('ADX')][0]
-        current_adx = adx.iloc[-1][adx_col]
-        prev_adx = adx.iloc[-2][adx_col] if len(adx) > 1 else current_adx
-        
-        if pd.isna(current_adx): current_adx = 0.0
-        if pd.isna(prev_adx): prev_adx = 0.0
+        df['adx'] = adx[adx_col]
     else:
-        current_adx = 0.0
-        prev_adx = 0.0
+        df['adx'] = np.nan
     
     # SuperTrend (Fast)
     st = ta.supertrend(calc_high, calc_low, calc_close, length=10, multiplier=1.5)
     if st is not None and not st.empty:
         st_dir_col = [c for c in st.columns if c.startswith('SUPERTd')][0]
-        current_trend = st.iloc[-1][st_dir_col]
-        confirmed_trend = st.iloc[-2][st_dir_col] if len(st) > 1 else current_trend
-        if pd.isna(current_trend): current_trend = 0
-        if pd.isna(confirmed_trend): confirmed_trend = 0
+        df['st_dir'] = st[st_dir_col]
     else:
-        current_trend = 0
-        confirmed_trend = 0
+        df['st_dir'] = np.nan
     
     # SuperTrend (Slow)
     st_slow = ta.supertrend(calc_high, calc_low, calc_close, length=60, multiplier=3.0)
     if st_slow is not None and not st_slow.empty:
         st_slow_dir_col = [c for c in st_slow.columns if c.startswith('SUPERTd')][0]
-        slow_trend = st_slow.iloc[-1][st_slow_dir_col]
-        confirmed_slow_trend = st_slow.iloc[-2][st_slow_dir_col] if len(st_slow) > 1 else slow_trend
-        if pd.isna(slow_trend): slow_trend = 0
-        if pd.isna(confirmed_slow_trend): confirmed_slow_trend = 0
+        df['st_slow_dir'] = st_slow[st_slow_dir_col]
     else:
-        slow_trend = 0
-        confirmed_slow_trend = 0
+        df['st_slow_dir'] = np.nan
 
     # Bollinger Bands & Squeeze
     bb = ta.bbands(calc_close, length=20, std=2.0)
     if bb is not None and not bb.empty:
         lower_col = [c for c in bb.columns if c.startswith('BBL')][0]
         upper_col = [c for c in bb.columns if c.startswith('BBU')][0]
-        lower_bb = bb.iloc[-1][lower_col]
-        upper_bb = bb.iloc[-1][upper_col]
+        df['bb_lower'] = bb[lower_col]
+        df['bb_upper'] = bb[upper_col]
         
         # Squeeze Metrics
         df['bb_width'] = (bb[upper_col] - bb[lower_col]) / calc_close
         df['bb_w_sma'] = ta.sma(df['bb_width'], length=20)
-        current_width = df.iloc[-1]['bb_width']
-        width_threshold = df.iloc[-1]['bb_w_sma']
     else:
-        lower_bb, upper_bb, current_width, width_threshold = 0.0, 0.0, 0.0, 0.0
+        df['bb_lower'] = df['bb_upper'] = df['bb_width'] = df['bb_w_sma'] = np.nan
     
     # Volume SMA
     df['vol_sma'] = ta.sma(df['volume'], length=20)
-    current_vol = df.iloc[-1]['volume']
-    vol_sma = df.iloc[-1]['vol_sma'] if not pd.isna(df.iloc[-1]['vol_sma']) else current_vol
 
     # EMA 200 (Major Trend Filter)
     df['ema_200'] = ta.ema(calc_close, length=200)
-    ema_200 = df.iloc[-1]['ema_200'] if not pd.isna(df.iloc[-1]['ema_200']) else df.iloc[-1]['close']
 
     # Choppiness Index (CHOP) - Regime Filter
     # 100 * LOG10( SUM(ATR(1), n) / ( MaxHi(n) - MinLo(n) ) ) / LOG10(n)
@@ -144,12 +129,11 @@ def calculate_indicators(df, params):
         # Safety: Avoid log10(0)
         ratio = ratio.replace(0, 0.0000001)
         
-        chop_series = 100 * np.log10(ratio) / np.log10(14)
-        current_chop = chop_series.iloc[-1] if not pd.isna(chop_series.iloc[-1]) else 50.0
+        df['chop'] = 100 * np.log10(ratio) / np.log10(14)
         
     except Exception as e:
         # print(f"CHOP Error: {e}")
-        current_chop = 50.0
+        df['chop'] = np.nan
     
     # Stochastic RSI (Standardized)
     rsi_series = rsi
@@ -168,38 +152,64 @@ def calculate_indicators(df, params):
         stoch = (rsi_series - min_rsi) / denom
         df['stoch_k'] = stoch.rolling(stoch_k_len).mean() * 100
         df['stoch_d'] = df['stoch_k'].rolling(stoch_d_len).mean()
-        
-        stoch_k = df.iloc[-1]['stoch_k'] if not pd.isna(df.iloc[-1]['stoch_k']) else 50.0
-        stoch_d = df.iloc[-1]['stoch_d'] if not pd.isna(df.iloc[-1]['stoch_d']) else 50.0
-        
-        prev_stoch_k = df.iloc[-2]['stoch_k'] if len(df) > 1 and not pd.isna(df.iloc[-2]['stoch_k']) else stoch_k
-        prev_stoch_d = df.iloc[-2]['stoch_d'] if len(df) > 1 and not pd.isna(df.iloc[-2]['stoch_d']) else stoch_d
     else:
-        stoch_k, stoch_d, prev_stoch_k, prev_stoch_d = 50.0, 50.0, 50.0, 50.0
+        df['stoch_k'] = df['stoch_d'] = np.nan
 
     # --- MARKET STRUCTURE & DIVERGENCE UTILS ---
     # Rolling Min/Max for Swing Stop Loss (10 periods)
     df['lowest_10'] = df['low'].rolling(10).min()
     df['highest_10'] = df['high'].rolling(10).max()
     
-    lowest_10 = df.iloc[-1]['lowest_10']
-    highest_10 = df.iloc[-1]['highest_10']
-    
     # RSI Extremes for Divergence Check
     df['rsi_lowest_10'] = df['rsi'].rolling(10).min()
     df['rsi_highest_10'] = df['rsi'].rolling(10).max()
     
-    rsi_lowest_10 = df.iloc[-1]['rsi_lowest_10']
-    rsi_highest_10 = df.iloc[-1]['rsi_highest_10']
+    return df
+
+INDICATOR_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume', 'donchian_high', 'donchian_low', 'atr', 'rsi', 'rsi_sma',
+    'adx', 'st_dir', 'st_slow_dir', 'bb_lower', 'bb_upper', 'bb_width', 'bb_w_sma', 'vol_sma', 'ema_200',
+    'chop', 'stoch_k', 'stoch_d', 'lowest_10', 'highest_10', 'rsi_lowest_10', 'rsi_highest_10'
+]
+
+def indicator_columns(df):
+    """Column name -> float64 numpy array, for fast per-row reads."""
+    return {c: df[c].to_numpy(dtype=np.float64) for c in INDICATOR_COLUMNS}
 
-    # Handle NaNs in scalar returns
-    if pd.isna(lower_bb): lower_bb = 0.0
-    if pd.isna(upper_bb): upper_bb = 0.0
-    if pd.isna(current_width): current_width = 0.0
-    if pd.isna(width_threshold): width_threshold = 0.0
+def _value(x, default):
+    return default if x != x else x # NaN check without pd.isna overhead
+
+def indicators_at(cols, i):
+    """The indicator dictionary for bar `i` (same values/defaults calculate_indicators used)."""
+    has_prev = i > 0
+    
+    current_atr = _value(cols['atr'][i], 0.0)
+    
+    rsi_value = _value(cols['rsi'][i], 50.0) # Default to Neutral
+    confirmed_rsi = _value(cols['rsi'][i-1], rsi_value) if has_prev else rsi_value
+    rsi_smooth = _value(cols['rsi_sma'][i], rsi_value)
+    
+    current_adx = _value(cols['adx'][i], 0.0)
+    prev_adx = _value(cols['adx'][i-1], 0.0) if has_prev else current_adx
+    
+    current_trend = _value(cols['st_dir'][i], 0)
+    confirmed_trend = _value(cols['st_dir'][i-1], 0) if has_prev else current_trend
+    slow_trend = _value(cols['st_slow_dir'][i], 0)
+    confirmed_slow_trend = _value(cols['st_slow_dir'][i-1], 0) if has_prev else slow_trend
+    
+    current_vol = cols['volume'][i]
+    close = cols['close'][i]
+    
+    stoch_k = _value(cols['stoch_k'][i], 50.0)
+    stoch_d = _value(cols['stoch_d'][i], 50.0)
+    prev_stoch_k = _value(cols['stoch_k'][i-1], stoch_k) if has_prev else stoch_k
+    prev_stoch_d = _value(cols['stoch_d'][i-1], stoch_d) if has_prev else stoch_d
 
     return {
-        'current_price': df.iloc[-1]['close'],
+        'current_price': close,
+        'current_open': cols['open'][i],
+        'current_high': cols['high'][i],
+        'current_low': cols['low'][i],
         'current_atr': current_atr,
         'rsi_value': rsi_value,
         'confirmed_rsi': confirmed_rsi,
@@ -208,25 +218,25 @@ def calculate_indicators(df, params):
         'confirmed_trend': confirmed_trend,
         'slow_trend': slow_trend,
         'confirmed_slow_trend': confirmed_slow_trend,
-        'lower_bb': lower_bb,
-        'upper_bb': upper_bb,
-        'current_width': current_width,
-        'width_threshold': width_threshold,
+        'lower_bb': _value(cols['bb_lower'][i], 0.0),
+        'upper_bb': _value(cols['bb_upper'][i], 0.0),
+        'current_width': _value(cols['bb_width'][i], 0.0),
+        'width_threshold': _value(cols['bb_w_sma'][i], 0.0),
         'current_vol': current_vol,
-        'vol_sma': vol_sma,
+        'vol_sma': _value(cols['vol_sma'][i], current_vol),
         'stoch_k': stoch_k,
         'stoch_d': stoch_d,
         'prev_stoch_k': prev_stoch_k,
         'prev_stoch_d': prev_stoch_d,
-        'donchian_high': donchian_high,
-        'donchian_low': donchian_low,
+        'donchian_high': cols['donchian_high'][i-1] if has_prev else np.nan, # Previous candle to avoid lookahead
+        'donchian_low': cols['donchian_low'][i-1] if has_prev else np.nan,
         'prev_adx': prev_adx,
         'confirmed_adx': prev_adx, # Alias for consistency
         'rsi_smooth': rsi_smooth,
-        'ema_200': ema_200,
-        'chop': current_chop,
-        'lowest_10': lowest_10,
-        'highest_10': highest_10,
-        'rsi_lowest_10': rsi_lowest_10,
-        'rsi_highest_10': rsi_highest_10
+        'ema_200': _value(cols['ema_200'][i], close),
+        'chop': _value(cols['chop'][i], 50.0),
+        'lowest_10': cols['lowest_10'][i],
+        'highest_10': cols['highest_10'][i],
+        'rsi_lowest_10': cols['rsi_lowest_10'][i],
+        'rsi_highest_10': cols['rsi_highest_10'][i]
     }
@@ -0,0 +1,181 @@
+import json
+import mmap
+import os
+import struct
+import time
+
+# --- LIVE STATE CHANNEL ---
+# Memory-mapped region shared between the bot (single writer) and the dashboard (readers).
+# A seqlock protects the payload: the writer bumps the sequence to an ODD value before
+# touching the payload and to the next EVEN value when done. Readers retry whenever the
+# sequence is odd or changed while they were copying.
+#
+# Layout (little endian):
+#   0  magic    4s  b'GLSC'
+#   4  version  I
+#   8  seq      Q   (odd = write in progress)
+#   16 length   I   (payload bytes)
+#   20 reserved I
+#   24 payload  JSON (utf-8)
+
+MAGIC = b'GLSC'
+VERSION = 1
+HEADER_SIZE = 24
+DEFAULT_CAPACITY = 4 * 1024 * 1024 # 4MB is plenty for 60 symbols of scan data
+
+_HEADER = struct.Struct('<4sIQII')
+_SEQ = struct.Struct('<Q')
+_LEN = struct.Struct('<I')
+_SEQ_OFFSET = 8
+_LEN_OFFSET = 16
+
+
+class LiveStateWriter:
+    """
+    Publishes the latest bot state into the shared region. Only one writer (the bot) is expected.
+    """
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.seq = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        size = HEADER_SIZE + capacity
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+        # Continue from the previous sequence so readers never see it go backwards
+        magic, version, seq, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic == MAGIC and version == VERSION:
+            self.seq = seq + (seq & 1)
+        _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.seq, 0, 0)
+
+    def publish(self, state):
+        payload = json.dumps(state, default=str).encode('utf-8')
+        if len(payload) > self.capacity:
+            print(f"Live Channel: payload {len(payload)}B exceeds capacity {self.capacity}B. Skipping publish.")
+            return False
+
+        # Begin write (odd)
+        self.seq += 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self.seq)
+
+        self._mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        _LEN.pack_into(self._mm, _LEN_OFFSET, len(payload))
+
+        # End write (even)
+        self.seq += 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self.seq)
+        return True
+
+    def close(self):
+        self._mm.close()
+
+
+class LiveStateReader:
+    """
+    Reads consistent snapshots from the shared region. Cheap to poll: `sequence()` only
+    touches the 8-byte counter, so callers can wait for a change before decoding anything.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+        self._inode = None
+        self.last_seq = -1
+        self.last_state = None
+
+    def _attach(self):
+        # (Re)map when the bot recreated the file or we never mapped it
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._detach()
+            return False
+
+        if self._mm is not None and st.st_ino == self._inode:
+            return True
+
+        self._detach()
+        if st.st_size < HEADER_SIZE:
+            return False
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), st.st_size, access=mmap.ACCESS_READ)
+        self._inode = st.st_ino
+
+        magic, version, _, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._detach()
+            return False
+        return True
+
+    def _detach(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+        self._inode = None
+
+    def sequence(self):
+        """Current published sequence, or -1 if the channel is unavailable."""
+        if not self._attach():
+            return -1
+        return _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0]
+
+    def read(self, retries=100):
+        """
+        Returns (seq, state). `state` is None if the channel is missing or the writer
+        kept us out for `retries` attempts.
+        """
+        if not self._attach():
+            return -1, None
+
+        for _ in range(retries):
+            seq_before = _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0]
+            if seq_before & 1:
+                time.sleep(0.0005) # Writer busy
+                continue
+
+            # Unchanged since last decode: reuse the parsed state
+            if seq_before == self.last_seq:
+                return self.last_seq, self.last_state
+
+            length = _LEN.unpack_from(self._mm, _LEN_OFFSET)[0]
+            payload = self._mm[HEADER_SIZE:HEADER_SIZE + length]
+
+            seq_after = _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0]
+            if seq_after != seq_before:
+                continue # Torn read, try again
+
+            if seq_before == 0 or length == 0:
+                return seq_before, None # Writer attached but never published
+
+            try:
+                state = json.loads(payload)
+            except ValueError:
+                continue
+
+            self.last_seq = seq_before
+            self.last_state = state
+            return seq_before, state
+
+        return self.last_seq, self.last_state
+
+    def wait_for_change(self, last_seq, timeout, poll_interval=0.1):
+        """
+        Blocks until the published sequence differs from `last_seq` or `timeout` seconds pass.
+        Returns True if a new state is available.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            seq = self.sequence()
+            if seq != last_seq and not (seq & 1):
+                return True
+            time.sleep(poll_interval)
+        return False
+
+    def close(self):
+        self._detach()
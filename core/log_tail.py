@@ -0,0 +1,132 @@
+import os
+from collections import deque
+from threading import Lock
+
+# --- LOG LEVELS ---
+# The bot logs with emoji markers instead of levels; map them so the UI can filter.
+LEVEL_MARKERS = {
+    'ERROR': ('❌', '🚨', 'Error', 'ERROR'),
+    'WARN': ('⚠️', '🚫', 'Warning'),
+    'TRADE': ('⚡', 'FILLED', '💰', '🔄 ROTATION', 'ENTRY'),
+}
+LEVELS = ['ERROR', 'WARN', 'TRADE', 'INFO']
+
+def line_level(line):
+    for level, markers in LEVEL_MARKERS.items():
+        if any(m in line for m in markers):
+            return level
+    return 'INFO'
+
+
+class LogTail:
+    """
+    Keeps the last `max_lines` lines of a growing log in memory.
+
+    The first refresh seeks backwards from EOF in blocks until it has enough lines, so a
+    multi-hundred-MB log costs a few reads. Later refreshes only read bytes appended after the
+    cached offset. Rotation (new inode) or truncation (file shorter than the offset) starts over.
+    """
+    def __init__(self, path, max_lines=2000, block_size=64 * 1024):
+        self.path = path
+        self.max_lines = max_lines
+        self.block_size = block_size
+        self.lines = deque(maxlen=max_lines)
+        self.offset = 0
+        self._inode = None
+        self._lock = Lock()
+
+    def _read_backwards(self, f, end):
+        # Collect whole blocks from the end until we've seen max_lines newlines (or hit BOF)
+        blocks = []
+        pos = end
+        newlines = 0
+        while pos > 0 and newlines <= self.max_lines:
+            size = min(self.block_size, pos)
+            pos -= size
+            f.seek(pos)
+            block = f.read(size)
+            newlines += block.count(b'\n')
+            blocks.append(block)
+        data = b''.join(reversed(blocks))
+
+        # Drop the (possibly partial) first line unless we started at BOF
+        if pos > 0:
+            data = data.split(b'\n', 1)[-1]
+        return data
+
+    def refresh(self):
+        """Pulls new lines from disk. Returns the number of lines added."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self.lines.clear()
+                self.offset = 0
+                self._inode = None
+                return 0
+
+            rotated = self._inode is not None and st.st_ino != self._inode
+            if rotated or st.st_size < self.offset:
+                self.lines.clear()
+                self.offset = 0
+                self._inode = None
+
+            if st.st_size == self.offset:
+                return 0
+
+            with open(self.path, 'rb') as f:
+                if self._inode is None:
+                    data = self._read_backwards(f, st.st_size)
+                    start = st.st_size - len(data)
+                else:
+                    f.seek(self.offset)
+                    data = f.read(st.st_size - self.offset)
+                    start = self.offset
+            self._inode = st.st_ino
+
+            # Keep the trailing partial line on disk for the next refresh
+            end = data.rfind(b'\n')
+            if end < 0:
+                self.offset = start
+                return 0
+            self.offset = start + end + 1
+
+            new_lines = data[:end].decode('utf-8', errors='replace').split('\n')
+            self.lines.extend(new_lines)
+            return len(new_lines)
+
+    def tail(self, n=50, contains=None, levels=None):
+        """Last `n` lines (oldest first) matching an optional substring and level filter."""
+        with self._lock:
+            lines = list(self.lines)
+        if contains:
+            needle = contains.lower()
+            lines = [l for l in lines if needle in l.lower()]
+        if levels:
+            lines = [l for l in lines if line_level(l) in levels]
+        return lines[-n:]
+
+    def entries(self, n=50, separator='-----', contains=None):
+        """
+        Groups lines into multi-line entries ending with a `separator` line
+        (strategy_analysis.log format). Returns the last `n` entries, newest first.
+        """
+        with self._lock:
+            lines = list(self.lines)
+
+        entries = []
+        current = []
+        for line in lines:
+            if line.startswith(separator):
+                if current:
+                    entries.append(current)
+                current = []
+            else:
+                current.append(line)
+        if current:
+            entries.append(current)
+
+        if contains:
+            needle = contains.lower()
+            entries = [e for e in entries if needle in e[0].lower()]
+        return list(reversed(entries[-n:]))
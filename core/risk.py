@@ -1,5 +1,6 @@
 from datetime import datetime
 from .config import CIRCUIT_BREAKER_DRAWDOWN
+from . import clock
 
 def check_circuit_breaker(initial_balance, current_balance, high_water_mark):
     """
@@ -27,7 +28,7 @@ def get_risk_cleanup_actions(active_positions, global_sentiment):
     Returns a list of actions (dicts) to close these positions.
     """
     actions = []
-    current_time = datetime.now()
+    current_time = clock.now()
     
     for sym, pos in active_positions.items():
         # 1. WRONG WAY CORRECTOR (Sentiment Mismatch)
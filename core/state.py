@@ -2,7 +2,20 @@ import json
 import os
 import time
 from datetime import datetime
-from .config import STATE_FILE, SESSION_FILE
+from .config import STATE_FILE, SESSION_FILE, LIVE_STATE_FILE
+from .live_channel import LiveStateWriter
+
+_live_writer = None
+
+def publish_state(state):
+    """Pushes the latest state to the shared-memory channel (dashboard fast path)."""
+    global _live_writer
+    try:
+        if _live_writer is None:
+            _live_writer = LiveStateWriter(LIVE_STATE_FILE)
+        _live_writer.publish(state)
+    except Exception as e:
+        print(f"Live Channel Error: {e}")
 
 def load_state():
     if os.path.exists(STATE_FILE):
@@ -21,6 +34,9 @@ def save_state(state):
         os.replace(temp_file, STATE_FILE)
     except Exception as e:
         print(f"State Save Error: {e}")
+    
+    # File above is for crash recovery; the dashboard reads the channel
+    publish_state(state)
 
 def init_session(exchange):
     initial_balance = 0.0
@@ -0,0 +1,178 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .config import METRICS_FILE
+
+# --- LOOP TELEMETRY ---
+# Monotonic timings of each run_bot phase and of every symbol's fetch / analysis, kept in
+# bounded in-memory windows. Quantiles are computed on demand: published with the bot state
+# for the dashboard, and written as Prometheus text to METRICS_FILE each cycle (also served
+# on http://127.0.0.1:METRICS_PORT/metrics when the port is set).
+
+# Phases in loop order (run_live.py laps them); symbol_* aggregate analyze_symbol over all symbols
+PHASES = ['command_check', 'account_sync', 'circuit_breaker', 'risk_cleanup', 'funding_fetch',
+          'scan', 'symbol_fetch', 'symbol_analysis', 'execution', 'adaptation',
+          'state_save', 'history_append', 'cycle']
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 500 # Samples per phase (about the last 500 cycles)
+SYMBOL_WINDOW = 100 # Samples per (symbol, stage)
+PREFIX = 'algobot'
+
+
+class Series:
+    """Sliding window of durations (seconds) plus the all-time count / sum / max."""
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def summary(self):
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        q = np.quantile(values, QUANTILES) if len(values) else np.zeros(len(QUANTILES))
+        return {'count': self.count, 'sum': self.total, 'max': self.max, 'last': self.samples[-1] if self.samples else 0.0,
+                **{f"p{round(p * 100)}": float(v) for p, v in zip(QUANTILES, q)}}
+
+
+_lock = threading.Lock()
+_phases = {}
+_symbols = {} # (symbol, stage) -> Series
+
+def observe(phase, seconds):
+    with _lock:
+        series = _phases.get(phase)
+        if series is None:
+            series = _phases[phase] = Series(WINDOW)
+        series.observe(seconds)
+
+def observe_symbol(symbol, stage, seconds):
+    """One symbol's `stage` ('fetch' / 'analysis'): its own series plus the symbol_<stage> phase."""
+    observe(f"symbol_{stage}", seconds)
+    with _lock:
+        series = _symbols.get((symbol, stage))
+        if series is None:
+            series = _symbols[(symbol, stage)] = Series(SYMBOL_WINDOW)
+        series.observe(seconds)
+
+@contextmanager
+def timed(phase, symbol=None):
+    """Times the block into `phase` (or into the symbol's `phase` stage when a symbol is given)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if symbol is None:
+            observe(phase, elapsed)
+        else:
+            observe_symbol(symbol, phase, elapsed)
+
+
+class Cycle:
+    """
+    Lap timer for one loop iteration: lap(phase) records the time since the previous lap
+    (or the start), so consecutive phases are timed without wrapping each block.
+    """
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        observe(phase, now - self.last)
+        self.last = now
+
+    def finish(self, phase='cycle'):
+        observe(phase, time.perf_counter() - self.start)
+
+
+def snapshot(top=None):
+    """
+    {'phases': {phase: {count, sum, max, last, p50, p95, p99}}, 'symbols': [...]} in seconds.
+    symbols: one row per (symbol, stage), slowest p95 first (`top` rows when given).
+    """
+    with _lock:
+        phases = {name: s.summary() for name, s in _phases.items()}
+        symbols = [{'symbol': sym, 'stage': stage, **s.summary()} for (sym, stage), s in _symbols.items()]
+    order = {name: i for i, name in enumerate(PHASES)}
+    phases = dict(sorted(phases.items(), key=lambda kv: order.get(kv[0], len(order))))
+    symbols.sort(key=lambda r: r['p95'], reverse=True)
+    return {'phases': phases, 'symbols': symbols[:top] if top else symbols}
+
+def reset():
+    with _lock:
+        _phases.clear()
+        _symbols.clear()
+
+
+# --- PROMETHEUS EXPOSITION ---
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+def _summary_lines(name, labels, row):
+    base = ','.join(f'{k}="{_label(v)}"' for k, v in labels.items())
+    lines = [f'{name}{{{base},quantile="{p}"}} {row[f"p{round(p * 100)}"]:.6f}' for p in QUANTILES]
+    lines.append(f'{name}_sum{{{base}}} {row["sum"]:.6f}')
+    lines.append(f'{name}_count{{{base}}} {row["count"]}')
+    return lines
+
+def render_prometheus(report=None):
+    """Text exposition format: phase and per-symbol summaries plus the phases' max."""
+    report = report or snapshot()
+    lines = [f"# HELP {PREFIX}_phase_seconds Duration of each run_bot loop phase.",
+             f"# TYPE {PREFIX}_phase_seconds summary"]
+    for phase, row in report['phases'].items():
+        lines += _summary_lines(f"{PREFIX}_phase_seconds", {'phase': phase}, row)
+    lines += [f"# HELP {PREFIX}_phase_max_seconds Slowest observation of each phase since the bot started.",
+              f"# TYPE {PREFIX}_phase_max_seconds gauge"]
+    lines += [f'{PREFIX}_phase_max_seconds{{phase="{_label(phase)}"}} {row["max"]:.6f}' for phase, row in report['phases'].items()]
+    lines += [f"# HELP {PREFIX}_symbol_seconds Per-symbol candle fetch and analysis time.",
+              f"# TYPE {PREFIX}_symbol_seconds summary"]
+    for row in report['symbols']:
+        lines += _summary_lines(f"{PREFIX}_symbol_seconds", {'symbol': row['symbol'], 'stage': row['stage']}, row)
+    return "\n".join(lines) + "\n"
+
+def write_metrics(path=METRICS_FILE, report=None):
+    """Atomic write of the exposition (for node_exporter's textfile collector or a scraper)."""
+    try:
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(render_prometheus(report))
+        os.replace(temp_file, path)
+    except Exception as e:
+        print(f"Metrics Write Error: {e}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass # Scrapes would flood the bot log
+
+def serve_metrics(port, host='127.0.0.1'):
+    """Serves GET /metrics from a daemon thread (rendered per request). Returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -7,6 +7,12 @@ import time
 import os
 from datetime import datetime
 
+from core.live_channel import LiveStateReader
+from core.log_tail import LogTail, LEVELS
+from core.downsample import RollupSet
+from core.incremental_csv import IncrementalCSV, file_signature, prepare_history, prepare_trades
+from core.analytics import daily_returns, rebuild_from_log, win_rate
+
 # --- PAGE CONFIG ---
 st.set_page_config(
     page_title="Gemini 3.0 Pro Terminal",
@@ -54,6 +60,12 @@ LOG_FILE = "logs/trades_log.csv"
 BOT_OUTPUT_LOG = "logs/bot_output.log"
 STRATEGY_LOG_FILE = "logs/strategy_analysis.log"
 HISTORY_FILE = "logs/balance_history.csv"
+ANALYTICS_FILE = "state/trade_analytics.json"
+TRADE_PAGE_SIZE = 50
+LIVE_STATE_FILE = "state/live_state.mmap"
+CHART_POINTS = 600 # ~1 point per pixel of a half-width chart
+CHART_RANGES = {'1H': pd.Timedelta(hours=1), '6H': pd.Timedelta(hours=6), '24H': pd.Timedelta(days=1), '7D': pd.Timedelta(days=7), '30D': pd.Timedelta(days=30), 'ALL': None}
+STALE_REDRAW_SECONDS = 5 # Max wait for a new bot state before redrawing anyway (keeps latency honest)
 
 # --- HELPER FUNCTIONS ---
 def load_json(filepath):
@@ -65,6 +77,92 @@ def load_json(filepath):
             pass
     return {}
 
+@st.cache_resource
+def get_live_reader():
+    # One mapping per dashboard process, shared across reruns
+    return LiveStateReader(LIVE_STATE_FILE)
+
+def load_live_state():
+    """
+    Returns (seq, state). Reads the bot's shared-memory channel; falls back to the
+    JSON snapshot (seq -1) when the bot has not published yet.
+    """
+    seq, live = get_live_reader().read()
+    if live is not None:
+        return seq, live
+    return -1, load_json(STATE_FILE)
+
+# --- CACHED DATA LAYER ---
+# Readers live across reruns and only parse bytes appended since the previous rerun.
+@st.cache_resource
+def get_history_reader():
+    # Rollups (1m/15m/1h/4h) are maintained as rows arrive, so wide ranges never touch raw data
+    rollups = RollupSet(['balance', 'open_pnl'])
+    return IncrementalCSV(HISTORY_FILE, transform=prepare_history, aggregators=[rollups]), rollups
+
+@st.cache_data(max_entries=32)
+def get_chart_series(signature, range_key, n_points):
+    # Cached per (file signature, time range, point budget). Raw rows are only needed when
+    # the range fits the budget, so the rollups plus the tail cover every range.
+    reader, rollups = get_history_reader()
+    df_tail = reader.tail(n_points * rollups.oversample + 1)
+    if df_tail.empty:
+        return df_tail
+    window = CHART_RANGES.get(range_key)
+    since = None if window is None else df_tail['timestamp'].iloc[-1] - window
+    return rollups.select(df_tail, since, n_points)
+
+@st.cache_resource
+def get_trades_reader():
+    return IncrementalCSV(LOG_FILE, transform=prepare_trades)
+
+@st.cache_data(max_entries=16)
+def trade_page(signature, page, page_size):
+    # Keyed on (path, mtime, size): only the visible page is sliced and rendered
+    reader = get_trades_reader()
+    end = reader.rows - page * page_size
+    df_display = reader.rows_between(end - page_size, end)[['timestamp', 'symbol', 'side', 'price', 'amount', 'pnl', 'reason']]
+    df_display.columns = ['Time', 'Symbol', 'Side', 'Price', 'Size', 'Realized PnL', 'Reason']
+    
+    # Log is append-only, so newest first is a reversal (no sort)
+    return df_display.iloc[::-1]
+
+@st.cache_data(max_entries=2)
+def load_analytics_snapshot(signature):
+    # Aggregates are maintained by the bot (core/analytics.py); reading is O(1) in log size
+    return load_json(ANALYTICS_FILE)
+
+@st.cache_data(max_entries=2)
+def rebuild_analytics_snapshot(signature):
+    # Bot hasn't written the aggregates yet: backfill once per log version
+    return rebuild_from_log(LOG_FILE)
+
+def breakdown_frame(buckets, label):
+    rows = [{
+        label: key,
+        "Closes": b['closes'],
+        "Win Rate": win_rate(b) * 100,
+        "PnL": b['pnl'],
+        "Fees": b['fees'],
+        "Volume": b['volume']
+    } for key, b in buckets.items()]
+    df = pd.DataFrame(rows)
+    return df.sort_values("PnL", ascending=False) if not df.empty else df
+
+@st.cache_resource
+def get_log_tail(path, max_lines):
+    # Tail readers keep their file offset across reruns; only appended bytes are read
+    return LogTail(path, max_lines=max_lines)
+
+def timing_frame(rows, label_cols):
+    # Bot reports seconds; milliseconds read better for per-phase numbers
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    for col in ['p50', 'p95', 'p99', 'max', 'last']:
+        df[col] = df[col] * 1000
+    return df[label_cols + ['p50', 'p95', 'p99', 'max', 'last', 'count']]
+
 def get_status_color(val, threshold_low, threshold_high, inverse=False):
     if inverse:
         if val < threshold_low: return "green"
@@ -80,7 +178,7 @@ with st.sidebar:
     st.title("⚡ Gemini 3.0")
     st.caption("Advanced Algo-Trading System")
     
-    state = load_json(STATE_FILE)
+    state_seq, state = load_live_state()
     last_update = state.get('timestamp', 'N/A')
     
     # System Health
@@ -98,6 +196,10 @@ with st.sidebar:
             st.success(f"🟢 Online ({latency:.1f}s latency)")
     except:
         st.warning("⚪ Initializing...")
+    
+    cycle_timing = state.get('timings', {}).get('phases', {}).get('cycle')
+    if cycle_timing:
+        st.caption(f"⏱️ Cycle p50 {cycle_timing['p50']:.2f}s | p95 {cycle_timing['p95']:.2f}s | p99 {cycle_timing['p99']:.2f}s")
 
     # Controls
     st.divider()
@@ -206,17 +308,11 @@ with tab1:
     
     if os.path.exists(HISTORY_FILE):
         try:
-            df_hist = pd.read_csv(HISTORY_FILE)
-            df_hist['timestamp'] = pd.to_datetime(df_hist['timestamp'], format='mixed', errors='coerce')
+            history_reader, _ = get_history_reader()
+            history_reader.refresh()
             
-            # Ensure numeric columns
-            cols_to_numeric = ['balance', 'open_pnl']
-            for col in cols_to_numeric:
-                if col in df_hist.columns:
-                    df_hist[col] = pd.to_numeric(df_hist[col], errors='coerce')
-            
-            # Drop rows with invalid timestamp or critical data
-            df_hist.dropna(subset=['timestamp', 'balance', 'open_pnl'], inplace=True)
+            chart_range = st.radio("Range", list(CHART_RANGES), index=len(CHART_RANGES) - 1, horizontal=True, key="chart_range")
+            df_hist = get_chart_series(file_signature(HISTORY_FILE), chart_range, CHART_POINTS)
             
             if not df_hist.empty:
                 with c1:
@@ -242,25 +338,19 @@ with tab2:
     st.subheader("Performance Analytics")
     if os.path.exists(LOG_FILE):
         try:
-            df_trades = pd.read_csv(LOG_FILE)
-            # Filter for FILLED trades
-            df_filled = df_trades[df_trades['status'].str.contains('FILLED', na=False)].copy()
-            
-            # Ensure PnL column exists (for backward compatibility)
-            if 'pnl' not in df_filled.columns:
-                df_filled['pnl'] = 0.0
+            analytics = load_analytics_snapshot(file_signature(ANALYTICS_FILE))
+            if not analytics:
+                analytics = rebuild_analytics_snapshot(file_signature(LOG_FILE))
+            totals = analytics.get('totals') if analytics else None
             
-            # Fill NaNs in PnL with 0
-            df_filled['pnl'] = df_filled['pnl'].fillna(0.0)
-            
-            if not df_filled.empty:
-                # --- METRICS ---
-                col_a1, col_a2, col_a3, col_a4 = st.columns(4)
+            if totals and totals['fills'] > 0:
+                # --- METRICS (materialised by the bot) ---
+                col_a1, col_a2, col_a3, col_a4, col_a5, col_a6 = st.columns(6)
                 
-                total_trades = len(df_filled)
-                total_vol = (df_filled['price'] * df_filled['amount']).sum()
+                total_trades = totals['fills']
+                total_vol = totals['volume']
                 avg_size = total_vol / total_trades if total_trades > 0 else 0
-                total_realized_pnl = df_filled['pnl'].sum()
+                total_realized_pnl = totals['pnl']
                 
                 with col_a1:
                     st.metric("Total Trades", total_trades)
@@ -271,21 +361,49 @@ with tab2:
                 with col_a4:
                     st.metric("Realized PnL", f"${total_realized_pnl:,.2f}", 
                               delta=f"{total_realized_pnl:,.2f}", delta_color="normal")
+                with col_a5:
+                    st.metric("Win Rate", f"{win_rate(totals) * 100:.1f}%", f"{totals['closes']} closes", delta_color="off")
+                with col_a6:
+                    st.metric("Fees Paid", f"${totals['fees']:,.2f}")
                 
-                st.divider()
+                # --- BREAKDOWNS ---
+                b1, b2 = st.columns(2)
+                with b1:
+                    st.caption("PnL by Symbol")
+                    st.dataframe(breakdown_frame(analytics['by_symbol'], "Symbol"), use_container_width=True, hide_index=True, height=250)
+                with b2:
+                    st.caption("PnL by Exit/Entry Reason")
+                    st.dataframe(breakdown_frame(analytics['by_reason'], "Reason"), use_container_width=True, hide_index=True, height=250)
                 
-                # --- DETAILED TRADE HISTORY ---
-                st.subheader("Trade History")
+                h1, h2 = st.columns(2)
+                with h1:
+                    st.caption("Holding Time (Closed Trades)")
+                    hist = analytics.get('holding_hist', {})
+                    fig_hold = px.bar(x=list(hist.keys()), y=list(hist.values()), template="plotly_dark")
+                    fig_hold.update_layout(height=220, margin=dict(l=0, r=0, t=0, b=0), xaxis_title=None, yaxis_title=None)
+                    st.plotly_chart(fig_hold, use_container_width=True)
+                with h2:
+                    st.caption("Daily Equity Returns")
+                    rets = daily_returns(analytics)
+                    if rets:
+                        fig_daily = px.bar(x=[d for d, _ in rets], y=[r * 100 for _, r in rets], template="plotly_dark")
+                        fig_daily.update_traces(marker_color=['#4ade80' if r >= 0 else '#f87171' for _, r in rets])
+                        fig_daily.update_layout(height=220, margin=dict(l=0, r=0, t=0, b=0), xaxis_title=None, yaxis_title="%")
+                        st.plotly_chart(fig_daily, use_container_width=True)
+                    else:
+                        st.info("No daily equity yet.")
                 
-                # Format Timestamp
-                df_filled['timestamp'] = pd.to_datetime(df_filled['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+                st.divider()
                 
-                # Select and Rename Columns for Display
-                df_display = df_filled[['timestamp', 'symbol', 'side', 'price', 'amount', 'pnl', 'reason']].copy()
-                df_display.columns = ['Time', 'Symbol', 'Side', 'Price', 'Size', 'Realized PnL', 'Reason']
+                # --- DETAILED TRADE HISTORY (paged, newest first) ---
+                st.subheader("Trade History")
+                trades_reader = get_trades_reader()
+                trades_reader.refresh()
                 
-                # Sort by Time Descending
-                df_display = df_display.sort_values('Time', ascending=False)
+                n_rows = trades_reader.rows
+                n_pages = max(1, -(-n_rows // TRADE_PAGE_SIZE))
+                page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1, key="trade_page")
+                df_display = trade_page(file_signature(LOG_FILE), int(page) - 1, TRADE_PAGE_SIZE)
 
                 st.dataframe(
                     df_display,
@@ -338,11 +456,33 @@ with tab3:
         st.warning("Scanner initializing...")
 
 with tab4:
+    # Loop health: per-phase and per-symbol timings published by the bot (core/telemetry.py)
+    timings = state.get('timings', {})
+    if timings.get('phases'):
+        st.subheader("Loop Timing")
+        ms_format = {c: st.column_config.NumberColumn(c, format="%.1f ms") for c in ['p50', 'p95', 'p99', 'max', 'last']}
+        t_col1, t_col2 = st.columns(2)
+        with t_col1:
+            st.caption("Phases (last 500 cycles)")
+            phase_rows = [{'phase': name, **row} for name, row in timings['phases'].items()]
+            st.dataframe(timing_frame(phase_rows, ['phase']), column_config=ms_format, hide_index=True, use_container_width=True)
+        with t_col2:
+            st.caption("Slowest symbols (p95)")
+            st.dataframe(timing_frame(timings.get('symbols', []), ['symbol', 'stage']), column_config=ms_format, hide_index=True, use_container_width=True)
+        st.divider()
+    
     st.subheader("System Logs")
+    f_col1, f_col2 = st.columns([1, 2])
+    with f_col1:
+        log_filter = st.text_input("Filter (symbol / text)", key="log_filter")
+    with f_col2:
+        log_levels = st.multiselect("Levels", LEVELS, default=LEVELS, key="log_levels")
+    
     if os.path.exists(BOT_OUTPUT_LOG):
-        with open(BOT_OUTPUT_LOG, "r", encoding='utf-8', errors='replace') as f:
-            lines = f.readlines()[-50:]
-            st.code("".join(lines), language="text")
+        bot_tail = get_log_tail(BOT_OUTPUT_LOG, 2000)
+        bot_tail.refresh()
+        lines = bot_tail.tail(50, contains=log_filter, levels=log_levels)
+        st.code("\n".join(lines), language="text")
 
 with tab5:
     st.subheader("Strategy Decision Logic")
@@ -353,18 +493,22 @@ with tab5:
         st.toast("Log Cleared!")
         st.rerun()
         
+    strategy_filter = st.text_input("Filter by Symbol", key="strategy_filter", placeholder="e.g. ETH/USDT")
+        
     if os.path.exists(STRATEGY_LOG_FILE):
-        with open(STRATEGY_LOG_FILE, "r", encoding='utf-8', errors='replace') as f:
-            # Read last 200 lines to avoid huge load
-            lines = f.readlines()[-200:]
-            # Reverse to show newest first
-            lines.reverse() 
-            
-            log_content = "".join(lines)
-            st.text_area("Analysis Log (Newest First)", log_content, height=600)
+        strategy_tail = get_log_tail(STRATEGY_LOG_FILE, 5000)
+        strategy_tail.refresh()
+        
+        # Newest decisions first, whole entries (not reversed lines)
+        entries = strategy_tail.entries(40, contains=strategy_filter)
+        log_content = "\n".join("\n".join(e) + "\n" + "-" * 50 for e in entries)
+        st.text_area("Analysis Log (Newest First)", log_content, height=600)
     else:
         st.info("No strategy analysis logs found yet.")
 
-# Auto-Refresh
-time.sleep(refresh_rate)
+# Auto-Refresh: redraw when the bot publishes a new state (no file polling)
+if state_seq >= 0:
+    get_live_reader().wait_for_change(state_seq, timeout=STALE_REDRAW_SECONDS)
+else:
+    time.sleep(refresh_rate)
 st.rerun()
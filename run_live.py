@@ -7,13 +7,15 @@ from datetime import datetime
 
 from core.config import (
     SYMBOLS, MAX_POSITIONS, LEVERAGE_CAP, COOLDOWN_MINUTES, 
-    COMMAND_FILE, HISTORY_FILE, BOT_OUTPUT_LOG
+    COMMAND_FILE, HISTORY_FILE, BOT_OUTPUT_LOG, METRICS_PORT, LIVE_STRATEGY, MOCK_EXCHANGE
 )
 from core.exchange import get_exchange, setup_markets
 from core.strategy import analyze_symbol, load_strategy_config
 from core.execution import execute_trade_safely, log_trade
 from core.risk import check_circuit_breaker, get_risk_cleanup_actions
 from core.state import load_state, save_state, init_session, merge_state_positions
+from core.analytics import load_analytics, record_equity, recent_performance, flush_analytics
+from core import clock, telemetry
 
 # --- DUAL LOGGING SETUP ---
 _print = print # Store original print function
@@ -41,11 +43,23 @@ def run_bot(snapshot=False):
     print("🚀 LIVE BOT INITIALIZED | Mode: REFACTORED CORE")
     
     exchange = get_exchange()
+    if MOCK_EXCHANGE:
+        # The local stand-in can list extra synthetic pairs (MOCK_SYMBOLS): scan what it serves
+        SYMBOLS[:] = exchange.symbols
     setup_markets(exchange)
     
     # Session & State
     initial_balance = init_session(exchange)
     saved_state = load_state()
+    load_analytics() # Backfills from trades_log.csv on first run
+    
+    # Phase timings: state/metrics.prom every cycle, plus HTTP when a port is configured
+    if METRICS_PORT:
+        try:
+            telemetry.serve_metrics(METRICS_PORT)
+            print(f"   📈 Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"   ⚠️ Metrics Endpoint Error: {e}")
     
     # Local State
     BLACKLIST = set(saved_state.get('blacklist', []))
@@ -54,6 +68,7 @@ def run_bot(snapshot=False):
     last_sync_time = datetime.now()
     global_sentiment = saved_state.get('sentiment', 0.5)
     high_water_mark = saved_state.get('high_water_mark', initial_balance)
+    adx_threshold = saved_state.get('adx_threshold', 20)
     active_positions = saved_state.get('positions', {})
     
     # Simulation Mode (Legacy support, mostly False for live)
@@ -63,6 +78,8 @@ def run_bot(snapshot=False):
     print(f"   Targets: {len(SYMBOLS)} Pairs")
     
     while True:
+        cycle_start = time.time()
+        cycle = telemetry.Cycle() # Monotonic lap timer per phase
         try:
             # --- COMMAND HANDLING ---
             if os.path.exists(COMMAND_FILE):
@@ -88,6 +105,7 @@ def run_bot(snapshot=False):
                         continue
                 except Exception as e:
                     print(f"Command Error: {e}")
+            cycle.lap('command_check')
 
             # --- 1. SYNC ACCOUNT ---
             ACTIVE_SYMBOLS = [s for s in SYMBOLS if s not in BLACKLIST]
@@ -129,7 +147,7 @@ def run_bot(snapshot=False):
                             else:
                                 # Try to recover from saved state to preserve entry_time
                                 saved_pos = saved_state.get('positions', {}).get(matched_sym, {})
-                                recovered_entry_time = saved_pos.get('entry_time', datetime.now().isoformat())
+                                recovered_entry_time = saved_pos.get('entry_time', clock.now().isoformat())
                                 
                                 # New position or Recovered
                                 current_positions_map[matched_sym] = {
@@ -156,9 +174,11 @@ def run_bot(snapshot=False):
             merge_state_positions(active_positions, saved_state)
             
             print(f"   💰 Bal: ${usdt_balance:.2f} | Avail: ${available_balance:.2f} | PnL: ${realized_pnl:.2f} | Pos: {len(active_positions)}")
+            cycle.lap('account_sync')
 
             # --- 2. CIRCUIT BREAKER ---
             is_triggered, drawdown, high_water_mark = check_circuit_breaker(initial_balance, usdt_balance, high_water_mark)
+            cycle.lap('circuit_breaker')
             if is_triggered:
                 print(f"🚨 CIRCUIT BREAKER: Drawdown {drawdown*100:.2f}% > Limit. HALTING & CLOSING ALL.")
                 
@@ -187,7 +207,9 @@ def run_bot(snapshot=False):
                 proposed_actions.append(action)
             
             # B. Market Scan (Entry/Exit Signals)
-            strategy_params = load_strategy_config("Hybrid_Futures_2x_LongShort")
+            strategy_params = load_strategy_config(LIVE_STRATEGY)
+            strategy_params['adx_threshold'] = adx_threshold # Adapted to the recent win rate (section 5)
+            cycle.lap('risk_cleanup')
             
             # Fetch Funding Rates (Smart Money Bias)
             funding_rates = {}
@@ -202,6 +224,7 @@ def run_bot(snapshot=False):
             except Exception as e:
                 # print(f"   ⚠️ Funding Rate Fetch Warning: {e}")
                 pass
+            cycle.lap('funding_fetch')
             
             # Parallel Analysis
             from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -251,6 +274,7 @@ def run_bot(snapshot=False):
                 global_sentiment = bull_count / len(current_trends)
 
             print(f"   ✅ Scan Complete. Found {len(proposed_actions)} signals.")
+            cycle.lap('scan') # Wall time; analyze_symbol records each symbol's fetch / analysis
 
             # --- 4. EXECUTION LOOP ---
             # Sort by score
@@ -278,7 +302,7 @@ def run_bot(snapshot=False):
                         # Better: Just stick to a short cooldown for now, or implement full state tracking later.
                         # Let's use the standard cooldown but reduce it if Score is very high (Hot Hand).
                         
-                        elapsed = (datetime.now() - last_exit).total_seconds() / 60
+                        elapsed = (clock.now() - last_exit).total_seconds() / 60
                         required_cooldown = COOLDOWN_MINUTES
                         
                         if elapsed < required_cooldown:
@@ -321,7 +345,7 @@ def run_bot(snapshot=False):
                                 if 'entry_time' in v_data:
                                     try:
                                         entry_dt = datetime.fromisoformat(v_data['entry_time'])
-                                        age_mins = (datetime.now() - entry_dt).total_seconds() / 60
+                                        age_mins = (clock.now() - entry_dt).total_seconds() / 60
                                         if age_mins > 10: is_old_enough = True
                                         if age_mins > 45 and w_pnl < 0.5: is_stagnant = True
                                     except: is_old_enough = True # Fallback
@@ -370,50 +394,37 @@ def run_bot(snapshot=False):
                     )
                     
                     if is_reduce:
-                        last_exit_times[symbol] = datetime.now()
+                        last_exit_times[symbol] = clock.now()
+            cycle.lap('execution')
 
             # --- 5. SELF-OPTIMIZATION & DASHBOARD ---
-            # Calculate Performance Metrics
-            total_trades = 0
-            wins = 0
-            total_pnl = realized_pnl
-            
-            # Read recent history (last 50 trades)
-            try:
-                if os.path.exists(LOG_FILE):
-                    with open(LOG_FILE, 'r') as f:
-                        reader = list(csv.DictReader(f))
-                        recent_trades = reader[-50:]
-                        total_trades = len(recent_trades)
-                        for t in recent_trades:
-                            pnl = float(t['pnl'])
-                            if pnl > 0: wins += 1
-            except: pass
-            
-            win_rate = (wins / total_trades * 100) if total_trades > 0 else 0.0
+            # Recent closed trades from the in-memory analytics aggregates (no trade-log read)
+            total_trades, win_rate = recent_performance()
+            cycle.lap('adaptation')
             
             # ADAPTIVE LOGIC
             # Default ADX Threshold is 20.
             # If Win Rate is bad (< 40%), we tighten it to 25 or 30 to filter chop.
             # If Win Rate is good (> 60%), we relax it to 15 to catch more moves.
-            
-            current_adx_threshold = 20
+            # The threshold is kept across cycles (and in the state file) and applied to each reloaded config.
+            new_adx_threshold = 20
             if total_trades > 10:
                 if win_rate < 40:
-                    current_adx_threshold = 30
-                    print(f"   ⚠️ Performance Low (WR {win_rate:.1f}%). Tightening ADX Filter to {current_adx_threshold}.")
+                    new_adx_threshold = 30
                 elif win_rate < 50:
-                    current_adx_threshold = 25
-                    print(f"   ⚠️ Performance Mediocre (WR {win_rate:.1f}%). Tightening ADX Filter to {current_adx_threshold}.")
+                    new_adx_threshold = 25
                 elif win_rate > 60:
-                    current_adx_threshold = 15
-                    print(f"   🔥 Performance High (WR {win_rate:.1f}%). Relaxing ADX Filter to {current_adx_threshold}.")
-            
-            # Pass this dynamic threshold to the strategy in the next loop (requires updating strategy.py signature, 
-            # but for now we can inject it via params or just log it. 
-            # To make it effective immediately, we'd need to pass it to analyze_symbol.
-            # Let's update strategy_params in the next iteration)
-            strategy_params['adx_threshold'] = current_adx_threshold
+                    new_adx_threshold = 15
+            if new_adx_threshold != adx_threshold: # Logged on change only
+                if new_adx_threshold == 30:
+                    print(f"   ⚠️ Performance Low (WR {win_rate:.1f}%). Tightening ADX Filter to {new_adx_threshold}.")
+                elif new_adx_threshold == 25:
+                    print(f"   ⚠️ Performance Mediocre (WR {win_rate:.1f}%). Tightening ADX Filter to {new_adx_threshold}.")
+                elif new_adx_threshold == 15:
+                    print(f"   🔥 Performance High (WR {win_rate:.1f}%). Relaxing ADX Filter to {new_adx_threshold}.")
+                else:
+                    print(f"   ℹ️ Performance Neutral (WR {win_rate:.1f}%). ADX Filter back to {new_adx_threshold}.")
+                adx_threshold = new_adx_threshold
 
             # --- 6. SAVE STATE ---
             # Clean up circular reference before saving
@@ -434,8 +445,17 @@ def run_bot(snapshot=False):
                 'blacklist': list(BLACKLIST),
                 'realized_pnl': realized_pnl,
                 'high_water_mark': high_water_mark,
-                'metrics': {'win_rate': win_rate, 'total_trades': total_trades}
+                'adx_threshold': adx_threshold,
+                'metrics': {
+                    'win_rate': win_rate,
+                    'total_trades': total_trades,
+                    'cycle_seconds': time.time() - cycle_start,
+                    'symbols_scanned': len(ACTIVE_SYMBOLS),
+                    'signals': len(proposed_actions)
+                },
+                'timings': telemetry.snapshot(top=10)
             })
+            cycle.lap('state_save')
             
             # History Log
             total_open_pnl = sum(p['pnl'] for p in active_positions.values())
@@ -445,6 +465,13 @@ def run_bot(snapshot=False):
                 if not file_exists:
                     writer.writerow(['timestamp', 'balance', 'open_pnl', 'position_count', 'sentiment', 'realized_pnl'])
                 writer.writerow([datetime.now().isoformat(), usdt_balance, total_open_pnl, len(active_positions), global_sentiment, realized_pnl])
+            
+            # Daily equity for analytics (skip failed syncs)
+            if usdt_balance > 0:
+                record_equity(usdt_balance)
+            cycle.lap('history_append')
+            cycle.finish()
+            telemetry.write_metrics()
 
             if snapshot: break
             time.sleep(2) # Poll Interval (Faster)
@@ -456,6 +483,8 @@ def run_bot(snapshot=False):
             print(f"Main Loop Error: {e}")
             time.sleep(5)
 
+    flush_analytics() # Pending intraday equity closes
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--snapshot', action='store_true')
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.incremental_csv import IncrementalCSV, RunningSums, prepare_trades, prepare_history
+from core.downsample import RollupSet
+
+ROWS = 1_000_000
+APPEND_ROWS = 20 # Roughly one busy bot cycle
+PAGE_SIZE = 50
+CHART_POINTS = 600
+HISTORY_ROWS = 400_000 # ~9 days of 2s balance samples
+
+def make_trade_log(path, rows, start=None):
+    rng = np.random.default_rng(42)
+    start = start or pd.Timestamp('2025-01-01')
+    ts = start + pd.to_timedelta(np.arange(rows) * 2, unit='s')
+    df = pd.DataFrame({
+        'timestamp': ts.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        'symbol': rng.choice(['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT'], rows),
+        'side': rng.choice(['buy', 'sell'], rows),
+        'amount': rng.uniform(0.1, 100, rows),
+        'price': rng.uniform(1, 100, rows),
+        'reason': rng.choice(['ENTRY_TREND_FOLLOW_LONG', 'EXIT_TRAIL_STOP (ROI 1.2%)'], rows),
+        'status': rng.choice(['FILLED', 'FAILED: margin'], rows, p=[0.95, 0.05]),
+        'pnl': rng.normal(0, 5, rows)
+    })
+    header = not os.path.exists(path)
+    df.to_csv(path, mode='a', header=header, index=False)
+
+def full_reload(path):
+    # What dashboard.py did on every 1s rerun before the cached layer
+    df_trades = pd.read_csv(path)
+    df_filled = df_trades[df_trades['status'].str.contains('FILLED', na=False)].copy()
+    df_filled['pnl'] = df_filled['pnl'].fillna(0.0)
+    total_vol = (df_filled['price'] * df_filled['amount']).sum()
+    total_pnl = df_filled['pnl'].sum()
+    df_filled['timestamp'] = pd.to_datetime(df_filled['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    df_display = df_filled[['timestamp', 'symbol', 'side', 'price', 'amount', 'pnl', 'reason']].copy()
+    df_display = df_display.sort_values('timestamp', ascending=False)
+    return total_vol, total_pnl, len(df_display)
+
+def make_history_log(path, rows, start=None):
+    rng = np.random.default_rng(7)
+    start = start or pd.Timestamp('2025-01-01')
+    ts = start + pd.to_timedelta(np.arange(rows) * 2, unit='s')
+    df = pd.DataFrame({
+        'timestamp': ts.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        'balance': 10000 + np.cumsum(rng.normal(0, 1, rows)),
+        'open_pnl': rng.normal(0, 20, rows),
+    })
+    header = not os.path.exists(path)
+    df.to_csv(path, mode='a', header=header, index=False)
+
+def page_from_frame(df, page, page_size):
+    # What dashboard.trade_page sliced before: the fully concatenated frame
+    end = len(df) - page * page_size
+    return df.iloc[max(0, end - page_size):max(end, 0)]
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'trades_log.csv')
+        print(f"Generating synthetic trade log ({rows:,} rows)...")
+        make_trade_log(path, rows)
+        print(f"   Size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+        t_full, _ = timed(full_reload, path)
+        print(f"\nBEFORE  full reload per rerun:        {t_full*1000:9.1f} ms")
+
+        totals = RunningSums(volume=lambda c: (c['price'] * c['amount']).sum(), pnl=lambda c: c['pnl'].sum())
+        reader = IncrementalCSV(path, transform=prepare_trades, aggregators=[totals])
+        t_cold, _ = timed(reader.refresh)
+        print(f"AFTER   first load (cold cache):      {t_cold*1000:9.1f} ms")
+
+        t_idle, _ = timed(reader.refresh)
+        print(f"AFTER   rerun, no new rows:           {t_idle*1000:9.3f} ms")
+
+        make_trade_log(path, APPEND_ROWS, start=pd.Timestamp('2026-01-01'))
+        t_append, _ = timed(reader.refresh)
+        print(f"AFTER   rerun, {APPEND_ROWS} appended rows:      {t_append*1000:9.3f} ms")
+
+        # Sanity: incremental totals match a full recompute
+        vol, pnl, n = full_reload(path)
+        assert n == totals.rows, (n, totals.rows)
+        assert abs(vol - totals['volume']) < 1e-6 * max(1.0, abs(vol))
+        assert abs(pnl - totals['pnl']) < 1e-6 * max(1.0, abs(pnl))
+        print("\n✅ Incremental totals match full recompute.")
+
+        # --- TRADE PAGES FROM THE TAIL ---
+        t_page, page = timed(reader.rows_between, reader.rows - PAGE_SIZE, reader.rows)
+        t_frame, full = timed(lambda: reader.frame)
+        print(f"\nnewest page via rows_between:         {t_page*1000:9.3f} ms  (full frame: {t_frame*1000:.1f} ms)")
+        n_pages = -(-reader.rows // PAGE_SIZE)
+        same = all(reader.rows_between(reader.rows - (p + 1) * PAGE_SIZE, reader.rows - p * PAGE_SIZE).reset_index(drop=True)
+                   .equals(page_from_frame(full, p, PAGE_SIZE).reset_index(drop=True)) for p in (0, 1, n_pages // 2, n_pages - 1, n_pages))
+        assert same, "paged rows differ from the full frame"
+        print("✅ Pages (newest, oldest, past the end) match the full frame.")
+
+        # --- CHART SERIES FROM ROLLUPS + TAIL ---
+        hist_path = os.path.join(tmp, 'balance_history.csv')
+        make_history_log(hist_path, HISTORY_ROWS)
+        rollups = RollupSet(['balance', 'open_pnl'])
+        history = IncrementalCSV(hist_path, transform=prepare_history, aggregators=[rollups])
+        history.refresh()
+        make_history_log(hist_path, APPEND_ROWS, start=pd.Timestamp('2025-01-01') + pd.Timedelta(seconds=2 * HISTORY_ROWS))
+        history.refresh()
+        full = history.frame
+        for label, window in [('1H', pd.Timedelta(hours=1)), ('24H', pd.Timedelta(days=1)), ('ALL', None)]:
+            t_tail, tail = timed(history.tail, CHART_POINTS * rollups.oversample + 1)
+            since = None if window is None else tail['timestamp'].iloc[-1] - window
+            t_sel, series = timed(rollups.select, tail, since, CHART_POINTS)
+            expected = rollups.select(full, since, CHART_POINTS)
+            assert series.reset_index(drop=True).equals(expected.reset_index(drop=True)), label
+            print(f"chart {label:<4} rollups + tail:              {(t_tail + t_sel)*1000:9.3f} ms  ({len(series)} points)")
+        print("✅ Chart series from the tail match the full frame.")
+
+if __name__ == "__main__":
+    main()
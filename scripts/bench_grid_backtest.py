@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+from itertools import product
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.wfo import BacktestEngine, Strategy, score_metrics
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+
+# 54 combinations, same size as the SmartHybrid grid in run_wfo.py
+PARAM_GRID = {
+    'fast': [5, 8, 12],
+    'slow': [21, 34, 55],
+    'band': [0.0, 0.001, 0.002],
+    'long_only': [False, True]
+}
+
+class EMABandStrategy(Strategy):
+    # pandas-only stand-in so the benchmark runs without pandas_ta
+    def generate_signals(self, df):
+        fast = df['close'].ewm(span=self.params['fast'], adjust=False).mean()
+        slow = df['close'].ewm(span=self.params['slow'], adjust=False).mean()
+        spread = (fast - slow) / slow
+        signal = np.where(spread > self.params['band'], 1.0, np.where(spread < -self.params['band'], -1.0, 0.0))
+        if self.params['long_only']:
+            signal = np.maximum(signal, 0.0)
+        return pd.Series(signal, index=df.index)
+
+class FixedSignals(Strategy):
+    def generate_signals(self, df):
+        return pd.Series(self.params, index=df.index)
+
+def legacy_run(engine, df, strategy):
+    # BacktestEngine.run before the grid engine (per-combination DataFrame pipeline)
+    signals = strategy.generate_signals(df.copy())
+    df = df.copy()
+    df['signal'] = signals
+    df['position'] = df['signal'].shift(1).fillna(0)
+    df['pct_change'] = df['close'].pct_change()
+    df['strategy_return'] = df['position'] * df['pct_change'] * engine.leverage
+    df['trade_count'] = df['position'].diff().abs().fillna(0)
+    df['costs'] = df['trade_count'] * (engine.fee + engine.slippage) * engine.leverage
+    df['net_return'] = df['strategy_return'] - df['costs']
+    df['equity'] = engine.initial_capital * (1 + df['net_return']).cumprod()
+    return engine.calculate_metrics(df)
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(DATA_FILE)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df.set_index('timestamp', inplace=True)
+
+    keys, values = zip(*PARAM_GRID.items())
+    combinations = [dict(zip(keys, v)) for v in product(*values)]
+    strategies = [EMABandStrategy(p) for p in combinations]
+    engine = BacktestEngine(leverage=2.0)
+    print(f"{len(combinations)} combinations x {len(df)} bars")
+
+    # Signals are shared so only the engine is timed
+    signal_matrix = np.vstack([np.asarray(s.generate_signals(df.copy(deep=False))) for s in strategies])
+
+    t0 = time.perf_counter()
+    legacy = [legacy_run(engine, df, FixedSignals(row)) for row in signal_matrix]
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    grid = engine.run_grid(df, signal_matrix)
+    t_grid = time.perf_counter() - t0
+
+    for key in ('total_return', 'win_rate', 'max_drawdown'):
+        expected = np.array([m[key] for m in legacy], dtype=np.float64)
+        assert np.allclose(expected, grid[key], rtol=1e-9, atol=1e-12), f"{key} mismatch"
+
+    legacy_scores = score_metrics({k: np.array([m[k] for m in legacy]) for k in ('total_return', 'max_drawdown')})
+    assert int(np.argmax(legacy_scores)) == int(np.argmax(score_metrics(grid))), "best combination mismatch"
+
+    print(f"Legacy loop: {t_legacy * 1000:8.1f} ms")
+    print(f"Grid engine: {t_grid * 1000:8.1f} ms  ({t_legacy / t_grid:.0f}x)")
+    print("✅ Metrics identical")
+
+if __name__ == "__main__":
+    main()
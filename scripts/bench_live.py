@@ -0,0 +1,365 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` / `run_live` are importable when run from scripts/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core import clock
+from core import state as state_module
+from core import analytics as analytics_module
+from core.config import SYMBOLS, MAX_POSITIONS
+
+# Per-cycle hot path of the live bot on recorded candles: calculate_indicators, analyze_symbol
+# (flat / long / short), get_risk_cleanup_actions, save_state, log_trade and one whole
+# run_bot --snapshot cycle against an in-process exchange (no network). Medians are compared
+# with a JSON baseline recorded on the same machine (--save); a benchmark that got slower than
+# its threshold fails the run (exit 1), so a slowdown is caught before it reaches the bot.
+#   python scripts/bench_live.py --save      record the baseline
+#   python scripts/bench_live.py             compare against it
+
+DATA_FILE = os.path.join(ROOT, 'data', 'ETHUSDT_5m.csv')
+STRATEGY = 'Hybrid_Futures_2x_LongShort'
+BASELINE_FILE = os.path.join(ROOT, 'results', 'bench_live_baseline.json')
+BARS = 500 # analyze_symbol's fetch_ohlcv limit
+STEP_MS = 300_000
+TOLERANCE = 0.25 # Allowed median slowdown before a benchmark counts as a regression
+CYCLE_TOLERANCE = 0.40 # run_bot spins a thread pool: noisier
+NOISE_FLOOR_MS = 0.05 # Slowdowns below this are timer noise whatever the ratio
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+# --- FIXTURES ---
+
+def load_windows(symbols, now_ms):
+    """One 500-bar ccxt-style window per symbol, cut at staggered offsets of ETHUSDT_5m and
+    rescaled to a per-symbol price level, re-stamped on the 5m grid ending at now_ms."""
+    df = pd.read_csv(DATA_FILE)
+    values = df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+    ts = now_ms - np.arange(BARS - 1, -1, -1, dtype=np.int64) * STEP_MS
+    windows = {}
+    for k, sym in enumerate(symbols):
+        start = (k * 251) % (len(values) - BARS)
+        block = values[start:start + BARS].copy()
+        block[:, :4] *= 10.0 ** ((k % 7) - 3) # 0.001x .. 1000x the ETH price
+        windows[sym] = [[int(t), *row] for t, row in zip(ts, block.tolist())]
+    return windows
+
+def fixture_positions(windows, count=MAX_POSITIONS, now=None):
+    """Open positions as the bot keeps them: alternating long / short around the last close."""
+    now = now or datetime.now()
+    positions = {}
+    for k, sym in enumerate(list(windows)[:count]):
+        price = windows[sym][-1][4]
+        side = 1 if k % 2 == 0 else -1
+        entry = price * (1 - side * 0.004 * ((k % 5) - 2)) # Some winning, some losing
+        amt = side * round(150.0 / price, 6)
+        positions[sym] = {
+            'amt': amt, 'entry': entry, 'pnl': (price - entry) * amt,
+            'entry_time': (now - timedelta(minutes=20 + 37 * k)).isoformat(),
+            'max_price': max(price, entry) * 1.002, 'min_price': min(price, entry) * 0.998,
+            'tp_count': k % 2, 'dca_count': 0
+        }
+    return positions
+
+
+class FixtureExchange:
+    """In-process stand-in for the ccxt exchange run_bot talks to: serves the recorded windows,
+    a Binance-shaped account with the fixture positions, funding rates and no-op setup calls."""
+    def __init__(self, windows, positions, balance=5000.0):
+        self.windows = windows
+        self.positions = positions
+        self.balance = balance
+        self.has = {'fetchFundingRates': True}
+        self.markets = {}
+        self.markets_by_id = {}
+        self.urls = {'api': {}}
+
+    def load_markets(self):
+        for sym in self.windows:
+            market_id = sym.replace('/', '')
+            self.markets[sym] = {'id': market_id, 'symbol': sym, 'precision': {'amount': 3, 'price': 4},
+                                 'limits': {'amount': {'min': 0.001}}, 'type': 'future', 'contract': True, 'linear': True}
+            self.markets_by_id[market_id] = self.markets[sym]
+        return self.markets
+
+    def request(self, path, *args, **kwargs):
+        return {}
+
+    def fetch_ohlcv(self, symbol, timeframe='5m', since=None, limit=500):
+        return self.windows[symbol][-limit:]
+
+    def fapiPrivateV2GetAccount(self, params=None):
+        rows = [{'symbol': sym.replace('/', ''), 'positionAmt': str(p['amt']), 'entryPrice': str(p['entry']),
+                 'unrealizedProfit': str(p['pnl'])} for sym, p in self.positions.items()]
+        return {'totalWalletBalance': str(self.balance), 'availableBalance': str(self.balance * 0.6), 'positions': rows}
+
+    def fapiPrivateV2GetPositionRisk(self, params=None):
+        return [{'symbol': sym.replace('/', ''), 'positionAmt': str(p['amt'])} for sym, p in self.positions.items()]
+
+    def fetch_positions(self, symbols=None, params={}):
+        return self.fapiPrivateV2GetPositionRisk(params)
+
+    def fetch_funding_rates(self, symbols=None):
+        return {sym: {'symbol': sym, 'fundingRate': 0.0001 * ((k % 5) - 1)} for k, sym in enumerate(symbols or self.windows)}
+
+    def fapiPrivatePostLeverage(self, params=None):
+        return {}
+
+    def fapiPrivatePostPositionSideDual(self, params=None):
+        return {}
+
+    def create_market_order(self, *args, **kwargs):
+        raise RuntimeError("FixtureExchange does not fill orders (snapshot cycles never execute)")
+
+
+# --- TIMING ---
+
+def timed(fn, repeat, number=1, warmup=2):
+    """Seconds per call over `repeat` samples of `number` calls each (after `warmup` calls)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return np.asarray(samples)
+
+def summarize(samples, tolerance):
+    ms = samples * 1000
+    return {'median_ms': round(float(np.median(ms)), 4), 'p95_ms': round(float(np.percentile(ms, 95)), 4),
+            'min_ms': round(float(ms.min()), 4), 'runs': len(ms), 'tolerance': tolerance}
+
+
+# --- BENCHMARKS ---
+
+class SnapshotAbort(Exception):
+    """Raised from run_live's error back-off sleep: a failing snapshot cycle would otherwise retry forever."""
+
+def run_benchmarks(workdir, only=None, scale=1.0):
+    """{name: stats} for each benchmark (ImportErrors skip the ones that need the bot's deps)."""
+    rep = lambda n: max(3, int(n * scale))
+    results = {}
+    wanted = lambda name: not only or any(name.startswith(o) for o in only)
+
+    now = datetime.now().replace(second=0, microsecond=0)
+    now_ms = int(pd.Timestamp(now).value // 1_000_000) // STEP_MS * STEP_MS
+    windows = load_windows(SYMBOLS, now_ms)
+    positions = fixture_positions(windows, now=now)
+    print(f"   Fixtures: {len(windows)} symbols x {BARS} bars, {len(positions)} open positions")
+
+    # Decision code reads the clock: pin it mid-candle so every run takes the same branches
+    clock.set_clock(lambda: now + timedelta(minutes=2, seconds=30))
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    try:
+        # 1. Indicators on one validated 500-bar frame
+        try:
+            from core.data_quality import validate_ohlcv
+            from core.indicators import calculate_indicators
+            from core.strategy import analyze_symbol
+        except ImportError as e:
+            print(f"⏭️ Skipping indicator / analyze_symbol benchmarks: {e}")
+        else:
+            params = strategy_params()
+            frame, _ = validate_ohlcv(windows['BTC/USDT'], '5m', 'BTC/USDT')
+            if wanted('calculate_indicators'):
+                results['calculate_indicators'] = summarize(timed(lambda: calculate_indicators(frame, params), rep(30)), TOLERANCE)
+
+            # 2. analyze_symbol: fetch + validate + indicators + decision, per position state
+            exchange = FixtureExchange(windows, positions)
+            held_long = next(s for s, p in positions.items() if p['amt'] > 0)
+            held_short = next(s for s, p in positions.items() if p['amt'] < 0)
+            flat = next(s for s in windows if s not in positions)
+            cases = {'flat': (flat, {'amt': 0.0, 'entry': 0.0, 'pnl': 0.0}),
+                     'long': (held_long, positions[held_long]), 'short': (held_short, positions[held_short])}
+            for label, (sym, pos) in cases.items():
+                name = f"analyze_symbol_{label}"
+                if not wanted(name):
+                    continue
+                def call(sym=sym, pos=pos):
+                    pos_data = dict(pos, active_positions_count=positions)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        analyze_symbol(sym, exchange, pos_data, 5000.0, 3000.0, False, False, 0.5, set(), params, 0.0001)
+                results[name] = summarize(timed(call, rep(30)), TOLERANCE)
+
+        # 3. Risk cleanup over a full book (µs scale: batched calls per sample)
+        from core.risk import get_risk_cleanup_actions
+        if wanted('get_risk_cleanup_actions'):
+            book = {s: dict(p) for s, p in positions.items()}
+            results['get_risk_cleanup_actions'] = summarize(timed(lambda: get_risk_cleanup_actions(book, 0.5), rep(50), number=200), TOLERANCE)
+
+        # 4. State persistence and trade bookkeeping (relative paths: run inside workdir)
+        with working_dir(workdir):
+            if wanted('save_state'):
+                scan = {s: {'price': w[-1][4], 'trend': 'BULL', 'rsi': 51.2, 'adx': 23.4, 'signal': 'HOLD',
+                            'pos': 'LONG' if s in positions else 'NONE', 'pnl': 1.25} for s, w in windows.items()}
+                state = {'timestamp': now.isoformat(), 'balance': 5000.0, 'available_balance': 3000.0, 'positions': positions,
+                         'market_scan': scan, 'sentiment': 0.5, 'blacklist': [], 'realized_pnl': 12.5, 'high_water_mark': 5100.0,
+                         'metrics': {'win_rate': 55.0, 'total_trades': 50, 'cycle_seconds': 1.2, 'symbols_scanned': len(windows), 'signals': 3}}
+                with quiet:
+                    results['save_state'] = summarize(timed(lambda: state_module.save_state(state), rep(100)), TOLERANCE)
+
+            if wanted('log_trade'):
+                from core.execution import log_trade
+                def fill():
+                    log_trade(now.isoformat(), 'BTC/USDT', 'sell', 0.01, 65000.0, 'TP_1', 'FILLED',
+                              pnl=3.2, fees=0.26, holding_minutes=42, is_close=True)
+                with quiet:
+                    results['log_trade'] = summarize(timed(fill, rep(100)), TOLERANCE)
+
+        # 5. One whole snapshot cycle: init, account sync, scan of every symbol, state save, history
+        if wanted('run_bot_snapshot'):
+            try:
+                import run_live
+            except ImportError as e:
+                print(f"⏭️ Skipping run_bot_snapshot: {e}")
+            else:
+                results['run_bot_snapshot'] = bench_snapshot(run_live, workdir, windows, positions, rep(8))
+    finally:
+        clock.reset_clock()
+    return results
+
+def bench_snapshot(run_live, workdir, windows, positions, repeat):
+    exchange = FixtureExchange(windows, positions)
+    originals = (run_live.get_exchange, run_live.time)
+
+    def abort(seconds):
+        raise SnapshotAbort("run_bot hit its error back-off (see logs/bot_output.log)")
+
+    run_live.get_exchange = lambda: exchange
+    run_live.time = type('FixtureTime', (), {'time': staticmethod(time.time), 'sleep': staticmethod(abort)})
+    try:
+        with working_dir(workdir), contextlib.redirect_stdout(io.StringIO()):
+            samples = timed(lambda: run_live.run_bot(snapshot=True), repeat, warmup=1)
+    finally:
+        run_live.get_exchange, run_live.time = originals
+    return summarize(samples, CYCLE_TOLERANCE)
+
+@contextlib.contextmanager
+def working_dir(path):
+    """chdir for the block (contextlib.chdir needs Python 3.11)."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+
+def strategy_params():
+    """The live strategy config (same file run_bot loads), defaults when it's missing."""
+    from core.strategy import load_strategy_config
+    with working_dir(ROOT):
+        return load_strategy_config(STRATEGY)
+
+def make_workdir(tmp):
+    """logs/, state/ and the live strategy config: the layout the bot's relative paths expect."""
+    for sub in ('logs', 'state', os.path.join('config', 'strategies')):
+        os.makedirs(os.path.join(tmp, sub), exist_ok=True)
+    src = os.path.join(ROOT, 'config', 'strategies', f"{STRATEGY}_config.txt")
+    if os.path.exists(src):
+        with open(src) as f, open(os.path.join(tmp, 'config', 'strategies', f"{STRATEGY}_config.txt"), 'w') as out:
+            out.write(f.read())
+    return tmp
+
+
+# --- BASELINES ---
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': f"{platform.node()} {platform.machine()}", 'cpus': os.cpu_count(), 'commit': commit}
+
+def compare(results, baseline, tolerance=None):
+    """Prints the comparison table; returns the names of the regressed benchmarks."""
+    regressed = []
+    print(f"\n{'benchmark':<26} {'baseline':>10} {'now':>10} {'change':>8}  p95")
+    for name, now in results.items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            print(f"{name:<26} {'-':>10} {now['median_ms']:>8.3f}ms {'new':>8}  {now['p95_ms']:.3f}ms")
+            continue
+        limit = tolerance if tolerance is not None else base.get('tolerance', TOLERANCE)
+        change = now['median_ms'] / base['median_ms'] - 1 if base['median_ms'] > 0 else 0.0
+        slower = change > limit and now['median_ms'] - base['median_ms'] > NOISE_FLOOR_MS
+        if slower:
+            regressed.append(name)
+        print(f"{name:<26} {base['median_ms']:>8.3f}ms {now['median_ms']:>8.3f}ms {change:>+8.1%}  {now['p95_ms']:.3f}ms"
+              f"{'  ❌ > +' + format(limit, '.0%') if slower else ''}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Live hot-path benchmarks against a JSON baseline")
+    parser.add_argument('--save', action='store_true', help="Record the results as the baseline")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=None, help="Override every benchmark's allowed slowdown (0.25 = +25%%)")
+    parser.add_argument('--only', nargs='*', default=None, metavar='NAME', help="Benchmarks whose name starts with NAME")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier on the number of samples")
+    args = parser.parse_args()
+
+    state_writer, analytics = state_module._live_writer, analytics_module._analytics
+    with tempfile.TemporaryDirectory() as tmp:
+        # Fresh channel / analytics cache so nothing is written next to the real bot's files
+        state_module._live_writer, analytics_module._analytics = None, None
+        try:
+            # analyze_symbol appends its decision log relative to the cwd as well
+            with working_dir(tmp):
+                results = run_benchmarks(make_workdir(tmp), args.only, args.scale)
+        finally:
+            if state_module._live_writer is not None:
+                state_module._live_writer.close()
+            state_module._live_writer, analytics_module._analytics = state_writer, analytics
+    if not results:
+        print("❌ No benchmark ran")
+        sys.exit(1)
+
+    if args.save:
+        baseline = {'created': datetime.now().isoformat(timespec='seconds'), 'environment': environment(), 'benchmarks': results}
+        if os.path.exists(args.baseline) and args.only:
+            with open(args.baseline) as f:
+                previous = json.load(f)
+            baseline['benchmarks'] = {**previous.get('benchmarks', {}), **results}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        for name, r in results.items():
+            print(f"   {name:<26} median {r['median_ms']:.3f}ms  p95 {r['p95_ms']:.3f}ms  min {r['min_ms']:.3f}ms")
+        print(f"💾 Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        for name, r in results.items():
+            print(f"   {name:<26} median {r['median_ms']:.3f}ms  p95 {r['p95_ms']:.3f}ms  min {r['min_ms']:.3f}ms")
+        print(f"⚠️ No baseline at {args.baseline}: run with --save to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    env, base_env = environment(), baseline.get('environment', {})
+    drift = [k for k in ('python', 'numpy', 'pandas', 'machine') if base_env.get(k) != env[k]]
+    if drift:
+        print(f"⚠️ Baseline recorded with a different {', '.join(drift)} ({base_env.get('commit', '?')}, {baseline.get('created', '?')})")
+    regressed = compare(results, baseline, args.tolerance)
+    ok = check(f"{len(results) - len(regressed)}/{len(results)} benchmarks within their thresholds", not regressed)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
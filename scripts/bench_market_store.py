@@ -0,0 +1,166 @@
+import os
+import sys
+import glob
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tools.market_store import MarketStore, COLUMNS, CSV_NAME
+
+# Market store vs CSV: round-trip of every data/*.csv, append / overlap merge, readers keeping
+# their snapshot across writes, load time for years of 1m bars (read_csv + to_datetime vs
+# memory-mapped columns), append cost against dataset size, a second process reading the same
+# mapping, and a WFO run on the store matching the CSV run. Uses a temporary root so data/store
+# is left alone.
+
+YEARS_1M = 3
+
+def synthetic_1m(years, seed=11):
+    n = int(years * 365 * 24 * 60)
+    rng = np.random.default_rng(seed)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.0007, n)))
+    spread = np.abs(rng.normal(0, 0.0005, n)) * close
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2022-01-01', periods=n, freq='1min'),
+        'open': np.roll(close, 1), 'high': close + spread, 'low': close - spread,
+        'close': close, 'volume': rng.uniform(1, 500, n)
+    })
+
+def _worker_load(root, symbol, timeframe):
+    arrays, frame = MarketStore(root).columnar(symbol, timeframe)
+    return len(frame), float(arrays['close'].sum()), bool(arrays['close'].flags.writeable)
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def main():
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketStore(os.path.join(tmp, 'store'))
+
+        # 1. Every data/*.csv round-trips exactly
+        for path in sorted(glob.glob('data/*.csv')):
+            if CSV_NAME.match(os.path.basename(path)) is None:
+                continue
+            store.import_csv(path)
+            raw = pd.read_csv(path)
+            frame = store.load(*store.dataset_for_csv(path))
+            expected = pd.DatetimeIndex(pd.to_datetime(raw['timestamp'])).as_unit('ns').asi8
+            same = np.array_equal(frame.index.asi8, np.sort(expected)) and all(
+                np.array_equal(frame[c].to_numpy(), raw.sort_values('timestamp')[c].to_numpy(dtype=np.float64)) for c in COLUMNS)
+            ok &= check(f"{path}: {len(frame):,} rows round-trip", same)
+        print(store.datasets()[['symbol', 'timeframe', 'rows', 'start', 'end']].to_string(index=False))
+
+        # 2. Append: new bars added, overlapping bars replaced, order kept
+        df = synthetic_1m(0.01)
+        store.write('TEST/USDT', '1m', df.iloc[:3000])
+        patch = df.iloc[2500:4000].copy()
+        patch['close'] += 1.0
+        store.append('TEST/USDT', '1m', patch)
+        merged = store.load('TEST/USDT', '1m')
+        expected = np.concatenate([df['close'].to_numpy()[:2500], patch['close'].to_numpy()])
+        ok &= check("append merges overlap (last write wins) and extends the range",
+                    len(merged) == 4000 and np.array_equal(merged['close'].to_numpy(), expected) and merged.index.is_monotonic_increasing)
+
+        # 2b. Versions: tail appends go in place, replaced bars publish a new version; a reader
+        # holding the old frame keeps its rows either way, and only two versions stay on disk
+        before = store.load('TEST/USDT', '1m')
+        snapshot = before['close'].to_numpy().copy()
+        version = store.info('TEST/USDT', '1m')['version']
+        store.append('TEST/USDT', '1m', pd.concat([patch.iloc[-1:], df.iloc[4000:4090]])) # Re-sends the unchanged last bar
+        in_place = store.info('TEST/USDT', '1m')['version'] == version and store.info('TEST/USDT', '1m')['rows'] == 4090
+        replaced = df.iloc[4089:4600].copy()
+        replaced['close'] += 1.0
+        store.append('TEST/USDT', '1m', replaced)
+        store.write('TEST/USDT', '1m', df)
+        versions = sorted(os.listdir(os.path.join(store.root, 'TESTUSDT', '1m')))
+        ok &= check(f"tail append kept v{version}, bar replacement + rewrite moved to {versions[-1]}; "
+                    f"the old reader's {len(before):,} rows are unchanged (on disk: {', '.join(versions)})",
+                    in_place and np.array_equal(before['close'].to_numpy(), snapshot) and len(versions) == 2 and
+                    np.array_equal(store.load('TEST/USDT', '1m')['close'].to_numpy(), df['close'].to_numpy()))
+
+        # 3. Load time for years of 1m data
+        big = synthetic_1m(YEARS_1M)
+        csv_path = os.path.join(tmp, 'ETHUSDT_1m.csv')
+        t0 = time.perf_counter()
+        big.to_csv(csv_path, index=False)
+        store.import_csv(csv_path)
+        print(f"\n📦 {len(big):,} 1m bars ({YEARS_1M} years): CSV + import written in {time.perf_counter() - t0:.1f}s")
+        del big
+
+        t0 = time.perf_counter()
+        raw = pd.read_csv(csv_path)
+        raw = raw.set_index(pd.DatetimeIndex(pd.to_datetime(raw['timestamp']), name='timestamp')).drop(columns='timestamp')
+        t_csv = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        arrays, frame = store.columnar('ETHUSDT', '1m')
+        t_store = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        window = store.load('ETHUSDT', '1m', start='2023-03-01', end='2023-03-31 23:59')
+        t_window = time.perf_counter() - t0
+        print(f"   read_csv + to_datetime {t_csv * 1000:,.0f} ms | store load {t_store * 1000:.2f} ms "
+              f"({t_csv / t_store:,.0f}x) | one-month slice {t_window * 1000:.2f} ms ({len(window):,} rows)")
+        ok &= check("store frame matches the CSV frame", np.array_equal(frame['close'].to_numpy(), raw['close'].to_numpy()) and
+                    np.array_equal(frame.index.asi8, raw.index.as_unit('ns').asi8))
+        ok &= check("columns are read-only memory maps", isinstance(arrays['close'].base, np.memmap) or
+                    not arrays['close'].flags.writeable)
+        ok &= check("frame columns are views of the mapping (no copy)", np.shares_memory(frame['close'].to_numpy(), arrays['close']))
+        del raw
+
+        # 4. Another process maps the same files (page cache shared, nothing pickled but the key)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            t0 = time.perf_counter()
+            rows, total, writeable = pool.submit(_worker_load, store.root, 'ETHUSDT', '1m').result()
+            t_proc = time.perf_counter() - t0
+        ok &= check(f"worker process loads the same {rows:,} bars read-only ({t_proc * 1000:.0f} ms incl. process start)",
+                    rows == len(frame) and total == float(arrays['close'].sum()) and not writeable)
+
+        # 4b. Append cost doesn't grow with the dataset: 1,000 new bars onto the years of 1m bars vs onto 10,000
+        store.write('SMALL/USDT', '1m', synthetic_1m(0.02).iloc[:10_000])
+        block = synthetic_1m(0.01).iloc[:1000]
+
+        def append_ms(symbol, repeats=20):
+            last = store.info(symbol, '1m')['rows']
+            start = pd.Timestamp(store.info(symbol, '1m')['end']) + pd.Timedelta(minutes=1)
+            times = []
+            for k in range(repeats):
+                block['timestamp'] = pd.date_range(start + pd.Timedelta(minutes=1000 * k), periods=len(block), freq='1min')
+                t0 = time.perf_counter()
+                store.append(symbol, '1m', block)
+                times.append(time.perf_counter() - t0)
+            return np.median(times) * 1000, store.info(symbol, '1m')['rows'] - last
+        small_ms, small_added = append_ms('SMALL/USDT')
+        big_ms, big_added = append_ms('ETHUSDT')
+        print(f"   append 1,000 bars: {small_ms:.2f} ms onto 10,000 rows, {big_ms:.2f} ms onto {len(frame):,} rows")
+        ok &= check("append cost is flat in the dataset size (within 5x over 150x the rows)",
+                    small_added == big_added == 20_000 and big_ms < 5 * small_ms)
+
+        # 5. WFO over the store matches WFO over the CSV
+        data_file = 'data/ETHUSDT_5m.csv'
+        if os.path.exists(data_file):
+            from tools.wfo import WFOOptimizer
+            from bench_parallel_wfo import EMABandStrategy, PARAM_GRID, same_results
+            t0 = time.perf_counter()
+            from_csv = WFOOptimizer(data_file, train_window_days=20, test_window_days=5, market_store=MarketStore(os.path.join(tmp, 'empty')))
+            t_csv = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            from_store = WFOOptimizer(data_file, train_window_days=20, test_window_days=5, market_store=store)
+            t_store = time.perf_counter() - t0
+            print(f"\n   WFOOptimizer init: CSV {t_csv * 1000:.0f} ms, store {t_store * 1000:.1f} ms")
+            a = from_csv.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0)
+            b = from_store.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0)
+            ok &= check("WFO results identical from CSV and store", same_results(a, b))
+
+    print("\n✅ Market store checks passed" if ok else "\n❌ Market store checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
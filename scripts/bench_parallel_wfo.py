@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.wfo import Strategy, WFOOptimizer
+from tools.parallel_wfo import ParallelWFO
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+
+# Same windows as run_wfo.py, 54 combinations like the SmartHybrid grid
+PARAM_GRID = {
+    'fast': [5, 8, 12],
+    'slow': [21, 34, 55],
+    'band': [0.0, 0.001, 0.002],
+    'long_only': [False, True]
+}
+
+class EMABandStrategy(Strategy):
+    # pandas-only stand-in so the benchmark runs without pandas_ta
+    def generate_signals(self, df):
+        fast = df['close'].ewm(span=self.params['fast'], adjust=False).mean()
+        slow = df['close'].ewm(span=self.params['slow'], adjust=False).mean()
+        spread = (fast - slow) / slow
+        signal = np.where(spread > self.params['band'], 1.0, np.where(spread < -self.params['band'], -1.0, 0.0))
+        if self.params['long_only']:
+            signal = np.maximum(signal, 0.0)
+        return pd.Series(signal, index=df.index)
+
+def same_results(a, b):
+    if len(a) != len(b):
+        return False
+    for ra, rb in zip(a, b):
+        if ra['params'] != rb['params'] or ra['period_start'] != rb['period_start']:
+            return False
+        for key in ('return', 'drawdown', 'bnh_return'):
+            if ra[key] != rb[key]:
+                return False
+    return True
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    optimizer = WFOOptimizer(DATA_FILE, train_window_days=20, test_window_days=5)
+    max_workers = os.cpu_count() or 1
+    core_counts = sorted({1, 2, 4, 8, max_workers} & set(range(1, max_workers + 1)))
+
+    t0 = time.perf_counter()
+    serial = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0)
+    t_serial = time.perf_counter() - t0
+    print(f"\nSerial: {t_serial:.2f}s ({len(serial)} windows)")
+
+    print(f"\n{'Workers':>8} {'Wall (s)':>10} {'Speedup':>8}  Identical")
+    for workers in core_counts:
+        # Pool + shared block setup is included: that's what run_wfo.py pays once
+        t0 = time.perf_counter()
+        with ParallelWFO(optimizer, workers=workers) as executor:
+            parallel = executor.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0)
+        wall = time.perf_counter() - t0
+        print(f"{workers:>8} {wall:>10.2f} {t_serial / wall:>7.2f}x  {'✅' if same_results(serial, parallel) else '❌'}")
+
+if __name__ == "__main__":
+    main()
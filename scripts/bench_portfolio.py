@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.portfolio import build_panel, PortfolioSimulator, sweep
+
+# Portfolio simulator on a synthetic universe: 60 symbols x 1 year of 5m bars with a shared
+# market factor, a sweep of RISK_PER_TRADE x LEVERAGE_CAP, and the cross-symbol caps checked
+# against the trade log. The circuit breaker is off so every run covers the full year.
+
+N_SYMBOLS = 60
+DAYS = 365
+
+def synthetic_universe(n_symbols, days):
+    n = days * 24 * 12
+    rng = np.random.default_rng(7)
+    market = rng.normal(0, 0.0008, n)
+    idx = pd.date_range('2024-01-01', periods=n, freq='5min')
+    candles = {}
+    for k in range(n_symbols):
+        beta = rng.uniform(0.5, 1.5)
+        # Trending regimes so the trend-follow entry actually fires
+        drift = np.repeat(rng.normal(0, 0.00005, n // 2000 + 1), 2000)[:n]
+        ret = beta * market + drift + rng.normal(0, 0.0012, n)
+        close = rng.uniform(1, 500) * np.exp(np.cumsum(ret))
+        spread = np.abs(rng.normal(0, 0.004, n)) * close
+        start = int(rng.integers(0, n // 10)) # Listings start at different times
+        candles[f"SYM{k:02d}/USDT"] = pd.DataFrame({
+            'timestamp': idx[start:], 'open': close[start:], 'high': close[start:] + spread[start:],
+            'low': close[start:] - spread[start:], 'close': close[start:], 'volume': rng.uniform(1, 100, n - start)
+        })
+    return candles
+
+def check_caps(summary, sim):
+    """Open-position counts by side after every fill never exceed the caps."""
+    log = summary['trade_log']
+    held = {}
+    worst = worst_long = worst_short = 0
+    for row in log.itertuples():
+        if row.is_close:
+            held.pop(row.symbol, None)
+        else:
+            held[row.symbol] = row.side
+        worst = max(worst, len(held))
+        worst_long = max(worst_long, sum(1 for s in held.values() if s == 'buy'))
+        worst_short = max(worst_short, sum(1 for s in held.values() if s == 'sell'))
+    ok = worst <= sim.max_positions and worst_long <= sim.max_side_positions and worst_short <= sim.max_side_positions
+    print(f"{'✅' if ok else '❌'} Max open {worst} (cap {sim.max_positions}), longs {worst_long}, shorts {worst_short} (cap {sim.max_side_positions})")
+    return ok
+
+def main():
+    candles = synthetic_universe(N_SYMBOLS, DAYS)
+    t0 = time.perf_counter()
+    panel = build_panel(candles)
+    print(f"📊 Panel: {panel['close'].shape[0]:,} bars x {len(panel['symbols'])} symbols built in {time.perf_counter() - t0:.1f}s\n")
+
+    sim = PortfolioSimulator(panel, circuit_breaker=1.0)
+    summary = sim.run()
+    rate = summary['bars'] / summary['seconds']
+    print(f"Single run: {summary['trades']} trades, return {summary['total_return']:.2%}, "
+          f"max DD {summary['max_drawdown']:.2%}, {summary['seconds']:.1f}s ({rate:,.0f} symbol-bars/s)")
+    ok = check_caps(summary, sim)
+
+    grid = {'risk_per_trade': [0.01, 0.025, 0.04], 'leverage_cap': [5, 12, 20]}
+    t0 = time.perf_counter()
+    results = sweep(panel, grid, circuit_breaker=1.0)
+    wall = time.perf_counter() - t0
+    print(f"\nSweep of {len(results)} settings in {wall:.1f}s ({wall / len(results):.1f}s per run)")
+    print(results.to_string(index=False, formatters={'total_return': '{:.2%}'.format, 'max_drawdown': '{:.2%}'.format,
+                                                     'win_rate': '{:.1%}'.format, 'fees': '{:,.2f}'.format, 'seconds': '{:.1f}'.format}))
+
+    # Same settings, same panel -> same result
+    again = PortfolioSimulator(panel, circuit_breaker=1.0).run()
+    same = again['final_equity'] == summary['final_equity'] and again['trades'] == summary['trades']
+    print(f"\n{'✅' if same else '❌'} Deterministic rerun")
+    sys.exit(0 if ok and same else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.wfo import WFOOptimizer
+from tools.parallel_wfo import ParallelWFO
+from tools.search import GridSearch, RandomSearch, SuccessiveHalving, TPESearch, SearchSpace, search_window
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+
+# Bigger than the run_wfo.py grids: 7 * 7 * 5 * 2 = 490 combinations per window
+PARAM_GRID = {
+    'fast': [3, 5, 8, 12, 16, 21, 26],
+    'slow': [30, 40, 55, 75, 100, 150, 200],
+    'band': [0.0, 0.0005, 0.001, 0.002, 0.004],
+    'long_only': [False, True]
+}
+BUDGET = 60
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bench_parallel_wfo import EMABandStrategy, same_results
+
+def summarize(results):
+    df = pd.DataFrame(results)
+    return (1 + df['return']).prod() - 1, df['drawdown'].mean()
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    optimizer = WFOOptimizer(DATA_FILE, train_window_days=20, test_window_days=5)
+    print(f"Search space: {SearchSpace(PARAM_GRID).size} combinations, budget {BUDGET} evaluations per window\n")
+
+    searches = [
+        ('Grid (exhaustive)', None),
+        ('Random', RandomSearch(budget=BUDGET)),
+        ('SuccessiveHalving', SuccessiveHalving(budget=BUDGET)),
+        ('TPE', TPESearch(budget=BUDGET))
+    ]
+
+    rows = []
+    for label, search in searches:
+        t0 = time.perf_counter()
+        results = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, search=search)
+        wall = time.perf_counter() - t0
+        total, avg_dd = summarize(results)
+        rows.append((label, wall, total, avg_dd))
+
+    print(f"\n{'Search':<20} {'Wall (s)':>9} {'OOS return':>11} {'Avg DD':>8}")
+    for label, wall, total, avg_dd in rows:
+        print(f"{label:<20} {wall:>9.2f} {total:>11.2%} {avg_dd:>8.2%}")
+
+    # Consistency checks: GridSearch == default grid, parallel == serial for a seeded search
+    small = {k: v[:3] for k, v in PARAM_GRID.items()}
+    default = optimizer.optimize(EMABandStrategy, small, leverage=2.0)
+    via_search = optimizer.optimize(EMABandStrategy, small, leverage=2.0, search=GridSearch())
+    print(f"\nGridSearch matches default grid: {'✅' if same_results(default, via_search) else '❌'}")
+
+    tpe = TPESearch(budget=BUDGET, seed=3)
+    serial = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, search=tpe)
+    with ParallelWFO(optimizer, workers=2) as executor:
+        parallel = executor.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, search=tpe)
+    print(f"Parallel TPE matches serial: {'✅' if same_results(serial, parallel) else '❌'}")
+
+    # Budgets too small to reach the full window still pick a fully scored config
+    _, _, train_slice, _ = optimizer.windows()[0]
+    for search in (RandomSearch(budget=1), SuccessiveHalving(budget=0.5), TPESearch(budget=1)):
+        best, info = search_window(optimizer.df.iloc[train_slice], EMABandStrategy, PARAM_GRID, search, leverage=2.0)
+        ok = isinstance(best, dict) and info['full_evaluations'] >= 1
+        print(f"{search.name} with budget {search.budget} returns a fully scored config: {'✅' if ok else '❌'} ({info['evaluations']} backtests)")
+
+if __name__ == "__main__":
+    main()
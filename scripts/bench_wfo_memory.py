@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tools.wfo as wfo
+from tools.wfo import WFOOptimizer, score_combinations
+from bench_parallel_wfo import EMABandStrategy, PARAM_GRID
+
+# Peak memory of the WFO data path on a synthetic multi-year 1m series:
+# window slicing (should allocate nothing) and a full grid score with and without row blocking.
+
+YEARS = 2
+
+def synthetic_1m(years):
+    n = years * 365 * 24 * 60
+    rng = np.random.default_rng(11)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.0006, n)))
+    spread = np.abs(rng.normal(0, 0.0005, n)) * close
+    idx = pd.date_range('2023-01-01', periods=n, freq='1min', name='timestamp')
+    return pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread,
+                         'close': close, 'volume': rng.uniform(1, 100, n)}, index=idx)
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 1e6, wall
+
+def main():
+    raw = synthetic_1m(YEARS)
+    optimizer = WFOOptimizer(raw, train_window_days=90, test_window_days=30)
+    del raw
+    data_mb = sum(a.nbytes for a in optimizer.arrays.values()) / 1e6
+    windows = optimizer.windows()
+    combos = wfo.param_combinations(PARAM_GRID)
+    print(f"📊 {len(optimizer.df):,} bars ({data_mb:.0f} MB of columns), {len(windows)} windows, {len(combos)} combinations\n")
+
+    # Slicing every window: views only
+    _, peak, wall = measure(lambda: [(optimizer.df.iloc[tr], optimizer.df.iloc[te]) for _, _, tr, te in windows])
+    print(f"{'Slice all windows':<32} peak {peak:8.1f} MB  {wall:6.2f}s")
+
+    full = optimizer.df
+    default_block = wfo.GRID_BLOCK_BYTES
+    rows = {}
+    for label, block_bytes in (('Grid, unblocked (before)', 1 << 62), ('Grid, blocked (default)', default_block)):
+        wfo.GRID_BLOCK_BYTES = block_bytes
+        scores, peak, wall = measure(lambda: score_combinations(full, EMABandStrategy, combos, 2.0))
+        rows[label] = scores
+        print(f"{label:<32} peak {peak:8.1f} MB  {wall:6.2f}s")
+    wfo.GRID_BLOCK_BYTES = default_block
+
+    a, b = rows.values()
+    print(f"\nScores identical: {'✅' if np.array_equal(a, b) else '❌'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` / `tools` are importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.data_quality import scan, validate_ohlcv, issues, COLUMNS
+from tools.market_store import MarketStore
+from tools.data_downloader import Downloader
+
+# Data-quality stage on ETHUSDT_5m with known corruption injected: duplicated (overlapping)
+# pages, deleted candles, a zero-volume stretch, wick and close bad ticks. Checks the counts
+# reported, each spike / gap policy, the frame layouts the downloader and the live path use,
+# and a download through a source that serves the corrupted series.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+STEP = 300_000 # 5m in ms
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def as_rows(df):
+    return [[int(t), *bar] for t, *bar in df.itertuples(index=False)]
+
+def corrupt(df, seed=7):
+    """ccxt-style rows with known defects. Returns (rows, expected counts, spike positions in the clean frame)."""
+    rng = np.random.default_rng(seed)
+    rows = df.copy()
+    n = len(rows)
+    wick = rng.choice(np.arange(100, n // 2), 5, replace=False)
+    rows.loc[wick, 'high'] = rows.loc[wick, ['open', 'close']].max(axis=1) * 2.5
+    spike = rng.choice(np.arange(n // 2, n - 100), 3, replace=False)
+    rows.loc[spike, 'close'] = rows.loc[spike, 'close'] * 1.4
+    rows.loc[spike, 'high'] = rows.loc[spike, 'close']
+    rows.loc[2000:2029, 'volume'] = 0.0
+    deleted = np.r_[3000:3012, 9000:9003]
+    kept = rows.drop(index=deleted)
+    overlap = kept.iloc[5000:5040] # A page fetched twice
+    corrupted = pd.concat([kept, overlap]).sample(frac=1.0, random_state=seed) # ... and out of order
+    expected = {'duplicates': 40, 'gaps': 2, 'missing_bars': len(deleted), 'largest_gap_bars': 12,
+                'wick_spikes': 5, 'close_spikes': 3, 'zero_volume_run': 30}
+    return as_rows(corrupted), expected, wick, spike
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(DATA_FILE)
+    df['timestamp'] = pd.to_datetime(df['timestamp']).astype('datetime64[ms]').astype(np.int64)
+    clean_ts = df['timestamp'].to_numpy()
+    rows, expected, wick, spike = corrupt(df)
+    ok = True
+
+    # 1. Detection
+    t0 = time.perf_counter()
+    _, flagged = validate_ohlcv(rows, '5m', 'ETHUSDT', spikes='flag')
+    elapsed = time.perf_counter() - t0
+    found = {k: flagged[k] for k in expected}
+    ok &= check(f"detected {issues(flagged)} in {len(rows):,} rows ({elapsed * 1000:.1f} ms)",
+                found == expected and flagged['unsorted'] and flagged['zero_volume'] >= 30)
+    base = validate_ohlcv(df, '5m', spikes='flag')[1]
+    ok &= check("the uncorrupted file reports no spikes, duplicates or gaps",
+                base['wick_spikes'] == base['close_spikes'] == base['duplicates'] == base['gaps'] == 0)
+
+    # 2. Spike policies
+    clamped, clamp_report = validate_ohlcv(rows, '5m', spikes='clamp')
+    report = clamp_report
+    position = {t: i for i, t in enumerate(clamped['timestamp'])}
+    at = lambda idx: [position[t] for t in clean_ts[idx]]
+    close_err = np.abs(clamped['close'].to_numpy()[at(spike)] / df['close'].to_numpy()[spike] - 1).max()
+    body = clamped[['open', 'close']].max(axis=1).to_numpy()
+    ok &= check(f"clamp repaired {report['repaired']} bars: wicks back within 10% of the body, "
+                f"close spikes within {close_err:.2%} of the true close",
+                report['repaired'] == 8 and np.allclose(clamped['high'].to_numpy()[at(wick)], body[at(wick)] * 1.1) and close_err < 0.01)
+    ok &= check("clamped frame is consistent (high >= open/close >= low) and passes a rescan",
+                (clamped['high'] >= body).all() and (clamped['low'] <= clamped[['open', 'close']].min(axis=1)).all() and
+                validate_ohlcv(clamped, '5m', spikes='flag')[1]['wick_spikes'] == 0 and
+                validate_ohlcv(clamped, '5m', spikes='flag')[1]['close_spikes'] == 0)
+    dropped, report = validate_ohlcv(rows, '5m', spikes='drop')
+    ok &= check(f"drop removed {report['dropped']} bars", report['dropped'] == 8 and len(dropped) == len(df) - 15 - 8)
+
+    # 3. Gap fill
+    filled, report = validate_ohlcv(rows, '5m', spikes='flag', gaps='fill')
+    ts = filled['timestamp'].to_numpy()
+    hole = filled.set_index('timestamp').loc[clean_ts[3000:3012]]
+    ok &= check(f"fill inserted {report['filled']} flat zero-volume bars: regular {len(filled):,}-bar grid",
+                report['filled'] == 15 and len(filled) == len(df) and (np.diff(ts) == STEP).all() and
+                (hole['volume'] == 0).all() and (hole[['open', 'high', 'low']].to_numpy() == df['close'].iloc[2999]).all())
+
+    # 4. Layouts: epoch-ms column (live / downloader), datetime column, DatetimeIndex (store frames)
+    as_dates = pd.DataFrame(rows, columns=['timestamp'] + COLUMNS)
+    as_dates['timestamp'] = pd.to_datetime(as_dates['timestamp'], unit='ms')
+    a, ra = validate_ohlcv(as_dates, '5m')
+    b, rb = validate_ohlcv(as_dates.set_index('timestamp'), '5m')
+    ok &= check("datetime column / DatetimeIndex frames give the same bars and report as epoch-ms rows",
+                ra == rb == dict(clamp_report, symbol=None, timeframe='5m') and
+                np.array_equal(a[COLUMNS].to_numpy(), clamped[COLUMNS].to_numpy()) and
+                np.array_equal(b.index.asi8 // 1_000_000, clamped['timestamp'].to_numpy()) and
+                a['timestamp'].dtype.kind == 'M' and clamped['timestamp'].dtype == np.int64)
+
+    live = validate_ohlcv(as_rows(df.iloc[-500:]), '5m', spikes='clamp')[0]
+    ok &= check("a clean live 500-bar frame passes through unchanged",
+                np.array_equal(live.to_numpy(), df.iloc[-500:].to_numpy()))
+
+    # 5. Downloader: pages served with the corruption land deduplicated and repaired
+    class CorruptedSource:
+        def __init__(self, rows):
+            self.rows = sorted(rows, key=lambda r: r[0]) # Duplicates stay adjacent (overlapping pages)
+        def fetch(self, symbol, timeframe, since, limit=1000):
+            start = next(i for i, r in enumerate(self.rows) if r[0] >= since) if self.rows[-1][0] >= since else len(self.rows)
+            return [list(r) for r in self.rows[start:start + limit]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketStore(os.path.join(tmp, 'store'))
+        until = pd.Timestamp(int(clean_ts[-1]), unit='ms')
+        dl = Downloader(CorruptedSource(rows), store, rate=1000.0, workers=1, limit=1000, flush_rows=4000)
+        report = dl.download(['ETHUSDT'], ['5m'], days=90, until=until).iloc[0]
+        stored = store.load('ETHUSDT', '5m')
+        quality = store.info('ETHUSDT', '5m')['quality']
+        ok &= check(f"download: {int(report['rows']):,} bars stored, {int(report['duplicates'])} duplicates dropped, "
+                    f"{int(report['repaired'])} bars repaired, {int(report['missing_bars'])} missing bars in the manifest report",
+                    len(stored) == len(df) - 15 and int(report['repaired']) == 8 and int(report['missing_bars']) == 15 and
+                    quality['wick_spikes'] == quality['close_spikes'] == 0 and quality['gaps'] == 2)
+        ok &= check("store quality() matches the manifest report", store.quality('ETHUSDT', '5m') == {'symbol': 'ETHUSDT', 'timeframe': '5m', **quality})
+
+    # 6. Throughput: one pass over 3 years of 1m bars
+    n = 3 * 365 * 1440
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    values = np.vstack([np.roll(close, 1), close * 1.001, close * 0.999, close, rng.uniform(0, 10, n)])
+    ts = np.arange(n, dtype=np.int64) * 60_000_000_000
+    t0 = time.perf_counter()
+    scan(ts, values, '1m', spikes='clamp')
+    print(f"   scan of {n:,} 1m bars: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    print("\n✅ Data quality checks passed" if ok else "\n❌ Data quality checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
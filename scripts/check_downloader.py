@@ -0,0 +1,157 @@
+import os
+import sys
+import glob
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, CSV_NAME
+from tools.data_downloader import Downloader, BinanceKlines, TokenBucket
+from tools.kline_server import KlineServer
+
+# Offline downloader checks against the local klines stand-in serving data/*.csv:
+# concurrent full download under a shared rate budget, no-op resume, incremental append and
+# backfill, retries through injected 429s / 500s, a bad symbol failing fast, and interrupted
+# forward and backfill runs resuming from their last flush. Everything lands in temporary store roots.
+
+RATE = 40.0
+PAGE = 200 # Small pages so each series takes many requests
+
+def same_store(a, b, datasets):
+    for symbol, tf in datasets:
+        fa, fb = a.load(symbol, tf), b.load(symbol, tf)
+        if not (np.array_equal(fa.index.asi8, fb.index.asi8) and np.array_equal(fa.to_numpy(), fb.to_numpy())):
+            return False
+    return True
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def main():
+    csvs = [p for p in sorted(glob.glob('data/*.csv')) if CSV_NAME.match(os.path.basename(p))]
+    if not csvs:
+        print("No data/<SYMBOL>_<tf>.csv files found. Run downloader first.")
+        return
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        source = MarketStore(os.path.join(tmp, 'source'))
+        for path in csvs:
+            source.import_csv(path)
+        datasets = [(e['symbol'], e['timeframe']) for e in source.manifest['datasets'].values()]
+        symbols = sorted({s for s, _ in datasets})
+        timeframes = sorted({tf for _, tf in datasets})
+        # Only request series the stand-in has (the others would be 400s)
+        until = max(pd.Timestamp(e['end']) for e in source.manifest['datasets'].values()).to_pydatetime()
+        days = 400
+        expected_rows = sum(e['rows'] for e in source.manifest['datasets'].values())
+
+        def downloader(root, **kwargs):
+            options = {'rate': RATE, 'workers': 4, 'limit': PAGE, 'backoff': 0.05}
+            options.update(kwargs)
+            return Downloader(BinanceKlines(server.url), MarketStore(os.path.join(tmp, root)), **options)
+
+        # 1. Full concurrent download under the shared budget (server 429s above RATE + 2 req/s)
+        with KlineServer.from_store(source, rate_limit=int(RATE) + 2) as server:
+            dl = downloader('full')
+            t0 = time.perf_counter()
+            report = dl.download(symbols, timeframes, days=days, until=until)
+            wall = time.perf_counter() - t0
+            fetched = report[report['status'] == 'ok']
+            ok &= check(f"{len(fetched)} series, {int(fetched['rows'].sum()):,} bars match the source exactly",
+                        int(fetched['rows'].sum()) == expected_rows and same_store(dl.store, source, datasets))
+            ok &= check(f"{server.stats['requests']} requests in {wall:.1f}s ({server.stats['requests'] / wall:.1f}/s), "
+                        f"peak {server.peak_rate}/s, {server.stats['rate_limited']} rate-limited (budget {RATE:g}/s)",
+                        server.stats['rate_limited'] == 0 and server.peak_rate <= RATE + 2)
+            missing = report[report['status'] != 'ok']
+            ok &= check(f"series the server doesn't have fail fast ({len(missing)}, 1 request each)",
+                        (missing['requests'] == 1).all())
+
+            # 2. Resume: nothing new -> one request per stored series, no rows added
+            before = server.stats['requests']
+            again = dl.download(symbols, timeframes, days=days, until=until)
+            stored = again[again['status'] == 'ok']
+            ok &= check(f"rerun resumes from the last bar: {server.stats['requests'] - before} requests, {int(stored['rows'].sum())} new rows",
+                        int(stored['rows'].sum()) == 0 and (stored['requests'] == 1).all())
+
+            # 3. Incremental append (store has the head) and backfill (store has the tail)
+            symbol, tf = 'ETHUSDT', '5m'
+            frame = source.load(symbol, tf)
+            partial = downloader('partial')
+            partial.store.write(symbol, tf, frame.iloc[:10_000].reset_index())
+            partial.store.write('ETHUSDT', '1h', source.load('ETHUSDT', '1h').iloc[3000:].reset_index())
+            before = server.stats['requests']
+            inc = partial.download(['ETHUSDT'], ['5m', '1h'], days=days, until=until).set_index('timeframe')
+            pages = -(-(len(frame) - 10_000 + 1) // PAGE) + 1 # +1: the last short page is confirmed by a short read
+            ok &= check(f"append fetched {int(inc.loc['5m', 'rows']):,} new 5m bars in {int(inc.loc['5m', 'requests'])} requests, "
+                        f"backfilled {int(inc.loc['1h', 'rows']):,} 1h bars",
+                        inc.loc['5m', 'rows'] == len(frame) - 10_000 and inc.loc['5m', 'requests'] <= pages and
+                        inc.loc['1h', 'rows'] == 3000 and same_store(partial.store, source, [(symbol, tf), ('ETHUSDT', '1h')]))
+
+        # 4. Flaky server: 15% 500s and a tight server budget -> retries, same data
+        with KlineServer.from_store(source, rate_limit=int(RATE / 2), retry_after=0.2, fail_rate=0.15, seed=1) as server:
+            dl = downloader('flaky', max_retries=8)
+            report = dl.download(symbols, timeframes, days=days, until=until)
+            ok &= check(f"flaky server: {server.stats['errors']} 500s + {server.stats['rate_limited']} 429s retried "
+                        f"({int(report['retries'].sum())} retries), data identical",
+                        server.stats['errors'] > 0 and server.stats['rate_limited'] > 0 and same_store(dl.store, source, datasets))
+
+        # 5. Interrupted run: the server dies mid-download; the rerun resumes from the last flush
+        with KlineServer.from_store(source) as server:
+            dl = downloader('interrupted', workers=1, max_retries=1, flush_rows=2000)
+            real_fetch = dl.source.fetch
+            calls = {'n': 0}
+            def dying_fetch(*args):
+                calls['n'] += 1
+                if calls['n'] > 30:
+                    server.fail_rate = 1.0 # Every request now answers 500
+                return real_fetch(*args)
+            dl.source.fetch = dying_fetch
+            t0 = time.perf_counter()
+            first = dl.download(['ETHUSDT'], ['5m'], days=days, until=until)
+            kept = dl.store.info('ETHUSDT', '5m')['rows']
+            failed_fast = first['status'].iloc[0] != 'ok' and time.perf_counter() - t0 < 30
+            server.fail_rate = 0.0
+            dl.source.fetch = real_fetch
+            before = server.stats['requests']
+            second = dl.download(['ETHUSDT'], ['5m'], days=days, until=until)
+            ok &= check(f"interrupted run gave up after bounded retries keeping {kept:,} flushed bars; "
+                        f"rerun fetched the other {int(second['rows'].iloc[0]):,} in {server.stats['requests'] - before} requests",
+                        failed_fast and kept > 0 and kept + int(second['rows'].iloc[0]) == len(frame) and
+                        same_store(dl.store, source, [('ETHUSDT', '5m')]))
+
+            # 5b. Interrupted backfill: the store has the tail, the run dies after flushing the oldest
+            # bars; the hole between that flush and the old first bar is fetched on the rerun
+            dl = downloader('interrupted_backfill', workers=1, max_retries=1, flush_rows=2000)
+            dl.store.write('ETHUSDT', '5m', frame.iloc[10_000:].reset_index())
+            calls['n'] = 0
+            dl.source.fetch = dying_fetch
+            first = dl.download(['ETHUSDT'], ['5m'], days=days, until=until)
+            kept = dl.store.info('ETHUSDT', '5m')['rows']
+            pending = dl.store.info('ETHUSDT', '5m').get('backfill')
+            server.fail_rate = 0.0
+            dl.source.fetch = real_fetch
+            second = dl.download(['ETHUSDT'], ['5m'], days=days, until=until)
+            ok &= check(f"interrupted backfill kept {kept - (len(frame) - 10_000):,} of 10,000 older bars (pending {pending}); "
+                        f"rerun filled the other {int(second['rows'].iloc[0]):,}",
+                        first['status'].iloc[0] != 'ok' and pending and kept < len(frame) and
+                        dl.store.info('ETHUSDT', '5m').get('backfill') is None and same_store(dl.store, source, [('ETHUSDT', '5m')]))
+
+    # 6. Token bucket pacing on a fake clock
+    now = [0.0]
+    bucket = TokenBucket(5.0, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+    for _ in range(50):
+        bucket.acquire()
+    ok &= check(f"token bucket: 50 requests at 5/s take {now[0]:.1f}s of (fake) time", abs(now[0] - 49 / 5) < 1e-9)
+
+    print("\n✅ Downloader checks passed" if ok else "\n❌ Downloader checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import bisect
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, COLUMNS
+from tools.funding import (FUNDING, FundingDownloader, asof, per_bar, bar_funding, with_funding, funding_events,
+                           mark_series)
+from tools.streaming import StreamingBacktest, TrendPullbackStream
+from tools.kernels import entry_levels
+
+# Funding / mark-price dataset checks on ETHUSDT_5m with a synthetic 8h settlement history
+# (ms jitter on the settlement times, early settlements without a mark price) and 1h mark
+# klines served by an in-process source: download, resume and backfill into a temporary store;
+# asof / per_bar against pandas merge_asof and per-bar lookups; BacktestEngine with the funding
+# column against a bar-by-bar loop; the streaming engine against BacktestEngine; the
+# portfolio panel's funding matrices.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+STEP = 300_000_000_000 # 5m in ns
+HOUR = 3_600_000 # ms
+LEVERAGE = 3.0
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def synthetic_history(df, seed=11):
+    """(funding rows, mark kline rows) in the exchange's shape: ms times, settlements every 8h."""
+    rng = np.random.default_rng(seed)
+    start, end = int(df.index[0].value // 1_000_000), int(df.index[-1].value // 1_000_000)
+    settle = np.arange(-(-start // (8 * HOUR)) * 8 * HOUR, end + 1, 8 * HOUR)
+    close = df['close']
+    mark_at = close.reindex(pd.to_datetime(settle - 300_000, unit='ms')).to_numpy() * (1 + rng.normal(0, 0.0005, len(settle)))
+    rate = rng.normal(0.0001, 0.0002, len(settle))
+    mark = np.where(np.arange(len(settle)) < len(settle) // 5, np.nan, mark_at) # Old records: no mark price
+    funding = [[int(t + rng.integers(0, 6)), float(r), float(m)] for t, r, m in zip(settle, rate, mark)]
+    hourly = df[COLUMNS[:4]].resample('1h').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}).dropna()
+    marks = [[int(t.value // 1_000_000), *map(float, row * (1 + rng.normal(0, 0.0003)))] for t, row in zip(hourly.index, hourly.to_numpy())]
+    return funding, marks
+
+class FuturesSource:
+    def __init__(self, funding, marks):
+        self.rows = {FUNDING: funding, mark_series('1h'): marks}
+    def fetch(self, symbol, series, since, limit=1000):
+        rows = self.rows[series]
+        start = bisect.bisect_left([r[0] for r in rows], since)
+        return [list(r) for r in rows[start:start + limit]]
+
+def loop_backtest(close, signal, events, leverage, fee=0.0006):
+    """Bar-by-bar equity with a dict lookup of the settlements inside each bar (the slow reference)."""
+    equity = 1.0
+    held = 0.0
+    for t in range(1, len(close)):
+        position = signal[t - 1]
+        r = position * leverage * (close[t] / close[t - 1] - 1)
+        for rate, mark in events.get(t, ()):
+            r -= position * leverage * rate * (mark if np.isfinite(mark) else close[t]) / close[t - 1]
+        r -= abs(position - held) * fee * leverage
+        held = position
+        equity *= 1 + r
+    return equity - 1
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(DATA_FILE)
+    df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df['timestamp']), name='timestamp').as_unit('ns')).drop(columns='timestamp')
+    funding_rows, mark_rows = synthetic_history(df)
+    until = df.index[-1]
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketStore(os.path.join(tmp, 'store'))
+        store.write('ETHUSDT', '5m', df)
+
+        # 1. Download: recent month first, then backfill to the full history, then a no-op resume
+        source = FuturesSource(funding_rows, mark_rows)
+        FundingDownloader(source, store, rate=1000.0, workers=2).download(['ETH/USDT'], days=30, until=until)
+        recent = store.events_info('ETHUSDT', FUNDING)['rows']
+        FundingDownloader(source, store, rate=1000.0, workers=2).download(['ETH/USDT'], days=90, until=until)
+        event_ts, columns = store.events('ETHUSDT', FUNDING)
+        marks = store.events('ETHUSDT', mark_series('1h'))[0]
+        ok &= check(f"funding backfilled from {recent} to {len(event_ts)} settlements, {len(marks):,} 1h mark klines",
+                    len(event_ts) == len(funding_rows) and len(marks) == len(mark_rows) and recent < len(event_ts))
+        ok &= check("settlement times snapped to the minute, missing mark prices kept as NaN, rates unchanged",
+                    not (event_ts % (8 * HOUR * 1_000_000)).any() and
+                    np.isnan(columns['mark_price']).sum() == sum(np.isnan(r[2]) for r in funding_rows) and
+                    np.array_equal(columns['rate'], [r[1] for r in funding_rows]))
+        again = FundingDownloader(source, store, rate=1000.0, workers=2).download(['ETH/USDT'], days=90, until=until)
+        ok &= check(f"resume fetches only the tail ({int(again['requests'].sum())} requests, {int(again['rows'].sum())} new rows)",
+                    int(again['rows'].sum()) == 0 and int(again['requests'].sum()) <= 2)
+
+        # 2. Joins
+        rng = np.random.default_rng(2)
+        event_ts = np.array(event_ts)
+        rates = np.array(columns['rate'])
+        queries = np.sort(rng.integers(event_ts[0] - 86_400 * 10 ** 9, event_ts[-1] + 86_400 * 10 ** 9, 1_000_000))
+        t0 = time.perf_counter()
+        got = asof(event_ts, rates, queries)
+        t_asof = time.perf_counter() - t0
+        expected = pd.merge_asof(pd.DataFrame({'t': queries}), pd.DataFrame({'t': event_ts, 'rate': rates}), on='t')['rate'].to_numpy()
+        times, sample = event_ts.tolist(), queries[:100_000].tolist()
+        t0 = time.perf_counter()
+        looked_up = [rates[i - 1] if (i := bisect.bisect_right(times, q)) else np.nan for q in sample]
+        t_loop = (time.perf_counter() - t0) / len(sample) * len(queries)
+        ok &= check(f"asof over {len(queries):,} queries matches merge_asof ({t_asof * 1000:.0f} ms vs ~{t_loop * 1000:.0f} ms of per-query lookups)",
+                    np.array_equal(got, expected, equal_nan=True) and np.array_equal(got[:len(sample)], looked_up, equal_nan=True))
+        stale = asof(event_ts, rates, queries, max_age=4 * HOUR * 1_000_000)
+        ok &= check("max_age blanks queries more than 4h after the last settlement",
+                    np.array_equal(np.isnan(stale), np.isnan(got) | (queries - event_ts[np.maximum(np.searchsorted(event_ts, queries, 'right') - 1, 0)] > 4 * HOUR * 1_000_000)))
+
+        bar_ts = df.index.asi8
+        settled = per_bar(event_ts, rates, bar_ts, STEP)
+        naive = np.zeros(len(bar_ts))
+        for t, r in zip(event_ts, rates):
+            hit = np.flatnonzero((bar_ts < t) & (t <= bar_ts + STEP))
+            naive[hit] += r
+        ok &= check(f"per_bar puts each settlement in the bar closing on it ({np.count_nonzero(settled)} bars)",
+                    np.allclose(settled, naive, rtol=0, atol=1e-15) and np.count_nonzero(settled) == len(event_ts))
+
+        joined = bar_funding(store, 'ETHUSDT', df, '5m')
+        closes_on = np.isin(bar_ts + STEP, event_ts)
+        hourly = (bar_ts + STEP) % (HOUR * 1_000_000) == 0 # Mark klines are known at their close only
+        ok &= check("funding_rate is the settlement known at each bar close (causal), NaN before the first; "
+                    f"mark basis on hourly closes within {joined['mark_basis'][hourly].abs().max():.2%}",
+                    np.array_equal(joined['funding_rate'].to_numpy()[closes_on], rates) and
+                    joined['funding_rate'].iloc[:np.argmax(closes_on)].isna().all() and
+                    joined['mark_basis'][hourly].abs().max() < 0.005)
+
+        # 3. BacktestEngine pays the funding column; same as a bar-by-bar loop
+        try:
+            from tools.wfo import BacktestEngine, Strategy, WFOOptimizer
+        except ImportError as e:
+            print(f"⏭️ Engine checks skipped ({e})")
+        else:
+            class Fixed(Strategy):
+                def generate_signals(self, frame):
+                    return pd.DataFrame(self.params, index=frame.index)
+
+            close = df['close'].to_numpy()
+            trend = pd.Series(close).rolling(2016).mean().to_numpy()
+            signal = np.where(close > trend, 1.0, np.where(close < trend, -1.0, 0.0))
+            funded = with_funding(df, store, 'ETHUSDT', '5m')
+            engine = BacktestEngine(leverage=LEVERAGE)
+            with_f = engine.run(funded, Fixed({'position': signal}))['total_return']
+            without = engine.run(df, Fixed({'position': signal}))['total_return']
+            settle_mark = funding_events(store, 'ETHUSDT')[2]
+            events = {}
+            for t, r, m in zip(event_ts, rates, settle_mark):
+                events.setdefault(int(np.searchsorted(bar_ts + STEP, t)), []).append((r, m))
+            reference = loop_backtest(close, signal, events, LEVERAGE)
+            ok &= check(f"{LEVERAGE:g}x trend strategy: {with_f:+.2%} with funding vs {without:+.2%} without, "
+                        f"bar-by-bar loop {reference:+.2%}", np.isclose(with_f, reference, rtol=1e-9) and with_f != without)
+            always_long = engine.run(funded, Fixed({'position': np.ones(len(df))}))['total_return']
+            hold = engine.run(df, Fixed({'position': np.ones(len(df))}))['total_return']
+            print(f"   {LEVERAGE:g}x buy and hold pays {hold - always_long:.2%} of equity in funding over {len(event_ts)} settlements")
+
+            # 4. Streaming engine with the same settlements, tight stops / take-profits
+            c = close
+            levels = {'position': signal, 'take_profit': entry_levels(signal, c, c * 0.003), 'stop': entry_levels(signal, c, -c * 0.003)}
+
+            class Replay(TrendPullbackStream):
+                def on_chunk(self, chunk_ts, bars):
+                    rows = slice(*np.searchsorted(bar_ts, chunk_ts[[0, -1]]) + [0, 1])
+                    return {k: a[rows] for k, a in self.params.items()}
+
+            expected = BacktestEngine(leverage=LEVERAGE).run(funded, Fixed(levels))
+            values = np.vstack([df[col].to_numpy() for col in COLUMNS])
+            results = [StreamingBacktest(leverage=LEVERAGE).run(((bar_ts[a:a + size], values[:, a:a + size]) for a in range(0, len(bar_ts), size)),
+                                                                Replay(levels), '5m', funding=funding_events(store, 'ETHUSDT'))
+                       for size in (997, 5000, len(bar_ts))]
+            ok &= check(f"streaming engine with funding matches BacktestEngine ({expected['total_return']:+.2%}, {int(expected['trades'])} trades)",
+                        all(np.isclose(r[k], expected[k], rtol=1e-8, atol=1e-12) for r in results
+                            for k in ('total_return', 'max_drawdown', 'sharpe', 'trades', 'profit_factor')))
+
+            # 5. WFO over the store dataset with the funding columns joined
+            optimizer = WFOOptimizer(('ETHUSDT', '5m'), 20, 5, market_store=store, funding=True)
+            plain = WFOOptimizer(('ETHUSDT', '5m'), 20, 5, market_store=store)
+            ok &= check("WFOOptimizer(funding=True) carries funding / funding_rate / mark_basis columns",
+                        {'funding', 'funding_rate', 'mark_basis'} <= set(optimizer.df.columns) and 'funding' not in plain.df.columns)
+
+        # 6. Portfolio panel: constant rates settle at 00/08/16 UTC, history on its own settlement bars
+        from tools.portfolio import _funding_panel
+        index = bar_ts.view('datetime64[ns]')
+        close2 = np.column_stack([df['close'].to_numpy()] * 2)
+        known, due = _funding_panel({'ETHUSDT': funding_events(store, 'ETHUSDT'), 'BTCUSDT': 0.0001}, ['ETHUSDT', 'BTCUSDT'], index, close2, 5)
+        ok &= check("portfolio funding: history due on the settlement bars, constant rate on the 8h bars, scores see the known rate",
+                    np.count_nonzero(due[:, 0]) == len(event_ts) and np.array_equal(np.flatnonzero(due[:, 0]), np.flatnonzero(due[:, 1])) and
+                    np.isclose(due[:, 0].sum(), bar_funding(store, 'ETHUSDT', df, '5m')['funding'].sum()) and
+                    np.allclose(known[closes_on, 0], rates))
+
+    print("\n✅ Funding checks passed" if ok else "\n❌ Funding checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.wfo import BacktestEngine, IntrabarPath, AMBIGUITY_POLICIES
+from tools.kernels import entry_levels
+
+# Checks the vectorised stop / take-profit fill model in BacktestEngine.run_grid against a
+# plain bar-by-bar loop (every ambiguity policy, 5m path resolution inside 1h bars), and that
+# strategies without levels still get bit-identical results from the original fast path.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+N_COMBOS = 64
+
+def load_bars():
+    fine = pd.read_csv(DATA_FILE)
+    fine['timestamp'] = pd.to_datetime(fine['timestamp'])
+    fine = fine.set_index('timestamp').sort_index()
+    hourly = fine.resample('1h').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+    return fine, hourly
+
+def random_trades(close, rng, n_combos):
+    """Regime-style signals with entry-anchored stops / take-profits at random distances."""
+    n = len(close)
+    signals, stops, tps = (np.empty((n_combos, n)) for _ in range(3))
+    for k in range(n_combos):
+        regime = np.repeat(rng.choice([-1.0, 0.0, 1.0], size=n // 12 + 1), 12)[:n]
+        stop_dist = close * rng.uniform(0.002, 0.012)
+        tp_dist = close * rng.uniform(0.002, 0.02)
+        signals[k] = regime
+        stops[k] = entry_levels(regime, close, -stop_dist)
+        tps[k] = entry_levels(regime, close, tp_dist)
+        if k % 4 == 1:
+            stops[k] = np.nan # TP only
+        elif k % 4 == 2:
+            tps[k] = np.nan # Stop only
+    return signals, stops, tps
+
+def reference(engine, df, signal, stop, tp, fine=None):
+    """Bar-by-bar version of the fill model (same bookkeeping, no vectorisation)."""
+    close, open_, high, low = (df[c].to_numpy() for c in ('close', 'open', 'high', 'low'))
+    times = df.index
+    cost = (engine.fee + engine.slippage) * engine.leverage
+    growth, closing, flat_until_change = 1.0, 0.0, False
+    equity = [1.0]
+    for t in range(1, len(close)):
+        p = signal[t - 1]
+        if t == 1 or p != signal[t - 2]:
+            flat_until_change = False
+        pos = 0.0 if flat_until_change else p
+        ret = close[t] / close[t - 1] - 1
+        exited = False
+        s, g = stop[t - 1], tp[t - 1]
+        if pos != 0:
+            long = pos > 0
+            stop_hit = (low[t] <= s) if long else (high[t] >= s)
+            tp_hit = (high[t] >= g) if long else (low[t] <= g)
+            if stop_hit or tp_hit:
+                use_tp = tp_hit and not stop_hit
+                if stop_hit and tp_hit:
+                    if engine.ambiguity == 'tp':
+                        use_tp = True
+                    elif engine.ambiguity == 'open':
+                        use_tp = abs(g - open_[t]) < abs(s - open_[t])
+                    elif engine.ambiguity == 'path' and fine is not None:
+                        # Walk the 5m bars of this hour one by one
+                        start = fine.index.searchsorted(times[t])
+                        end = fine.index.searchsorted(times[t] + pd.Timedelta(hours=1))
+                        fine_bars = fine.iloc[start:end]
+                        stop_at = tp_at = len(fine_bars)
+                        for j, (h, l) in enumerate(zip(fine_bars['high'], fine_bars['low'])):
+                            if stop_at == len(fine_bars) and ((l <= s) if long else (h >= s)):
+                                stop_at = j
+                            if tp_at == len(fine_bars) and ((h >= g) if long else (l <= g)):
+                                tp_at = j
+                        use_tp = tp_at < stop_at
+                if use_tp:
+                    fill = max(open_[t], g) if long else min(open_[t], g)
+                else:
+                    fill = min(open_[t], s) if long else max(open_[t], s)
+                ret = fill / close[t - 1] - 1
+                exited = True
+                flat_until_change = True
+        turnover = abs(pos - closing) + (abs(pos) if exited else 0.0)
+        net = pos * ret * engine.leverage - turnover * cost
+        closing = 0.0 if exited else pos
+        growth *= 1 + net
+        equity.append(growth)
+    return np.array(equity) * engine.initial_capital
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    fine, hourly = load_bars()
+    rng = np.random.default_rng(3)
+    signals, stops, tps = random_trades(hourly['close'].to_numpy(), rng, N_COMBOS)
+    path = IntrabarPath(fine, hourly.index)
+    print(f"📊 {len(hourly)} 1h bars, {len(fine)} 5m bars, {N_COMBOS} combinations\n")
+    ok = True
+
+    # 1. No levels: the level-aware path reproduces the original fast path bit for bit
+    engine = BacktestEngine(leverage=3.0)
+    fast = engine.run_grid(hourly, signals, keep_equity=True)
+    nan_levels = np.full(signals.shape, np.nan)
+    slow = engine.run_grid(hourly, signals, keep_equity=True, stop_matrix=nan_levels, tp_matrix=nan_levels)
+    same = all(np.array_equal(fast[k], slow[k]) for k in fast)
+    print(f"{'✅' if same else '❌'} NaN levels match the close-to-close engine exactly")
+    ok &= same
+
+    # 2. Every ambiguity policy against the bar-by-bar loop
+    for policy in AMBIGUITY_POLICIES:
+        engine = BacktestEngine(leverage=3.0, ambiguity=policy, path=path if policy == 'path' else None)
+        t0 = time.perf_counter()
+        grid = engine.run_grid(hourly, signals, keep_equity=True, stop_matrix=stops, tp_matrix=tps)
+        vec_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ref = np.vstack([reference(engine, hourly, signals[k], stops[k], tps[k], fine if policy == 'path' else None)
+                         for k in range(N_COMBOS)])
+        loop_time = time.perf_counter() - t0
+        err = np.max(np.abs(grid['equity'] - ref) / ref)
+        match = err < 1e-12
+        ok &= match
+        print(f"{'✅' if match else '❌'} {policy:<5} max rel diff {err:.1e} | mean return {grid['total_return'].mean():+.2%} | "
+              f"vectorised {vec_time * 1000:.0f} ms vs loop {loop_time * 1000:.0f} ms")
+
+    # 3. How often the policy matters on these bars
+    held = signals[:, :-1] != 0
+    high, low = hourly['high'].to_numpy()[1:], hourly['low'].to_numpy()[1:]
+    both = held & (((signals[:, :-1] > 0) & (low <= stops[:, :-1]) & (high >= tps[:, :-1])) |
+                   ((signals[:, :-1] < 0) & (high >= stops[:, :-1]) & (low <= tps[:, :-1])))
+    print(f"\n{int(both.sum())} held bars touched both levels ({both.sum() / max(held.sum(), 1):.2%} of held bars)")
+
+    print("\n✅ Intrabar fill checks passed" if ok else "\n❌ Intrabar fill checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
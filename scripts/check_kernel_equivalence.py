@@ -0,0 +1,253 @@
+import os
+import sys
+import time
+import itertools
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.kernels import positions_from_signals, BACKEND
+
+# Checks the position kernel against the Python loops it replaced in
+# SmartHybrid / TrendPullback / RSI2 / TrendFollowing. The loops below are verbatim copies
+# of the pre-kernel strategy code, fed the same indicator arrays. Indicators are pandas-only
+# stand-ins (the kernel only sees arrays, so pandas_ta isn't needed to prove equivalence).
+# Timings depend on the kernel backend (numba is optional), so every line names it.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+
+# --- REFERENCE LOOPS ---
+
+def ref_smart_hybrid(trend_vals, rsi_vals, atr_vals, close_vals, high_vals, low_vals, rsi_buy, tp_mult):
+    position = np.zeros(len(close_vals))
+    curr_pos = 0
+    entry_price = 0.0
+    for i in range(1, len(close_vals)):
+        trend_dir = trend_vals[i]
+        if curr_pos == 0:
+            if trend_dir == 1:
+                if rsi_vals[i] < rsi_buy:
+                    curr_pos = 1
+                    entry_price = close_vals[i]
+            elif trend_dir == -1:
+                rsi_sell_lvl = 100 - rsi_buy
+                if rsi_vals[i] > rsi_sell_lvl:
+                    curr_pos = -1
+                    entry_price = close_vals[i]
+        elif curr_pos == 1:
+            if trend_dir == -1:
+                curr_pos = 0
+            elif tp_mult > 0:
+                tp_price = entry_price + (atr_vals[i] * tp_mult)
+                if high_vals[i] >= tp_price:
+                    curr_pos = 0
+        elif curr_pos == -1:
+            if trend_dir == 1:
+                curr_pos = 0
+            elif tp_mult > 0:
+                tp_price = entry_price - (atr_vals[i] * tp_mult)
+                if low_vals[i] <= tp_price:
+                    curr_pos = 0
+        position[i] = curr_pos
+    return position
+
+def ref_trend_pullback(trend_vals, rsi_vals, vol_vals, rsi_buy, use_vol_target, target_vol_ann):
+    position = np.zeros(len(rsi_vals))
+    curr_pos = 0
+    for i in range(1, len(rsi_vals)):
+        is_uptrend = (trend_vals[i] == 1)
+        size = 1.0
+        if use_vol_target and vol_vals[i] > 0:
+            raw_size = target_vol_ann / vol_vals[i]
+            size = min(max(raw_size, 0.5), 2.0)
+        if curr_pos == 0:
+            if is_uptrend and rsi_vals[i] < rsi_buy:
+                curr_pos = size
+        elif curr_pos > 0:
+            if not is_uptrend:
+                curr_pos = 0
+            elif rsi_vals[i] > 70:
+                curr_pos = 0
+        position[i] = curr_pos
+    return position
+
+def ref_rsi2(rsi, close, ma_exit, ma_trend, buy_lvl, sell_lvl):
+    position = np.zeros(len(close))
+    curr_pos = 0
+    for i in range(1, len(close)):
+        if np.isnan(rsi[i]) or np.isnan(ma_exit[i]) or np.isnan(ma_trend[i]):
+            continue
+        uptrend = close[i] > ma_trend[i]
+        if curr_pos == 0:
+            if rsi[i] < buy_lvl and uptrend:
+                curr_pos = 1
+            elif rsi[i] > sell_lvl and not uptrend:
+                curr_pos = -1
+        elif curr_pos == 1:
+            if close[i] > ma_exit[i]:
+                curr_pos = 0
+        elif curr_pos == -1:
+            if close[i] < ma_exit[i]:
+                curr_pos = 0
+        position[i] = curr_pos
+    return position
+
+def ref_trend_following(ema_fast, ema_slow, long_only):
+    position = np.zeros(len(ema_fast))
+    curr_pos = 0
+    for i in range(1, len(ema_fast)):
+        if np.isnan(ema_fast[i]) or np.isnan(ema_slow[i]):
+            continue
+        if ema_fast[i] > ema_slow[i]:
+            curr_pos = 1
+        elif ema_fast[i] < ema_slow[i]:
+            if long_only:
+                curr_pos = 0
+            else:
+                curr_pos = -1
+        position[i] = curr_pos
+    return position
+
+
+# --- KERNEL PORTS (same expressions as the strategies) ---
+
+def kernel_smart_hybrid(trend_vals, rsi_vals, atr_vals, close_vals, high_vals, low_vals, rsi_buy, tp_mult):
+    return positions_from_signals(
+        long_entry=(trend_vals == 1) & (rsi_vals < rsi_buy),
+        short_entry=(trend_vals == -1) & (rsi_vals > 100 - rsi_buy),
+        long_exit=(trend_vals == -1),
+        short_exit=(trend_vals == 1),
+        entry_price=close_vals,
+        tp_dist=atr_vals * tp_mult if tp_mult > 0 else None,
+        high=high_vals,
+        low=low_vals
+    )
+
+def kernel_trend_pullback(trend_vals, rsi_vals, vol_vals, rsi_buy, use_vol_target, target_vol_ann):
+    size = np.ones(len(rsi_vals))
+    if use_vol_target:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scaled = np.clip(target_vol_ann / vol_vals, 0.5, 2.0)
+        size = np.where(vol_vals > 0, scaled, 1.0)
+    is_uptrend = (trend_vals == 1)
+    return positions_from_signals(
+        long_entry=is_uptrend & (rsi_vals < rsi_buy),
+        long_exit=~is_uptrend | (rsi_vals > 70),
+        sizes=size
+    )
+
+def kernel_rsi2(rsi, close, ma_exit, ma_trend, buy_lvl, sell_lvl):
+    uptrend = close > ma_trend
+    return positions_from_signals(
+        long_entry=(rsi < buy_lvl) & uptrend,
+        short_entry=(rsi > sell_lvl) & ~uptrend,
+        long_exit=close > ma_exit,
+        short_exit=close < ma_exit,
+        skip=np.isnan(rsi) | np.isnan(ma_exit) | np.isnan(ma_trend)
+    )
+
+def kernel_trend_following(ema_fast, ema_slow, long_only):
+    bull = ema_fast > ema_slow
+    bear = ema_fast < ema_slow
+    return positions_from_signals(
+        long_entry=bull,
+        short_entry=None if long_only else bear,
+        long_exit=bear,
+        short_exit=bull,
+        skip=np.isnan(ema_fast) | np.isnan(ema_slow),
+        reverse=True
+    )
+
+
+# --- INPUTS ---
+
+def rsi(close, length):
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+def atr(df, length):
+    prev = df['close'].shift(1)
+    tr = pd.concat([df['high'] - df['low'], (df['high'] - prev).abs(), (df['low'] - prev).abs()], axis=1).max(axis=1)
+    return tr.ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+
+def htf_trend(df, rule='4h', span=12):
+    # Sign of the 4h close vs its EMA, with NaN warm-up and flat gaps like the real Supertrend
+    htf = df['close'].resample(rule).last().dropna()
+    trend = np.sign(htf - htf.ewm(span=span, adjust=False, min_periods=span).mean())
+    return trend.reindex(df.index).ffill().values
+
+def load_frame():
+    if os.path.exists(DATA_FILE):
+        df = pd.read_csv(DATA_FILE, parse_dates=['timestamp']).set_index('timestamp')
+        return df.sort_index()
+    # Synthetic random walk if the data hasn't been downloaded
+    rng = np.random.default_rng(7)
+    n = 50_000
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    spread = np.abs(rng.normal(0, 0.002, n)) * close
+    idx = pd.date_range('2024-01-01', periods=n, freq='5min')
+    return pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread,
+                         'close': close, 'volume': 1.0}, index=idx)
+
+
+# --- CHECKS ---
+
+def compare(name, ref_fn, kernel_fn, cases):
+    mismatches = 0
+    t_ref = t_kernel = 0.0
+    for args in cases:
+        t0 = time.perf_counter()
+        expected = ref_fn(*args)
+        t_ref += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = kernel_fn(*args)
+        t_kernel += time.perf_counter() - t0
+        if not np.array_equal(expected, got):
+            mismatches += 1
+            first = int(np.flatnonzero(expected != got)[0])
+            print(f"   ❌ {name}: first difference at bar {first} ({expected[first]} vs {got[first]})")
+    status = '✅' if mismatches == 0 else '❌'
+    print(f"{status} {name:<16} {len(cases):>3} cases  loop {t_ref:7.2f}s  kernel [{BACKEND}] {t_kernel:6.2f}s  ({t_ref / max(t_kernel, 1e-9):5.1f}x)")
+    return mismatches == 0
+
+def main():
+    df = load_frame()
+    close = df['close'].values
+    high = df['high'].values
+    low = df['low'].values
+    print(f"📊 {len(df)} bars, kernel backend: {BACKEND}" + ("" if BACKEND == 'numba' else " (numba not installed; timings are the default fallback)"))
+
+    trend = htf_trend(df)
+    rsis = {n: rsi(df['close'], n).values for n in (2, 7, 14)}
+    atrs = {n: atr(df, n).values for n in (14,)}
+    smas = {n: df['close'].rolling(n).mean().values for n in (5, 10, 200)}
+    emas = {n: df['close'].ewm(span=n, adjust=False, min_periods=n).mean().values for n in (8, 20, 50)}
+    vol = (df['close'].pct_change().rolling(96).std() * np.sqrt(96) * np.sqrt(365)).values
+
+    ok = True
+    ok &= compare('SmartHybrid', ref_smart_hybrid, kernel_smart_hybrid, [
+        (trend, rsis[r], atrs[14], close, high, low, buy, tp)
+        for r, buy, tp in itertools.product((7, 14), (30, 40), (0.0, 1.5, 3.0))
+    ])
+    ok &= compare('TrendPullback', ref_trend_pullback, kernel_trend_pullback, [
+        (trend, rsis[r], vol, buy, use_vol, 0.4)
+        for r, buy, use_vol in itertools.product((7, 14), (35, 45), (False, True))
+    ])
+    ok &= compare('RSI2', ref_rsi2, kernel_rsi2, [
+        (rsis[2], close, smas[m], smas[200], buy, 100 - buy)
+        for m, buy in itertools.product((5, 10), (5, 10, 20))
+    ])
+    ok &= compare('TrendFollowing', ref_trend_following, kernel_trend_following, [
+        (emas[f], emas[s], long_only)
+        for (f, s), long_only in itertools.product(((8, 20), (8, 50), (20, 50)), (True, False))
+    ])
+
+    print(f"\n✅ Kernel [{BACKEND}] matches every reference loop" if ok else f"\n❌ Kernel [{BACKEND}] output differs")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
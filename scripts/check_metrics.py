@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tools.wfo import BacktestEngine, WFOOptimizer
+from tools.metrics import trade_ledger, periods_per_year
+from bench_parallel_wfo import EMABandStrategy, PARAM_GRID, same_results
+
+# Checks tools/metrics.py against plain loops (trade ledger, Sharpe / Sortino / profit factor
+# per grid row), that a trade's exit cost counts against it, that the default grid path is
+# unchanged by extended=True, what the extended statistics cost on a 5m grid, and a WFO run
+# optimising Sharpe serially and in parallel.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+N_COMBOS = 200
+
+def reference_trades(position, returns, cost=0.0):
+    trades = []
+    current = None
+    for i, p in enumerate(position):
+        r = returns[i]
+        if current is not None and p != current['size'] * current['side']:
+            # This bar's cost of closing the old position belongs to the old trade
+            exit_cost = cost * min(current['size'], abs(p - current['size'] * current['side']))
+            current['growth'] *= 1 - exit_cost
+            r += exit_cost
+            trades.append(current)
+            current = None
+        if current is None and p != 0:
+            current = {'entry': i, 'side': np.sign(p), 'size': abs(p), 'growth': 1.0}
+        if current is not None:
+            current['growth'] *= 1 + r
+            current['exit'] = i
+    if current is not None:
+        trades.append(current)
+    return trades
+
+def reference_row(net, position, periods, cost):
+    trades = reference_trades(position, net, cost)
+    pnl = np.array([t['growth'] - 1 for t in trades])
+    gains, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+    std = net.std()
+    downside = np.sqrt(np.mean(np.minimum(net, 0) ** 2))
+    return {
+        'sharpe': net.mean() / std * np.sqrt(periods) if std > 0 else 0.0,
+        'sortino': net.mean() / downside * np.sqrt(periods) if downside > 0 else 0.0,
+        'profit_factor': gains / losses if losses > 0 else (np.inf if gains > 0 else 0.0),
+        'trades': len(trades),
+        'trade_win_rate': (pnl > 0).mean() if len(pnl) else 0.0,
+        'exposure': np.mean(position != 0)
+    }
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(DATA_FILE)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.set_index('timestamp')
+    rng = np.random.default_rng(5)
+    n = len(df)
+    signals = np.vstack([np.repeat(rng.choice([-1.0, 0.0, 0.5, 1.0], size=n // 40 + 1), 40)[:n] for _ in range(N_COMBOS)])
+    ok = True
+
+    # 1. Trade ledger vs the loop
+    returns = rng.normal(0, 0.002, n)
+    ledger = trade_ledger(signals[0], returns, df.index, cost=0.0012)
+    ref = reference_trades(signals[0], returns, cost=0.0012)
+    ok &= check(f"ledger: {len(ref)} trades, entries/exits/pnl match the loop",
+                len(ref) == len(ledger['pnl']) and
+                np.array_equal([t['entry'] for t in ref], ledger['entry']) and
+                np.array_equal([t['exit'] for t in ref], ledger['exit']) and
+                np.allclose([t['growth'] - 1 for t in ref], ledger['pnl'], rtol=1e-12, atol=1e-15))
+
+    # 2. Grid statistics vs per-row loops
+    engine = BacktestEngine(leverage=2.0)
+    grid = engine.run_grid(df, signals, keep_equity=True, extended=True)
+    periods = periods_per_year(df.index)
+    worst = 0.0
+    for k in range(0, N_COMBOS, 20):
+        equity = grid['equity'][k]
+        net = equity[1:] / equity[:-1] - 1
+        expected = reference_row(net, grid['position'][k, 1:], periods, (engine.fee + engine.slippage) * engine.leverage)
+        for key, value in expected.items():
+            got = grid[key][k]
+            if np.isinf(value) or np.isinf(got):
+                worst = max(worst, 0.0 if value == got else np.inf)
+            else:
+                worst = max(worst, abs(got - value) / max(abs(value), 1e-12))
+    ok &= check(f"grid Sharpe / Sortino / profit factor / trades / exposure match the loops (max rel diff {worst:.1e})", worst < 1e-8)
+
+    # 2b. Exit costs count against the closing trade: a long whose gross move covers its entry cost
+    # but not the round trip (it used to count as a winner), then a reversal to a short over flat
+    # prices, which loses exactly its own round trip (it used to pay for closing the long too)
+    c = (engine.fee + engine.slippage) * engine.leverage
+    close = 100.0 * np.array([1.0, 1.0] + [1 + 1.5 * c / engine.leverage] * 4)
+    bars = pd.DataFrame({'close': close}, index=pd.date_range('2025-01-01', periods=len(close), freq='5min'))
+    signal = np.array([1.0, 1.0, -1.0, -1.0, 0.0, 0.0])
+    small = engine.run_grid(bars, signal[None, :], keep_equity=True, extended=True)
+    equity = small['equity'][0]
+    small_ledger = trade_ledger(small['position'][0], np.r_[0.0, equity[1:] / equity[:-1] - 1], cost=c)
+    expected = [(1 - c) * (1 + 1.5 * c) * (1 - c) - 1, (1 - c) ** 2 - 1]
+    ok &= check(f"round trip counts against the trade: pnl {', '.join(f'{p:+.4%}' for p in small_ledger['pnl'])} "
+                f"(expected {', '.join(f'{p:+.4%}' for p in expected)}), trade win rate {small['trade_win_rate'][0]:.0%}",
+                np.allclose(small_ledger['pnl'], expected, rtol=1e-9) and small['trades'][0] == 2 and
+                small['trade_win_rate'][0] == 0 and small['profit_factor'][0] == 0)
+
+    # 3. Base metrics are unchanged by extended=True
+    basic = engine.run_grid(df, signals)
+    ok &= check("extended=True leaves return / win rate / drawdown bit-identical",
+                all(np.array_equal(basic[k], grid[k]) for k in basic))
+
+    # 4. Cost of the extended statistics
+    timings = {}
+    for extended in (False, True):
+        t0 = time.perf_counter()
+        for _ in range(3):
+            engine.run_grid(df, signals, extended=extended)
+        timings[extended] = (time.perf_counter() - t0) / 3
+    print(f"   run_grid {N_COMBOS} x {n} bars: basic {timings[False] * 1000:.0f} ms, "
+          f"extended {timings[True] * 1000:.0f} ms (+{timings[True] / timings[False] - 1:.0%})")
+
+    # 5. WFO on Sharpe: parallel matches serial, and the OOS results carry the new stats
+    optimizer = WFOOptimizer(DATA_FILE, train_window_days=20, test_window_days=5)
+    serial = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, objective='sharpe')
+    parallel = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, objective='sharpe', workers=2)
+    default = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0)
+    ok &= check("Sharpe-objective WFO: parallel matches serial", same_results(serial, parallel))
+    changed = sum(a['params'] != b['params'] for a, b in zip(serial, default))
+    print(f"   Sharpe picked different params than return/drawdown in {changed}/{len(serial)} windows")
+    ok &= check("OOS results report sharpe / profit_factor / trades", all({'sharpe', 'profit_factor', 'trades'} <= set(r) for r in serial))
+
+    print("\n✅ Metrics checks passed" if ok else "\n❌ Metrics checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
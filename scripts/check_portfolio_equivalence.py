@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` / `tools` are importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core import clock
+from core.indicators import indicators_at
+from core.risk import get_risk_cleanup_actions
+from core.strategy import evaluate_symbol, load_strategy_config
+from core.config import LIVE_STRATEGY
+from tools.portfolio import build_panel, PortfolioSimulator, EXIT_COLUMNS, EXIT_REASONS
+from tools.replay import ReplaySimulator
+from bench_portfolio import synthetic_universe
+
+# Checks tools/portfolio.py's vectorised rules against the live code they re-implement, per
+# symbol on a shared fixture (bench_portfolio's synthetic universe plus a few price shocks):
+# every bar's entry side and score from build_panel vs core.strategy.evaluate_symbol on the
+# replay's indicators, the market sentiment, and for a position walked through each symbol
+# (opened on the live entry, or on alternating sides when there is none so every exit rule
+# gets exercised), PortfolioSimulator._exits' reason and trailing stop vs evaluate_symbol +
+# core.risk.get_risk_cleanup_actions. Rules the portfolio documents as not modelled are held
+# out on both sides: partial TPs (tp_count = 1) and volume-climax exits (volume 0). Any other
+# difference is a drift to fix.
+
+N_SYMBOLS = 6
+DAYS = 45
+SHOCK_EVERY = 700 # Bars between +-6% jumps (toxic purges, sentiment swings)
+WARMUP = 300
+BALANCE = 10000.0
+# Mixed signs so the funding branches of the entry score are exercised
+FUNDING = {f"SYM{k:02d}/USDT": rate for k, rate in enumerate([0.0001, -0.0002, 0.0, 0.0003, -0.0001, 0.0001])}
+
+def shocked(candles, seed=3):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for sym, df in candles.items():
+        jumps = np.zeros(len(df))
+        jumps[rng.integers(0, len(df), len(df) // SHOCK_EVERY)] = rng.choice([-0.06, 0.06], len(df) // SHOCK_EVERY)
+        scale = np.cumprod(1 + jumps)
+        out[sym] = df.assign(**{c: df[c] * scale for c in ('open', 'high', 'low', 'close')})
+    return out
+
+def exit_code(action):
+    """EXIT_REASONS code of a live reduce-only action (0: none, or an unmodelled add)."""
+    if not action or not action.get('reduceOnly'):
+        return 0
+    reason = action['reason']
+    if 'SCALP' in reason:
+        return EXIT_REASONS.index('EXIT_SCALP')
+    return next(k for k, name in enumerate(EXIT_REASONS) if k and reason.startswith(name))
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def main():
+    candles = shocked(synthetic_universe(N_SYMBOLS, DAYS))
+    params = load_strategy_config(LIVE_STRATEGY)
+    t0 = time.perf_counter()
+    panel = build_panel(candles, params, funding_rate=FUNDING, warmup=WARMUP)
+    replay = ReplaySimulator(candles, params, funding_rate=FUNDING, warmup=WARMUP)
+    print(f"📊 {len(panel['index']):,} bars x {N_SYMBOLS} symbols, panel + replay indicators in {time.perf_counter() - t0:.1f}s\n")
+    ok = check("panel and replay share the timeline", np.array_equal(panel['index'], replay.timeline))
+
+    sim = PortfolioSimulator(panel)
+    n_syms = len(panel['symbols'])
+    sim.qty, sim.entry, sim.peak, sim.stop, sim.entry_time = (np.zeros(n_syms) for _ in range(5))
+    decision = replay.timeline + np.timedelta64(5, 'm')
+    minutes = decision.astype('datetime64[m]').astype(np.int64).astype(np.float64)
+
+    sim_clock = clock.SimClock()
+    clock.set_clock(sim_clock)
+    entries = entry_diff = score_diff = exits = exit_diff = stop_diff = held_bars = 0
+    by_reason = {}
+    first_diff = []
+    try:
+        # 1. Sentiment: share of evaluated symbols in an up trend, as the next bar sees it
+        sentiment, expected = 0.5, []
+        for t in range(len(replay.timeline)):
+            expected.append(sentiment)
+            trends = [replay.cols[s]['st_dir'][replay.rows[s][t]] for s in replay.symbols if replay.rows[s][t] >= WARMUP]
+            trends = [0 if v != v else v for v in trends]
+            if trends:
+                sentiment = trends.count(1) / len(trends)
+        ok &= check("market sentiment matches the replay's on every bar", np.allclose(panel['sentiment'], expected))
+
+        # 2. Per symbol: flat bars compare entries, held bars compare exits and the trailing stop
+        for s, sym in enumerate(panel['symbols']):
+            cols, rows = replay.cols[sym], replay.rows[sym]
+            book = None
+            forced = 1
+            for t in range(len(replay.timeline)):
+                i = rows[t]
+                if i < WARMUP:
+                    continue
+                now = pd.Timestamp(decision[t]).to_pydatetime()
+                sim_clock.set(now)
+                inds = indicators_at(cols, i)
+                inds['current_vol'] = 0.0 # Volume-climax exits need intrabar volume projection: not modelled
+                price = inds['current_price']
+                sentiment = panel['sentiment'][t]
+
+                # The flat branch keeps no state: compare it on every bar
+                res = evaluate_symbol(sym, inds, {'amt': 0.0, 'entry': 0.0, 'pnl': 0.0}, BALANCE, sentiment, params, FUNDING[sym], log=False)
+                action = res['action']
+                side = 0 if not action else (1 if action['side'] == 'buy' else -1)
+                entries += side != 0
+                if side != panel['entry_side'][t, s]:
+                    entry_diff += 1
+                    first_diff.append(f"{sym} bar {t}: entry {side} live vs {panel['entry_side'][t, s]} panel")
+                elif side and not np.isclose(action['score'], panel['score'][t, s]):
+                    score_diff += 1
+                    first_diff.append(f"{sym} bar {t}: score {action['score']:.4f} live vs {panel['score'][t, s]:.4f} panel")
+
+                if book is None:
+                    if not side:
+                        side, forced = forced, -forced
+                    book = {'amt': float(side), 'entry': price, 'pnl': 0.0, 'price': price, 'entry_time': now.isoformat(), 'tp_count': 1}
+                    sim.qty[s], sim.entry[s], sim.peak[s], sim.stop[s], sim.entry_time[s] = side, price, price, 0.0, minutes[t]
+                    continue
+
+                held_bars += 1
+                sim.now_min = minutes[t]
+                portfolio = int(sim._exits(np.array([s]), {k: panel[k][t] for k in EXIT_COLUMNS}, sentiment)[0])
+                book.update(pnl=book['amt'] * (price - book['entry']), price=price)
+                cleanup = get_risk_cleanup_actions({sym: book}, sentiment)
+                res = evaluate_symbol(sym, inds, book, BALANCE, sentiment, params, FUNDING[sym], log=False)
+                live = exit_code(cleanup[0]) if cleanup else exit_code(res['action'])
+                if live != portfolio:
+                    exit_diff += 1
+                    first_diff.append(f"{sym} bar {t}: exit {EXIT_REASONS[live]} live vs {EXIT_REASONS[portfolio]} panel")
+                elif not live and not np.isclose(res['trail_stop'], sim.stop[s]):
+                    stop_diff += 1
+                    first_diff.append(f"{sym} bar {t}: trailing stop {res['trail_stop']:.6f} live vs {sim.stop[s]:.6f} panel")
+                book.update(max_price=res['max_price'], min_price=res['min_price'], trail_stop=res['trail_stop'])
+                if live:
+                    exits += 1
+                    by_reason[EXIT_REASONS[live]] = by_reason.get(EXIT_REASONS[live], 0) + 1
+                    book = None
+                    sim.qty[s] = 0.0
+    finally:
+        clock.reset_clock()
+
+    for line in first_diff[:10]:
+        print(f"   {line}")
+    ok &= check(f"entries: {entries} live entry signals, side differs on {entry_diff} bars, score on {score_diff}",
+                entry_diff == 0 and score_diff == 0 and entries > 0)
+    ok &= check(f"exits over {held_bars:,} held bars: {exits} live exits "
+                f"({', '.join(f'{k} {v}' for k, v in sorted(by_reason.items(), key=lambda kv: -kv[1]))}), "
+                f"reason differs on {exit_diff} bars, trailing stop on {stop_diff}",
+                exit_diff == 0 and stop_diff == 0 and exits > 0)
+
+    print("\n✅ Portfolio rules match the live code" if ok else "\n❌ Portfolio rules drifted from the live code")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
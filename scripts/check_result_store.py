@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tools.wfo import WFOOptimizer
+from tools.parallel_wfo import ParallelWFO
+from tools.result_store import ResultStore
+from tools.search import TPESearch
+from bench_parallel_wfo import EMABandStrategy, PARAM_GRID, same_results
+
+# Exercises the WFO result store against a throwaway database:
+# cold run, warm rerun, overlapping grid, resume after an interrupted run, parallel reuse.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+
+class InterruptedRun(Exception):
+    pass
+
+class CrashingStrategy(EMABandStrategy):
+    """Same signals, but blows up once `calls` reaches `crash_at` (simulates a killed run)."""
+    calls = 0
+    crash_at = None
+
+    def generate_signals(self, df):
+        CrashingStrategy.calls += 1
+        if CrashingStrategy.crash_at is not None and CrashingStrategy.calls >= CrashingStrategy.crash_at:
+            raise InterruptedRun()
+        return super().generate_signals(df)
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    optimizer = WFOOptimizer(DATA_FILE, train_window_days=20, test_window_days=5)
+    baseline = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0)
+    n_windows = len(baseline)
+    n_combos = len(PARAM_GRID['fast']) * len(PARAM_GRID['slow']) * len(PARAM_GRID['band']) * len(PARAM_GRID['long_only'])
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(os.path.join(tmp, 'wfo_cache.sqlite'))
+
+        # 1. Cold run: every evaluation is computed, results match the store-less run
+        before = dict(store.stats)
+        cold = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, store=store)
+        ok &= check("cold run matches run without store", same_results(baseline, cold))
+        ok &= check(f"cold run computed all {n_windows * n_combos} evaluations",
+                    store.stats['store_misses'] - before['store_misses'] == n_windows * n_combos)
+
+        # 2. Same run again: resumed from checkpoints, nothing recomputed
+        before = dict(store.stats)
+        warm = optimizer.optimize(EMABandStrategy, PARAM_GRID, leverage=2.0, store=store)
+        ok &= check("rerun resumes every window", same_results(baseline, warm) and store.stats == before)
+
+        # 3. Grid with one extra value: only the new combinations are backtested
+        bigger = dict(PARAM_GRID, band=PARAM_GRID['band'] + [0.003])
+        before = dict(store.stats)
+        optimizer.optimize(EMABandStrategy, bigger, leverage=2.0, store=store)
+        hits = store.stats['store_hits'] - before['store_hits']
+        misses = store.stats['store_misses'] - before['store_misses']
+        ok &= check(f"overlapping grid reused {hits} and computed {misses} evaluations",
+                    hits == n_windows * n_combos and misses == n_windows * n_combos // len(PARAM_GRID['band']))
+
+        # 4. Interrupted run: crash partway, then resume from the last finished window
+        CrashingStrategy.calls, CrashingStrategy.crash_at = 0, 3 * (n_combos + 1) + 5
+        try:
+            optimizer.optimize(CrashingStrategy, PARAM_GRID, leverage=2.0, store=store)
+        except InterruptedRun:
+            print(f"   💥 interrupted after {CrashingStrategy.calls - 1} strategy calls")
+        CrashingStrategy.calls, CrashingStrategy.crash_at = 0, None
+        resumed = optimizer.optimize(CrashingStrategy, PARAM_GRID, leverage=2.0, store=store)
+        # 3 windows were checkpointed; the 4th crashed inside its score batch, so it reruns in full
+        expected_calls = (n_windows - 3) * (n_combos + 1)
+        ok &= check(f"resumed run matches and made {CrashingStrategy.calls} strategy calls (expected {expected_calls})",
+                    same_results(baseline, resumed) and CrashingStrategy.calls == expected_calls)
+
+        # 5. Parallel workers read and write the same store
+        with ParallelWFO(optimizer, workers=2) as executor:
+            tpe = TPESearch(budget=20, seed=1)
+            serial = optimizer.optimize(EMABandStrategy, bigger, leverage=2.0, search=tpe)
+            parallel = executor.optimize(EMABandStrategy, bigger, leverage=2.0, search=tpe, store=store)
+        ok &= check("parallel search with store matches serial without", same_results(serial, parallel))
+
+        provenance = [f for f in os.listdir(tmp) if f.endswith('_provenance.json')]
+        ok &= check(f"{len(provenance)} provenance files written", len(provenance) == 4)
+        store.close()
+
+    print("\n✅ Result store checks passed" if ok else "\n❌ Result store checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
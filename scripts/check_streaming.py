@@ -0,0 +1,203 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, COLUMNS
+from tools.timeframes import resample_arrays
+from tools.streaming import (store_chunks, trade_chunks, trade_bars, StreamRMA, StreamRSI, StreamATR, StreamRolling,
+                             StreamResampler, StreamSupertrend, TrendPullbackStream, StreamingBacktest)
+
+# Streaming backtest checks: every streaming indicator against its whole-series pandas
+# definition and against itself at odd chunk sizes, the chunked TrendPullbackStream signals,
+# the streaming engine against BacktestEngine.run on the same signals, aggTrades -> bars, and
+# memory / throughput on years of synthetic 1m bars in a temporary store.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+CHUNKS = (997, 5000, 123_457)
+PARAMS = {'st_len': 10, 'st_mult': 3.0, 'rsi_len': 14, 'rsi_buy': 40, 'atr_len': 14, 'tp_mult': 2.0, 'rule': '1h'}
+YEARS_1M = 3
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def chunked(n, size):
+    return [slice(a, min(a + size, n)) for a in range(0, n, size)]
+
+def same(a, b, rtol=1e-9):
+    return a.shape == b.shape and np.allclose(a, b, rtol=rtol, atol=1e-12, equal_nan=True)
+
+def stream(make, arrays, size):
+    """Runs a fresh streaming object over `arrays` in chunks of `size` and concatenates the outputs."""
+    obj = make()
+    return np.concatenate([obj.update(*(a[s] for a in arrays)) for s in chunked(len(arrays[0]), size)])
+
+def rma(x, length):
+    return pd.Series(x).ewm(alpha=1 / length, min_periods=length).mean().to_numpy()
+
+def supertrend_loop(high, low, close, length, multiplier):
+    """pandas_ta's supertrend direction loop over whole-series bands."""
+    prev = np.concatenate(([np.nan], close[:-1]))
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+    atr = np.concatenate(([np.nan], rma(tr[1:], length)))
+    upper, lower = (high + low) / 2 + multiplier * atr, (high + low) / 2 - multiplier * atr
+    direction = np.ones(len(close))
+    for i in range(1, len(close)):
+        if close[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+            if direction[i] > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction[i] < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+    return direction
+
+def run_signals(strategy_cls, ts, values, timeframe, size):
+    strategy = strategy_cls(PARAMS)
+    strategy.begin(timeframe)
+    parts = [strategy.on_chunk(ts[s], {c: values[k, s] for k, c in enumerate(COLUMNS)}) for s in chunked(len(ts), size)]
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+def synthetic_1m(years, seed=5):
+    n = int(years * 365 * 24 * 60)
+    rng = np.random.default_rng(seed)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.0007, n)))
+    spread = np.abs(rng.normal(0, 0.0006, n)) * close
+    ts = pd.Timestamp('2022-01-01').value + np.arange(n, dtype=np.int64) * 60_000_000_000
+    return ts, np.vstack([np.roll(close, 1), close + spread, close - spread, close, rng.uniform(1, 500, n)])
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    df = pd.read_csv(DATA_FILE)
+    df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df['timestamp']), name='timestamp').as_unit('ns')).drop(columns='timestamp')
+    ts = df.index.asi8
+    values = np.vstack([df[c].to_numpy(dtype=np.float64) for c in COLUMNS])
+    o, h, l, c, v = values
+    ok = True
+
+    # 1. Indicators: whole-series definitions, and identical at every chunk size
+    prev = np.concatenate(([np.nan], c[:-1]))
+    change = np.diff(c)
+    gain, loss = rma(np.maximum(change, 0), 14), rma(np.maximum(-change, 0), 14)
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev), np.abs(l - prev)))
+    references = {
+        'RMA(14)': (lambda: StreamRMA(14), (c,), rma(c, 14)),
+        'RSI(14)': (lambda: StreamRSI(14), (c,), np.concatenate(([np.nan], 100 * gain / (gain + loss)))),
+        'ATR(14)': (lambda: StreamATR(14), (h, l, c), np.concatenate(([np.nan], rma(tr[1:], 14)))),
+        'rolling max(96)': (lambda: StreamRolling(96, 'max'), (h,), pd.Series(h).rolling(96).max().to_numpy()),
+        'rolling min(96)': (lambda: StreamRolling(96, 'min'), (l,), pd.Series(l).rolling(96).min().to_numpy()),
+        'Supertrend(10, 3)': (lambda: StreamSupertrend(10, 3.0), (h, l, c), supertrend_loop(h, l, c, 10, 3.0)),
+    }
+    for name, (make, arrays, expected) in references.items():
+        ok &= check(f"{name} matches the whole-series definition at chunk sizes {', '.join(map(str, CHUNKS))}",
+                    all(same(stream(make, arrays, size), expected) for size in CHUNKS + (len(c),)))
+
+    whole_ts, whole = resample_arrays(ts, values, '4h')
+    for size in CHUNKS:
+        resampler = StreamResampler('4h')
+        parts = [resampler.update(ts[s], values[:, s]) for s in chunked(len(ts), size)] + [resampler.flush()]
+        got_ts = np.concatenate([p[0] for p in parts])
+        got = np.concatenate([p[1] for p in parts], axis=1)
+        ok &= check(f"4h resampler over {size}-bar chunks matches resample_arrays ({len(got_ts)} bars)",
+                    np.array_equal(got_ts, whole_ts) and same(got, whole, rtol=1e-12))
+
+    # 2. Strategy signals don't depend on the chunking
+    full = run_signals(TrendPullbackStream, ts, values, '5m', len(ts))
+    ok &= check(f"TrendPullbackStream signals identical at chunk sizes {', '.join(map(str, CHUNKS))} "
+                f"({int(np.count_nonzero(np.diff(full['position'])))} position changes)",
+                all(all(np.array_equal(run_signals(TrendPullbackStream, ts, values, '5m', size)[k], full[k], equal_nan=True) for k in full)
+                    for size in CHUNKS))
+
+    # 3. Streaming engine vs BacktestEngine.run on the same signals
+    try:
+        from tools.wfo import BacktestEngine, Strategy
+    except ImportError as e:
+        print(f"⏭️ BacktestEngine comparison skipped ({e})")
+    else:
+        class Fixed(Strategy):
+            def generate_signals(self, frame):
+                return pd.DataFrame(self.params, index=frame.index)
+
+        class Replay(TrendPullbackStream):
+            def on_chunk(self, chunk_ts, bars):
+                rows = slice(*np.searchsorted(ts, chunk_ts[[0, -1]]) + [0, 1])
+                return {k: a[rows] for k, a in self.params.items()}
+
+        from tools.kernels import entry_levels
+        # Tight symmetric levels, so bars touching both exercise every ambiguity policy
+        full = dict(full, take_profit=entry_levels(full['position'], c, c * 0.003), stop=entry_levels(full['position'], c, -c * 0.003))
+        keys = ('total_return', 'win_rate', 'max_drawdown', 'sharpe', 'sortino', 'profit_factor', 'trades',
+                'trade_win_rate', 'avg_bars_held', 'exposure', 'turnover', 'annual_return', 'calmar')
+        for ambiguity in ('stop', 'tp', 'open'):
+            expected = BacktestEngine(leverage=2.0, ambiguity=ambiguity).run(df, Fixed(full))
+            results = [StreamingBacktest(leverage=2.0, ambiguity=ambiguity).run(
+                (( ts[s], values[:, s]) for s in chunked(len(ts), size)), Replay(full), '5m') for size in CHUNKS + (len(ts),)]
+            ok &= check(f"streaming engine ({ambiguity}) matches BacktestEngine.run: return {expected['total_return']:+.2%}, "
+                        f"{int(expected['trades'])} trades, Sharpe {expected['sharpe']:.2f}",
+                        all(np.isclose(r[k], expected[k], rtol=1e-9, atol=1e-12) for r in results for k in keys))
+
+    # 4. aggTrades -> bars
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(3)
+        n_trades = 2_000_000
+        trade_ts = np.sort(pd.Timestamp('2024-03-01').value // 1_000_000 + rng.integers(0, 14 * 86_400_000, n_trades))
+        price = np.round(3000 * np.exp(np.cumsum(rng.normal(0, 0.0002, n_trades))), 2)
+        qty = np.round(rng.exponential(0.5, n_trades), 4)
+        path = os.path.join(tmp, 'ETHUSDT-aggTrades-2024-03.csv')
+        pd.DataFrame({'agg_trade_id': np.arange(n_trades), 'price': price, 'quantity': qty, 'first_trade_id': np.arange(n_trades),
+                      'last_trade_id': np.arange(n_trades), 'transact_time': trade_ts, 'is_buyer_maker': rng.random(n_trades) > 0.5,
+                      'is_best_match': True}).to_csv(path, index=False, header=False)
+        expected_ts, expected = resample_arrays(trade_ts * 1_000_000, np.vstack([price, price, price, price, qty]), '1m')
+        t0 = time.perf_counter()
+        parts = list(trade_bars(trade_chunks(path, chunk_rows=300_000), '1m'))
+        elapsed = time.perf_counter() - t0
+        got_ts = np.concatenate([p[0] for p in parts])
+        got = np.concatenate([p[1] for p in parts], axis=1)
+        ok &= check(f"{n_trades:,} aggTrades -> {len(got_ts):,} 1m bars in 300k-trade chunks ({n_trades / elapsed:,.0f} trades/s) "
+                    f"match one resample", np.array_equal(got_ts, expected_ts) and same(got, expected, rtol=1e-12))
+        metrics = StreamingBacktest().run(trade_bars(trade_chunks(path, 300_000), '1m'), TrendPullbackStream(PARAMS), '1m')
+        print(f"   TrendPullbackStream on the trade bars: {metrics['trades']} trades, {metrics['bars_per_sec']:,.0f} bars/s")
+
+        # 5. Years of 1m bars: bounded memory, same result at every chunk size
+        store = MarketStore(os.path.join(tmp, 'store'))
+        syn_ts, syn = synthetic_1m(YEARS_1M)
+        store.write('SYNUSDT', '1m', pd.DataFrame(syn.T, index=pd.DatetimeIndex(syn_ts.view('datetime64[ns]'), name='timestamp'), columns=COLUMNS))
+        data_mb = (syn.nbytes + syn_ts.nbytes) / 1e6
+        del syn_ts, syn
+        runs = {}
+        for size in (50_000, 250_000):
+            run = lambda: StreamingBacktest().run(store_chunks(store, 'SYNUSDT', '1m', size), TrendPullbackStream(PARAMS), '1m')
+            metrics = run()
+            # Peak from a second, traced run (tracemalloc slows the pure-Python kernel down a lot)
+            tracemalloc.start()
+            run()
+            metrics['peak'] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            runs[size] = metrics
+            print(f"   {metrics['bars']:,} 1m bars ({data_mb:.0f} MB stored) in {size:,}-bar chunks: {metrics['seconds']:.1f}s "
+                  f"({metrics['bars_per_sec']:,.0f} bars/s), peak {metrics['peak']:.0f} MB traced, {metrics['trades']} trades")
+        a, b = runs[50_000], runs[250_000]
+        ok &= check(f"{YEARS_1M}y of 1m bars: same result at both chunk sizes, peak memory follows the chunk size "
+                    f"({a['peak']:.0f} MB / {b['peak']:.0f} MB with {data_mb:.0f} MB of bars)",
+                    a['trades'] == b['trades'] and np.isclose(a['total_return'], b['total_return'], rtol=1e-9) and
+                    a['peak'] < b['peak'] and a['peak'] < data_mb / 2)
+
+    print("\n✅ Streaming checks passed" if ok else "\n❌ Streaming checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run from scripts/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from tools.market_store import MarketStore, COLUMNS
+from tools.timeframes import resample_arrays, derive
+from tools.indicator_cache import AGG_DICT, CACHE
+
+# Derived timeframes: numpy bucketing vs pandas resample (5m -> 15m / 1h / 4h / 1d, 1m with gaps,
+# Monday-aligned weeks), bars derived from ETHUSDT_5m vs the separately downloaded 15m / 1h
+# files, incremental updates vs a full rebuild, and a SmartHybrid WFO reading the stored 4h
+# bars instead of resampling. Uses a temporary store root.
+
+DATA_FILE = 'data/ETHUSDT_5m.csv'
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+def arrays_of(frame):
+    return frame.index.as_unit('ns').asi8, np.vstack([frame[c].to_numpy(dtype=np.float64) for c in COLUMNS])
+
+def same_as_pandas(frame, timeframe, rule, **resample_kwargs):
+    ts, values = resample_arrays(*arrays_of(frame), timeframe)
+    expected = frame.resample(rule, **resample_kwargs).agg(AGG_DICT).dropna()
+    return (np.array_equal(ts, expected.index.as_unit('ns').asi8) and
+            all(np.array_equal(values[k], expected[c].to_numpy()) for k, c in enumerate(COLUMNS[:4])) and
+            np.allclose(values[4], expected['volume'].to_numpy(), rtol=1e-12))
+
+def synthetic_1m(n=200_000, seed=4):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2024-01-03 13:07', periods=n, freq='1min')
+    keep = rng.random(n) > 0.02 # ~2% missing bars, plus a 6h outage
+    keep[50_000:50_360] = False
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    df = pd.DataFrame({'open': np.roll(close, 1), 'high': close * 1.001, 'low': close * 0.999,
+                       'close': close, 'volume': rng.uniform(0, 10, n)}, index=idx)
+    return df[keep]
+
+def main():
+    if not os.path.exists(DATA_FILE):
+        print(f"Data file {DATA_FILE} not found. Run downloader first.")
+        return
+
+    base = pd.read_csv(DATA_FILE)
+    base = base.set_index(pd.DatetimeIndex(pd.to_datetime(base['timestamp']), name='timestamp')).drop(columns='timestamp')
+    ok = True
+
+    # 1. Same bars as pandas resample
+    for tf, rule in (('15m', '15min'), ('1h', '1h'), ('4h', '4h'), ('1d', '1D')):
+        ok &= check(f"5m -> {tf} matches resample('{rule}')", same_as_pandas(base, tf, rule))
+    minute = synthetic_1m()
+    for tf, rule in (('5m', '5min'), ('1h', '1h'), ('4h', '4h')):
+        ok &= check(f"1m with gaps -> {tf} matches resample('{rule}')", same_as_pandas(minute, tf, rule))
+    ok &= check("1m -> 1w opens on Monday 00:00 UTC (resample('W-MON', closed/label left))",
+                same_as_pandas(minute, '1w', 'W-MON', closed='left', label='left'))
+
+    t0 = time.perf_counter()
+    for _ in range(5):
+        resample_arrays(*arrays_of(base), '4h')
+    t_np = (time.perf_counter() - t0) / 5
+    t0 = time.perf_counter()
+    for _ in range(5):
+        base.resample('4h').agg(AGG_DICT).dropna()
+    t_pd = (time.perf_counter() - t0) / 5
+    print(f"   4h from {len(base):,} 5m bars: reduceat {t_np * 1000:.1f} ms vs resample {t_pd * 1000:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketStore(os.path.join(tmp, 'store'))
+        store.import_csv(DATA_FILE)
+
+        # 2. Derived vs downloaded higher timeframes (exchange-aligned buckets -> same bars)
+        derive(store, 'ETHUSDT', '5m', ('15m', '1h', '4h'))
+        for tf in ('15m', '1h'):
+            path = f"data/ETHUSDT_{tf}.csv"
+            if not os.path.exists(path):
+                continue
+            downloaded = pd.read_csv(path)
+            downloaded = downloaded.set_index(pd.DatetimeIndex(pd.to_datetime(downloaded['timestamp'])).as_unit('ns')).drop(columns='timestamp')
+            derived = store.load('ETHUSDT', tf)
+            # Complete buckets only: the 5m file's first / last buckets may be partial, and the
+            # downloaded file's last bar was still forming when it was fetched
+            common = derived.index[1:-1].intersection(downloaded.index[:-1])
+            ohlc = np.isclose(derived.loc[common, COLUMNS[:4]].to_numpy(), downloaded.loc[common, COLUMNS[:4]].to_numpy(), rtol=0, atol=1e-9).all(axis=1)
+            vol = np.abs(derived.loc[common, 'volume'].to_numpy() / downloaded.loc[common, 'volume'].to_numpy() - 1)
+            ok &= check(f"derived {tf} vs downloaded {path}: {ohlc.mean():.2%} of {len(common):,} bars identical OHLC, "
+                        f"max volume rel diff {vol.max():.1e}", len(common) > 0 and ohlc.all() and vol.max() < 1e-9)
+
+        # 3. Incremental update == full rebuild
+        cut = int(len(base) * 0.6) + 7 # Mid-bucket, so the last stored 4h / 1h bars are partial
+        inc = MarketStore(os.path.join(tmp, 'incremental'))
+        inc.write('ETHUSDT', '5m', base.iloc[:cut])
+        derive(inc, 'ETHUSDT', '5m')
+        inc.append('ETHUSDT', '5m', base.iloc[cut:])
+        t0 = time.perf_counter()
+        modes = derive(inc, 'ETHUSDT', '5m')
+        t_inc = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        derive(store, 'ETHUSDT', '5m', full=True)
+        t_full = time.perf_counter() - t0
+        same = all(np.array_equal(inc.load('ETHUSDT', tf).to_numpy(), store.load('ETHUSDT', tf).to_numpy()) and
+                   np.array_equal(inc.load('ETHUSDT', tf).index.asi8, store.load('ETHUSDT', tf).index.asi8) for tf in modes)
+        ok &= check(f"incremental update ({', '.join(f'{k} {v}' for k, v in modes.items())}) equals a full rebuild "
+                    f"({t_inc * 1000:.0f} ms vs {t_full * 1000:.0f} ms)", same and set(modes.values()) == {'incremental'})
+        ok &= check("second derive with no new base bars is a no-op", set(derive(inc, 'ETHUSDT', '5m').values()) == {'current'})
+
+        # 4. SmartHybrid WFO: stored 4h bars instead of resampling, same results
+        sys.path.append(os.path.join(ROOT, 'backups', 'unused_strategies'))
+        try:
+            from smart_hybrid import SmartHybridStrategy
+        except ImportError as e:
+            print(f"⏭️ SmartHybrid WFO skipped ({e})")
+        else:
+            from tools.wfo import WFOOptimizer
+            grid = {'st_len': [10], 'st_mult': [2.0, 3.0], 'rsi_len': [14], 'rsi_buy': [35, 45], 'atr_len': [14], 'tp_mult': [2.0]}
+            from_csv = WFOOptimizer(DATA_FILE, 20, 5, market_store=MarketStore(os.path.join(tmp, 'empty')))
+            a = from_csv.optimize(SmartHybridStrategy, grid, leverage=2.0)
+            CACHE.clear()
+            from_store = WFOOptimizer(('ETHUSDT', '5m'), 20, 5, market_store=store)
+            misses = CACHE.snapshot()['misses']
+            b = from_store.optimize(SmartHybridStrategy, grid, leverage=2.0)
+            resampled = sum(1 for key in CACHE._entries if key[1] == 'resample' and CACHE._entries[key][1] > 0)
+            same = len(a) == len(b) and all(x['params'] == y['params'] and np.isclose(x['return'], y['return'], rtol=1e-9, atol=1e-12)
+                                            for x, y in zip(a, b))
+            ok &= check(f"SmartHybrid WFO from stored 4h bars matches the resampling run ({len(b)} windows, "
+                        f"{resampled} resamples computed, {CACHE.snapshot()['misses'] - misses} cache misses)", same and resampled == 0)
+
+    print("\n✅ Timeframe checks passed" if ok else "\n❌ Timeframe checks failed")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
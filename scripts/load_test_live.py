@@ -0,0 +1,172 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+# Add project root so `core` / `tools` / `run_live` are importable when run from scripts/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core import clock, telemetry
+from core import state as state_module
+from core import analytics as analytics_module
+from core.config import SYMBOLS
+from tools.mock_exchange import MockExchange
+from bench_live import make_workdir, working_dir
+
+# Whole run_bot loop (scan, orders, state, history) against tools/mock_exchange.py: hundreds of
+# synthetic symbols on an accelerated clock, no network. Reports cycle times (core/telemetry.py
+# phases), scan throughput, whether a cycle fits in a 5m bar at that speed, memory (RSS over the
+# run, growth after the first cycle) and what the exchange saw (orders, rejections, fees).
+#   python scripts/load_test_live.py --symbols 300 --speed 100 --minutes 120
+
+BAR_SECONDS = 300
+
+def rss_mb():
+    """Resident set size now (peak when /proc is unavailable)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def cycles_done():
+    return telemetry.snapshot()['phases'].get('cycle', {}).get('count', 0)
+
+class MemorySampler(threading.Thread):
+    """RSS every `interval` seconds, tagged with the number of finished cycles."""
+    def __init__(self, interval=0.25):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.samples.append((cycles_done(), rss_mb()))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.samples.append((cycles_done(), rss_mb()))
+
+def run(exchange, workdir):
+    """run_bot until the exchange runs out of replay; returns (wall seconds, memory samples, bot output tail)."""
+    import run_live
+    from core.exchange import use_exchange
+
+    saved_symbols = list(SYMBOLS)
+    saved = (state_module._live_writer, analytics_module._analytics)
+    SYMBOLS[:] = exchange.symbols # run_live scans the shared list
+    use_exchange(exchange)
+    clock.set_clock(exchange.clock)
+    telemetry.reset()
+    state_module._live_writer, analytics_module._analytics = None, None
+    sampler = MemorySampler()
+    try:
+        sampler.start()
+        t0 = time.perf_counter()
+        with working_dir(workdir), contextlib.redirect_stdout(io.StringIO()):
+            run_live.run_bot()
+        wall = time.perf_counter() - t0
+    finally:
+        sampler.stop()
+        if state_module._live_writer is not None:
+            state_module._live_writer.close()
+        state_module._live_writer, analytics_module._analytics = saved
+        SYMBOLS[:] = saved_symbols
+        use_exchange(None)
+        clock.reset_clock()
+    with open(os.path.join(workdir, 'logs', 'bot_output.log')) as f:
+        tail = f.read().splitlines()[-5:]
+    return wall, sampler.samples, tail
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the live loop on the local futures stand-in")
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--speed', type=float, default=100.0, help="Simulated seconds per wall second")
+    parser.add_argument('--minutes', type=float, default=120.0, help="Simulated minutes to run")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Injected latency per exchange call")
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of market-data calls failing with -1001")
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--json', default=None, help="Also write the report here")
+    args = parser.parse_args()
+
+    try:
+        import run_live # noqa: F401 (the bot's own dependencies: ccxt, pandas_ta, dotenv)
+    except ImportError as e:
+        print(f"⏭️ Skipping load test: {e}")
+        return
+
+    rss_start = rss_mb()
+    t_build = time.perf_counter()
+    exchange = MockExchange.synthetic(args.symbols, speed=args.speed, until=timedelta(minutes=args.minutes),
+                                      balance=args.balance, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                                      fail_rate=args.fail_rate)
+    build = time.perf_counter() - t_build
+    print(f"🧪 {len(exchange.symbols)} synthetic symbols x {exchange.bars:,} bars (built in {build:.1f}s), "
+          f"x{args.speed:g} clock, {args.minutes:g} simulated minutes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wall, samples, tail = run(exchange, make_workdir(tmp))
+
+    report = telemetry.snapshot()
+    phases = report['phases']
+    cycle = phases.get('cycle')
+    if not cycle:
+        print("❌ The bot finished no cycle. Last output:\n   " + "\n   ".join(tail))
+        sys.exit(1)
+    analysed = phases.get('symbol_analysis', {}).get('count', 0)
+    scanning = phases.get('scan', {}).get('sum', 0.0)
+    fetched = phases.get('symbol_fetch', {}).get('count', 0)
+    sim_minutes = wall * args.speed / 60
+    after_first = [rss for done, rss in samples if done >= 1]
+    result = {
+        'symbols': len(exchange.symbols), 'speed': args.speed, 'wall_seconds': wall, 'simulated_minutes': sim_minutes,
+        'cycles': cycle['count'], 'cycle_p50_s': cycle['p50'], 'cycle_p95_s': cycle['p95'], 'cycle_max_s': cycle['max'],
+        'bars_per_cycle_p95': cycle['p95'] * args.speed / BAR_SECONDS,
+        'symbols_analysed_per_s': analysed / wall, 'symbols_per_scan_second': analysed / scanning if scanning else 0.0,
+        'fetches': fetched,
+        'phases_p95_ms': {name: row['p95'] * 1000 for name, row in phases.items()},
+        'rss_start_mb': rss_start, 'rss_peak_mb': max(rss for _, rss in samples), 'rss_end_mb': samples[-1][1],
+        'rss_growth_after_first_cycle_mb': after_first[-1] - after_first[0] if after_first else 0.0,
+        'exchange': exchange.summary()
+    }
+
+    print(f"\n   Wall {wall:.1f}s = {sim_minutes:.0f} simulated minutes, {cycle['count']} cycles")
+    print(f"   Cycle p50 {cycle['p50']:.2f}s | p95 {cycle['p95']:.2f}s | max {cycle['max']:.2f}s (wall)")
+    print(f"   Scan: {result['symbols_per_scan_second']:.0f} symbols/s while scanning, {result['symbols_analysed_per_s']:.1f}/s overall, "
+          f"{fetched:,} candle fetches")
+    for name, ms in result['phases_p95_ms'].items():
+        print(f"      {name:<16} p95 {ms:9.1f} ms")
+    print(f"   Memory: {rss_start:.0f} MB before the fixtures, peak {result['rss_peak_mb']:.0f} MB, "
+          f"{result['rss_growth_after_first_cycle_mb']:+.1f} MB after the first cycle")
+    ex = result['exchange']
+    rejected = ', '.join(f"{n}x {code}" for code, n in ex['rejected'].items()) or 'none'
+    print(f"   Exchange: {ex['orders']} orders (rejected: {rejected}), {ex['open_positions']} open, "
+          f"equity ${ex['equity']:,.2f} (fees ${ex['fees']:.2f}, funding ${ex['funding']:.2f}), {sum(ex['calls'].values()):,} calls")
+    if result['bars_per_cycle_p95'] <= 1:
+        print(f"✅ A p95 cycle fits in one 5m bar at x{args.speed:g}")
+    else:
+        print(f"⚠️ A p95 cycle spans {result['bars_per_cycle_p95']:.1f} 5m bars at x{args.speed:g}: "
+              f"the bot keeps up with at most x{args.speed / result['bars_per_cycle_p95']:.0f} on this machine")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Report saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
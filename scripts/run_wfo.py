@@ -3,6 +3,8 @@ import os
 import pandas as pd
 import numpy as np
 from tools.wfo import WFOOptimizer
+from tools.parallel_wfo import ParallelWFO
+from tools.result_store import ResultStore
 from strategies.trend_following import TrendFollowingStrategy
 from strategies.ml_strategy import MLStrategy
 from strategies.meta_strategy import MetaMLStrategy
@@ -39,19 +41,7 @@ def analyze_results(results, strategy_name):
         
     return total_return
 
-def main():
-    # Switch to 5m data for High Frequency WFO
-    data_file = 'data/ETHUSDT_5m.csv'
-    if not os.path.exists(data_file):
-        print(f"Data file {data_file} not found. Run downloader first.")
-        return
-
-    print(f"Loading data from {data_file}...")
-    
-    # WFO Settings
-    # Shorter windows for 5m data (30 days train, 5 days test)
-    optimizer = WFOOptimizer(data_file, train_window_days=20, test_window_days=5)
-    
+def run_benchmarks(executor, store=None):
     # 1. Baseline: Hybrid Strategy
     print("\n>>> BENCHMARKING: Hybrid Strategy (Baseline)")
     hybrid_params = {
@@ -61,7 +51,7 @@ def main():
         'rsi_buy': [40],
         'breakout_window': [96] 
     }
-    ret_hybrid = analyze_results(optimizer.optimize(HybridStrategy, hybrid_params, leverage=2.0), "Hybrid_Futures_2x_LongShort")
+    ret_hybrid = analyze_results(executor.optimize(HybridStrategy, hybrid_params, leverage=2.0, store=store), "Hybrid_Futures_2x_LongShort")
     
     # 2. Challenger 1: Smart Hybrid (ATR TP + Scalping)
     print("\n>>> BENCHMARKING: Smart Hybrid Strategy (Challenger 1)")
@@ -73,7 +63,7 @@ def main():
         'atr_len': [14],
         'tp_mult': [1.5, 2.0, 3.0] # Tighter TP
     }
-    ret_smart = analyze_results(optimizer.optimize(SmartHybridStrategy, smart_params, leverage=2.0), "Smart_Hybrid_Futures_2x_LongShort")
+    ret_smart = analyze_results(executor.optimize(SmartHybridStrategy, smart_params, leverage=2.0, store=store), "Smart_Hybrid_Futures_2x_LongShort")
 
     # 3. Challenger 2: Bollinger Hybrid
     print("\n>>> BENCHMARKING: Bollinger Hybrid Strategy (Challenger 2)")
@@ -84,7 +74,32 @@ def main():
         'bb_std': [2.0, 2.5],
         'rsi_len': [14]
     }
-    ret_bb = analyze_results(optimizer.optimize(BollingerHybridStrategy, bb_params, leverage=2.0), "Bollinger_Hybrid_Futures_2x")
+    ret_bb = analyze_results(executor.optimize(BollingerHybridStrategy, bb_params, leverage=2.0, store=store), "Bollinger_Hybrid_Futures_2x")
+    
+    return ret_hybrid, ret_smart, ret_bb
+
+def main():
+    # Switch to 5m data for High Frequency WFO
+    data_file = 'data/ETHUSDT_5m.csv'
+    if not os.path.exists(data_file):
+        print(f"Data file {data_file} not found. Run downloader first.")
+        return
+
+    print(f"Loading data from {data_file}...")
+    
+    # WFO Settings
+    # Shorter windows for 5m data (30 days train, 5 days test)
+    optimizer = WFOOptimizer(data_file, train_window_days=20, test_window_days=5)
+    
+    # One process pool + shared OHLCV block for all three benchmarks.
+    # Evaluations and finished windows are cached in results/wfo_cache.sqlite, so reruns
+    # and interrupted runs pick up where they left off.
+    executor = ParallelWFO(optimizer, workers=os.cpu_count())
+    store = ResultStore()
+    try:
+        ret_hybrid, ret_smart, ret_bb = run_benchmarks(executor, store)
+    finally:
+        executor.close()
     
     print("\n" + "="*40)
     print("CHAMPIONSHIP RESULT")
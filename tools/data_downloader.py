@@ -1,80 +1,352 @@
-import ccxt
-import pandas as pd
-import time
-from datetime import datetime, timedelta
+import argparse
+import json
 import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+
+# Add project root so `tools` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore
+from tools.timeframes import timeframe_ms, derive as derive_timeframes
+from core.data_quality import DEFAULT_POLICY, validate_ohlcv, scan, issues
+
+# --- HISTORICAL DOWNLOADER ---
+# Every (symbol, timeframe) series is paged by its own worker thread; all workers draw from one
+# token bucket, so the request rate stays under the exchange budget however many series run.
+# Series resume from the last bar in the market store and backfill any range before the first
+# stored bar. Only closed bars are stored: the re-fetched last bar then matches the stored one and
+# the resume is a plain in-place append (a replaced bar would cost a new store version). Pages are
+# flushed into the store every `flush_rows` bars, so an interrupted run loses at most one flush;
+# how far each backfill got is kept in the manifest ('backfill'), so the hole an interrupted
+# backfill leaves between its last flush and the older first bar is fetched on the next run.
+# Failed requests retry with exponential backoff and give up after `max_retries`; a 429 / 418
+# pauses the whole bucket for the server's Retry-After.
+
+BINANCE_URL = 'https://api.binance.com'
+
+
+class RateLimitError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PermanentError(Exception):
+    """Request that will never succeed (bad symbol / interval): no retries."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity` (default 1 = evenly paced)."""
+    def __init__(self, rate, capacity=1.0, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.acquired = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # Tolerance: a refill landing a rounding error short of `weight` would otherwise spin on ~0s waits
+                if now >= self.blocked_until and self.tokens >= weight - 1e-9:
+                    self.tokens -= weight
+                    self.acquired += weight
+                    return
+                wait = max(self.blocked_until - now, (weight - self.tokens) / self.rate)
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        """Blocks every worker for `seconds` (server-side rate limit hit) and drains the burst."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+            self.tokens = 0.0
+
+
+# --- SOURCES ---
+# fetch(symbol, timeframe, since_ms, limit) -> [[open_time_ms, open, high, low, close, volume], ...]
+# with open_time >= since_ms, oldest first.
+
+def get_json(url, params, timeout=10):
+    """GET url?params as JSON; 429 / 418 -> RateLimitError, other 4xx -> PermanentError."""
+    try:
+        with urllib.request.urlopen(f"{url}?{urllib.parse.urlencode(params)}", timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        if e.code in (418, 429):
+            retry_after = e.headers.get('Retry-After')
+            raise RateLimitError(f"HTTP {e.code}", float(retry_after) if retry_after else None) from e
+        if 400 <= e.code < 500:
+            raise PermanentError(f"HTTP {e.code}: {e.read()[:200]!r}") from e
+        raise
+
+class BinanceKlines:
+    """Binance-compatible REST klines (/api/v3/klines); base_url can point at a local stand-in."""
+    def __init__(self, base_url=BINANCE_URL, path='/api/v3/klines', timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.path = path
+        self.timeout = timeout
+
+    def fetch(self, symbol, timeframe, since, limit=1000):
+        rows = get_json(f"{self.base_url}{self.path}", {'symbol': symbol.split(':')[0].replace('/', ''), 'interval': timeframe,
+                                                         'startTime': int(since), 'limit': limit}, self.timeout)
+        return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in rows]
+
+class CcxtSource:
+    """Any ccxt exchange's fetch_ohlcv (one client per worker thread; ccxt clients aren't shared)."""
+    def __init__(self, exchange_id='binance', config=None):
+        import ccxt
+        self.ccxt = ccxt
+        self.exchange_id = exchange_id
+        self.config = config or {}
+        self._local = threading.local()
+
+    def fetch(self, symbol, timeframe, since, limit=1000):
+        if not hasattr(self._local, 'exchange'):
+            # ccxt's own throttle is off: the shared TokenBucket paces requests
+            self._local.exchange = getattr(self.ccxt, self.exchange_id)({**self.config, 'enableRateLimit': False})
+        try:
+            return self._local.exchange.fetch_ohlcv(symbol, timeframe, since, limit)
+        except (self.ccxt.RateLimitExceeded, self.ccxt.DDoSProtection) as e:
+            raise RateLimitError(str(e)) from e
+        except (self.ccxt.BadSymbol, self.ccxt.BadRequest, self.ccxt.AuthenticationError) as e:
+            raise PermanentError(str(e)) from e
+
+
+class Downloader:
+    def __init__(self, source=None, store=None, rate=10.0, workers=4, limit=1000, max_retries=5, backoff=1.0,
+                 flush_rows=100_000, quality=None, sleep=time.sleep):
+        # rate: requests/second shared by all workers (Binance allows ~20/s of klines by weight)
+        # quality: core/data_quality policy for fetched pages (spikes clamped by default); gaps are
+        # only reported here, the store keeps what the exchange has
+        self.source = source or BinanceKlines()
+        self.store = store or MarketStore()
+        self.bucket = TokenBucket(rate, sleep=sleep)
+        self.workers = workers
+        self.limit = limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.flush_rows = flush_rows
+        self.quality = {**DEFAULT_POLICY, **(quality or {}), 'gaps': 'flag'}
+        self.sleep = sleep
+        self._store_lock = threading.Lock() # The manifest is read-modify-write
+
+    def download(self, symbols, timeframes, days=365, until=None, derive=()):
+        """
+        Brings every (symbol, timeframe) up to `until` (default now; naive = UTC, like the stored bars)
+        with at least `days` of history. Returns one report row per series (rows added, requests, retries, status).
+        derive: higher timeframes to rebuild incrementally (tools/timeframes.py) from each downloaded
+        series they are a multiple of, e.g. download(..., ['5m'], derive=['15m', '1h', '4h']).
+        """
+        until_ms = int(pd.Timestamp(until).timestamp() * 1000) if until is not None else int(time.time() * 1000)
+        since_ms = until_ms - int(timedelta(days=days).total_seconds() * 1000)
+        series = [(s, tf) for s in symbols for tf in timeframes]
+        t0 = time.perf_counter()
+        print(f"⬇️ Downloading {len(series)} series with {self.workers} workers at {self.bucket.rate:g} req/s...")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            reports = list(pool.map(lambda job: self._series(*job, since_ms, until_ms), series))
+        report = pd.DataFrame(reports)
+        if derive:
+            self._derive(report, derive)
+        print(f"✅ {int(report['rows'].sum()):,} bars in {time.perf_counter() - t0:.1f}s "
+              f"({int(report['requests'].sum())} requests, {int(report['retries'].sum())} retries, "
+              f"{int((report['status'] != 'ok').sum())} failed series)")
+        return report
+
+    def _derive(self, report, targets):
+        for row in report[report['status'] == 'ok'].itertuples():
+            base_ms = timeframe_ms(row.timeframe)
+            wanted = [tf for tf in targets if timeframe_ms(tf) > base_ms and timeframe_ms(tf) % base_ms == 0]
+            if wanted and self.store.has(row.symbol, row.timeframe):
+                modes = derive_timeframes(self.store, row.symbol, row.timeframe, wanted)
+                print(f"📐 {row.symbol} {', '.join(f'{tf} {mode}' for tf, mode in modes.items())} from {row.timeframe}")
+
+    def ranges(self, symbol, timeframe, since_ms, until_ms):
+        """
+        [start, end] ms ranges still missing from the store, oldest first: a backfill before the first
+        bar, what an interrupted earlier backfill left unfetched, then the resume from the last bar.
+        """
+        step = self._step(timeframe)
+        info = self._info(symbol, timeframe)
+        last = self._last_ms(symbol, timeframe)
+        if info is None or last is None:
+            return [(since_ms, until_ms)]
+        first = int(pd.Timestamp(info['start']).value // 1_000_000)
+        # history_from: an earlier run already searched back this far (nothing older exists)
+        searched = info.get('history_from', first)
+        ranges = [(since_ms, first - step)] if first - step >= since_ms and since_ms < searched else []
+        # backfill: [next, end] ranges an interrupted run had still to fetch (holes inside the stored span)
+        ranges += [tuple(r) for r in info.get('backfill') or []]
+        return ranges + [(last, until_ms)]
+
+    def _info(self, symbol, timeframe):
+        return self.store.info(symbol, timeframe)
+
+    def _last_ms(self, symbol, timeframe):
+        last = self.store.last_timestamp(symbol, timeframe)
+        return None if last is None else last // 1_000_000
+
+    def _set_meta(self, symbol, timeframe, **fields):
+        self.store.set_meta(symbol, timeframe, **fields)
+
+    def _save_backfill(self, symbol, timeframe, pending):
+        """Persists the unfetched part of each backfill range, so a rerun fills the hole an interruption leaves."""
+        with self._store_lock:
+            if self._info(symbol, timeframe) is not None:
+                self._set_meta(symbol, timeframe, backfill=[r for r in pending if r[0] <= r[1]] or None)
+
+    def _series(self, symbol, timeframe, since_ms, until_ms):
+        report = {'symbol': symbol, 'timeframe': timeframe, 'rows': 0, 'requests': 0, 'retries': 0, 'status': 'ok',
+                  'duplicates': 0, 'repaired': 0, 'missing_bars': 0}
+        step = self._step(timeframe)
+        ranges = self.ranges(symbol, timeframe, since_ms, until_ms)
+        closed = int(time.time() * 1000) - self._bar_ms(timeframe) # Open times of bars that have closed
+        # Every range but the last lies below stored bars: track how far each got (the last resumes from the newest bar)
+        pending = [list(r) for r in ranges[:-1]]
+        buffer = []
+
+        def flush(k):
+            added = self._flush(symbol, timeframe, buffer, report)
+            if k < len(pending):
+                pending[k][0] = buffer[-1][0] + step
+                self._save_backfill(symbol, timeframe, pending)
+            buffer.clear()
+            return added
 
-def fetch_ohlcv(symbol, timeframe, since, limit=1000):
-    exchange = ccxt.binance()
-    all_candles = []
-    
-    while True:
+        k = 0
         try:
-            print(f"Fetching {symbol} {timeframe} since {datetime.fromtimestamp(since/1000)}")
-            candles = exchange.fetch_ohlcv(symbol, timeframe, since, limit)
-            if not candles:
-                break
-            
-            all_candles.extend(candles)
-            since = candles[-1][0] + 1
-            
-            if len(candles) < limit:
-                break
-                
-            # Rate limit respect
-            time.sleep(exchange.rateLimit / 1000)
-            
+            for k, (start, end) in enumerate(ranges):
+                since = start
+                while since <= end:
+                    rows = self._fetch(symbol, timeframe, since, report)
+                    rows = [r for r in rows if since <= r[0] <= min(end, closed)]
+                    if not rows:
+                        break
+                    buffer.extend(rows)
+                    if len(buffer) >= self.flush_rows:
+                        report['rows'] += flush(k)
+                    if len(rows) < self.limit:
+                        break
+                    since = rows[-1][0] + step
+                if k < len(pending):
+                    # Backfill range done: store it before moving on and drop it from the pending list
+                    if buffer:
+                        report['rows'] += flush(k)
+                    pending[k][0] = end + 1
+                    self._save_backfill(symbol, timeframe, pending)
         except Exception as e:
-            print(f"Error: {e}")
-            time.sleep(5)
-            
-    return all_candles
-
-def save_data(symbol, timeframe, days=365):
-    # Calculate start time
-    start_date = datetime.now() - timedelta(days=days)
-    since = int(start_date.timestamp() * 1000)
-    
-    data = fetch_ohlcv(symbol, timeframe, since)
-    
-    if not data:
-        print(f"No data found for {symbol}")
-        return
-
-    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    
-    # Outlier Filtering (Robustness)
-    # If High is > 50% higher than Open and Close, likely a bad tick
-    # We replace with max of Open/Close * 1.1
-    
-    df['body_max'] = df[['open', 'close']].max(axis=1)
-    mask_high = df['high'] > df['body_max'] * 1.5
-    if mask_high.any():
-        print(f"⚠️ Detected {mask_high.sum()} outlier highs. Fixing...")
-        df.loc[mask_high, 'high'] = df.loc[mask_high, 'body_max'] * 1.1
-        
-    # Same for Low
-    df['body_min'] = df[['open', 'close']].min(axis=1)
-    mask_low = df['low'] < df['body_min'] * 0.5
-    if mask_low.any():
-        print(f"⚠️ Detected {mask_low.sum()} outlier lows. Fixing...")
-        df.loc[mask_low, 'low'] = df.loc[mask_low, 'body_min'] * 0.9
-        
-    # Drop helpers
-    df.drop(columns=['body_max', 'body_min'], inplace=True)
-    
-    # Ensure data directory exists
-    os.makedirs('data', exist_ok=True)
-    
-    filename = f"data/{symbol.replace('/', '')}_{timeframe}.csv"
-    df.to_csv(filename, index=False)
-    print(f"Saved {len(df)} rows to {filename}")
+            report['status'] = f"failed: {e}"
+            print(f"❌ {symbol} {timeframe}: {e}")
+        # Whatever was fetched before a failure is kept, so the next run resumes after it
+        if buffer:
+            report['rows'] += flush(k)
+        self._finish_series(symbol, timeframe, since_ms, report)
+        return report
+
+    def _step(self, timeframe):
+        """ms from a page's last row to the next page's `since`."""
+        return timeframe_ms(timeframe)
+
+    def _bar_ms(self, timeframe):
+        """How long a row keeps changing after its open time."""
+        return timeframe_ms(timeframe)
+
+    def _finish_series(self, symbol, timeframe, since_ms, report):
+        if report['status'] == 'ok' and self.store.has(symbol, timeframe):
+            with self._store_lock:
+                self.store.set_meta(symbol, timeframe, history_from=int(min(since_ms, self.store.info(symbol, timeframe).get('history_from', since_ms))))
+        if self.store.has(symbol, timeframe):
+            report['missing_bars'] = self._check_series(symbol, timeframe)['missing_bars']
+
+    def _check_series(self, symbol, timeframe):
+        """Quality report of the whole stored series (report only), kept in the manifest as `quality`."""
+        ts, values = self.store._open(symbol, timeframe)
+        found = scan(ts, values, timeframe, spikes='flag', gaps='flag')[2]
+        with self._store_lock:
+            self.store.set_meta(symbol, timeframe, quality=found)
+        if issues(found):
+            print(f"🔎 {symbol} {timeframe}: {issues(found)}")
+        return found
+
+    def _fetch(self, symbol, timeframe, since, report):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            report['requests'] += 1
+            try:
+                return self.source.fetch(symbol, timeframe, since, self.limit)
+            except PermanentError:
+                raise
+            except RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"⏳ {symbol} {timeframe}: rate limited, pausing all workers")
+                self.bucket.pause(e.retry_after or self.backoff * 2 ** attempt)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"⚠️ {symbol} {timeframe}: {e} (retry {attempt + 1}/{self.max_retries})")
+                self.sleep(self.backoff * 2 ** attempt)
+            report['retries'] += 1
+
+    def _flush(self, symbol, timeframe, rows, report):
+        df, found = validate_ohlcv(rows, timeframe, symbol, **self.quality)
+        report['duplicates'] += found['duplicates']
+        report['repaired'] += found['repaired']
+        if found['repaired'] or found['dropped']:
+            print(f"⚠️ {symbol} {timeframe}: {issues(found)} ({found['repaired']} repaired, {found['dropped']} dropped)")
+        with self._store_lock:
+            before = (self.store.info(symbol, timeframe) or {}).get('rows', 0)
+            after = self.store.append(symbol, timeframe, df)
+        return after - before
+
+
+def save_data(symbol, timeframe, days=365, csv=True, derive=()):
+    """Single-series download into the market store (plus the data/<SYMBOL>_<tf>.csv export)."""
+    downloader = Downloader(workers=1)
+    downloader.download([symbol], [timeframe], days=days, derive=derive)
+    if csv and downloader.store.has(symbol, timeframe):
+        path = downloader.store.export_csv(symbol, timeframe)
+        print(f"Saved {downloader.store.info(symbol, timeframe)['rows']} rows to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent, resumable OHLCV downloader into the market store")
+    parser.add_argument('--symbols', nargs='+', default=['BTC/USDT', 'ETH/USDT'])
+    parser.add_argument('--timeframes', nargs='+', default=['15m', '1h'])
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=10.0, help="Shared request budget (requests/second)")
+    parser.add_argument('--base-url', default=BINANCE_URL, help="Klines API root (e.g. a local stand-in)")
+    parser.add_argument('--ccxt', metavar='EXCHANGE', help="Use ccxt's fetch_ohlcv for this exchange instead of the REST klines")
+    parser.add_argument('--store', default=None, help="Market store root (default data/store)")
+    parser.add_argument('--derive', nargs='*', default=[], metavar='TF', help="Higher timeframes to build from the downloaded ones (e.g. 15m 1h 4h)")
+    parser.add_argument('--csv', action='store_true', help="Also export data/<SYMBOL>_<tf>.csv")
+    args = parser.parse_args()
+
+    source = CcxtSource(args.ccxt) if args.ccxt else BinanceKlines(args.base_url)
+    store = MarketStore(args.store) if args.store else MarketStore()
+    downloader = Downloader(source, store, rate=args.rate, workers=args.workers)
+    report = downloader.download(args.symbols, args.timeframes, days=args.days, derive=args.derive)
+    print(report.to_string(index=False))
+    if args.csv:
+        for symbol in args.symbols:
+            for tf in args.timeframes:
+                if store.has(symbol, tf):
+                    print(f"Saved {store.export_csv(symbol, tf)}")
 
 if __name__ == "__main__":
-    symbols = ['BTC/USDT', 'ETH/USDT']
-    timeframes = ['15m', '1h']
-    
-    for symbol in symbols:
-        for tf in timeframes:
-            save_data(symbol, tf, days=180)
+    main()
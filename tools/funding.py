@@ -0,0 +1,217 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, symbol_key
+from tools.timeframes import timeframe_ms
+from tools.data_downloader import Downloader, get_json
+
+# --- FUNDING RATES / MARK PRICES ---
+# Historical USDT-M funding settlements and mark-price klines, stored as event series next to
+# the symbol's bars in the market store ('funding': rate, mark_price; 'mark_<tf>': OHLC), and
+# searchsorted joins that line them up with any bar index without per-bar lookups:
+#   asof(...)      last event at or before each query time (signals: the rate known at a bar close)
+#   per_bar(...)   events settled inside each bar (cash flows: what the position held over it pays)
+#   bar_funding()  both for a stored symbol as frame columns. A 'funding' column is charged by
+#                  wfo.BacktestEngine (and tools/streaming.py / tools/portfolio.py take the events)
+# Longs pay a positive rate, shorts receive it, on the notional at the settlement's mark price.
+
+FUTURES_URL = 'https://fapi.binance.com'
+FUNDING = 'funding'
+FUNDING_COLUMNS = ['rate', 'mark_price']
+MARK_COLUMNS = ['open', 'high', 'low', 'close']
+FUNDING_PAGE = 1000 # fundingRate limit (markPriceKlines allows 1500; one page size serves both)
+
+def mark_series(timeframe):
+    """'1h' -> 'mark_1h' (event series name of the mark-price klines)."""
+    return f"mark_{timeframe}"
+
+def _mark_timeframe(name):
+    return name[len('mark_'):]
+
+
+# --- SOURCE ---
+
+class BinanceFunding:
+    """Binance USDT-M REST: /fapi/v1/fundingRate and /fapi/v1/markPriceKlines (base_url can point at a stand-in)."""
+    def __init__(self, base_url=FUTURES_URL, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def fetch(self, symbol, series, since, limit=FUNDING_PAGE):
+        """series 'funding' -> [[time_ms, rate, mark_price], ...]; 'mark_<tf>' -> [[open_time_ms, o, h, l, c], ...]."""
+        market = symbol_key(symbol)
+        if series == FUNDING:
+            rows = get_json(f"{self.base_url}/fapi/v1/fundingRate", {'symbol': market, 'startTime': int(since), 'limit': limit}, self.timeout)
+            # Old settlements come without a mark price ('')
+            return [[int(r['fundingTime']), float(r['fundingRate']), float(r['markPrice']) if r.get('markPrice') else np.nan] for r in rows]
+        rows = get_json(f"{self.base_url}/fapi/v1/markPriceKlines", {'symbol': market, 'interval': _mark_timeframe(series),
+                                                                    'startTime': int(since), 'limit': limit}, self.timeout)
+        return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4])] for r in rows]
+
+
+class FundingDownloader(Downloader):
+    """
+    Downloader for the event series: same shared token bucket, retries, resume / backfill and
+    periodic flushes, with the series names ('funding', 'mark_1h'...) in place of timeframes.
+    """
+    def __init__(self, source=None, store=None, limit=FUNDING_PAGE, **kwargs):
+        super().__init__(source or BinanceFunding(), store, limit=limit, **kwargs)
+
+    def download(self, symbols, days=365, until=None, mark=('1h',)):
+        """Funding settlements plus mark-price klines of each `mark` timeframe, up to `until` (default now)."""
+        return super().download(symbols, [FUNDING] + [mark_series(tf) for tf in mark], days=days, until=until)
+
+    def _step(self, series):
+        # Settlements are irregular (8h, 4h or 1h depending on the market and the period)
+        return 1 if series == FUNDING else timeframe_ms(_mark_timeframe(series))
+
+    def _bar_ms(self, series):
+        return 0 if series == FUNDING else timeframe_ms(_mark_timeframe(series))
+
+    def _info(self, symbol, series):
+        return self.store.events_info(symbol, series)
+
+    def _last_ms(self, symbol, series):
+        last = self.store.last_event(symbol, series)
+        return None if last is None else last // 1_000_000
+
+    def _set_meta(self, symbol, series, **fields):
+        self.store.set_event_meta(symbol, series, **fields)
+
+    def _flush(self, symbol, series, rows, report):
+        rows = np.asarray(rows, dtype=np.float64)
+        ts = rows[:, 0].astype(np.int64)
+        if series == FUNDING:
+            # fundingTime carries a few ms of settlement jitter: snap to the minute so the event
+            # lands in the bar that closes at the settlement
+            ts = ts // 60_000 * 60_000
+        columns = FUNDING_COLUMNS if series == FUNDING else MARK_COLUMNS
+        with self._store_lock:
+            before = (self.store.events_info(symbol, series) or {}).get('rows', 0)
+            after = self.store.write_events(symbol, series, ts * 1_000_000, {c: rows[:, k + 1] for k, c in enumerate(columns)})
+        return after - before
+
+    def _finish_series(self, symbol, series, since_ms, report):
+        if report['status'] == 'ok' and self.store.has_events(symbol, series):
+            with self._store_lock:
+                searched = self.store.events_info(symbol, series).get('history_from', since_ms)
+                self.store.set_event_meta(symbol, series, history_from=int(min(since_ms, searched)))
+
+
+# --- JOINS ---
+
+def asof(event_ts, values, query_ts, max_age=None, fill=np.nan):
+    """
+    Value of the last event at or before each query time: one searchsorted over the sorted
+    event times. values: (n,) or (k, n); max_age (ns): older events count as missing (fill).
+    """
+    event_ts = np.asarray(event_ts, dtype=np.int64)
+    query_ts = np.asarray(query_ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(event_ts):
+        return np.full(values.shape[:-1] + query_ts.shape, fill)
+    idx = np.searchsorted(event_ts, query_ts, 'right') - 1
+    found = idx >= 0
+    idx = np.maximum(idx, 0)
+    if max_age is not None:
+        found &= query_ts - event_ts[idx] <= max_age
+    return np.where(found, np.take(values, idx, axis=-1), fill)
+
+def per_bar(event_ts, values, bar_ts, step):
+    """
+    Sum of the events settled inside each bar, (open, open + step]: what the position held
+    over the bar pays. Events in a gap between bars (no bar closing on them) are dropped.
+    """
+    event_ts = np.asarray(event_ts, dtype=np.int64)
+    bar_ts = np.asarray(bar_ts, dtype=np.int64)
+    n = len(bar_ts)
+    if not n or not len(event_ts):
+        return np.zeros(n)
+    bar = np.searchsorted(bar_ts + step, event_ts, 'left') # First bar closing at or after the event
+    inside = bar < n
+    inside[inside] = event_ts[inside] > bar_ts[bar[inside]]
+    return np.bincount(bar[inside], weights=np.nan_to_num(np.asarray(values, dtype=np.float64)[inside]), minlength=n)
+
+def bar_charges(event_ts, rates, marks, bar_ts, close, step):
+    """
+    per_bar() of rate * mark / close of the bar each settlement falls in: the engines charge
+    position * charge * close / previous close, so the rate is paid on the mark notional
+    (on the close where the mark is unknown, NaN).
+    """
+    event_ts = np.asarray(event_ts, dtype=np.int64)
+    if not len(bar_ts) or not len(event_ts):
+        return np.zeros(len(bar_ts))
+    bar = np.minimum(np.searchsorted(np.asarray(bar_ts, dtype=np.int64) + step, event_ts, 'left'), len(bar_ts) - 1)
+    scale = np.asarray(marks, dtype=np.float64) / np.asarray(close, dtype=np.float64)[bar]
+    scale = np.where(np.isfinite(scale), scale, 1.0)
+    return per_bar(event_ts, np.asarray(rates, dtype=np.float64) * scale, bar_ts, step)
+
+def funding_events(store, symbol, mark='1h'):
+    """(ts, rate, mark at settlement) of a stored symbol, the mark filled from mark_<mark> klines where Binance has none."""
+    event_ts, columns = store.events(symbol, FUNDING)
+    settle_mark = np.array(columns['mark_price'], dtype=np.float64)
+    if mark and store.has_events(symbol, mark_series(mark)):
+        mark_ts, mark_values = store.events(symbol, mark_series(mark))
+        known = asof(mark_ts + timeframe_ms(mark) * 1_000_000, mark_values['close'], event_ts)
+        settle_mark = np.where(np.isfinite(settle_mark), settle_mark, known)
+    return np.array(event_ts), np.array(columns['rate'], dtype=np.float64), settle_mark
+
+def bar_funding(store, symbol, frame, timeframe, mark='1h'):
+    """
+    Funding columns for an OHLCV frame (DatetimeIndex of bar open times, 'close') of `timeframe`:
+      funding       rate settled over each bar, scaled by mark / close: the engine charges
+                    position * funding * close / previous close, i.e. the rate on the mark notional
+      funding_rate  last settled rate known at the bar's close (for signals)
+      mark_basis    close / mark - 1 at the bar's close (when the mark_<mark> series is stored)
+    Bars before the first stored settlement get funding 0 and funding_rate NaN.
+    """
+    bar_ts = pd.DatetimeIndex(frame.index).as_unit('ns').asi8
+    step = timeframe_ms(timeframe) * 1_000_000
+    close = frame['close'].to_numpy(dtype=np.float64)
+    event_ts, rates, settle_mark = funding_events(store, symbol, mark)
+    out = pd.DataFrame(index=frame.index)
+    out['funding'] = bar_charges(event_ts, rates, settle_mark, bar_ts, close, step)
+    out['funding_rate'] = asof(event_ts, rates, bar_ts + step)
+    if mark and store.has_events(symbol, mark_series(mark)):
+        mark_ts, mark_values = store.events(symbol, mark_series(mark))
+        known = asof(mark_ts + timeframe_ms(mark) * 1_000_000, mark_values['close'], bar_ts + step) # Klines count at their close
+        out['mark_basis'] = close / known - 1
+    return out
+
+def with_funding(frame, store, symbol, timeframe, mark='1h'):
+    """frame plus the bar_funding() columns (a new frame; the input isn't modified)."""
+    return frame.join(bar_funding(store, symbol, frame, timeframe, mark))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historical funding rates and mark prices into the market store")
+    parser.add_argument('--symbols', nargs='+', default=['BTC/USDT', 'ETH/USDT'])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--mark', nargs='*', default=['1h'], metavar='TF', help="Mark-price kline timeframes")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=5.0, help="Shared request budget (requests/second)")
+    parser.add_argument('--base-url', default=FUTURES_URL)
+    parser.add_argument('--store', default=None, help="Market store root (default data/store)")
+    args = parser.parse_args()
+
+    store = MarketStore(args.store) if args.store else MarketStore()
+    downloader = FundingDownloader(BinanceFunding(args.base_url), store, rate=args.rate, workers=args.workers)
+    report = downloader.download(args.symbols, days=args.days, mark=args.mark)
+    print(report[['symbol', 'timeframe', 'rows', 'requests', 'retries', 'status']].rename(columns={'timeframe': 'series'}).to_string(index=False))
+    for symbol in args.symbols:
+        if store.has_events(symbol, FUNDING):
+            ts, columns = store.events(symbol, FUNDING)
+            rate = np.asarray(columns['rate'])
+            years = max((int(ts[-1]) - int(ts[0])) / (365 * 86_400 * 1e9), 1 / 365) if len(ts) else 1.0
+            print(f"💸 {symbol_key(symbol)}: {len(ts):,} settlements, mean {rate.mean():.4%}, "
+                  f"{(rate > 0).mean():.0%} positive, {rate.sum() / years:.1%} a year paid by a 1x long")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import hashlib
+import time
+import weakref
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+# --- INDICATOR CACHE ---
+# Grid searches re-run the same indicators for every combination (a tp_mult change still
+# recomputes RSI, ATR, the 4h resample and its Supertrend) and again for every overlapping
+# WFO window. Indicators are computed once over the full registered series, keyed by
+# (data fingerprint, indicator, params), and windows receive positional slices of the result.
+#
+# Note: a window's indicator values are warmed up on the history before it, so they can
+# differ from a from-scratch computation on the window over the first `length` bars.
+
+AGG_DICT = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+def fingerprint(df):
+    """Content hash of the index, OHLCV and funding columns (stable across processes)."""
+    h = hashlib.blake2b(digest_size=16)
+    # ns regardless of the index resolution, so a CSV load and the same bars from the market store match
+    h.update(np.ascontiguousarray(df.index.as_unit('ns').asi8).tobytes())
+    # 'funding' changes what the engine charges (tools/funding.py); frames without it hash as before
+    for col in ('open', 'high', 'low', 'close', 'volume', 'funding'):
+        if col in df.columns:
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+def _direction_column(frame, prefix):
+    cols = [c for c in frame.columns if c.startswith(prefix)]
+    return cols[0] if cols else None
+
+
+# --- INDICATORS ---
+# Each takes (cache, full_df, **params) and returns a Series/DataFrame aligned to full_df,
+# except 'resample' which returns the higher-timeframe bars.
+
+def _rsi(cache, df, length=14):
+    return ta.rsi(df['close'], length=length)
+
+def _ema(cache, df, length=20):
+    return pd.to_numeric(ta.ema(df['close'], length=length), errors='coerce')
+
+def _sma(cache, df, length=20):
+    return ta.sma(df['close'], length=length)
+
+def _atr(cache, df, length=14):
+    return ta.atr(df['high'], df['low'], df['close'], length=length)
+
+def _adx(cache, df, length=14):
+    adx = ta.adx(df['high'], df['low'], df['close'], length=length)
+    col = f"ADX_{length}"
+    return adx[col] if col in adx.columns else adx[adx.columns[0]]
+
+def _bbands(cache, df, length=20, std=2.0):
+    # Columns renamed to lower/mid/upper so strategies don't depend on pandas_ta's naming
+    bb = ta.bbands(df['close'], length=length, std=std)
+    if bb is None:
+        return None
+    return pd.DataFrame({
+        'lower': bb[_direction_column(bb, 'BBL')],
+        'mid': bb[_direction_column(bb, 'BBM')],
+        'upper': bb[_direction_column(bb, 'BBU')]
+    }, index=df.index)
+
+def _rolling_high(cache, df, window=20):
+    # Donchian high of the previous `window` candles (excludes the current one)
+    return df['high'].rolling(window=window).max().shift(1)
+
+def _rolling_low(cache, df, window=20):
+    return df['low'].rolling(window=window).min().shift(1)
+
+def _supertrend(cache, df, length=10, multiplier=3.0):
+    """Supertrend direction (1 / -1)."""
+    st = ta.supertrend(df['high'], df['low'], df['close'], length=length, multiplier=multiplier)
+    col = f"SUPERTd_{length}_{multiplier}"
+    if col not in st.columns:
+        col = _direction_column(st, 'SUPERTd')
+    return st[col] if col else pd.Series(0.0, index=df.index)
+
+def _resample(cache, df, rule='4h'):
+    return df.resample(rule).agg(AGG_DICT).dropna()
+
+def _htf_trend(cache, df, rule='4h', length=10, multiplier=3.0):
+    """Supertrend direction on `rule` bars, forward-filled onto the base timeframe."""
+    htf = cache.compute(df, 'resample', rule=rule)
+    return cache.compute(htf, 'supertrend', length=length, multiplier=multiplier).reindex(df.index).ffill()
+
+INDICATORS = {
+    'rsi': _rsi,
+    'ema': _ema,
+    'sma': _sma,
+    'atr': _atr,
+    'adx': _adx,
+    'bbands': _bbands,
+    'rolling_high': _rolling_high,
+    'rolling_low': _rolling_low,
+    'supertrend': _supertrend,
+    'resample': _resample,
+    'htf_trend': _htf_trend
+}
+
+
+class IndicatorCache:
+    """
+    LRU of full-series indicator results.
+
+    register(df) makes a frame a slicing base: any later request for a contiguous slice of it
+    (a WFO window, a shallow copy of one) is answered from the full-series result. Frames
+    that aren't slices of a registered base are fingerprinted and cached as-is.
+
+    Bases are held by weak reference (the last `max_bases` registered), so the cache never
+    keeps a dropped frame alive. A slice must share the base's 'close' buffer: two symbols on
+    the same bars have equal timestamps but never resolve to each other's base.
+    """
+    def __init__(self, max_entries=256, max_bases=8):
+        self.max_entries = max_entries
+        self.max_bases = max_bases
+        self._entries = OrderedDict() # key -> (result, compute_seconds)
+        self._bases = OrderedDict() # fingerprint -> weakref to the registered frame
+        self._lock = Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'compute_seconds': 0.0, 'saved_seconds': 0.0}
+
+    def register(self, df):
+        fp = fingerprint(df)
+        with self._lock:
+            self._bases[fp] = weakref.ref(df)
+            self._bases.move_to_end(fp)
+            while len(self._bases) > self.max_bases:
+                self._bases.popitem(last=False)
+        return fp
+
+    def _live_bases(self):
+        """(fingerprint, frame) of the registered bases still alive; dead references are dropped."""
+        with self._lock:
+            bases = [(fp, ref()) for fp, ref in self._bases.items()]
+            for fp, base in bases:
+                if base is None:
+                    del self._bases[fp]
+        return [(fp, base) for fp, base in bases if base is not None]
+
+    def _fingerprint(self, df):
+        """df's registered fingerprint when df is a base itself, else its content hash."""
+        for fp, base in self._live_bases():
+            if base is df:
+                return fp
+        return fingerprint(df)
+
+    def _resolve(self, df):
+        """(base_df, fingerprint, start, stop) for the registered base containing df."""
+        if len(df) and 'close' in df.columns:
+            close = df['close'].to_numpy()
+            first, last = df.index.asi8[0], df.index.asi8[-1]
+            for fp, base in self._live_bases():
+                if base is df:
+                    return base, fp, 0, len(base)
+                base_ts = base.index.asi8
+                start = int(np.searchsorted(base_ts, first))
+                stop = start + len(df)
+                if (stop <= len(base_ts) and base_ts[start] == first and base_ts[stop - 1] == last
+                        and np.shares_memory(close, base['close'].to_numpy())):
+                    return base, fp, start, stop
+        return df, fingerprint(df), 0, len(df)
+
+    def locate(self, df):
+        """(fingerprint, start, stop) of df: its registered base and row bounds, or its own hash."""
+        _, fp, start, stop = self._resolve(df)
+        return fp, start, stop
+
+    def compute(self, df, name, **params):
+        """Full result of `name` on df (no slicing). Used by composite indicators."""
+        fp = self._fingerprint(df)
+        return self._get(df, fp, name, params)
+
+    def _get(self, base, fp, name, params):
+        key = (fp, name, tuple(sorted(params.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['saved_seconds'] += entry[1]
+                return entry[0]
+
+        t0 = time.perf_counter()
+        result = INDICATORS[name](self, base, **params)
+        elapsed = time.perf_counter() - t0
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self.stats['compute_seconds'] += elapsed
+            self._entries[key] = (result, elapsed)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def seed(self, df, name, result, **params):
+        """Stores a precomputed full-series result for df (e.g. 'resample' bars from the market store)."""
+        fp = self._fingerprint(df)
+        with self._lock:
+            self._entries[(fp, name, tuple(sorted(params.items())))] = (result, 0.0)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, df, name, **params):
+        """Indicator `name` for df's rows, sliced out of the full-series result."""
+        base, fp, start, stop = self._resolve(df)
+        result = self._get(base, fp, name, params)
+        if result is None or (start == 0 and stop == len(base)):
+            return result
+        return result.iloc[start:stop]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def delta(self, since):
+        now = self.snapshot()
+        return {k: now[k] - since.get(k, 0) for k in now}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def format_report(stats):
+    hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+    lookups = hits + misses
+    hit_rate = hits / lookups if lookups else 0.0
+    return (f"📦 Indicator cache: {hits}/{lookups} hits ({hit_rate:.0%}), "
+            f"computed {stats.get('compute_seconds', 0.0):.2f}s, saved ~{stats.get('saved_seconds', 0.0):.2f}s")
+
+# Process-wide cache used by Strategy.indicator()
+CACHE = IndicatorCache()
@@ -0,0 +1,139 @@
+import numpy as np
+
+# --- POSITION STATE MACHINE ---
+# The loop-based strategies all share one shape: flat -> enter on a condition, in a position
+# -> exit on a condition or take-profit, optionally reversing in the same bar. The kernel
+# below runs that loop once over precomputed condition arrays. numba is optional: when it is
+# installed the kernel is compiled to native code, otherwise (the default) the same source runs
+# over Python lists. The fallback gives identical positions but only saves the per-bar pandas /
+# numpy scalar indexing: 1.4x over the old loop on SmartHybrid, up to ~12x on RSI2 (ETHUSDT 5m,
+# scripts/check_kernel_equivalence.py). Quote speedups together with BACKEND.
+
+try:
+    from numba import njit
+except ImportError: # Optional dependency
+    njit = None
+
+BACKEND = 'numba' if njit is not None else 'python'
+
+
+def _position_kernel(long_entry, short_entry, long_exit, short_exit, skip, sizes, entry_price,
+                     tp_dist, high, low, use_tp, reverse, out, start, pos, entry):
+    n = len(long_entry)
+    for i in range(start, n):
+        # Bars with missing inputs keep the state but report flat (matches `continue` in the loops)
+        if skip[i]:
+            continue
+
+        if pos == 0.0:
+            if long_entry[i]:
+                pos = sizes[i]
+                entry = entry_price[i]
+            elif short_entry[i]:
+                pos = -sizes[i]
+                entry = entry_price[i]
+
+        elif pos > 0.0:
+            exit_now = long_exit[i]
+            if not exit_now and use_tp:
+                exit_now = high[i] >= entry + tp_dist[i]
+            if exit_now:
+                pos = 0.0
+                if reverse and short_entry[i]:
+                    pos = -sizes[i]
+                    entry = entry_price[i]
+
+        else:
+            exit_now = short_exit[i]
+            if not exit_now and use_tp:
+                exit_now = low[i] <= entry - tp_dist[i]
+            if exit_now:
+                pos = 0.0
+                if reverse and long_entry[i]:
+                    pos = sizes[i]
+                    entry = entry_price[i]
+
+        out[i] = pos
+    return pos, entry
+
+_compiled_kernel = njit(cache=True)(_position_kernel) if njit is not None else None
+
+
+def _bool_array(x, n):
+    if x is None:
+        return np.zeros(n, dtype=np.bool_)
+    return np.asarray(x, dtype=np.bool_)
+
+def _float_array(x, n, fill):
+    if x is None:
+        return np.full(n, fill, dtype=np.float64)
+    if np.isscalar(x):
+        return np.full(n, float(x), dtype=np.float64)
+    return np.asarray(x, dtype=np.float64)
+
+def positions_from_signals(long_entry, short_entry=None, long_exit=None, short_exit=None, skip=None,
+                           sizes=None, entry_price=None, tp_dist=None, high=None, low=None, reverse=False, state=None):
+    """
+    Position array (float64, bar 0 always flat) from per-bar condition arrays.
+
+    long_entry/short_entry: enter when flat (long is checked first)
+    long_exit/short_exit:  leave the position
+    skip:      bars to ignore (state kept, output 0)
+    sizes:     position size taken at entry (scalar or array, default 1.0)
+    tp_dist:   take-profit distance from the entry price per bar (checked against high/low)
+    reverse:   on an exit, enter the opposite side in the same bar if its entry condition holds
+    state:     dict carried between calls over consecutive chunks of one series (tools/streaming.py);
+               holds the open position / entry price, and later chunks evaluate their bar 0 too
+    Comparisons against NaN are False, exactly like the Python loops they replace.
+    """
+    long_entry = np.asarray(long_entry, dtype=np.bool_)
+    n = len(long_entry)
+    use_tp = tp_dist is not None
+
+    args = (
+        long_entry,
+        _bool_array(short_entry, n),
+        _bool_array(long_exit, n),
+        _bool_array(short_exit, n),
+        _bool_array(skip, n),
+        _float_array(sizes, n, 1.0),
+        _float_array(entry_price, n, 0.0),
+        _float_array(tp_dist, n, np.nan),
+        _float_array(high, n, np.nan),
+        _float_array(low, n, np.nan),
+    )
+
+    carried = state is not None and 'pos' in state
+    start, pos, entry = (0, state['pos'], state['entry']) if carried else (1, 0.0, 0.0)
+
+    if _compiled_kernel is not None:
+        out = np.zeros(n, dtype=np.float64)
+        pos, entry = _compiled_kernel(*args, use_tp, reverse, out, start, float(pos), float(entry))
+    else:
+        # Pure-Python fallback: lists index much faster than numpy scalars
+        out = [0.0] * n
+        pos, entry = _position_kernel(*[a.tolist() for a in args], use_tp, reverse, out, start, pos, entry)
+        out = np.asarray(out, dtype=np.float64)
+    if state is not None and n:
+        state.update(pos=pos, entry=entry)
+    return out
+
+def entry_levels(position, entry_price, distance, state=None):
+    """
+    Exit levels anchored at each trade's entry: entry + distance for longs, entry - distance for
+    shorts, NaN when flat (pass -distance for stops). Row i is the level resting after bar i's
+    close - the 'stop' / 'take_profit' column BacktestEngine checks against bar i+1's high/low.
+    state: dict carried between consecutive chunks (the open trade's side and entry price).
+    """
+    side = np.sign(np.asarray(position, dtype=np.float64))
+    entry_price = np.asarray(entry_price, dtype=np.float64)
+    state = {} if state is None else state
+    prev_side = np.concatenate(([state.get('side', 0.0)], side[:-1]))
+    entries = (side != 0) & (side != prev_side)
+    # -1: the trade was entered in an earlier chunk
+    entry_bar = np.maximum.accumulate(np.where(entries, np.arange(len(side)), -1)) if len(side) else np.zeros(0, dtype=np.int64)
+    price = np.where(entry_bar >= 0, entry_price[np.maximum(entry_bar, 0)], state.get('price', np.nan))
+    level = price + side * _float_array(distance, len(side), np.nan)
+    if len(side):
+        state.update(side=side[-1], price=price[-1])
+    return np.where(side != 0, level, np.nan)
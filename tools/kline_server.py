@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Add project root so `tools` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, symbol_key
+
+# --- LOCAL KLINES STAND-IN ---
+# Serves canned candles on a Binance-compatible GET /api/v3/klines (symbol, interval,
+# startTime, endTime, limit), so the downloader runs offline against known data.
+# Misbehaviour can be switched on to exercise the client: a server-side request budget that
+# answers 429 + Retry-After when exceeded, random 500s, and symbols that always answer 400.
+
+
+class KlineServer:
+    def __init__(self, candles, host='127.0.0.1', port=0, max_limit=1000, rate_limit=None, retry_after=1.0,
+                 fail_rate=0.0, bad_symbols=(), seed=0):
+        # candles: {('ETHUSDT', '5m'): (open_time_ms int64 array, values (5, n) float array)}
+        self.candles = {(symbol_key(s), tf): (np.asarray(ts, dtype=np.int64), np.asarray(v, dtype=np.float64))
+                        for (s, tf), (ts, v) in candles.items()}
+        self.max_limit = max_limit
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.fail_rate = fail_rate
+        self.bad_symbols = {symbol_key(s) for s in bad_symbols}
+        self.rng = np.random.default_rng(seed)
+        self.stats = {'requests': 0, 'served': 0, 'rate_limited': 0, 'errors': 0}
+        self.peak_rate = 0 # Most requests seen in any trailing 1s window
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def from_store(cls, store=None, **kwargs):
+        """Every dataset in a MarketStore, served as-is."""
+        store = store or MarketStore()
+        candles = {}
+        for entry in store.manifest['datasets'].values():
+            arrays, frame = store.columnar(entry['symbol'], entry['timeframe'])
+            values = np.vstack([arrays[c] for c in ('open', 'high', 'low', 'close', 'volume')])
+            candles[(entry['symbol'], entry['timeframe'])] = (frame.index.as_unit('ns').asi8 // 1_000_000, values)
+        return cls(candles, **kwargs)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _admit(self):
+        """HTTP status for the next request: server-side rate budget, then injected failures."""
+        with self._lock:
+            self.stats['requests'] += 1
+            now = time.monotonic()
+            self._recent.append(now)
+            while self._recent and self._recent[0] <= now - 1.0:
+                self._recent.popleft()
+            self.peak_rate = max(self.peak_rate, len(self._recent))
+            if self.rate_limit is not None and len(self._recent) > self.rate_limit:
+                self.stats['rate_limited'] += 1
+                return 429
+            if self.fail_rate and self.rng.random() < self.fail_rate:
+                self.stats['errors'] += 1
+                return 500
+            return 200
+
+    def klines(self, query):
+        symbol, interval = query.get('symbol', [''])[0].upper(), query.get('interval', [''])[0]
+        if symbol in self.bad_symbols or (symbol, interval) not in self.candles:
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        ts, values = self.candles[(symbol, interval)]
+        limit = min(int(query.get('limit', [500])[0]), self.max_limit)
+        lo = np.searchsorted(ts, int(query['startTime'][0]), 'left') if 'startTime' in query else max(len(ts) - limit, 0)
+        hi = np.searchsorted(ts, int(query['endTime'][0]), 'right') if 'endTime' in query else len(ts)
+        hi = min(hi, lo + limit)
+        step = int(ts[1] - ts[0]) if len(ts) > 1 else 60_000
+        # Binance row layout: open time, OHLCV as strings, close time, then fields the downloader ignores
+        rows = [[int(ts[i]), *(repr(float(x)) for x in values[:, i]), int(ts[i]) + step - 1, '0', 0, '0', '0', '0']
+                for i in range(lo, hi)]
+        with self._lock:
+            self.stats['served'] += 1
+        return 200, rows
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                if url.path != '/api/v3/klines':
+                    return self._send(404, {'code': -1, 'msg': 'Not found'})
+                status = server._admit()
+                if status == 429:
+                    return self._send(429, {'code': -1003, 'msg': 'Too many requests'}, {'Retry-After': str(server.retry_after)})
+                if status == 500:
+                    return self._send(500, {'code': -1000, 'msg': 'Internal error'})
+                self._send(*server.klines(urllib.parse.parse_qs(url.query)))
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass # Quiet: thousands of requests per run
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binance-compatible klines stand-in over the market store")
+    parser.add_argument('--store', default=None, help="Market store root (default data/store)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate-limit', type=int, default=None, help="Answer 429 above this many requests/s")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 500")
+    args = parser.parse_args()
+
+    store = MarketStore(args.store) if args.store else MarketStore()
+    server = KlineServer.from_store(store, port=args.port, rate_limit=args.rate_limit, fail_rate=args.fail_rate)
+    print(f"📡 Serving {len(server.candles)} datasets at {server.url}/api/v3/klines (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.data_quality import scan, report_frame
+
+# --- MARKET DATA STORE ---
+# Local columnar OHLCV store for research. One directory per symbol / timeframe, holding
+# numbered versions of the data:
+#   <root>/<SYMBOL>/<timeframe>/v<N>/timestamp.npy   int64 bar open times (ns since epoch, UTC)
+#   <root>/<SYMBOL>/<timeframe>/v<N>/ohlcv.npy       float64 (5, capacity): open, high, low, close, volume
+# plus <root>/manifest.json describing every dataset (version, rows, range, source CSV).
+# Files are opened with np.load(mmap_mode='r'): loading is a header read, the OS page cache
+# is shared by every process reading the same dataset, and frames are zero-copy read-only
+# views with the same layout as wfo.columnar_frame.
+# The manifest is the only thing readers trust: they map version N and slice the rows it lists.
+# Arrays are allocated with spare capacity, so bars after the last one are written in place past
+# the published rows (no reader looks there) and an append costs the new bars only. Anything that
+# changes stored bars (a rewrite, a replaced still-forming bar, a backfill) or outgrows the capacity
+# writes version N+1. Either way one os.replace of the manifest publishes the change, so a reader
+# never pairs timestamps from one write with prices from another. The previous version is kept
+# for readers that read the manifest just before the swap; older ones are removed.
+# Irregular event series (funding rates, mark prices) sit next to the bars of the same symbol:
+#   <root>/<SYMBOL>/<name>/v<N>/timestamp.npy + values.npy (k, capacity) float64, listed under 'events'.
+
+DEFAULT_ROOT = 'data/store'
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+MANIFEST = 'manifest.json'
+CSV_NAME = re.compile(r'^(?P<symbol>[A-Z0-9]+)_(?P<timeframe>\d+[mhdwM])\.csv$')
+VERSION_DIR = re.compile(r'^v(\d+)$')
+MIN_CAPACITY = 1024
+
+def symbol_key(symbol):
+    """'ETH/USDT' / 'ETHUSDT' / 'ETH/USDT:USDT' -> 'ETHUSDT' (directory name, same as the CSV names)."""
+    return symbol.split(':')[0].replace('/', '').upper()
+
+def to_ns(timestamps):
+    """Datetime-like or epoch-ms values -> int64 ns (pandas 3 parses CSV strings to us, ccxt gives ms)."""
+    if isinstance(timestamps, (pd.Series, pd.Index, np.ndarray, list)) and np.issubdtype(np.asarray(timestamps).dtype, np.integer):
+        return np.asarray(timestamps, dtype=np.int64) * 1_000_000
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8
+
+def _normalise(df):
+    """OHLCV frame (timestamp column or DatetimeIndex, or ccxt rows) -> (ts int64 ns, values (5, n)) sorted, deduplicated."""
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df, columns=['timestamp'] + COLUMNS)
+    ts = to_ns(df['timestamp'] if 'timestamp' in df.columns else df.index)
+    values = np.vstack([df[c].to_numpy(dtype=np.float64) for c in COLUMNS])
+    order = np.argsort(ts, kind='stable')
+    ts, values = ts[order], values[:, order]
+    if not len(ts):
+        return ts, values
+    # Last write wins for duplicated bars (re-downloaded candles replace stale ones)
+    keep = np.append(ts[1:] != ts[:-1], True)
+    return ts[keep], np.ascontiguousarray(values[:, keep])
+
+def _capacity(rows):
+    """Rows to allocate: the next power of two, so in-place appends only copy the series O(log n) times."""
+    return max(MIN_CAPACITY, 1 << max(int(rows) - 1, 0).bit_length())
+
+def _merge(old_ts, old_values, ts, values, capacity):
+    """
+    Keyed merge of sorted, unique new rows into the stored ones (same time = replaced).
+    Returns (ts, values, at): the rows to write and their position. at > 0: the stored rows are unchanged
+    (re-sent rows equal to the stored ones are dropped) and only rows after them follow, to be written in
+    place; at == 0: the whole merged series, for a new version.
+    """
+    n = len(old_ts)
+    k = int(np.searchsorted(ts, old_ts[-1], 'right')) if n else 0 # New rows at or before the last stored one
+    idx = np.minimum(np.searchsorted(old_ts, ts[:k]), max(n - 1, 0))
+    unchanged = np.array_equal(old_ts[idx], ts[:k]) and np.array_equal(old_values[:, idx], values[:, :k], equal_nan=True)
+    if unchanged and n + len(ts) - k <= capacity:
+        return ts[k:], values[:, k:], n
+    if unchanged:
+        # Out of room: the next version carries the stored rows as they are
+        return np.concatenate([old_ts, ts[k:]]), np.concatenate([old_values, values[:, k:]], axis=1), 0
+    # Old rows the new block doesn't have stay (the block may have gaps, e.g. backfill + resume)
+    keep = ~np.isin(old_ts, ts, assume_unique=True)
+    ts = np.concatenate([old_ts[keep], ts])
+    values = np.concatenate([old_values[:, keep], values], axis=1)
+    order = np.argsort(ts, kind='stable')
+    return ts[order], values[:, order], 0
+
+def _put(path, array, at):
+    """Writes array into the last axis of a preallocated .npy file from position `at`."""
+    if array.size:
+        out = np.lib.format.open_memmap(path, mode='r+')
+        out[..., at:at + array.shape[-1]] = array
+        out.flush()
+        del out
+
+def _write_version(folder, ts, values, values_name):
+    """New version directory: timestamps and values with room to grow. Returns the capacity."""
+    os.makedirs(folder, exist_ok=True)
+    capacity = _capacity(len(ts))
+    for name, array, shape, dtype in [('timestamp.npy', ts, (capacity,), np.int64),
+                                      (values_name, values, (len(values), capacity), np.float64)]:
+        # 'w+' truncates whatever an interrupted write left in an unpublished version
+        out = np.lib.format.open_memmap(os.path.join(folder, name), mode='w+', dtype=dtype, shape=shape)
+        out[..., :array.shape[-1]] = array
+        out.flush()
+        del out
+    return capacity
+
+def _read(path, values_name, info):
+    """(ts, values) read-only views of the rows the manifest entry publishes."""
+    # Datasets written before versioning keep their files directly in the dataset directory
+    folder = os.path.join(path, f"v{info['version']}") if 'version' in info else path
+    ts = np.load(os.path.join(folder, 'timestamp.npy'), mmap_mode='r')
+    values = np.load(os.path.join(folder, values_name), mmap_mode='r')
+    return ts[:info['rows']], values[:, :info['rows']]
+
+def _prune(path, keep):
+    """Removes versions other than `keep` (None: the unversioned files of an older store)."""
+    for name in os.listdir(path):
+        match = VERSION_DIR.match(name)
+        if match and int(match[1]) not in keep:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        elif name.endswith('.npy') and None not in keep:
+            os.remove(os.path.join(path, name))
+
+
+class MarketStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._manifest = None
+
+    # --- Manifest ---
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            path = os.path.join(self.root, MANIFEST)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {'version': 1, 'datasets': {}}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+    def datasets(self):
+        """Manifest entries as a DataFrame (one row per symbol / timeframe)."""
+        return pd.DataFrame(list(self.manifest['datasets'].values()))
+
+    def info(self, symbol, timeframe):
+        return self.manifest['datasets'].get(f"{symbol_key(symbol)}/{timeframe}")
+
+    def has(self, symbol, timeframe):
+        return self.info(symbol, timeframe) is not None
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol_key(symbol), timeframe)
+
+    # --- Writing ---
+
+    def write(self, symbol, timeframe, df, source=None):
+        """Replaces the dataset with df. Returns the number of rows stored."""
+        ts, values = _normalise(df)
+        return self._write(symbol, timeframe, ts, values, source)
+
+    def append(self, symbol, timeframe, df, source=None):
+        """Merges df into the dataset (new bars added, overlapping bars replaced). Returns rows stored."""
+        ts, values = _normalise(df)
+        at = 0
+        if self.has(symbol, timeframe):
+            old_ts, old_values = self._open(symbol, timeframe)
+            info = self.info(symbol, timeframe)
+            ts, values, at = _merge(old_ts, old_values, ts, values, info.get('capacity', 0))
+            if source is None:
+                source = info.get('source')
+        return self._write(symbol, timeframe, ts, values, source, keep=('history_from', 'derived_from', 'backfill'), at=at)
+
+    def set_meta(self, symbol, timeframe, **fields):
+        """Extra manifest fields on an existing dataset (e.g. history_from: earliest time already searched)."""
+        self._manifest = None
+        self.manifest['datasets'][f"{symbol_key(symbol)}/{timeframe}"].update(fields)
+        self._save_manifest()
+
+    def _write(self, symbol, timeframe, ts, values, source, keep=(), at=0):
+        entry = {'symbol': symbol_key(symbol), 'timeframe': timeframe, 'columns': COLUMNS}
+        return self._publish('datasets', f"{entry['symbol']}/{timeframe}", self._dir(symbol, timeframe), 'ohlcv.npy',
+                             ts, values, entry, source, keep, at)
+
+    def _publish(self, section, key, path, values_name, ts, values, entry, source, keep, at):
+        """
+        Stores the rows (the whole series when at == 0, else rows following the `at` published ones) and
+        swaps the manifest entry in. Returns the number of rows stored.
+        """
+        # Re-read so two processes writing different datasets don't drop each other's entries
+        self._manifest = None
+        old = self.manifest.setdefault(section, {}).get(key, {})
+        if at:
+            version, capacity = old['version'], old['capacity']
+            folder = os.path.join(path, f"v{version}")
+            _put(os.path.join(folder, 'timestamp.npy'), np.asarray(ts), at)
+            _put(os.path.join(folder, values_name), np.asarray(values), at)
+        else:
+            version = old.get('version', 0) + 1
+            capacity = _write_version(os.path.join(path, f"v{version}"), ts, values, values_name)
+        entry.update({
+            'rows': int(at + len(ts)),
+            'start': old['start'] if at else (str(pd.Timestamp(ts[0])) if len(ts) else None),
+            'end': str(pd.Timestamp(ts[-1])) if len(ts) else (old['end'] if at else None),
+            'timestamp_unit': 'ns',
+            'version': version,
+            'capacity': capacity,
+            'updated': datetime.now().isoformat(timespec='seconds')
+        })
+        if source is not None:
+            entry['source'] = source
+        entry.update({k: old[k] for k in keep if k in old})
+        self.manifest[section][key] = entry
+        self._save_manifest()
+        if not at:
+            _prune(path, {version, old.get('version')})
+        return entry['rows']
+
+    def import_csv(self, path, symbol=None, timeframe=None):
+        """Imports a data/<SYMBOL>_<tf>.csv file (symbol / timeframe parsed from the name unless given)."""
+        if symbol is None or timeframe is None:
+            match = CSV_NAME.match(os.path.basename(path))
+            if match is None:
+                raise ValueError(f"Can't infer symbol / timeframe from {path!r}; pass them explicitly")
+            symbol = symbol or match['symbol']
+            timeframe = timeframe or match['timeframe']
+        df = pd.read_csv(path)
+        stat = os.stat(path)
+        source = {'csv': os.path.relpath(path), 'mtime': stat.st_mtime, 'size': stat.st_size}
+        return self.write(symbol, timeframe, df, source=source)
+
+    def resolve(self, source):
+        """(symbol, timeframe) for a store key or an imported, unchanged CSV path; None otherwise."""
+        if isinstance(source, tuple):
+            return source
+        return self.dataset_for_csv(source)
+
+    def dataset_for_csv(self, path):
+        """(symbol, timeframe) of the dataset imported from this CSV, if the CSV hasn't changed since."""
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        rel = os.path.relpath(path)
+        for entry in self.manifest['datasets'].values():
+            source = entry.get('source') or {}
+            if source.get('csv') == rel and source.get('mtime') == stat.st_mtime and source.get('size') == stat.st_size:
+                return entry['symbol'], entry['timeframe']
+        return None
+
+    # --- Reading ---
+
+    def _open(self, symbol, timeframe):
+        if not self.has(symbol, timeframe):
+            raise KeyError(f"No {symbol} {timeframe} data in {self.root}")
+        try:
+            return _read(self._dir(symbol, timeframe), 'ohlcv.npy', self.info(symbol, timeframe))
+        except FileNotFoundError:
+            # Our manifest is two writes old and that version is gone: read the current one
+            self._manifest = None
+            return _read(self._dir(symbol, timeframe), 'ohlcv.npy', self.info(symbol, timeframe))
+
+    def columnar(self, symbol, timeframe, start=None, end=None):
+        """
+        (arrays, frame) over the memory-mapped files, same contract as wfo.columnar_frame:
+        per-column read-only views and a DataFrame backed by them. start / end (inclusive)
+        are anything pd.Timestamp accepts and are applied with searchsorted, still without copying.
+        """
+        ts, values = self._open(symbol, timeframe)
+        lo = 0 if start is None else int(np.searchsorted(ts, to_ns([start])[0], 'left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, to_ns([end])[0], 'right'))
+        ts, values = ts[lo:hi], values[:, lo:hi]
+        index = pd.DatetimeIndex(np.asarray(ts).view('datetime64[ns]'), name='timestamp')
+        frame = pd.DataFrame(values.T, index=index, columns=COLUMNS, copy=False)
+        return {col: values[k] for k, col in enumerate(COLUMNS)}, frame
+
+    def load(self, symbol, timeframe, start=None, end=None):
+        """Read-only OHLCV DataFrame with a DatetimeIndex (the shape strategies expect)."""
+        return self.columnar(symbol, timeframe, start, end)[1]
+
+    def last_timestamp(self, symbol, timeframe):
+        """Open time (int64 ns) of the newest stored bar, None if the dataset is missing or empty."""
+        if not self.has(symbol, timeframe):
+            return None
+        ts = self._open(symbol, timeframe)[0]
+        return int(ts[-1]) if len(ts) else None
+
+    def quality(self, symbol, timeframe, **policy):
+        """core/data_quality report for the stored series (report only unless a repair policy is given, nothing is written)."""
+        ts, values = self._open(symbol, timeframe)
+        report = scan(ts, values, timeframe, **policy)[2]
+        return {'symbol': symbol_key(symbol), 'timeframe': timeframe, **report}
+
+    # --- Event series ---
+
+    def events_info(self, symbol, name):
+        return self.manifest.get('events', {}).get(f"{symbol_key(symbol)}/{name}")
+
+    def has_events(self, symbol, name):
+        return self.events_info(symbol, name) is not None
+
+    def write_events(self, symbol, name, ts, columns, source=None, merge=True):
+        """
+        Stores an event series: ts (int64 ns since epoch) and {column: values}.
+        merge: keyed merge into the stored events (same time = replaced), else replace them all.
+        Returns the number of events stored.
+        """
+        names = list(columns)
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.vstack([np.asarray(columns[c], dtype=np.float64) for c in names]) if names else np.empty((0, len(ts)))
+        order = np.argsort(ts, kind='stable')
+        ts, values = ts[order], values[:, order]
+        if len(ts):
+            keep = np.append(ts[1:] != ts[:-1], True) # Last copy wins
+            ts, values = ts[keep], values[:, keep]
+        info = self.events_info(symbol, name)
+        at = 0
+        if merge and info is not None:
+            if info['columns'] != names:
+                raise ValueError(f"{symbol} {name} stores columns {info['columns']}, got {names}")
+            old_ts, old_values = self._open_events(symbol, name)
+            ts, values, at = _merge(old_ts, old_values, ts, values, info.get('capacity', 0))
+            source = info.get('source') if source is None else source
+
+        entry = {'symbol': symbol_key(symbol), 'series': name, 'columns': names}
+        return self._publish('events', f"{entry['symbol']}/{name}", os.path.join(self.root, entry['symbol'], name), 'values.npy',
+                             ts, values, entry, source, ('history_from', 'backfill'), at)
+
+    def set_event_meta(self, symbol, name, **fields):
+        self._manifest = None
+        self.manifest['events'][f"{symbol_key(symbol)}/{name}"].update(fields)
+        self._save_manifest()
+
+    def _open_events(self, symbol, name):
+        if not self.has_events(symbol, name):
+            raise KeyError(f"No {symbol} {name} events in {self.root}")
+        path = os.path.join(self.root, symbol_key(symbol), name)
+        try:
+            return _read(path, 'values.npy', self.events_info(symbol, name))
+        except FileNotFoundError:
+            self._manifest = None
+            return _read(path, 'values.npy', self.events_info(symbol, name))
+
+    def events(self, symbol, name, start=None, end=None):
+        """(ts, {column: values}) read-only views of an event series, start / end (inclusive) by searchsorted."""
+        ts, values = self._open_events(symbol, name)
+        lo = 0 if start is None else int(np.searchsorted(ts, to_ns([start])[0], 'left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, to_ns([end])[0], 'right'))
+        return ts[lo:hi], {col: values[k, lo:hi] for k, col in enumerate(self.events_info(symbol, name)['columns'])}
+
+    def last_event(self, symbol, name):
+        """Time (int64 ns) of the newest stored event, None if the series is missing or empty."""
+        if not self.has_events(symbol, name):
+            return None
+        ts = self._open_events(symbol, name)[0]
+        return int(ts[-1]) if len(ts) else None
+
+    def export_csv(self, symbol, timeframe, path=None):
+        """Writes the dataset as data/<SYMBOL>_<tf>.csv for CSV consumers and links it as the source."""
+        path = path or f"data/{symbol_key(symbol)}_{timeframe}.csv"
+        frame = self.load(symbol, timeframe)
+        frame.reset_index().to_csv(path, index=False)
+        stat = os.stat(path)
+        self._manifest = None
+        self.manifest['datasets'][f"{symbol_key(symbol)}/{timeframe}"]['source'] = {
+            'csv': os.path.relpath(path), 'mtime': stat.st_mtime, 'size': stat.st_size}
+        self._save_manifest()
+        return path
+
+
+def load_ohlcv(source, store=None):
+    """
+    Research loader: (symbol, timeframe) reads the store; a CSV path reads the store when that
+    CSV has been imported and is unchanged, else falls back to pd.read_csv.
+    Returns (arrays, frame) with read-only columns, or (None, raw_df) for the CSV fallback.
+    """
+    store = store or MarketStore()
+    dataset = store.resolve(source)
+    if dataset is not None:
+        return store.columnar(*dataset)
+    return None, pd.read_csv(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OHLCV store (memory-mapped .npy columns)")
+    parser.add_argument('--root', default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help="Import data/<SYMBOL>_<tf>.csv files")
+    imp.add_argument('paths', nargs='*', default=None)
+    sub.add_parser('list', help="Show the manifest")
+    sub.add_parser('quality', help="Gaps / duplicates / spikes report for every dataset")
+    args = parser.parse_args()
+
+    store = MarketStore(args.root)
+    if args.command == 'import':
+        for path in args.paths or sorted(glob.glob('data/*.csv')):
+            if CSV_NAME.match(os.path.basename(path)) is None:
+                print(f"⏭️ Skipping {path} (not <SYMBOL>_<tf>.csv)")
+                continue
+            rows = store.import_csv(path)
+            print(f"✅ {path}: {rows:,} rows")
+    if args.command == 'quality':
+        reports = report_frame(store.quality(e['symbol'], e['timeframe']) for e in store.manifest['datasets'].values())
+        print(reports.to_string(index=False) if len(reports) else "Store is empty")
+        return
+    datasets = store.datasets()
+    print(datasets[['symbol', 'timeframe', 'rows', 'start', 'end']].to_string(index=False) if len(datasets) else "Store is empty")
+    events = pd.DataFrame(list(store.manifest.get('events', {}).values()))
+    if len(events):
+        print(events[['symbol', 'series', 'rows', 'start', 'end']].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
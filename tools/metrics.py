@@ -0,0 +1,177 @@
+import numpy as np
+
+# --- BACKTEST METRICS ---
+# Trade-level statistics straight from position / return arrays, for one backtest or a whole
+# (combinations x bars) grid block at once. A trade is a run of bars holding the same non-zero
+# position; its PnL compounds the net returns of those bars plus its exit cost. BacktestEngine
+# charges entry costs on a trade's first bar and the exit on the bar after it, so that cost is
+# moved into the closing trade (a trade that only makes back its fees is a loser, and whatever
+# follows doesn't pay for it). Everything is a handful of array passes: run boundaries, one
+# multiply.reduceat for every trade's PnL, and bincounts per row.
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600 # Crypto trades around the clock
+
+def periods_per_year(index):
+    """Bars per year from a DatetimeIndex's median spacing (1.0 = no annualisation if unknown)."""
+    if len(index) < 2 or not hasattr(index, 'asi8'):
+        return 1.0
+    step = np.median(np.diff(index.as_unit('ns').asi8)) / 1e9 # pandas 3 CSV indexes are us, store indexes ns
+    return SECONDS_PER_YEAR / step if step > 0 else 1.0
+
+def _run_bounds(position):
+    """(starts, ends) flat indices of each run of equal non-zero values, never crossing rows."""
+    held = position != 0
+    starts = held.copy()
+    starts[:, 1:] &= position[:, 1:] != position[:, :-1]
+    ends = held
+    ends[:, :-1] &= position[:, :-1] != position[:, 1:]
+    return np.flatnonzero(starts), np.flatnonzero(ends)
+
+def _exit_costs(position, closing, ends, cost):
+    """
+    Cost each trade pays on the bar after its last one for closing what it carries into it: none at a
+    row's last bar, or when a stop / take-profit already closed it inside the bar (closing = 0 there).
+    A reversal's turnover is split: the old side's size is the exit, the rest the new trade's entry.
+    """
+    n_bars = position.shape[1]
+    carried = closing.ravel()[ends]
+    after = position.ravel()[np.minimum(ends + 1, position.size - 1)]
+    exit_size = np.minimum(np.abs(carried), np.abs(after - carried))
+    return np.where(ends % n_bars < n_bars - 1, exit_size * cost, 0.0)
+
+def _trade_pnl(growth, starts, ends, exit_cost=None):
+    """
+    Compounded return over [start, end] for each trade; growth is the flat (1 + net return) array.
+    exit_cost (_exit_costs): charged to each trade and given back to the bar after it, so a trade
+    opened there by a reversal doesn't pay it too (growth is restored before returning).
+    """
+    if not len(starts):
+        return np.empty(0)
+    bounds = np.empty(2 * len(starts), dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends + 1
+    if exit_cost is None:
+        # Sentinel so the last trade's end + 1 is a valid index
+        return np.multiply.reduceat(np.append(growth, 1.0), bounds)[0::2] - 1
+    charged = exit_cost > 0
+    after = ends[charged] + 1
+    kept = growth[after]
+    growth[after] += exit_cost[charged]
+    try:
+        pnl = np.multiply.reduceat(np.append(growth, 1.0), bounds)[0::2]
+    finally:
+        growth[after] = kept
+    return pnl * (1 - exit_cost) - 1
+
+def trade_ledger(position, returns, index=None, cost=0.0, closing=None):
+    """
+    Trades in one backtest as a dict of arrays (no DataFrame):
+    entry / exit (first and last bar held), side, size, bars, pnl (compounded net return).
+    position[i] is the position held over bar i and returns[i] that bar's net return.
+    cost: exit cost per unit of position (fee + slippage, times leverage) charged on the bar after
+    a trade, moved into its pnl; closing: the position carried out of each bar (default position,
+    0 where a stop / take-profit filled). With a DatetimeIndex, entry_time / exit_time are added.
+    """
+    position = np.asarray(position, dtype=np.float64)
+    closing = position if closing is None else np.asarray(closing, dtype=np.float64)
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    starts, ends = _run_bounds(position[None, :])
+    ledger = {
+        'entry': starts,
+        'exit': ends,
+        'side': np.sign(position[starts]),
+        'size': np.abs(position[starts]),
+        'bars': ends - starts + 1,
+        'pnl': _trade_pnl(1 + returns, starts, ends, _exit_costs(position[None, :], closing[None, :], ends, cost))
+    }
+    if index is not None:
+        ledger['entry_time'] = np.asarray(index)[starts]
+        ledger['exit_time'] = np.asarray(index)[ends]
+    return ledger
+
+def grid_metrics(net_return, position, turnover, periods, cost=0.0, closing=None):
+    """
+    Per-row statistics of a (rows, bars) block: net_return and position are the engine's
+    return-space buffers, turnover the per-row sum of |position changes|. cost / closing:
+    the exit cost per unit and the position carried out of each bar, as in trade_ledger.
+    Calmar needs the finished equity curve, so run_grid adds it afterwards (add_calmar).
+    """
+    n_rows, n_bars = net_return.shape
+    # Row sums of squares via einsum (no squared temporaries); one scratch buffer is reused below
+    mean = net_return.sum(axis=1) / n_bars
+    std = np.sqrt(np.maximum(np.einsum('ij,ij->i', net_return, net_return) / n_bars - mean * mean, 0.0))
+    scratch = np.minimum(net_return, 0.0)
+    downside = np.sqrt(np.einsum('ij,ij->i', scratch, scratch) / n_bars)
+    scale = np.sqrt(periods)
+    years = n_bars / periods
+
+    starts, ends = _run_bounds(position)
+    np.add(net_return, 1.0, out=scratch)
+    exit_cost = _exit_costs(position, position if closing is None else closing, ends, cost)
+    pnl = _trade_pnl(scratch.ravel(), starts, ends, exit_cost)
+    row = starts // n_bars
+    trades = np.bincount(row, minlength=n_rows)
+    wins = np.bincount(row, weights=pnl > 0, minlength=n_rows)
+    gross_profit = np.bincount(row, weights=np.maximum(pnl, 0.0), minlength=n_rows)
+    gross_loss = np.bincount(row, weights=np.maximum(-pnl, 0.0), minlength=n_rows)
+    bars_held = np.bincount(row, weights=ends - starts + 1, minlength=n_rows)
+
+    # Profit factor: inf when nothing lost but something won, 0 without winners
+    profit_factor = np.where(gross_profit > 0, np.inf, 0.0)
+    np.divide(gross_profit, gross_loss, out=profit_factor, where=gross_loss > 0)
+
+    return {
+        'sharpe': np.divide(mean, std, out=np.zeros(n_rows), where=std > 0) * scale,
+        'sortino': np.divide(mean, downside, out=np.zeros(n_rows), where=downside > 0) * scale,
+        'profit_factor': profit_factor,
+        'trades': trades,
+        'trade_win_rate': np.divide(wins, trades, out=np.zeros(n_rows), where=trades > 0),
+        'avg_bars_held': np.divide(bars_held, trades, out=np.zeros(n_rows), where=trades > 0),
+        'exposure': np.count_nonzero(position, axis=1) / n_bars,
+        'turnover': turnover / years if years > 0 else turnover # Position units traded per year
+    }
+
+def add_calmar(metrics, n_bars, periods):
+    """Annualised return and Calmar (annual return / |max drawdown|) from the finished grid."""
+    growth = np.maximum(1 + np.asarray(metrics['total_return'], dtype=np.float64), 0.0)
+    years = n_bars / periods
+    # Log form: short windows annualise to huge exponents (inf rather than overflow warnings)
+    with np.errstate(over='ignore', divide='ignore'):
+        annual = np.expm1(np.log(growth) / years) if years > 0 else growth - 1
+    drawdown = np.abs(np.asarray(metrics['max_drawdown'], dtype=np.float64))
+    metrics['annual_return'] = annual
+    metrics['calmar'] = np.divide(annual, drawdown, out=np.zeros_like(annual), where=drawdown > 0)
+    return metrics
+
+
+# --- OPTIMISATION OBJECTIVES ---
+# Score functions over run_grid output (scalars or arrays); higher is better.
+
+def return_over_drawdown(metrics):
+    """Return / Abs(MaxDrawdown), the original WFO goal."""
+    total_return = np.asarray(metrics['total_return'], dtype=np.float64)
+    drawdown = np.abs(np.asarray(metrics['max_drawdown'], dtype=np.float64))
+    return np.divide(total_return, drawdown, out=total_return.copy(), where=drawdown != 0)
+
+def _metric(name):
+    return lambda metrics: np.asarray(metrics[name], dtype=np.float64).copy()
+
+def _profit_factor(metrics):
+    # Capped so a single lucky winner with no losers doesn't dominate the search
+    return np.minimum(np.asarray(metrics['profit_factor'], dtype=np.float64), 10.0)
+
+OBJECTIVES = {
+    'return_dd': return_over_drawdown,
+    'sharpe': _metric('sharpe'),
+    'sortino': _metric('sortino'),
+    'calmar': _metric('calmar'),
+    'profit_factor': _profit_factor
+}
+
+# Objectives that need run_grid(extended=True)
+EXTENDED_OBJECTIVES = {'sharpe', 'sortino', 'calmar', 'profit_factor'}
+
+def objective_score(metrics, objective='return_dd'):
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {sorted(OBJECTIVES)}, got {objective!r}")
+    return OBJECTIVES[objective](metrics)
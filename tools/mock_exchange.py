@@ -0,0 +1,506 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.timeframes import timeframe_ms
+
+# --- LOCAL BINANCE FUTURES STAND-IN ---
+# In-process replacement for the ccxt client run_live.py uses, over the subset of calls the bot
+# makes: fetch_ohlcv, fapiPrivateV2GetAccount / GetPositionRisk, fapiPrivatePostOrder (MARKET,
+# one-way, reduceOnly), fetch_funding_rates, fapiPrivatePostLeverage / PositionSideDual,
+# fetch_positions, plus the market / precision / fee helpers core/execution.py needs.
+#
+# Candles are recorded series replayed on a simulated clock that starts at the wall time and
+# runs `speed` times faster. The bar in progress is revealed as it forms: open, then the move
+# towards its recorded close in proportion to the elapsed part of the bar, so nothing ahead
+# of the clock leaks. Market orders fill at that price plus slippage, pay the taker fee, and
+# are netted into a one-way position book with isolated-style margin. Funding is settled at
+# 00/08/16 UTC. Optional latency (sleeps) and random -1001 failures exercise the client paths.
+#
+# Plugging it in: core.exchange.use_exchange(MockExchange(...)) in-process, or MOCK_EXCHANGE=true
+# for `python run_live.py` (from_env(): MOCK_SPEED, MOCK_LATENCY_MS, MOCK_SYMBOLS, MOCK_BALANCE).
+# Set core.clock to exchange.clock so the strategy sees the simulated time.
+
+DATA_DIR = 'data'
+BASE_SERIES = 'ETHUSDT_5m.csv' # Source of the synthetic symbols
+FUNDING_MS = 8 * 3_600_000 # Settlements at 00/08/16 UTC: multiples of 8h since the epoch
+MIN_NOTIONAL = 5.0
+
+
+class MockExchangeError(Exception):
+    """Raised with Binance's error body, like ccxt's exceptions ('binance {"code":-2019,...}')."""
+    def __init__(self, code, msg):
+        super().__init__(f'binance {{"code":{code},"msg":"{msg}"}}')
+        self.code = code
+
+class ReplayFinished(KeyboardInterrupt):
+    """
+    The simulated clock ran past the recorded candles (or `until`). Raised from the account
+    call, so run_bot leaves its loop as it does on Ctrl-C.
+    """
+
+
+class SimulatedClock:
+    """Wall time since construction, scaled by `speed`, from `start` (core.clock source)."""
+    def __init__(self, start=None, speed=1.0):
+        self.start = start or datetime.now()
+        self.speed = speed
+        self._t0 = time.perf_counter()
+
+    def __call__(self):
+        return self.start + timedelta(seconds=(time.perf_counter() - self._t0) * self.speed)
+
+    def now_ms(self):
+        return int(pd.Timestamp(self()).value // 1_000_000)
+
+
+def _precision(price):
+    """(amount decimals, price decimals) in the spirit of Binance's step / tick sizes."""
+    magnitude = int(np.floor(np.log10(max(price, 1e-12))))
+    return int(np.clip(magnitude, 0, 3)), int(np.clip(4 - magnitude, 1, 8))
+
+
+class MockExchange:
+    def __init__(self, candles, timeframe='5m', warmup=500, speed=1.0, start=None, until=None,
+                 balance=10000.0, leverage=20, fee=0.0005, slippage=0.0002, funding_rate=0.0001,
+                 latency=0.0, jitter=0.0, fail_rate=0.0, seed=0):
+        """
+        candles: {symbol: (n, 5) OHLCV array, or (array, price scale)}: one shared bar grid,
+          re-stamped so bar `warmup` opens at the start of the simulation (arrays are only
+          read, so synthetic symbols can be views of one series).
+        until: stop after this much simulated time (timedelta); default: the end of the candles.
+        funding_rate: per-settlement rate, a float or {symbol: rate}. Longs pay when positive.
+        latency / jitter: seconds slept per call (mean, uniform +/-); fail_rate: chance that a
+          market-data call fails with -1001.
+        """
+        self.timeframe = timeframe
+        self.step = timeframe_ms(timeframe)
+        self.candles = {}
+        self.scale = {}
+        for sym, series in candles.items():
+            values, scale = series if isinstance(series, tuple) else (series, 1.0)
+            self.candles[sym] = np.asarray(values, dtype=np.float64)
+            self.scale[sym] = float(scale)
+        self.symbols = list(self.candles)
+        self.bars = min(len(v) for v in self.candles.values())
+        if warmup >= self.bars:
+            raise ValueError(f"warmup ({warmup}) must leave bars to replay ({self.bars} recorded)")
+
+        self.clock = SimulatedClock(start, speed)
+        start_ms = self.clock.now_ms()
+        self.origin = start_ms // self.step * self.step - warmup * self.step # Open time of bar 0
+        end_ms = self.origin + self.bars * self.step
+        self.end_ms = min(end_ms, start_ms + int(until.total_seconds() * 1000)) if until is not None else end_ms
+
+        self.balance = float(balance) # Wallet balance (realized PnL, fees and funding)
+        self.default_leverage = leverage
+        self.leverage = {}
+        self.fee = fee
+        self.slippage = slippage
+        self.funding_rate = funding_rate
+        self.positions = {} # symbol -> {'amt', 'entry'}
+        self.dual_side = False
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.rng = np.random.default_rng(seed)
+        self._order_ids = itertools.count(1_000_000)
+        self._last_funding = start_ms
+        self._lock = threading.RLock()
+        self.stats = {'calls': {}, 'orders': 0, 'rejected': {}, 'failures': 0, 'fees': 0.0, 'funding': 0.0, 'realized_pnl': 0.0}
+
+        # ccxt surface the bot touches
+        self.has = {'fetchPositions': True, 'fetchFundingRates': True, 'fetchOHLCV': True}
+        self.urls = {'api': {}}
+        self.options = {'defaultType': 'future'}
+        self.fees = {'trading': {'taker': fee, 'maker': fee / 2}}
+        self.markets = {}
+        self.markets_by_id = {}
+
+    # --- BUILDERS ---
+
+    @classmethod
+    def from_csv(cls, symbols, data_dir=DATA_DIR, base=BASE_SERIES, history=None, **kwargs):
+        """
+        Recorded 5m candles (the last `history` bars, default half the base series) for each
+        symbol with a data/<SYMBOL>_5m.csv; synthetic ones for the rest: windows of the base
+        series at staggered offsets and per-symbol price levels (views, no copies).
+        """
+        values = _load_values(os.path.join(data_dir, base))
+        recorded = {}
+        for sym in symbols:
+            path = os.path.join(data_dir, f"{sym.replace('/', '')}_5m.csv")
+            if os.path.exists(path):
+                recorded[sym] = _load_values(path)
+        n = min([history or len(values) // 2, len(values)] + [len(v) for v in recorded.values()])
+        span = len(values) - n + 1
+        candles = {}
+        for k, sym in enumerate(symbols):
+            if sym in recorded:
+                candles[sym] = recorded[sym][-n:]
+            else:
+                offset = (k * 389) % span
+                candles[sym] = (values[offset:offset + n], 10.0 ** ((k % 9) - 4) * (1 + 0.37 * (k % 5)))
+        return cls(candles, **kwargs)
+
+    @classmethod
+    def synthetic(cls, count, **kwargs):
+        """`count` synthetic symbols (SYN001/USDT...), see from_csv."""
+        return cls.from_csv([f"SYN{k + 1:03d}/USDT" for k in range(count)], **kwargs)
+
+    # --- SIMULATION ---
+
+    def _call(self, name, can_fail=False):
+        with self._lock: # The generator isn't thread-safe (analyze_symbol runs on a pool)
+            self.stats['calls'][name] = self.stats['calls'].get(name, 0) + 1
+            delay = self.latency + self.rng.uniform(-self.jitter, self.jitter) if self.jitter else self.latency
+            failed = can_fail and self.fail_rate and self.rng.random() < self.fail_rate
+            if failed:
+                self.stats['failures'] += 1
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise MockExchangeError(-1001, "Internal error; unable to process your request. Please try again.")
+
+    @property
+    def finished(self):
+        return self.clock.now_ms() >= self.end_ms
+
+    def _bar(self, now_ms=None):
+        """(index of the bar in progress, elapsed fraction of it)."""
+        now_ms = self.clock.now_ms() if now_ms is None else now_ms
+        offset = min(now_ms, self.end_ms - 1) - self.origin
+        index = min(offset // self.step, self.bars - 1)
+        return int(index), min((offset - index * self.step) / self.step, 1.0)
+
+    def _row(self, sym, index, fraction=1.0):
+        """[open_ms, o, h, l, c, v] of a bar, partially formed when fraction < 1."""
+        o, h, l, c, v = self.candles[sym][index].tolist()
+        scale = self.scale[sym]
+        if fraction < 1.0:
+            c = o + (c - o) * fraction
+            h = max(o + (h - o) * fraction, o, c)
+            l = min(o - (o - l) * fraction, o, c)
+            v = v * fraction
+        return [self.origin + index * self.step, o * scale, h * scale, l * scale, c * scale, v]
+
+    def price(self, sym):
+        """Last price (the close so far of the bar in progress), also used as the mark price."""
+        index, fraction = self._bar()
+        return self._row(sym, index, fraction)[4]
+
+    def _settle_funding(self):
+        """Charges every funding settlement the clock passed since the last call."""
+        now_ms = self.clock.now_ms()
+        with self._lock:
+            first = self._last_funding // FUNDING_MS * FUNDING_MS + FUNDING_MS
+            self._last_funding = max(self._last_funding, now_ms)
+            for t in range(first, now_ms + 1, FUNDING_MS):
+                index, fraction = self._bar(t)
+                for sym, pos in self.positions.items():
+                    mark = self._row(sym, index, fraction)[4]
+                    paid = pos['amt'] * mark * self._rate(sym)
+                    self.balance -= paid
+                    self.stats['funding'] += paid
+
+    def _rate(self, sym):
+        return self.funding_rate.get(sym, 0.0) if isinstance(self.funding_rate, dict) else self.funding_rate
+
+    def _id(self, sym):
+        return sym.replace('/', '')
+
+    def _symbol(self, market_id):
+        market = self.markets_by_id.get(market_id)
+        if market is not None:
+            return market['symbol']
+        match = next((s for s in self.symbols if self._id(s) == market_id), None)
+        if match is None:
+            raise MockExchangeError(-1121, "Invalid symbol.")
+        return match
+
+    def _account_rows(self):
+        """(wallet, unrealized, initial margin, [(symbol, amt, entry, mark, pnl, leverage)])."""
+        rows = []
+        unrealized = margin = 0.0
+        for sym, pos in self.positions.items():
+            mark = self.price(sym)
+            pnl = (mark - pos['entry']) * pos['amt']
+            lev = self.leverage.get(sym, self.default_leverage)
+            unrealized += pnl
+            margin += abs(pos['amt']) * mark / lev
+            rows.append((sym, pos['amt'], pos['entry'], mark, pnl, lev))
+        return self.balance, unrealized, margin, rows
+
+    # --- MARKETS (ccxt helpers) ---
+
+    def load_markets(self, reload=False, params={}):
+        self._call('load_markets')
+        if self.markets and not reload:
+            return self.markets
+        index, _ = self._bar()
+        for sym in self.symbols:
+            amount_dp, price_dp = _precision(self._row(sym, index)[4])
+            base = sym.split('/')[0]
+            market = {
+                'id': self._id(sym), 'symbol': sym, 'base': base, 'quote': 'USDT', 'settle': 'USDT',
+                'baseId': base, 'quoteId': 'USDT', 'active': True, 'type': 'swap', 'spot': False, 'swap': True,
+                'future': False, 'option': False, 'contract': True, 'linear': True, 'contractSize': 1.0,
+                'precision': {'amount': amount_dp, 'price': price_dp},
+                'limits': {'amount': {'min': 10.0 ** -amount_dp, 'max': 1e9}, 'cost': {'min': MIN_NOTIONAL}},
+                'taker': self.fee, 'maker': self.fee / 2
+            }
+            self.markets[sym] = market
+            self.markets_by_id[market['id']] = market
+        return self.markets
+
+    def market(self, symbol):
+        if not self.markets:
+            self.load_markets()
+        if symbol in self.markets:
+            return self.markets[symbol]
+        if symbol in self.markets_by_id:
+            return self.markets_by_id[symbol]
+        raise MockExchangeError(-1121, "Invalid symbol.")
+
+    def amount_to_precision(self, symbol, amount):
+        decimals = self.market(symbol)['precision']['amount']
+        step = 10.0 ** -decimals
+        truncated = np.floor(float(amount) / step + 1e-9) * step # ccxt truncates
+        if truncated <= 0:
+            raise MockExchangeError(-4003, f"Quantity less than or equal to zero ({symbol} amount {amount}).")
+        return f"{truncated:.{decimals}f}"
+
+    def request(self, path, *args, **kwargs):
+        self._call('request')
+        return {}
+
+    def fetch_trading_fee(self, symbol, params={}):
+        self._call('fetch_trading_fee')
+        return {'symbol': symbol, 'maker': self.fee / 2, 'taker': self.fee}
+
+    def cancel_all_orders(self, symbol=None, params={}):
+        self._call('cancel_all_orders')
+        return [] # Market orders only: nothing ever rests on the book
+
+    # --- MARKET DATA ---
+
+    def fetch_ohlcv(self, symbol, timeframe='5m', since=None, limit=500, params={}):
+        self._call('fetch_ohlcv', can_fail=True)
+        if timeframe != self.timeframe:
+            raise MockExchangeError(-1120, f"Invalid interval {timeframe} (recorded: {self.timeframe}).")
+        if symbol not in self.candles:
+            raise MockExchangeError(-1121, "Invalid symbol.")
+        index, fraction = self._bar()
+        first = max(0, index + 1 - limit) if since is None else min(max(0, -(-(int(since) - self.origin) // self.step)), index + 1)
+        last = min(index + 1, first + limit)
+        rows = [self._row(symbol, i) for i in range(first, min(last, index))]
+        if last > index:
+            rows.append(self._row(symbol, index, fraction))
+        return rows
+
+    def fetch_funding_rates(self, symbols=None, params={}):
+        self._call('fetch_funding_rates', can_fail=True)
+        now_ms = self.clock.now_ms()
+        next_ms = now_ms // FUNDING_MS * FUNDING_MS + FUNDING_MS
+        return {sym: {'symbol': sym, 'fundingRate': self._rate(sym), 'markPrice': self.price(sym),
+                      'fundingTimestamp': next_ms, 'timestamp': now_ms}
+                for sym in (symbols or self.symbols) if sym in self.candles}
+
+    # --- ACCOUNT ---
+
+    def fapiPrivateV2GetAccount(self, params={}):
+        self._call('fapiPrivateV2GetAccount')
+        if self.finished:
+            raise ReplayFinished(f"Replay finished at {pd.Timestamp(self.end_ms, unit='ms')}")
+        self._settle_funding()
+        with self._lock:
+            wallet, unrealized, margin, rows = self._account_rows()
+            held = {sym: (amt, entry, mark, pnl, lev) for sym, amt, entry, mark, pnl, lev in rows}
+            positions = []
+            for sym in self.symbols: # Binance lists every symbol, flat ones with zeros
+                amt, entry, mark, pnl, lev = held.get(sym, (0.0, 0.0, 0.0, 0.0, self.leverage.get(sym, self.default_leverage)))
+                positions.append({'symbol': self._id(sym), 'positionAmt': f"{amt}", 'entryPrice': f"{entry}",
+                                  'unrealizedProfit': f"{pnl}", 'leverage': str(lev), 'isolated': False,
+                                  'positionSide': 'BOTH', 'initialMargin': f"{abs(amt) * mark / lev}"})
+            margin_balance = wallet + unrealized
+            return {'totalWalletBalance': f"{wallet}", 'totalUnrealizedProfit': f"{unrealized}",
+                    'totalMarginBalance': f"{margin_balance}", 'totalInitialMargin': f"{margin}",
+                    'availableBalance': f"{max(0.0, margin_balance - margin)}", 'positions': positions}
+
+    def fapiPrivateV2GetPositionRisk(self, params={}):
+        self._call('fapiPrivateV2GetPositionRisk')
+        with self._lock:
+            _, _, _, rows = self._account_rows()
+        return [{'symbol': self._id(sym), 'positionAmt': f"{amt}", 'entryPrice': f"{entry}", 'markPrice': f"{mark}",
+                 'unRealizedProfit': f"{pnl}", 'leverage': str(lev), 'positionSide': 'BOTH'}
+                for sym, amt, entry, mark, pnl, lev in rows
+                if not params.get('symbol') or params['symbol'] == self._id(sym)]
+
+    def fetch_positions(self, symbols=None, params={}):
+        """ccxt's unified layout (run_live replaces this with the raw PositionRisk rows)."""
+        self._call('fetch_positions')
+        with self._lock:
+            _, _, _, rows = self._account_rows()
+        return [{'symbol': sym, 'contracts': abs(amt), 'side': 'long' if amt > 0 else 'short', 'entryPrice': entry,
+                 'markPrice': mark, 'unrealizedPnl': pnl, 'leverage': lev, 'info': {'positionAmt': f"{amt}"}}
+                for sym, amt, entry, mark, pnl, lev in rows if not symbols or sym in symbols]
+
+    def fapiPrivatePostLeverage(self, params={}):
+        self._call('fapiPrivatePostLeverage')
+        sym = self._symbol(params['symbol'])
+        leverage = int(params['leverage'])
+        if not 1 <= leverage <= 125:
+            raise MockExchangeError(-4028, f"Leverage {leverage} is not valid")
+        self.leverage[sym] = leverage
+        return {'symbol': params['symbol'], 'leverage': leverage, 'maxNotionalValue': '1000000'}
+
+    def set_leverage(self, leverage, symbol=None, params={}):
+        return self.fapiPrivatePostLeverage({'symbol': self._id(symbol), 'leverage': leverage})
+
+    def fapiPrivatePostPositionSideDual(self, params={}):
+        self._call('fapiPrivatePostPositionSideDual')
+        dual = str(params.get('dualSidePosition', 'false')).lower() == 'true'
+        if dual == self.dual_side:
+            raise MockExchangeError(-4059, "No need to change position side.")
+        if dual:
+            raise MockExchangeError(-4067, "Position side cannot be changed: the stand-in is one-way only.")
+        self.dual_side = dual
+        return {'code': 200, 'msg': 'success'}
+
+    # --- ORDERS ---
+
+    def fapiPrivatePostOrder(self, params={}):
+        """MARKET orders, one-way mode: fill at the current price +/- slippage, taker fee, netting."""
+        self._call('fapiPrivatePostOrder')
+        self._settle_funding()
+        sym = self._symbol(params['symbol'])
+        if str(params.get('type', 'MARKET')).upper() != 'MARKET':
+            raise MockExchangeError(-1116, "Invalid orderType (the stand-in fills MARKET orders only).")
+        side = 1 if str(params['side']).upper() == 'BUY' else -1
+        qty = float(params['quantity'])
+        reduce_only = str(params.get('reduceOnly', 'false')).lower() == 'true'
+        with self._lock:
+            self.stats['orders'] += 1
+            pos = self.positions.get(sym)
+            amt = pos['amt'] if pos else 0.0
+            if qty <= 0:
+                return self._reject(-4003, "Quantity less than or equal to zero.")
+            if reduce_only:
+                if amt == 0 or np.sign(amt) == side:
+                    return self._reject(-2022, "ReduceOnly Order is rejected.")
+                qty = min(qty, abs(amt))
+
+            price = self.price(sym) * (1 + side * self.slippage)
+            notional = qty * price
+            if not reduce_only and notional < MIN_NOTIONAL:
+                return self._reject(-4164, f"Order's notional must be no smaller than {MIN_NOTIONAL}.")
+            opening = qty if amt == 0 or np.sign(amt) == side else max(0.0, qty - abs(amt))
+            if opening > 0:
+                wallet, unrealized, margin, _ = self._account_rows()
+                required = opening * price / self.leverage.get(sym, self.default_leverage)
+                if required > wallet + unrealized - margin:
+                    return self._reject(-2019, "Margin is insufficient.")
+
+            fee = notional * self.fee
+            closing = qty - opening
+            realized = (price - pos['entry']) * closing * np.sign(amt) if closing > 0 else 0.0
+            new_amt = amt + side * qty
+            if abs(new_amt) < 1e-12:
+                self.positions.pop(sym, None)
+            elif closing > 0 and opening == 0:
+                pos['amt'] = new_amt # Partial close keeps the entry
+            elif closing > 0:
+                self.positions[sym] = {'amt': new_amt, 'entry': price} # Flipped through zero
+            else:
+                entry = (abs(amt) * pos['entry'] + qty * price) / abs(new_amt) if pos else price
+                self.positions[sym] = {'amt': new_amt, 'entry': entry}
+            self.balance += realized - fee
+            self.stats['fees'] += fee
+            self.stats['realized_pnl'] += realized
+            now_ms = self.clock.now_ms()
+            return {'orderId': next(self._order_ids), 'symbol': params['symbol'], 'status': 'FILLED',
+                    'side': 'BUY' if side > 0 else 'SELL', 'type': 'MARKET', 'origQty': params['quantity'],
+                    'executedQty': f"{qty}", 'avgPrice': f"{price}", 'cumQuote': f"{notional}",
+                    'reduceOnly': reduce_only, 'positionSide': 'BOTH', 'updateTime': now_ms}
+
+    def _reject(self, code, msg):
+        self.stats['rejected'][code] = self.stats['rejected'].get(code, 0) + 1
+        raise MockExchangeError(code, msg)
+
+    def create_market_order(self, symbol, side, amount, price=None, params={}):
+        order = {'symbol': self._id(symbol), 'side': side.upper(), 'type': 'MARKET', 'quantity': self.amount_to_precision(symbol, amount)}
+        if params.get('reduceOnly'):
+            order['reduceOnly'] = 'true'
+        raw = self.fapiPrivatePostOrder(order)
+        return {'id': str(raw['orderId']), 'symbol': symbol, 'side': side, 'type': 'market', 'status': 'closed',
+                'amount': float(raw['executedQty']), 'filled': float(raw['executedQty']), 'average': float(raw['avgPrice']), 'info': raw}
+
+    # --- REPORTING ---
+
+    def summary(self):
+        wallet, unrealized, margin, rows = self._account_rows()
+        return {'sim_time': self.clock().isoformat(timespec='seconds'), 'wallet': wallet, 'unrealized': unrealized,
+                'equity': wallet + unrealized, 'open_positions': len(rows), 'orders': self.stats['orders'],
+                'rejected': dict(self.stats['rejected']), 'failures': self.stats['failures'], 'fees': self.stats['fees'],
+                'funding': self.stats['funding'], 'realized_pnl': self.stats['realized_pnl'],
+                'calls': dict(self.stats['calls'])}
+
+
+def _load_values(path):
+    """OHLCV (n, 5) float array of a data/*.csv file, sorted and deduplicated."""
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values('timestamp').drop_duplicates('timestamp')
+    return df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+
+def from_env(symbols=None):
+    """
+    get_exchange() hook (MOCK_EXCHANGE=true): `symbols` (default the configured SYMBOLS) from data/
+    (synthetic where no CSV is recorded) plus MOCK_SYMBOLS extra synthetic pairs. The full list is
+    exchange.symbols; core.config.SYMBOLS is left alone, the caller decides what to scan.
+    Also points core.clock at the simulated clock.
+    """
+    from core import clock
+    from core.config import SYMBOLS
+    symbols = list(symbols or SYMBOLS)
+    extra = int(os.getenv('MOCK_SYMBOLS', '0'))
+    symbols += [f"SYN{k + 1:03d}/USDT" for k in range(extra) if f"SYN{k + 1:03d}/USDT" not in symbols]
+    exchange = MockExchange.from_csv(symbols, speed=float(os.getenv('MOCK_SPEED', '1')),
+                                     balance=float(os.getenv('MOCK_BALANCE', '10000')),
+                                     latency=float(os.getenv('MOCK_LATENCY_MS', '0')) / 1000)
+    clock.set_clock(exchange.clock)
+    print(f"   🧪 Mock exchange: {len(exchange.symbols)} symbols, x{exchange.clock.speed:g} clock, "
+          f"{(exchange.end_ms - exchange.clock.now_ms()) / 3_600_000:.0f}h of candles to replay")
+    return exchange
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poke the local futures stand-in (what the bot would see)")
+    parser.add_argument('--symbols', nargs='+', default=['BTC/USDT', 'ETH/USDT'])
+    parser.add_argument('--synthetic', type=int, default=0, help="Extra synthetic symbols")
+    parser.add_argument('--speed', type=float, default=100.0)
+    parser.add_argument('--seconds', type=float, default=3.0, help="Wall seconds to watch the clock run")
+    args = parser.parse_args()
+
+    symbols = args.symbols + [f"SYN{k + 1:03d}/USDT" for k in range(args.synthetic)]
+    exchange = MockExchange.from_csv(symbols, speed=args.speed)
+    exchange.load_markets()
+    for sym in symbols[:5]:
+        bars = exchange.fetch_ohlcv(sym, limit=3)
+        print(f"   {sym:<14} last bars {[round(b[4], 6) for b in bars]}  precision {exchange.market(sym)['precision']}")
+    time.sleep(args.seconds)
+    print(json.dumps(exchange.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
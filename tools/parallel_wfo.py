@@ -0,0 +1,208 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .indicator_cache import CACHE, format_report
+from .market_store import MarketStore
+from .timeframes import seed_resamples
+from .result_store import RunCheckpoint
+from .wfo import engine_settings, param_combinations, score_combinations, select_best, test_window
+
+# --- PARALLEL WALK-FORWARD ---
+# The OHLCV frame is written once into a shared memory block; workers attach to it at
+# startup and rebuild a zero-copy DataFrame view, so jobs only carry window bounds and
+# combination indices instead of pickled DataFrames.
+
+
+class SharedOHLCV:
+    """Owner side: copies the frame's index (int64 ns) and numeric columns into shared memory."""
+    def __init__(self, df):
+        self.columns = [c for c in df.columns if np.issubdtype(df[c].dtype, np.number)]
+        self.rows = len(df)
+        self.tz = getattr(df.index, 'tz', None)
+        size = max(8 * self.rows * (len(self.columns) + 1), 8)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+
+        index, values = _views(self.shm.buf, self.rows, len(self.columns))
+        index[:] = df.index.as_unit('ns').asi8
+        values[:] = df[self.columns].to_numpy(dtype=np.float64).T
+
+    @property
+    def spec(self):
+        return {'name': self.shm.name, 'rows': self.rows, 'columns': self.columns, 'tz': self.tz}
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _views(buf, rows, n_cols):
+    index = np.ndarray((rows,), dtype=np.int64, buffer=buf)
+    values = np.ndarray((n_cols, rows), dtype=np.float64, buffer=buf, offset=8 * rows)
+    return index, values
+
+def attach_frame(spec):
+    """Worker side: returns (shm, df) where df's data lives in the shared block (no copy)."""
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    index, values = _views(shm.buf, spec['rows'], len(spec['columns']))
+    # Same contract as WFOOptimizer.df: strategies get read-only views of the series
+    values.flags.writeable = False
+    dt_index = pd.DatetimeIndex(index.view('datetime64[ns]'), name='timestamp')
+    if spec['tz'] is not None:
+        dt_index = dt_index.tz_localize('UTC').tz_convert(spec['tz'])
+    df = pd.DataFrame(values.T, index=dt_index, columns=spec['columns'], copy=False)
+    return shm, df
+
+
+# Per-process state, set once by the pool initializer
+_shm = None
+_df = None
+
+def _init_worker(spec, market=None):
+    global _shm, _df
+    _shm, _df = attach_frame(spec)
+    # Each worker keeps its own indicator cache over the shared frame
+    CACHE.register(_df)
+    if market is not None:
+        # Derived higher timeframes are memory-mapped from the store, not resampled per worker
+        root, symbol, timeframe = market
+        seed_resamples(CACHE, _df, MarketStore(root), symbol, timeframe)
+
+def _snapshot(store):
+    stats = CACHE.snapshot()
+    if store is not None:
+        stats.update(store.stats)
+    return stats
+
+def _delta(since, store):
+    now = _snapshot(store)
+    return {k: now[k] - since.get(k, 0) for k in now}
+
+def _score_job(strategy_cls, combinations, leverage, train_slice, store=None, objective='return_dd'):
+    stats = _snapshot(store)
+    scores = score_combinations(_df.iloc[train_slice], strategy_cls, combinations, leverage, store, objective)
+    return scores, _delta(stats, store)
+
+def _search_job(strategy_cls, param_grid, search, leverage, train_slice, window, store=None, objective='return_dd'):
+    from .search import search_window
+    stats = _snapshot(store)
+    best_params, info = search_window(_df.iloc[train_slice], strategy_cls, param_grid, search, leverage, window, store, objective)
+    return best_params, info, _delta(stats, store)
+
+def _test_job(strategy_cls, best_params, leverage, train_slice, test_slice):
+    stats = CACHE.snapshot()
+    result = test_window(_df.iloc[train_slice], _df.iloc[test_slice], strategy_cls, best_params, leverage)
+    return result, CACHE.delta(stats)
+
+def _add_stats(total, delta):
+    for k, v in delta.items():
+        total[k] = total.get(k, 0) + v
+
+
+class ParallelWFO:
+    """
+    Process-pool WFO executor bound to one WFOOptimizer's data. Reuse it across strategies
+    (`with ParallelWFO(optimizer) as ex: ex.optimize(...)`) so the pool and the shared block
+    are created once.
+
+    Jobs are (window, chunk of combinations). Scores are written back by combination index and
+    the best is picked with the serial tie-break, so the output matches WFOOptimizer.optimize.
+    """
+    def __init__(self, optimizer, workers=None, chunk_size=None):
+        self.optimizer = optimizer
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.shared = SharedOHLCV(optimizer.df)
+        dataset = getattr(optimizer, 'dataset', None)
+        market = (optimizer.market_store.root, *dataset) if dataset is not None else None
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.shared.spec, market))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.shared.close()
+
+    def _chunk_size(self, n_combos, n_windows):
+        if self.chunk_size:
+            return self.chunk_size
+        # ~4 jobs per worker keeps the pool busy without shrinking the grid matrices too much
+        chunks_per_window = max(1, -(-self.workers * 4 // max(n_windows, 1)))
+        return max(1, -(-n_combos // chunks_per_window))
+
+    def optimize(self, strategy_cls, param_grid, leverage=1.0, search=None, store=None, objective='return_dd'):
+        windows = self.optimizer.windows()
+
+        print(f"Starting parallel WFO for {strategy_cls.__name__} (Lev: {leverage}x, {self.workers} workers, {len(windows)} windows)...")
+
+        # Windows finished by an earlier (interrupted) run with the same inputs are skipped
+        checkpoint = RunCheckpoint(store, self.optimizer, strategy_cls, param_grid, engine_settings(leverage, objective), search)
+        pending = [(w, window) for w, window in enumerate(windows) if w not in checkpoint.done]
+
+        cache_stats = {}
+        if search is None:
+            best = self._grid_search(strategy_cls, param_grid, leverage, pending, store, cache_stats, objective)
+        else:
+            # Adaptive searches are sequential within a window, so each window is one job
+            best = self._adaptive_search(strategy_cls, param_grid, leverage, pending, search, store, cache_stats, objective)
+
+        # 2. Out-of-sample test of each window's winner
+        tests = []
+        for best_params, (w, (_, _, train_slice, test_slice)) in zip(best, pending):
+            tests.append(self.pool.submit(_test_job, strategy_cls, best_params, leverage, train_slice, test_slice))
+
+        by_window = dict(checkpoint.done)
+        for (w, (train_end, test_end, _, _)), future in zip(pending, tests):
+            result = {'period_start': train_end, 'period_end': test_end}
+            test_result, delta = future.result()
+            _add_stats(cache_stats, delta)
+            result.update(test_result)
+            checkpoint.record(w, result)
+            by_window[w] = result
+        results = [by_window[w] for w in range(len(windows))]
+
+        print(format_report(cache_stats))
+        checkpoint.finish(results, cache_stats)
+        return results
+
+    def _grid_search(self, strategy_cls, param_grid, leverage, pending, store, cache_stats, objective='return_dd'):
+        combinations = param_combinations(param_grid)
+        chunk = self._chunk_size(len(combinations), len(pending))
+
+        # 1. Train-window grid search, fanned out over (window, combination chunk)
+        futures = []
+        for row, (_, (_, _, train_slice, _)) in enumerate(pending):
+            for start in range(0, len(combinations), chunk):
+                combo_slice = slice(start, start + chunk)
+                futures.append((row, combo_slice, self.pool.submit(_score_job, strategy_cls, combinations[combo_slice], leverage, train_slice, store, objective)))
+
+        scores = np.full((len(pending), len(combinations)), np.nan)
+        for row, combo_slice, future in futures:
+            scores[row, combo_slice], delta = future.result()
+            _add_stats(cache_stats, delta)
+
+        return [select_best(scores[row], combinations) for row in range(len(pending))]
+
+    def _adaptive_search(self, strategy_cls, param_grid, leverage, pending, search, store, cache_stats, objective='return_dd'):
+        from .search import format_search_report, SearchSpace
+
+        # 1. One budgeted search per window (seeded by window, so results match the serial run)
+        futures = [self.pool.submit(_search_job, strategy_cls, param_grid, search, leverage, train_slice, w, store, objective)
+                   for w, (_, _, train_slice, _) in pending]
+
+        best, infos = [], []
+        for future in futures:
+            best_params, info, delta = future.result()
+            _add_stats(cache_stats, delta)
+            best.append(best_params)
+            infos.append(info)
+
+        print(format_search_report(search, infos, SearchSpace(param_grid).size))
+        return best
@@ -0,0 +1,502 @@
+import os
+import sys
+import time
+import argparse
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import MAX_POSITIONS, LEVERAGE_CAP, RISK_PER_TRADE, COOLDOWN_MINUTES, CIRCUIT_BREAKER_DRAWDOWN, LIVE_STRATEGY
+from core.indicators import compute_indicator_frame
+from core.strategy import load_strategy_config
+from tools.funding import asof, bar_charges
+from tools.timeframes import timeframe_ms
+
+# --- PORTFOLIO BACKTESTER ---
+# Steps every symbol on one clock with the live bot's cross-symbol rules: shared margin
+# (notional / LEVERAGE_CAP), MAX_POSITIONS, 12 longs / 12 shorts, score-ranked entries,
+# resize-to-fit, rotation of the weakest position and the circuit breaker.
+#
+# Per-symbol state lives in columnar arrays (one slot per symbol) and exits are evaluated for
+# all symbols at once, so a year of 5m bars on 60+ symbols runs in seconds and risk settings
+# (RISK_PER_TRADE, LEVERAGE_CAP, MAX_POSITIONS...) can be swept over one precomputed panel.
+#
+# Signals are a vectorised version of core.strategy.evaluate_symbol: the trend-follow entry,
+# its score and risk sizing; exits are the dynamic TP, trend reversal, RSI scalps, time stop,
+# stagnation, trailing stop and the risk-cleanup rules, at bar close. Partial TPs, pyramiding
+# and volume-climax exits (which need intrabar volume projection) are not modelled.
+# scripts/check_portfolio_equivalence.py compares these rules bar by bar with the live code,
+# so run it after changing either side. tools/replay.py runs the exact live code when fidelity
+# matters more than speed.
+
+FUNDING_HOURS = (0, 8, 16)
+EXIT_COLUMNS = ('close', 'atr', 'adx', 'rsi', 'rsi_sma', 'stoch_k', 'trend', 'bb_width', 'bb_w_sma')
+MAX_SIDE_POSITIONS = 12 # run_live.py correlation cap (longs and shorts each)
+
+EXIT_REASONS = ['NONE', 'SENTIMENT_MISMATCH', 'TOXIC_ASSET_PURGE', 'EXIT_TP_DYNAMIC', 'EXIT_TREND_REVERSAL', 'EXIT_SCALP',
+                'EXIT_TIME_STOP', 'EXIT_STAGNATION', 'EXIT_TRAIL_STOP', 'ROTATION_SACRIFICE', 'CIRCUIT_BREAKER']
+
+
+def _panel_column(frames, symbols, index, col, fill=np.nan):
+    out = np.full((len(index), len(symbols)), fill, dtype=np.float64)
+    for s, sym in enumerate(symbols):
+        df = frames[sym]
+        out[df['_row'].to_numpy(), s] = df[col].to_numpy(dtype=np.float64)
+    return out
+
+def _funding_panel(funding_rate, symbols, index, close, bar_minutes):
+    """
+    (rate known at each bar close, rate due over each bar), both (bars x symbols).
+    funding_rate: per-8h float, {symbol: float} (settled at FUNDING_HOURS), or {symbol: (ts, rate, mark)}
+    settlement history (tools/funding.py funding_events), paid on the mark notional.
+    """
+    step = np.int64(bar_minutes * 60_000_000_000)
+    decision = index + np.timedelta64(bar_minutes, 'm')
+    on_hour = (decision.astype('datetime64[m]').astype(np.int64) % 60 == 0) & np.isin(decision.astype('datetime64[h]').astype(np.int64) % 24, FUNDING_HOURS)
+    bar_ts = index.astype('datetime64[ns]').astype(np.int64)
+    known = np.zeros((len(index), len(symbols)))
+    due = np.zeros((len(index), len(symbols)))
+    for s, sym in enumerate(symbols):
+        rate = funding_rate.get(sym, 0.0) if isinstance(funding_rate, dict) else funding_rate
+        if isinstance(rate, tuple):
+            known[:, s] = np.nan_to_num(asof(rate[0], rate[1], bar_ts + step))
+            due[:, s] = bar_charges(*rate, bar_ts, close[:, s], step)
+        else:
+            known[:, s] = rate
+            due[on_hour, s] = rate
+    return known, due
+
+def build_panel(candles, params=None, funding_rate=0.0001, warmup=300, bar_minutes=5):
+    """
+    candles: {symbol: DataFrame(timestamp, open, high, low, close, volume)}
+    Returns the (bars x symbols) arrays the simulator steps through, on the union timeline.
+    params: strategy parameters, by default the live config (config/strategies/{LIVE_STRATEGY}_config.txt)
+    funding_rate: see _funding_panel (historical settlements also drive the entry scores).
+    """
+    params = dict(params or load_strategy_config(LIVE_STRATEGY))
+    symbols = list(candles)
+    frames = {}
+    for sym, df in candles.items():
+        df = df.sort_values('timestamp').drop_duplicates('timestamp').reset_index(drop=True).copy()
+        compute_indicator_frame(df, params)
+        df['_bar'] = np.arange(len(df))
+        frames[sym] = df
+
+    index = np.unique(np.concatenate([df['timestamp'].to_numpy(dtype='datetime64[ns]') for df in frames.values()]))
+    for df in frames.values():
+        df['_row'] = np.searchsorted(index, df['timestamp'].to_numpy(dtype='datetime64[ns]'))
+
+    col = lambda name, fill=np.nan: _panel_column(frames, symbols, index, name, fill)
+    close = col('close')
+    valid = ~np.isnan(close)
+    ready = valid & (col('_bar', -1) >= warmup)
+
+    atr = np.nan_to_num(col('atr'), nan=0.0)
+    rsi = np.nan_to_num(col('rsi'), nan=50.0)
+    adx = np.nan_to_num(col('adx'), nan=0.0)
+    st_dir = np.nan_to_num(col('st_dir'), nan=0.0)
+    ema_200 = col('ema_200')
+    ema_200 = np.where(np.isnan(ema_200), close, ema_200)
+
+    # Previous bar of the same symbol (rows are contiguous per symbol once it has started)
+    prev = lambda a, fill: np.vstack([np.full((1, a.shape[1]), fill), a[:-1]])
+    prev_adx = np.where(ready, prev(adx, 0.0), 0.0)
+    confirmed_trend = prev(st_dir, 0.0)
+
+    # --- Entry (evaluate_symbol, flat branch) ---
+    adx_threshold = params.get('adx_threshold', 20)
+    adx_min = np.where(adx - prev_adx > 0, 20, 25)
+    strong = (prev_adx >= adx_threshold) & (prev_adx > adx_min)
+    long_entry = strong & (confirmed_trend == 1) & (close > ema_200)
+    short_entry = strong & (confirmed_trend == -1) & (close < ema_200)
+    entry_side = np.where(long_entry, 1, np.where(short_entry, -1, 0)).astype(np.int8)
+    entry_side[~ready | (atr <= 0)] = 0
+
+    rates, funding_due = _funding_panel(funding_rate, symbols, index, close, bar_minutes)
+    score = 5.0 + adx / 20.0
+    score += np.where(entry_side == 1, (rates < 0) * 1.0 - (rates > 0.05) * 2.0, 0.0)
+    score += np.where(entry_side == -1, (rates > 0) * 1.0 - (rates < -0.05) * 2.0, 0.0)
+
+    # Market sentiment (share of symbols in an up trend) as seen by the next bar's risk cleanup
+    counted = ready.sum(axis=1)
+    bullish = np.where(ready, st_dir == 1, False).sum(axis=1)
+    sentiment = pd.Series(np.where(counted > 0, bullish / np.maximum(counted, 1), np.nan)).ffill().shift(1).fillna(0.5).to_numpy()
+
+    # Entry candidates per bar, best score first
+    rows, cols = np.nonzero(entry_side)
+    order = np.lexsort((-score[rows, cols], rows))
+    rows, cols = rows[order], cols[order]
+    bounds = np.searchsorted(rows, np.arange(len(index) + 1))
+    candidates = [cols[bounds[t]:bounds[t + 1]] for t in range(len(index))]
+
+    rsi_sma = col('rsi_sma')
+    return {
+        'symbols': symbols,
+        'index': index,
+        'close': close,
+        'valid': valid,
+        'ready': ready,
+        'atr': atr,
+        'rsi': rsi,
+        'rsi_sma': np.where(np.isnan(rsi_sma), rsi, rsi_sma),
+        'adx': adx,
+        'stoch_k': np.nan_to_num(col('stoch_k'), nan=50.0),
+        'trend': st_dir,
+        'bb_width': np.nan_to_num(col('bb_width'), nan=0.0),
+        'bb_w_sma': np.nan_to_num(col('bb_w_sma'), nan=0.0),
+        'entry_side': entry_side,
+        'score': np.where(entry_side != 0, score, 0.0),
+        'sentiment': sentiment,
+        'candidates': candidates,
+        'funding': rates,
+        'funding_due': funding_due
+    }
+
+
+class PortfolioSimulator:
+    def __init__(self, panel, initial_balance=10000.0, risk_per_trade=RISK_PER_TRADE, leverage_cap=LEVERAGE_CAP,
+                 max_positions=MAX_POSITIONS, max_side_positions=MAX_SIDE_POSITIONS, cooldown_minutes=COOLDOWN_MINUTES,
+                 circuit_breaker=CIRCUIT_BREAKER_DRAWDOWN, fee=0.0005, slippage=0.0002, rotation=True, bar_minutes=5):
+        self.panel = panel
+        self.initial_balance = initial_balance
+        self.risk_per_trade = risk_per_trade
+        self.leverage_cap = leverage_cap
+        self.max_positions = max_positions
+        self.max_side_positions = max_side_positions
+        self.cooldown_minutes = cooldown_minutes
+        self.circuit_breaker = circuit_breaker
+        self.fee = fee
+        self.slippage = slippage
+        self.rotation = rotation
+        self.bar_minutes = bar_minutes
+
+    # --- FILLS (same bookkeeping as tools/replay.py) ---
+    def _open(self, t, s, side, qty, price):
+        fill = price * (1 + self.slippage) if side > 0 else price * (1 - self.slippage)
+        self.qty[s] = qty * side
+        self.entry[s] = fill
+        self.peak[s] = fill
+        self.stop[s] = 0.0
+        self.entry_time[s] = self.now_min
+        self.margin_used += qty * fill / self.leverage_cap
+        self.open_count[0 if side > 0 else 1] += 1
+        self.trades.append((t, s, 1 if side > 0 else -1, qty, fill, 0, 0.0, 0.0))
+
+    def _close(self, t, s, price, reason):
+        qty, entry = abs(self.qty[s]), self.entry[s]
+        long = self.qty[s] > 0
+        fill = price * (1 - self.slippage) if long else price * (1 + self.slippage)
+        fees = (entry * qty + fill * qty) * self.fee
+        gross = (fill - entry) * qty if long else (entry - fill) * qty
+        self.balance += gross - fees
+        self.fees_paid += fees
+        self.margin_used -= qty * entry / self.leverage_cap
+        self.qty[s] = 0.0
+        self.stop[s] = 0.0
+        self.last_exit[s] = self.now_min
+        self.open_count[0 if long else 1] -= 1
+        self.trades.append((t, s, -1 if long else 1, qty, fill, reason, gross - fees, fees))
+        return gross - fees
+
+    def _exits(self, idx, row, sentiment):
+        """
+        Exit rules for the open symbols `idx` in evaluate_symbol's priority order.
+        Returns the EXIT_REASONS code per symbol in `idx` (0 = hold) and ratchets their trailing stops.
+        """
+        price, atr, adx = row['close'][idx], row['atr'][idx], row['adx'][idx]
+        rsi, rsi_smooth = row['rsi'][idx], row['rsi_sma'][idx]
+        side = np.sign(self.qty[idx])
+        long = side > 0
+        entry = self.entry[idx]
+        pnl_unit = side * (price - entry)
+        roi = pnl_unit / entry
+        duration_min = self.now_min - self.entry_time[idx]
+
+        peak = np.where(long, np.maximum(self.peak[idx], price), np.minimum(self.peak[idx], price))
+        self.peak[idx] = peak
+        peak_pnl = side * (peak - entry)
+
+        # Hard TP: 3.5 ATR (4.5 / 6.0 in strong trends, +1 on expanding width) when RSI is extreme, or fading in a weak trend;
+        # below the TP distance, a confirmed trend flip bails out instead
+        tp_dist = atr * (np.where(adx > 50, 6.0, np.where(adx > 30, 4.5, 3.5)) + (row['bb_width'][idx] > row['bb_w_sma'][idx]))
+        extreme = np.where(long, rsi > 85, rsi < 15)
+        fading = np.where(long, rsi < rsi_smooth, rsi > rsi_smooth)
+        beyond_tp = pnl_unit > tp_dist
+        hard_tp = beyond_tp & (extreme | (adx < 25) & fading)
+        reversal = ~beyond_tp & (row['trend'][idx] == -side) & (adx > 20)
+
+        # RSI scalps in weak trends
+        stoch_k = row['stoch_k'][idx]
+        scalp = (roi > 0.01) & np.where(adx < 25, np.where(long, rsi_smooth > 70, rsi_smooth < 30),
+                                        (adx < 30) & np.where(long, (rsi_smooth > 75) & (stoch_k > 80), (rsi_smooth < 25) & (stoch_k < 20)))
+
+        time_stop = (duration_min > 15) & (roi < -0.003)
+        stagnation = (duration_min > 120) & (adx < 50) & (np.abs(roi) < 0.005)
+
+        # Trailing stop (ratchets, breakeven move and short profit locks as in evaluate_symbol)
+        mult = np.where(roi > 0.015, 0.5, np.where(roi > 0.008, 0.8, 1.5))
+        prev_stop = self.stop[idx]
+        has_prev = prev_stop > 0
+        long_stop = np.maximum(peak - atr * mult, prev_stop)
+        long_stop = np.where((roi > 0.005) & (long_stop < entry), entry * 1.001, long_stop)
+        fee_lock = entry * 0.003
+        short_stop = peak + atr * mult
+        short_stop = np.where((peak_pnl > atr * 0.5) & (peak_pnl > fee_lock), np.minimum(short_stop, entry - fee_lock), short_stop)
+        short_stop = np.where(peak_pnl > atr, np.minimum(short_stop, entry - atr * 0.5), short_stop)
+        stop = np.where(long, np.where(has_prev, np.maximum(long_stop, prev_stop), long_stop),
+                        np.where(has_prev, np.minimum(short_stop, prev_stop), short_stop))
+        trail = side * (price - stop) < 0
+
+        # Lowest priority first, so earlier rules overwrite later ones
+        reason = np.zeros(len(idx), dtype=np.int64)
+        reason[trail] = 8
+        reason[stagnation] = 7
+        reason[time_stop] = 6
+        reason[scalp] = 5
+        reason[reversal] = 4
+        reason[hard_tp] = 3
+        self.stop[idx] = stop
+
+        # Risk cleanup (core.risk.get_risk_cleanup_actions) outranks the strategy
+        mismatch = np.where(long, sentiment < 0.25, sentiment > 0.75) & (roi < -0.015)
+        toxic = (duration_min < 30) & (roi < -0.05)
+        reason[toxic] = 2
+        reason[mismatch] = 1
+        return reason
+
+    def run(self):
+        p = self.panel
+        n_bars, n_syms = p['close'].shape
+        self.balance = self.initial_balance
+        self.margin_used = 0.0
+        self.fees_paid = 0.0
+        self.funding_paid = 0.0
+        self.trades = []
+        self.qty = np.zeros(n_syms)
+        self.entry = np.zeros(n_syms)
+        self.peak = np.zeros(n_syms)
+        self.stop = np.zeros(n_syms)
+        self.entry_time = np.zeros(n_syms)
+        self.last_exit = np.full(n_syms, -np.inf)
+        self.open_count = [0, 0] # longs, shorts
+        last_price = np.zeros(n_syms)
+        equity = np.full(n_bars, np.nan)
+        high_water_mark = self.initial_balance
+        halted = None
+
+        # Decisions happen at bar close; minutes since epoch for cooldowns and durations
+        decision = p['index'] + np.timedelta64(self.bar_minutes, 'm')
+        minutes = decision.astype('datetime64[m]').astype(np.int64).astype(np.float64)
+        funding_bar = p['funding_due'].any(axis=1)
+
+        t_start = time.time()
+        for t in range(n_bars):
+            self.now_min = minutes[t]
+            valid = p['valid'][t]
+            np.copyto(last_price, p['close'][t], where=valid)
+            price = last_price
+            open_ = self.qty != 0
+            any_open = sum(self.open_count) > 0
+
+            # Mark, funding, equity
+            upnl = float(np.dot(self.qty, price - self.entry)) if any_open else 0.0
+            if funding_bar[t] and any_open:
+                payment = float(np.sum(self.qty * price * p['funding_due'][t]))
+                self.balance -= payment
+                self.funding_paid += payment
+            wallet = self.balance
+            equity[t] = wallet + upnl
+
+            # Circuit breaker on wallet balance vs high water mark
+            high_water_mark = max(high_water_mark, wallet)
+            if high_water_mark > 0 and (high_water_mark - wallet) / high_water_mark > self.circuit_breaker:
+                for s in np.flatnonzero(open_):
+                    self._close(t, s, price[s], 10)
+                equity[t] = self.balance
+                halted = pd.Timestamp(decision[t])
+                break
+
+            # Margin snapshot taken before this bar's fills, like the live loop
+            available = wallet + min(0.0, upnl) - self.margin_used
+
+            strategy_exits = ()
+            if any_open:
+                held = np.flatnonzero(open_ & p['ready'][t])
+                if len(held):
+                    reasons = self._exits(held, {k: p[k][t] for k in EXIT_COLUMNS}, p['sentiment'][t])
+                    # 1. Risk cleanup exits (score 100: ahead of entries)
+                    for s, reason in zip(held, reasons):
+                        if reason in (1, 2):
+                            self._close(t, s, price[s], reason)
+                    strategy_exits = [(s, reason) for s, reason in zip(held, reasons) if reason >= 3]
+
+            # 2. Entries by score
+            if wallet > 0:
+                side, score, atr = p['entry_side'][t], p['score'][t], p['atr'][t]
+                for s in p['candidates'][t]:
+                    if sum(self.open_count) >= self.max_positions:
+                        break
+                    if self.qty[s] != 0 or self.now_min - self.last_exit[s] < self.cooldown_minutes:
+                        continue
+                    available = self._try_entry(t, s, side[s], score[s], price, atr[s], wallet, available)
+                    if available is None:
+                        break
+
+            # 3. Strategy exits (score 0: after entries)
+            for s, reason in strategy_exits:
+                if self.qty[s] != 0: # May have been rotated out above
+                    self._close(t, s, price[s], reason)
+
+        elapsed = time.time() - t_start
+        return self._summary(equity, elapsed, halted)
+
+    def _try_entry(self, t, s, side, score, price, atr, wallet, available):
+        """run_live.py entry gating for one candidate. Returns the remaining margin, or None to stop entries."""
+        if self.open_count[0 if side > 0 else 1] >= self.max_side_positions:
+            return available
+
+        # Risk sizing (evaluate_symbol): RISK_PER_TRADE of the wallet over a 1.5 ATR stop, capped by leverage
+        risk_pct = self.risk_per_trade * (1.5 if score > 10.0 else 1.0)
+        qty = min(wallet * risk_pct / (atr * 1.5), wallet * self.leverage_cap / price[s])
+        if qty * price[s] < 6:
+            return available
+
+        cost = qty * price[s] / self.leverage_cap
+        if cost > available:
+            if self.rotation and sum(self.open_count) > 0 and score >= 8.0:
+                available += self._rotate(t, s, score, price)
+            if cost > available:
+                if available > 10:
+                    qty = available * 0.95 * self.leverage_cap / price[s]
+                else:
+                    return None
+        self._open(t, s, side, qty, price[s])
+        return available - qty * price[s] / self.leverage_cap
+
+    def _rotate(self, t, s, score, price):
+        """Sacrifice the weakest position for a high-score entry (run_live.py rotation). Returns margin released."""
+        others = np.flatnonzero(self.qty != 0)
+        others = others[others != s]
+        if not len(others):
+            return 0.0
+        pnl = self.qty[others] * (price[others] - self.entry[others])
+        k = int(np.argmin(pnl))
+        weakest, w_pnl = others[k], pnl[k]
+        age = self.now_min - self.entry_time[weakest]
+        stagnant = age > 45 and w_pnl < 0.5
+        if (w_pnl < -2.0 and age > 10) or w_pnl < -10.0 or (stagnant and score > 8.5):
+            initial_margin = abs(self.qty[weakest]) * self.entry[weakest] / self.leverage_cap
+            self._close(t, weakest, price[weakest], 9)
+            return max(0.0, initial_margin + w_pnl)
+        return 0.0
+
+    def _summary(self, equity, elapsed, halted):
+        p = self.panel
+        log = pd.DataFrame(self.trades, columns=['bar', 'symbol', 'side', 'amount', 'price', 'reason', 'pnl', 'fees'])
+        if len(log):
+            log['timestamp'] = pd.to_datetime(p['index'][log['bar'].to_numpy()])
+            log['symbol'] = np.asarray(p['symbols'], dtype=object)[log['symbol'].to_numpy()]
+            log['side'] = np.where(log['side'] > 0, 'buy', 'sell')
+            log['is_close'] = log['reason'] > 0
+            log['reason'] = np.asarray(EXIT_REASONS, dtype=object)[log['reason'].to_numpy()]
+            log.loc[~log['is_close'], 'reason'] = 'ENTRY_TREND_FOLLOW'
+        closes = log[log['is_close']] if len(log) else log
+        curve = pd.Series(equity, index=pd.to_datetime(p['index'])).dropna()
+        final = curve.iloc[-1] if len(curve) else self.initial_balance
+        wins = int((closes['pnl'] > 0).sum()) if len(closes) else 0
+        return {
+            'final_equity': final,
+            'total_return': final / self.initial_balance - 1,
+            'max_drawdown': (curve / curve.cummax() - 1).min() if len(curve) else 0.0,
+            'trades': len(log),
+            'closes': len(closes),
+            'win_rate': wins / len(closes) if len(closes) else 0.0,
+            'fees': self.fees_paid,
+            'funding': self.funding_paid,
+            'halted': halted,
+            'bars': int(p['valid'].sum()),
+            'seconds': elapsed,
+            'equity_curve': curve,
+            'trade_log': log
+        }
+
+
+def sweep(panel, grid, **fixed):
+    """
+    Runs the simulator for every combination of `grid` (PortfolioSimulator keyword -> values)
+    over one precomputed panel. Returns a DataFrame with one row per combination.
+    """
+    keys = list(grid)
+    rows = []
+    for values in product(*grid.values()):
+        settings = dict(zip(keys, values))
+        summary = PortfolioSimulator(panel, **fixed, **settings).run()
+        rows.append({**settings, **{k: summary[k] for k in ('total_return', 'max_drawdown', 'trades', 'win_rate', 'fees', 'halted', 'seconds')}})
+    return pd.DataFrame(rows)
+
+
+def print_summary(summary):
+    print("\n--- Portfolio Backtest ---")
+    print(f"Final Equity: ${summary['final_equity']:,.2f} ({summary['total_return']:.2%})")
+    print(f"Max Drawdown: {summary['max_drawdown']:.2%}")
+    print(f"Trades: {summary['trades']} ({summary['closes']} closes) | Win Rate: {summary['win_rate']:.1%}")
+    print(f"Fees: ${summary['fees']:,.2f} | Funding: ${summary['funding']:,.2f}")
+    if summary['halted']:
+        print(f"🚨 Circuit breaker halted the run at {summary['halted']}")
+    rate = summary['bars'] / summary['seconds'] if summary['seconds'] > 0 else 0
+    print(f"Simulated {summary['bars']:,} symbol-bars in {summary['seconds']:.1f}s ({rate:,.0f} bars/s)")
+
+def main():
+    from tools.replay import load_candles
+    from core.config import SYMBOLS
+
+    parser = argparse.ArgumentParser(description="Portfolio backtest of the live rules across symbols")
+    parser.add_argument('--symbols', default=None, help="Comma separated (default: every config symbol with data)")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--funding', type=float, default=0.0001, help="Per-8h funding rate")
+    parser.add_argument('--funding-history', action='store_true', help="Use the funding settlements in the market store (tools/funding.py) where downloaded")
+    parser.add_argument('--risk', default=None, help="Sweep RISK_PER_TRADE, e.g. 0.01,0.025,0.04")
+    parser.add_argument('--leverage', default=None, help="Sweep LEVERAGE_CAP, e.g. 5,12,20")
+    args = parser.parse_args()
+
+    candles = {}
+    for sym in (args.symbols.split(',') if args.symbols else SYMBOLS):
+        try:
+            candles[sym] = load_candles(sym, args.data_dir, args.timeframe)
+        except FileNotFoundError:
+            if args.symbols:
+                print(f"⚠️ No {args.timeframe} data for {sym} in {args.data_dir}. Skipping.")
+    if not candles:
+        print("No candle data found.")
+        return
+
+    print(f"Building panel for {len(candles)} symbols...")
+    funding = args.funding
+    if args.funding_history:
+        from tools.market_store import MarketStore
+        from tools.funding import FUNDING, funding_events
+        store = MarketStore()
+        funding = {sym: funding_events(store, sym) if store.has_events(sym, FUNDING) else args.funding for sym in candles}
+        print(f"💸 Funding history for {sum(isinstance(v, tuple) for v in funding.values())}/{len(candles)} symbols")
+    bar_minutes = timeframe_ms(args.timeframe) // 60_000
+    panel = build_panel(candles, funding_rate=funding, bar_minutes=bar_minutes)
+
+    if args.risk or args.leverage:
+        grid = {
+            'risk_per_trade': [float(x) for x in args.risk.split(',')] if args.risk else [RISK_PER_TRADE],
+            'leverage_cap': [float(x) for x in args.leverage.split(',')] if args.leverage else [LEVERAGE_CAP]
+        }
+        results = sweep(panel, grid, initial_balance=args.balance, bar_minutes=bar_minutes)
+        print(results.to_string(index=False, formatters={'total_return': '{:.2%}'.format, 'max_drawdown': '{:.2%}'.format,
+                                                         'win_rate': '{:.1%}'.format, 'fees': '{:,.2f}'.format, 'seconds': '{:.1f}'.format}))
+    else:
+        print_summary(PortfolioSimulator(panel, initial_balance=args.balance, bar_minutes=bar_minutes).run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import os
+import sys
+import time
+import argparse
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `core` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import clock
+from core.config import MAX_POSITIONS, LEVERAGE_CAP, COOLDOWN_MINUTES, LIVE_STRATEGY
+from core.indicators import compute_indicator_frame, indicator_columns, indicators_at
+from core.strategy import evaluate_symbol, load_strategy_config
+from core.risk import check_circuit_breaker, get_risk_cleanup_actions
+from tools.timeframes import timeframe_ms
+
+# --- LIVE STRATEGY REPLAY ---
+# Drives core.strategy.evaluate_symbol (the exact decision code run_live.py uses) bar by bar
+# over historical candles, with a simulated position book, taker fees, slippage and funding.
+#
+# Indicators are computed once per symbol over the whole history (every column is causal,
+# so bar i never sees bar i+1) and read per bar from numpy arrays. Live computes them on the
+# last 500 candles, so recursive indicators (EMA 200, Wilder RSI/ADX) are better converged here.
+#
+# Order gating mirrors run_live.py: risk cleanup first, score-sorted actions, cooldown after
+# exits, MAX_POSITIONS, 12 longs / 12 shorts, margin resize. Rotation is not modelled.
+
+FUNDING_HOURS = (0, 8, 16) # Binance USDT-M funding times (UTC)
+BAR = timedelta(minutes=5) # Live analyses 5m candles
+LIVE_CANDLES = 500 # analyze_symbol's fetch_ohlcv limit
+
+def load_candles(symbol, data_dir='data', timeframe='5m'):
+    """data/{BASE}{QUOTE}_{tf}.csv -> DataFrame(timestamp, open, high, low, close, volume)."""
+    path = os.path.join(data_dir, f"{symbol.replace('/', '')}_{timeframe}.csv")
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df.sort_values('timestamp').drop_duplicates('timestamp').reset_index(drop=True)
+
+
+class ReplaySimulator:
+    def __init__(self, candles, params=None, initial_balance=10000.0, fee=0.0005, slippage=0.0002,
+                 funding_rate=0.0001, warmup=300, bar=BAR):
+        """
+        candles: {symbol: DataFrame(timestamp, open, high, low, close, volume)}
+        params: strategy parameters, by default the live config (config/strategies/{LIVE_STRATEGY}_config.txt)
+        bar: candle width, decisions are made at each bar's close
+        funding_rate: per-8h rate, a float or {symbol: float}. Longs pay when positive.
+        """
+        self.params = dict(params or load_strategy_config(LIVE_STRATEGY))
+        self.initial_balance = initial_balance
+        self.fee = fee
+        self.slippage = slippage
+        self.funding_rate = funding_rate
+        self.warmup = warmup
+        self.bar = bar
+
+        # Indicators: one vectorised pass per symbol
+        self.symbols = list(candles)
+        self.cols = {}
+        ts_by_symbol = {}
+        for sym, df in candles.items():
+            df = df.reset_index(drop=True).copy()
+            compute_indicator_frame(df, self.params)
+            self.cols[sym] = indicator_columns(df)
+            ts_by_symbol[sym] = df['timestamp'].values.astype('datetime64[ns]')
+
+        # Global timeline; row[sym][t] = bar index of sym at step t (-1 when it has no bar)
+        self.timeline = np.unique(np.concatenate(list(ts_by_symbol.values())))
+        self.rows = {}
+        for sym, ts in ts_by_symbol.items():
+            row = np.full(len(self.timeline), -1, dtype=np.int64)
+            row[np.searchsorted(self.timeline, ts)] = np.arange(len(ts))
+            self.rows[sym] = row
+
+    def _funding(self, sym):
+        if isinstance(self.funding_rate, dict):
+            return self.funding_rate.get(sym, 0.0)
+        return self.funding_rate
+
+    # --- POSITION BOOK (same bookkeeping as core.execution.execute_trade_safely) ---
+    def _fill(self, now, action, book):
+        sym, side, price = action['symbol'], action['side'], action['price']
+        amount = action['amount']
+        is_reduce = action.get('reduceOnly', False)
+        fill_price = price * (1 + self.slippage) if side == 'buy' else price * (1 - self.slippage)
+        realized = 0.0
+        fees = 0.0
+
+        if is_reduce:
+            pos = book.get(sym)
+            if pos is None:
+                return None
+            # Partial TP below min notional -> full close
+            if action.get('is_tp') and amount * price < 6:
+                amount = abs(pos['amt'])
+            amount = min(amount, abs(pos['amt']))
+            fees = (pos['entry'] * amount + fill_price * amount) * self.fee
+            gross = (fill_price - pos['entry']) * amount if pos['amt'] > 0 else (pos['entry'] - fill_price) * amount
+            realized = gross - fees
+            self.balance += gross - fees
+            self.margin_used -= (amount * pos['entry']) / LEVERAGE_CAP
+            remaining = abs(pos['amt']) - amount
+            holding = (now - pd.Timestamp(pos['entry_time'])).total_seconds() / 60
+            if remaining < (amount * 0.01) or remaining < 0.0001:
+                del book[sym]
+            else:
+                pos['amt'] = remaining if pos['amt'] > 0 else -remaining
+                if action.get('is_tp'):
+                    pos['tp_count'] = pos.get('tp_count', 0) + 1
+        else:
+            holding = None
+            if sym in book:
+                pos = book[sym]
+                total_cost = abs(pos['amt']) * pos['entry'] + amount * fill_price
+                new_amt = abs(pos['amt']) + amount
+                pos['entry'] = total_cost / new_amt
+                pos['amt'] = new_amt if side == 'buy' else -new_amt
+                pos['dca_count'] = pos.get('dca_count', 0) + 1
+            else:
+                book[sym] = {'amt': amount if side == 'buy' else -amount, 'entry': fill_price, 'pnl': 0.0,
+                             'entry_time': now.isoformat(), 'dca_count': 0, 'tp_count': 0, 'price': fill_price}
+            self.margin_used += (amount * fill_price) / LEVERAGE_CAP
+
+        self.fees_paid += fees
+        trade = {'timestamp': now, 'symbol': sym, 'side': side, 'amount': amount, 'price': fill_price,
+                 'reason': action['reason'], 'pnl': realized, 'fees': fees, 'is_close': is_reduce,
+                 'holding_minutes': holding}
+        self.trades.append(trade)
+        return trade
+
+    def _mark(self, book, prices):
+        for sym, pos in book.items():
+            price = prices.get(sym, pos.get('price', pos['entry']))
+            pos['price'] = price
+            pos['pnl'] = (price - pos['entry']) * pos['amt']
+
+    def _apply_funding(self, book, now):
+        if now.minute != 0 or now.hour not in FUNDING_HOURS:
+            return
+        for sym, pos in book.items():
+            payment = pos['amt'] * pos['price'] * self._funding(sym)
+            self.balance -= payment
+            self.funding_paid += payment
+
+    def run(self, start=None, end=None, progress=True):
+        self.balance = self.initial_balance
+        self.margin_used = 0.0
+        self.fees_paid = 0.0
+        self.funding_paid = 0.0
+        self.trades = []
+        book = {}
+        last_exit_times = {}
+        sentiment = 0.5
+        high_water_mark = self.initial_balance
+        equity = np.full(len(self.timeline), np.nan)
+        halted = None
+
+        sim_clock = clock.SimClock()
+        clock.set_clock(sim_clock)
+        t_start = time.time()
+        bars = 0
+        try:
+            for t, ts in enumerate(self.timeline):
+                now = pd.Timestamp(ts).to_pydatetime()
+                if (start is not None and now < start) or (end is not None and now > end):
+                    continue
+                # Decisions are made on the completed bar, i.e. at its close
+                decision_time = now + self.bar
+                sim_clock.set(decision_time)
+
+                prices = {}
+                inds_by_symbol = {}
+                for sym in self.symbols:
+                    i = self.rows[sym][t]
+                    if i < 0:
+                        continue
+                    prices[sym] = self.cols[sym]['close'][i]
+                    if i >= self.warmup:
+                        inds_by_symbol[sym] = indicators_at(self.cols[sym], i)
+                bars += len(prices)
+
+                self._mark(book, prices)
+                self._apply_funding(book, decision_time)
+                wallet = self.balance
+                equity[t] = wallet + sum(p['pnl'] for p in book.values())
+
+                # Circuit breaker (same check as live): flatten and stop
+                is_triggered, drawdown, high_water_mark = check_circuit_breaker(self.initial_balance, wallet, high_water_mark)
+                if is_triggered:
+                    for sym, pos in list(book.items()):
+                        self._fill(decision_time, {'symbol': sym, 'side': 'sell' if pos['amt'] > 0 else 'buy', 'amount': abs(pos['amt']),
+                                                   'price': pos['price'], 'reason': 'CIRCUIT_BREAKER', 'reduceOnly': True}, book)
+                    equity[t] = self.balance
+                    halted = decision_time
+                    break
+
+                # --- STRATEGY & RISK SCAN ---
+                proposed = []
+                for action in get_risk_cleanup_actions(book, sentiment):
+                    action['score'] = 100
+                    proposed.append(action)
+
+                trends = []
+                for sym, inds in inds_by_symbol.items():
+                    pos_data = book.get(sym, {'amt': 0.0, 'entry': 0.0, 'pnl': 0.0})
+                    res = evaluate_symbol(sym, inds, pos_data, wallet, sentiment, self.params, self._funding(sym), log=False)
+                    if sym in book:
+                        book[sym]['max_price'] = res.get('max_price', 0.0)
+                        book[sym]['min_price'] = res.get('min_price', 0.0)
+                        book[sym]['trail_stop'] = res.get('trail_stop', 0.0)
+                    trends.append(res['trend'])
+                    if res['action']:
+                        proposed.append(res['action'])
+
+                if trends:
+                    sentiment = trends.count(1) / len(trends)
+
+                # --- EXECUTION (run_live.py gating) ---
+                proposed.sort(key=lambda x: x.get('score', 0), reverse=True)
+                available = wallet + min(0.0, sum(p['pnl'] for p in book.values())) - self.margin_used
+                for action in proposed:
+                    sym, side = action['symbol'], action['side']
+                    if action.get('reduceOnly', False):
+                        if self._fill(decision_time, action, book):
+                            last_exit_times[sym] = decision_time
+                        continue
+
+                    last_exit = last_exit_times.get(sym)
+                    if last_exit and (decision_time - last_exit).total_seconds() / 60 < COOLDOWN_MINUTES:
+                        continue
+                    if sym not in book and len(book) >= MAX_POSITIONS:
+                        continue
+                    longs = sum(1 for p in book.values() if p['amt'] > 0)
+                    shorts = sum(1 for p in book.values() if p['amt'] < 0)
+                    if (side == 'buy' and longs >= 12) or (side == 'sell' and shorts >= 12):
+                        continue
+
+                    cost = (action['amount'] * action['price']) / LEVERAGE_CAP
+                    if cost > available:
+                        if available > 10:
+                            action = dict(action, amount=(available * 0.95 * LEVERAGE_CAP) / action['price'])
+                        else:
+                            break
+                    self._fill(decision_time, action, book)
+                    available -= (action['amount'] * action['price']) / LEVERAGE_CAP
+
+                if progress and t and t % 20000 == 0:
+                    print(f"   ⏱️  {now:%Y-%m-%d} | Equity ${equity[t]:,.2f} | Pos {len(book)} | Trades {len(self.trades)}")
+        finally:
+            clock.reset_clock()
+
+        elapsed = time.time() - t_start
+        curve = pd.Series(equity, index=pd.to_datetime(self.timeline)).dropna()
+        return self._summary(curve, bars, elapsed, halted)
+
+    def _summary(self, curve, bars, elapsed, halted):
+        trades = pd.DataFrame(self.trades)
+        closes = trades[trades['is_close']] if len(trades) else trades
+        final = curve.iloc[-1] if len(curve) else self.initial_balance
+        drawdown = (curve / curve.cummax() - 1).min() if len(curve) else 0.0
+        wins = int((closes['pnl'] > 0).sum()) if len(closes) else 0
+        return {
+            'final_equity': final,
+            'total_return': final / self.initial_balance - 1,
+            'max_drawdown': drawdown,
+            'trades': len(trades),
+            'closes': len(closes),
+            'win_rate': wins / len(closes) if len(closes) else 0.0,
+            'fees': self.fees_paid,
+            'funding': self.funding_paid,
+            'halted': halted,
+            'bars': bars,
+            'seconds': elapsed,
+            'warmup': self.warmup,
+            'equity_curve': curve,
+            'trade_log': trades
+        }
+
+
+def print_summary(summary):
+    print("\n--- Replay Results ---")
+    print(f"Final Equity: ${summary['final_equity']:,.2f} ({summary['total_return']:.2%})")
+    print(f"Max Drawdown: {summary['max_drawdown']:.2%}")
+    print(f"Trades: {summary['trades']} ({summary['closes']} closes) | Win Rate: {summary['win_rate']:.1%}")
+    print(f"Fees: ${summary['fees']:,.2f} | Funding: ${summary['funding']:,.2f}")
+    if summary['halted']:
+        print(f"🚨 Circuit breaker halted the run at {summary['halted']}")
+    rate = summary['bars'] / summary['seconds'] if summary['seconds'] > 0 else 0
+    print(f"ℹ️ Indicators span the whole history (first {summary['warmup']} bars skipped); live computes them on its "
+          f"last {LIVE_CANDLES} candles, so EMA 200 and Wilder RSI/ADX can differ from what the bot saw")
+    print(f"Replayed {summary['bars']:,} symbol-bars in {summary['seconds']:.1f}s ({rate:,.0f} bars/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the live strategy over historical candles")
+    parser.add_argument('--symbols', default='ETH/USDT', help="Comma separated, e.g. BTC/USDT,ETH/USDT")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--funding', type=float, default=0.0001, help="Per-8h funding rate")
+    parser.add_argument('--trades-out', default=None, help="Optional CSV path for the simulated trade log")
+    args = parser.parse_args()
+
+    candles = {}
+    for sym in args.symbols.split(','):
+        try:
+            candles[sym] = load_candles(sym, args.data_dir, args.timeframe)
+        except FileNotFoundError:
+            print(f"⚠️ No {args.timeframe} data for {sym} in {args.data_dir}. Skipping.")
+    if not candles:
+        return
+
+    print(f"Replaying {len(candles)} symbols...")
+    sim = ReplaySimulator(candles, initial_balance=args.balance, funding_rate=args.funding,
+                          bar=timedelta(milliseconds=timeframe_ms(args.timeframe)))
+    summary = sim.run()
+    print_summary(summary)
+    if args.trades_out and len(summary['trade_log']):
+        summary['trade_log'].to_csv(args.trades_out, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+from .indicator_cache import fingerprint
+
+# --- WFO RESULT STORE ---
+# Content-addressed SQLite cache for WFO runs:
+# - evaluations: one train-window score per (window content fingerprint, strategy class and
+#   source hash, params, engine settings and source hash), so reruns and overlapping grids
+#   reuse prior scores
+# - windows: completed out-of-sample window results per run, so an interrupted run resumes
+#   after the last finished window
+# Each finished run also writes a provenance JSON next to the database in results/.
+
+DEFAULT_PATH = 'results/wfo_cache.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    key TEXT PRIMARY KEY,
+    score REAL,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS windows (
+    run_key TEXT,
+    window INTEGER,
+    result TEXT,
+    created_at TEXT,
+    PRIMARY KEY (run_key, window)
+);
+"""
+
+def digest(obj):
+    payload = json.dumps(obj, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def strategy_version(strategy_cls):
+    """Qualified class name + hash of its source, so editing a strategy invalidates its results."""
+    try:
+        source = inspect.getsource(strategy_cls)
+    except (OSError, TypeError):
+        source = ''
+    source_hash = hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+    version = getattr(strategy_cls, 'VERSION', None)
+    name = f"{strategy_cls.__module__}.{strategy_cls.__qualname__}"
+    return f"{name}@{source_hash}" + (f"/v{version}" if version is not None else '')
+
+def describe_search(search):
+    if search is None:
+        return None
+    return {'name': type(search).__name__, **vars(search)}
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+def _encode_result(result):
+    out = dict(result)
+    for key in ('period_start', 'period_end'):
+        if key in out:
+            out[key] = pd.Timestamp(out[key]).isoformat()
+    return json.dumps(out, default=float)
+
+def _decode_result(payload):
+    out = json.loads(payload)
+    for key in ('period_start', 'period_end'):
+        if key in out:
+            out[key] = pd.Timestamp(out[key])
+    return out
+
+
+# One connection per (process, path): stores are pickled into pool workers
+_CONNECTIONS = {}
+
+class ResultStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.stats = {'store_hits': 0, 'store_misses': 0}
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def conn(self):
+        key = (os.getpid(), self.path)
+        conn = _CONNECTIONS.get(key)
+        if conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60)
+            # WAL lets pool workers write while others read
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _CONNECTIONS[key] = conn
+        return conn
+
+    def close(self):
+        conn = _CONNECTIONS.pop((os.getpid(), self.path), None)
+        if conn is not None:
+            conn.close()
+
+    # --- Evaluations ---
+
+    def evaluation_keys(self, train_data, strategy_cls, combinations, engine):
+        base = [fingerprint(train_data), strategy_version(strategy_cls), engine]
+        return [digest(base + [params]) for params in combinations]
+
+    def get_scores(self, keys):
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ','.join('?' * len(chunk))
+            for key, score in self.conn.execute(f"SELECT key, score FROM evaluations WHERE key IN ({marks})", chunk):
+                # SQLite stores NaN as NULL
+                found[key] = float('nan') if score is None else score
+        self.stats['store_hits'] += len(found)
+        self.stats['store_misses'] += len(keys) - len(found)
+        return found
+
+    def put_scores(self, items):
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO evaluations (key, score, created_at) VALUES (?, ?, ?)",
+                                  [(key, float(score), now) for key, score in items])
+
+    # --- Runs / windows ---
+
+    def run_key(self, optimizer, strategy_cls, param_grid, engine, search=None):
+        return digest([
+            fingerprint(optimizer.df), str(optimizer.train_window), str(optimizer.test_window),
+            strategy_version(strategy_cls), param_grid, engine, describe_search(search)
+        ])
+
+    def completed_windows(self, run_key):
+        rows = self.conn.execute("SELECT window, result FROM windows WHERE run_key = ?", (run_key,))
+        return {window: _decode_result(result) for window, result in rows}
+
+    def put_window(self, run_key, window, result):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO windows (run_key, window, result, created_at) VALUES (?, ?, ?, ?)",
+                              (run_key, window, _encode_result(result), datetime.now().isoformat()))
+
+    def write_provenance(self, run_key, optimizer, strategy_cls, param_grid, engine, search, results,
+                         started_at, resumed, stats):
+        folder = os.path.dirname(self.path) or '.'
+        path = os.path.join(folder, f"{strategy_cls.__name__}_{run_key[:12]}_provenance.json")
+        index = optimizer.df.index
+        provenance = {
+            'run_key': run_key,
+            'strategy': strategy_version(strategy_cls),
+            'data': {
+                'path': getattr(optimizer, 'data_path', None),
+                'fingerprint': fingerprint(optimizer.df),
+                'rows': len(optimizer.df),
+                'start': index.min().isoformat() if len(index) else None,
+                'end': index.max().isoformat() if len(index) else None
+            },
+            'windows': {
+                'train': str(optimizer.train_window),
+                'test': str(optimizer.test_window),
+                'count': len(results),
+                'resumed': resumed
+            },
+            'param_grid': param_grid,
+            'search': describe_search(search),
+            'engine': engine,
+            'git_commit': git_commit(),
+            'started_at': started_at,
+            'finished_at': datetime.now().isoformat(),
+            'evaluation_cache': {k: stats.get(k, 0) for k in ('store_hits', 'store_misses')},
+            'results': [json.loads(_encode_result(r)) for r in results]
+        }
+        with open(path, 'w') as f:
+            json.dump(provenance, f, indent=2, default=str)
+        return path
+
+
+class RunCheckpoint:
+    """Checkpoint/resume bookkeeping for one optimize() call (a no-op without a store)."""
+    def __init__(self, store, optimizer, strategy_cls, param_grid, engine, search=None):
+        self.store = store
+        self.optimizer = optimizer
+        self.strategy_cls = strategy_cls
+        self.param_grid = param_grid
+        self.engine = engine
+        self.search = search
+        self.started_at = datetime.now().isoformat()
+        self.run_key = store.run_key(optimizer, strategy_cls, param_grid, engine, search) if store else None
+        self.done = store.completed_windows(self.run_key) if store else {}
+        self.resumed = len(self.done)
+        if self.resumed:
+            print(f"⏩ Resuming run {self.run_key[:12]}: {self.resumed} window(s) already complete")
+
+    def record(self, window, result):
+        if self.store is not None:
+            self.store.put_window(self.run_key, window, result)
+
+    def finish(self, results, stats):
+        if self.store is None:
+            return None
+        print(format_store_report(stats))
+        path = self.store.write_provenance(self.run_key, self.optimizer, self.strategy_cls, self.param_grid,
+                                           self.engine, self.search, results, self.started_at, self.resumed, stats)
+        print(f"🧾 Provenance: {path}")
+        return path
+
+
+def format_store_report(stats):
+    hits, misses = stats.get('store_hits', 0), stats.get('store_misses', 0)
+    lookups = hits + misses
+    return f"💾 Result store: {hits}/{lookups} evaluations reused" if lookups else "💾 Result store: no lookups"
@@ -0,0 +1,316 @@
+import math
+import numpy as np
+
+from .wfo import param_combinations, score_combinations, select_best
+
+# --- HYPERPARAMETER SEARCH ---
+# Pluggable replacements for the exhaustive grid in WFOOptimizer.optimize(search=...).
+# The search space is the same param_grid dict (lists of candidate values); each strategy
+# spends a budget counted in full-window backtest evaluations, where a run on a prefix of the
+# train window costs its fraction of the window (a 1/9 prefix costs 1/9 of an evaluation).
+#
+# Early stopping: a config is first screened on a prefix of the train window and dropped if
+# it is clearly bad there (losing money AND in the bottom half of its batch); successive
+# halving does this by construction.
+
+
+def params_key(params):
+    return tuple(sorted(params.items()))
+
+
+class SearchSpace:
+    """Index view of a param_grid: a config is a tuple of value positions, one per parameter."""
+    def __init__(self, param_grid):
+        self.keys = list(param_grid.keys())
+        self.values = [list(v) for v in param_grid.values()]
+        self.size = math.prod(len(v) for v in self.values)
+        # Numeric grids are treated as ordered (neighbouring values share density in TPE)
+        self.ordered = [all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in v) for v in self.values]
+
+    def decode(self, idx):
+        return {k: v[j] for k, v, j in zip(self.keys, self.values, idx)}
+
+    def sample(self, rng, n, exclude=()):
+        """Up to n distinct random configs not in `exclude`."""
+        exclude = set(exclude)
+        remaining = self.size - len(exclude)
+        n = min(n, remaining)
+        if n <= 0:
+            return []
+        if remaining <= 4 * n:
+            # Small space: enumerate what's left and draw without replacement
+            pool = [idx for idx in np.ndindex(*[len(v) for v in self.values]) if idx not in exclude]
+            picks = rng.choice(len(pool), size=n, replace=False)
+            return [pool[p] for p in picks]
+        out = []
+        while len(out) < n:
+            idx = tuple(int(rng.integers(len(v))) for v in self.values)
+            if idx not in exclude:
+                exclude.add(idx)
+                out.append(idx)
+        return out
+
+
+class Evaluator:
+    """
+    Scores configs on one train window, or on a prefix of it, and keeps the budget account.
+    Results are memoised per (config, prefix length); only full-window scores compete for best.
+    """
+    def __init__(self, train_data, strategy_cls, leverage=1.0, min_rows=100, store=None, objective='return_dd'):
+        self.train_data = train_data
+        self.store = store
+        self.objective = objective
+        self.strategy_cls = strategy_cls
+        self.leverage = leverage
+        self.min_rows = min_rows
+        self.spent = 0.0
+        self.evaluations = 0
+        self._memo = {}
+        self._full = [] # (params, score) in evaluation order
+        self._partial = [] # (prefix rows, params, score) of prefix screens
+
+    def prefix_rows(self, fraction):
+        n = len(self.train_data)
+        return min(n, max(self.min_rows, int(round(n * fraction))))
+
+    def score(self, combinations, fraction=1.0):
+        rows = self.prefix_rows(fraction)
+        scores = np.empty(len(combinations))
+        todo = []
+        for k, params in enumerate(combinations):
+            cached = self._memo.get((params_key(params), rows))
+            if cached is None:
+                todo.append(k)
+            else:
+                scores[k] = cached
+
+        if todo:
+            batch = [combinations[k] for k in todo]
+            # Prefixes are slices of the registered frame, so indicators still come from the cache
+            new = score_combinations(self.train_data.iloc[:rows], self.strategy_cls, batch, self.leverage, self.store, self.objective)
+            new = np.where(np.isnan(new), -np.inf, new)
+            for k, params, s in zip(todo, batch, new):
+                scores[k] = s
+                self._memo[(params_key(params), rows)] = s
+                if rows == len(self.train_data):
+                    self._full.append((params, s))
+                else:
+                    self._partial.append((rows, params, s))
+            self.spent += len(todo) * rows / len(self.train_data)
+            self.evaluations += len(todo)
+        return scores
+
+    def best(self):
+        if not self._full:
+            return None
+        params, scores = zip(*self._full)
+        return select_best(np.asarray(scores), list(params))
+
+    def best_screened(self):
+        """Best config on the longest prefix scored so far (None before any evaluation)."""
+        if not self._partial:
+            return None
+        rows = max(r for r, _, _ in self._partial)
+        params, scores = zip(*[(p, s) for r, p, s in self._partial if r == rows])
+        return select_best(np.asarray(scores), list(params)) or params[0]
+
+    def info(self):
+        return {'evaluations': self.evaluations, 'cost': self.spent, 'full_evaluations': len(self._full)}
+
+
+def screen(evaluator, combinations, fraction):
+    """Prefix screen: drops configs that lose money on the prefix and rank in the bottom half."""
+    if not fraction or fraction >= 1 or len(combinations) < 2:
+        return combinations
+    scores = evaluator.score(combinations, fraction)
+    cutoff = np.median(scores)
+    return [c for c, s in zip(combinations, scores) if s >= 0 or s >= cutoff]
+
+
+class GridSearch:
+    """Exhaustive grid (the default behaviour of optimize)."""
+    name = 'Grid'
+    seed = 0
+
+    def run(self, evaluator, param_grid, rng):
+        combinations = param_combinations(param_grid)
+        scores = evaluator.score(combinations)
+        return select_best(scores, combinations)
+
+
+class RandomSearch:
+    """Distinct random configs in batches until the budget is spent, each screened on a prefix first."""
+    name = 'Random'
+
+    def __init__(self, budget=30, batch_size=8, early_stop=True, screen_fraction=0.25, seed=0):
+        self.budget = budget
+        self.batch_size = batch_size
+        self.screen_fraction = screen_fraction if early_stop else None
+        self.seed = seed
+
+    def run(self, evaluator, param_grid, rng):
+        space = SearchSpace(param_grid)
+        per_config = 1 + (self.screen_fraction or 0)
+        tried = set()
+        while True:
+            n = min(self.batch_size, int((self.budget - evaluator.spent) / per_config))
+            batch = space.sample(rng, n, exclude=tried)
+            if not batch:
+                break
+            tried.update(batch)
+            survivors = screen(evaluator, [space.decode(idx) for idx in batch], self.screen_fraction)
+            evaluator.score(survivors)
+        return evaluator.best()
+
+
+class SuccessiveHalving:
+    """
+    Samples as many configs as the budget allows, scores them on a short prefix of the train
+    window, keeps the top 1/eta, and repeats on eta-times longer prefixes up to the full window.
+    """
+    name = 'SuccessiveHalving'
+
+    def __init__(self, budget=30, eta=3, min_fraction=1/9, seed=0):
+        self.budget = budget
+        self.eta = eta
+        self.min_fraction = min_fraction
+        self.seed = seed
+
+    def rungs(self):
+        fractions = []
+        f = self.min_fraction
+        while f < 1:
+            fractions.append(f)
+            f *= self.eta
+        fractions.append(1.0)
+        return fractions
+
+    def _cost(self, n, fractions):
+        cost = 0.0
+        for f in fractions:
+            cost += n * f
+            n = max(1, math.ceil(n / self.eta))
+        return cost
+
+    def run(self, evaluator, param_grid, rng):
+        space = SearchSpace(param_grid)
+        fractions = self.rungs()
+
+        # Largest starting population that fits the budget
+        n = min(space.size, max(1, int(self.budget / sum(f / self.eta ** r for r, f in enumerate(fractions)))))
+        while n > 1 and self._cost(n, fractions) > self.budget:
+            n -= 1
+
+        configs = [space.decode(idx) for idx in space.sample(rng, n)]
+        for f in fractions:
+            scores = evaluator.score(configs, f)
+            if f >= 1:
+                break
+            keep = max(1, math.ceil(len(configs) / self.eta))
+            # Stable sort: ties keep sampling order
+            order = np.argsort(-scores, kind='stable')[:keep]
+            configs = [configs[k] for k in sorted(order)]
+        return evaluator.best()
+
+
+class TPESearch:
+    """
+    Tree-structured Parzen Estimator over the grid values. After `n_startup` random configs,
+    candidates are drawn from the density of the best `gamma` fraction of trials and the batch
+    maximising l(x)/g(x) is evaluated. Configs dropped by the prefix screen count as bad trials.
+    """
+    name = 'TPE'
+
+    def __init__(self, budget=30, n_startup=8, gamma=0.25, n_candidates=32, batch_size=4,
+                 early_stop=True, screen_fraction=0.25, seed=0):
+        self.budget = budget
+        self.n_startup = n_startup
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+        self.batch_size = batch_size
+        self.screen_fraction = screen_fraction if early_stop else None
+        self.seed = seed
+
+    def _densities(self, space, trials):
+        """Per-parameter categorical densities, smoothed with a prior and (if ordered) neighbours."""
+        out = []
+        for p, values in enumerate(space.values):
+            w = np.ones(len(values))
+            for idx in trials:
+                j = idx[p]
+                w[j] += 1.0
+                if space.ordered[p]:
+                    if j > 0:
+                        w[j - 1] += 0.5
+                    if j + 1 < len(values):
+                        w[j + 1] += 0.5
+            out.append(w / w.sum())
+        return out
+
+    def _propose(self, space, trials, rng, n, tried):
+        ranked = sorted(trials, key=lambda t: -t[1]) # stable: earlier trials win ties
+        n_good = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good = self._densities(space, [idx for idx, _ in ranked[:n_good]])
+        bad = self._densities(space, [idx for idx, _ in ranked[n_good:]])
+
+        candidates = {}
+        for _ in range(self.n_candidates):
+            idx = tuple(int(rng.choice(len(d), p=d)) for d in good)
+            if idx in tried or idx in candidates:
+                continue
+            candidates[idx] = sum(math.log(good[p][j]) - math.log(bad[p][j]) for p, j in enumerate(idx))
+        picks = sorted(candidates, key=lambda idx: -candidates[idx])[:n]
+        if len(picks) < n:
+            # Good region exhausted: top up with random configs
+            picks += space.sample(rng, n - len(picks), exclude=tried | set(picks))
+        return picks
+
+    def run(self, evaluator, param_grid, rng):
+        space = SearchSpace(param_grid)
+        per_config = 1 + (self.screen_fraction or 0)
+        trials = [] # (idx, score); screened-out configs score -inf
+        tried = set()
+        while True:
+            n = min(self.batch_size, int((self.budget - evaluator.spent) / per_config))
+            if n <= 0:
+                break
+            if len(trials) < self.n_startup:
+                batch = space.sample(rng, min(n, self.n_startup - len(trials)), exclude=tried)
+            else:
+                batch = self._propose(space, trials, rng, n, tried)
+            if not batch:
+                break
+            tried.update(batch)
+
+            configs = [space.decode(idx) for idx in batch]
+            survivors = screen(evaluator, configs, self.screen_fraction)
+            scores = dict(zip(map(params_key, survivors), evaluator.score(survivors)))
+            for idx, params in zip(batch, configs):
+                trials.append((idx, scores.get(params_key(params), -np.inf)))
+        return evaluator.best()
+
+
+def search_window(train_data, strategy_cls, param_grid, search, leverage=1.0, window=0, store=None, objective='return_dd'):
+    """
+    Runs `search` on one train window. Returns (best_params, budget info).
+    The winner always has a full-window score: when the budget ran out before any config
+    reached the full window, the best screened config (else a random one) is scored on it.
+    """
+    rng = np.random.default_rng([search.seed, window])
+    evaluator = Evaluator(train_data, strategy_cls, leverage, store=store, objective=objective)
+    best_params = search.run(evaluator, param_grid, rng)
+    if best_params is None and not evaluator.info()['full_evaluations']:
+        space = SearchSpace(param_grid)
+        candidate = evaluator.best_screened() or space.decode(space.sample(rng, 1)[0])
+        evaluator.score([candidate])
+        best_params = evaluator.best()
+    if best_params is None:
+        raise ValueError(f"{search.name} search found no config with a finite train score in window {window}")
+    return best_params, evaluator.info()
+
+def format_search_report(search, infos, grid_size):
+    evaluations = sum(i['evaluations'] for i in infos)
+    cost = sum(i['cost'] for i in infos)
+    full = grid_size * len(infos)
+    return (f"🔎 {search.name} search: {evaluations} backtests ({cost:.1f} full-window equivalents) "
+            f"vs {full} for the full grid ({cost / full:.0%})" if full else f"🔎 {search.name} search: no windows")
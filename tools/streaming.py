@@ -0,0 +1,541 @@
+import argparse
+import ast
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, COLUMNS
+from tools.timeframes import timeframe_ms, resample_arrays
+from tools.kernels import positions_from_signals, entry_levels
+from tools.metrics import periods_per_year, add_calmar, _run_bounds, _trade_pnl, _exit_costs
+from tools.funding import FUNDING, bar_charges, funding_events
+
+# --- STREAMING (OUT-OF-CORE) BACKTEST ---
+# Years of 1m bars or aggTrades for many symbols don't fit in one DataFrame. Here a series is
+# read as fixed-size chunks (the market store's memory-mapped columns, or an aggTrades CSV
+# aggregated into bars on the fly) and everything that spans chunks keeps explicit state:
+#   indicators  RMA / RSI / ATR carry their recursions, rolling windows their last window-1
+#               values, resamplers the still-forming higher-timeframe bar
+#   positions   tools/kernels.py position machine and entry levels (state=...)
+#   engine      previous close / signal / levels, the current trade's hits, equity peak and
+#               running sums for every metric
+# so a chunked run gives the same signals and metrics as one pass over the whole series, and
+# memory is O(chunk) whatever the series length. BacktestEngine's fill rules are mirrored for
+# one signal row ('path' ambiguity needs the whole IntrabarPath, so it isn't available here).
+
+DEFAULT_CHUNK = 250_000
+AGG_TRADE_COLUMNS = ['agg_trade_id', 'price', 'quantity', 'first_trade_id', 'last_trade_id', 'transact_time', 'is_buyer_maker']
+
+
+# --- CHUNK SOURCES ---
+# Each yields (ts int64 ns, values (5, n) float64) for consecutive, sorted bars.
+
+def store_chunks(store, symbol, timeframe, chunk_bars=DEFAULT_CHUNK, start=None, end=None):
+    """
+    Bars of a market-store dataset, chunk_bars at a time. Every chunk is copied out of a fresh
+    mapping which is dropped before the next one, so resident memory stays at one chunk
+    instead of growing with the pages touched.
+    """
+    ts, _ = store._open(symbol, timeframe)
+    lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).as_unit('ns').value, 'left'))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).as_unit('ns').value, 'right'))
+    del ts
+    for a in range(lo, hi, chunk_bars):
+        b = min(a + chunk_bars, hi)
+        ts, values = store._open(symbol, timeframe)
+        chunk = np.array(ts[a:b]), np.array(values[:, a:b])
+        del ts, values
+        yield chunk
+
+def trade_chunks(path, chunk_rows=1_000_000):
+    """(ts int64 ns, price, quantity) from a Binance aggTrades CSV (with or without the header row)."""
+    with open(path, newline='') as f:
+        first = next(csv.reader(f), [])
+    header = 0 if first and not first[0].strip().lstrip('-').isdigit() else None
+    names = None if header == 0 else AGG_TRADE_COLUMNS + (['is_best_match'] if len(first) > len(AGG_TRADE_COLUMNS) else [])
+    reader = pd.read_csv(path, header=header, names=names, usecols=['price', 'quantity', 'transact_time'], chunksize=chunk_rows)
+    for frame in reader:
+        ts = frame['transact_time'].to_numpy(dtype=np.int64)
+        # Binance switched spot dumps from ms to us timestamps in 2025
+        ts = ts * (1_000 if len(ts) and ts[0] > 10 ** 14 else 1_000_000)
+        yield ts, frame['price'].to_numpy(dtype=np.float64), frame['quantity'].to_numpy(dtype=np.float64)
+
+def trade_bars(trades, timeframe):
+    """Trade chunks -> bar chunks of `timeframe` (the bar still forming at a chunk's end is carried over)."""
+    resampler = StreamResampler(timeframe)
+    for ts, price, quantity in trades:
+        bars = resampler.update(ts, np.vstack([price, price, price, price, quantity]))
+        if len(bars[0]):
+            yield bars
+    last = resampler.flush()
+    if len(last[0]):
+        yield last
+
+
+# --- STREAMING INDICATORS ---
+# update() takes the next chunk and returns that chunk's values; state lives on the object.
+# RMA is pandas_ta's rma (ewm(alpha=1/length, min_periods=length), adjust=True), which RSI,
+# ATR and Supertrend are built on.
+
+def _ewm(x, alpha, init):
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t] from y[-1] = init (one pandas ewm pass)."""
+    return pd.Series(np.concatenate(([init], x))).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+class StreamRMA:
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 1.0 / length
+        # adjust=True average = weighted sum / weight sum, both first-order recursions
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if not len(x):
+            return x.copy()
+        num = _ewm(x, self.alpha, self.num)
+        den = _ewm(np.ones(len(x)), self.alpha, self.den)
+        out = num / den
+        out[self.count + np.arange(1, len(x) + 1) < self.length] = np.nan
+        self.num, self.den, self.count = num[-1], den[-1], self.count + len(x)
+        return out
+
+class StreamRSI:
+    def __init__(self, length=14):
+        self.gain = StreamRMA(length)
+        self.loss = StreamRMA(length)
+        self.prev = None
+
+    def update(self, close):
+        close = np.asarray(close, dtype=np.float64)
+        out = np.full(len(close), np.nan)
+        change = np.diff(close) if self.prev is None else np.diff(close, prepend=self.prev)
+        if len(close):
+            self.prev = close[-1]
+        if len(change):
+            up = self.gain.update(np.maximum(change, 0.0))
+            down = self.loss.update(np.maximum(-change, 0.0))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out[len(close) - len(change):] = 100 * up / (up + down)
+        return out
+
+class StreamATR:
+    def __init__(self, length=14):
+        self.rma = StreamRMA(length)
+        self.prev = None
+
+    def update(self, high, low, close):
+        close = np.asarray(close, dtype=np.float64)
+        out = np.full(len(close), np.nan)
+        # The very first bar has no previous close (pandas_ta's true range is NaN there)
+        skip = 1 if self.prev is None else 0
+        if len(close) > skip:
+            prev = close[:-1] if skip else np.concatenate(([self.prev], close[:-1]))
+            h, l = np.asarray(high)[skip:], np.asarray(low)[skip:]
+            tr = np.maximum(h - l, np.maximum(np.abs(h - prev), np.abs(l - prev)))
+            out[skip:] = self.rma.update(tr)
+        if len(close):
+            self.prev = close[-1]
+        return out
+
+class StreamRolling:
+    """rolling(window).max() / .min() / .mean() carrying the last window - 1 values."""
+    def __init__(self, window, how='max'):
+        self.window = window
+        self.how = how
+        self.tail = np.empty(0)
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        ext = np.concatenate((self.tail, x))
+        out = getattr(pd.Series(ext).rolling(self.window), self.how)().to_numpy()[len(self.tail):]
+        self.tail = ext[-(self.window - 1):] if self.window > 1 else np.empty(0)
+        return out
+
+class StreamResampler:
+    """
+    Base bars (or trades as 1-tick bars) -> `timeframe` bars, exchange-aligned like tools/timeframes.py.
+    update() returns the bars completed so far: every bucket before the last one, or every bucket
+    ending by `complete_until` (ns) when the caller knows the last bucket has no more bars to come.
+    """
+    def __init__(self, timeframe):
+        self.timeframe = timeframe
+        self.width = timeframe_ms(timeframe) * 1_000_000
+        self.partial = (np.empty(0, dtype=np.int64), np.empty((len(COLUMNS), 0)))
+
+    def update(self, ts, values, complete_until=None):
+        ts = np.concatenate((self.partial[0], ts))
+        values = np.concatenate((self.partial[1], values), axis=1)
+        bucket_ts, bars = resample_arrays(ts, values, self.timeframe)
+        if complete_until is None:
+            done = max(len(bucket_ts) - 1, 0)
+        else:
+            done = int(np.searchsorted(bucket_ts + self.width, complete_until, 'right'))
+        self.partial = (bucket_ts[done:], bars[:, done:])
+        return bucket_ts[:done], bars[:, :done]
+
+    def flush(self):
+        partial = self.partial
+        self.partial = (np.empty(0, dtype=np.int64), np.empty((len(COLUMNS), 0)))
+        return partial
+
+class StreamSupertrend:
+    """pandas_ta supertrend direction (1 / -1), bar by bar with the bands carried over."""
+    def __init__(self, length=10, multiplier=3.0):
+        self.atr = StreamATR(length)
+        self.multiplier = multiplier
+        self.dir = None
+        self.upper = self.lower = np.nan
+
+    def update(self, high, low, close):
+        high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+        matr = self.multiplier * self.atr.update(high, low, close)
+        hl2 = (high + low) / 2
+        upper, lower = (hl2 + matr).tolist(), (hl2 - matr).tolist()
+        out = np.empty(len(close))
+        # Few higher-timeframe bars per chunk: a plain loop (same rules as pandas_ta's)
+        for i, c in enumerate(close.tolist()):
+            if self.dir is None:
+                d = 1.0
+            elif c > self.upper:
+                d = 1.0
+            elif c < self.lower:
+                d = -1.0
+            else:
+                d = self.dir
+                if d > 0 and lower[i] < self.lower:
+                    lower[i] = self.lower
+                if d < 0 and upper[i] > self.upper:
+                    upper[i] = self.upper
+            self.dir, self.upper, self.lower = d, upper[i], lower[i]
+            out[i] = d
+        return out
+
+
+# --- STRATEGIES ---
+
+class StreamingStrategy:
+    """
+    Chunk-at-a-time signal generator. begin(timeframe) is called once per series, then
+    on_chunk(ts, bars) for each chunk in order (bars: column name -> array), returning the
+    position array or a dict with 'position' and optional 'stop' / 'take_profit' levels
+    (same meaning as a wfo.Strategy's signal columns).
+    """
+    def __init__(self, params):
+        self.params = params
+
+    def begin(self, timeframe):
+        self.timeframe = timeframe
+
+    def on_chunk(self, ts, bars):
+        raise NotImplementedError("Should implement on_chunk")
+
+class TrendPullbackStream(StreamingStrategy):
+    """
+    SmartHybrid's rules (higher-timeframe Supertrend trend, RSI pullback entries, ATR take-profit)
+    on a stream. The trend of a base bar is the one of the last *completed* higher-timeframe bar,
+    known at that bar's close - the in-memory strategy forward-fills the trend from the bucket's
+    open, which peeks at the bucket's later bars.
+    """
+    def begin(self, timeframe):
+        super().begin(timeframe)
+        p = self.params
+        self.step = timeframe_ms(timeframe) * 1_000_000
+        self.rsi_buy = p.get('rsi_buy', 40)
+        self.tp_mult = p.get('tp_mult', 3.0)
+        self.htf = StreamResampler(p.get('rule', '4h'))
+        self.trend = StreamSupertrend(p.get('st_len', 10), p.get('st_mult', 3.0))
+        self.rsi = StreamRSI(p.get('rsi_len', 14))
+        self.atr = StreamATR(p.get('atr_len', 14))
+        self.last_trend = np.nan
+        self.prev_tp = np.nan
+        self.position_state = {}
+        self.level_state = {}
+
+    def on_chunk(self, ts, bars):
+        close, high, low = bars['close'], bars['high'], bars['low']
+        closes_at = ts + self.step
+        htf_ts, htf = self.htf.update(ts, np.vstack([bars[c] for c in COLUMNS]), complete_until=closes_at[-1])
+        direction = self.trend.update(htf[1], htf[2], htf[3])
+        # Bar i's trend: the last higher-timeframe bar that had closed by bar i's close
+        known = np.searchsorted(htf_ts + self.htf.width, closes_at, 'right') - 1
+        trend = np.where(known >= 0, direction[np.maximum(known, 0)] if len(direction) else np.nan, self.last_trend)
+        if len(direction):
+            self.last_trend = direction[-1]
+
+        rsi = self.rsi.update(close)
+        tp_dist = self.atr.update(high, low, close) * self.tp_mult if self.tp_mult > 0 else None
+        resting_tp = None
+        if tp_dist is not None:
+            resting_tp = np.concatenate(([self.prev_tp], tp_dist[:-1]))
+            self.prev_tp = tp_dist[-1]
+
+        position = positions_from_signals(
+            long_entry=(trend == 1) & (rsi < self.rsi_buy),
+            short_entry=(trend == -1) & (rsi > 100 - self.rsi_buy),
+            long_exit=(trend == -1),
+            short_exit=(trend == 1),
+            entry_price=close,
+            tp_dist=resting_tp,
+            high=high,
+            low=low,
+            state=self.position_state
+        )
+        signals = {'position': position}
+        if tp_dist is not None:
+            signals['take_profit'] = entry_levels(position, close, tp_dist, state=self.level_state)
+        return signals
+
+
+# --- ENGINE ---
+
+class StreamingBacktest:
+    def __init__(self, initial_capital=10000, fee=0.0004, slippage=0.0002, leverage=1.0, ambiguity='stop'):
+        # Same costs / defaults as wfo.BacktestEngine
+        if ambiguity not in ('stop', 'tp', 'open'):
+            raise ValueError(f"ambiguity must be 'stop', 'tp' or 'open' when streaming, got {ambiguity!r}")
+        self.initial_capital = initial_capital
+        self.fee = fee
+        self.slippage = slippage
+        self.leverage = leverage
+        self.ambiguity = ambiguity
+
+    def run(self, chunks, strategy, timeframe, periods=None, progress=False, funding=None):
+        """
+        Streams `chunks` ((ts, values) pairs, e.g. store_chunks()) through `strategy`.
+        Returns the metrics BacktestEngine.run reports (without the equity curve and ledger)
+        plus bars, chunks, seconds and bars_per_sec. periods: bars per year (default: the
+        median spacing of the first chunk, like periods_per_year on a whole series).
+        funding: (ts, rate, mark) settlements (tools/funding.py funding_events) paid by the
+        position held over the bar each falls in, like a 'funding' column in BacktestEngine.
+        """
+        strategy.begin(timeframe)
+        state = {
+            'close': None, 'signal': 0.0, 'stop': np.nan, 'tp': np.nan, 'held': 0.0, 'closing': 0.0, 'run_hits': 0,
+            'equity': float(self.initial_capital), 'peak': -np.inf, 'max_drawdown': 0.0,
+            'n': 0, 'sum': 0.0, 'sumsq': 0.0, 'downsq': 0.0, 'wins': 0, 'losses': 0,
+            'exposure': 0, 'turnover': 0.0, 'trades': 0, 'trade_wins': 0, 'gross_profit': 0.0, 'gross_loss': 0.0,
+            'bars_held': 0, 'open_trade': (0.0, 1.0, 0) # (position, growth, bars) of the trade running at the chunk edge
+        }
+        step = timeframe_ms(timeframe) * 1_000_000
+        t0 = time.perf_counter()
+        n_bars = n_chunks = 0
+        for ts, values in chunks:
+            if not len(ts):
+                continue
+            if periods is None:
+                periods = periods_per_year(pd.DatetimeIndex(ts.view('datetime64[ns]')))
+            bars = {col: values[k] for k, col in enumerate(COLUMNS)}
+            signals = strategy.on_chunk(ts, bars)
+            if not isinstance(signals, dict):
+                signals = {'position': signals}
+            charge = bar_charges(*funding, ts, bars['close'], step) if funding is not None else None
+            self._update(state, bars, signals, charge)
+            n_bars += len(ts)
+            n_chunks += 1
+            if progress:
+                print(f"   {n_bars:,} bars, {n_bars / (time.perf_counter() - t0):,.0f} bars/s")
+        seconds = time.perf_counter() - t0
+        metrics = self._finish(state, periods or 1.0)
+        metrics.update(bars=n_bars, chunks=n_chunks, seconds=seconds, bars_per_sec=n_bars / seconds if seconds > 0 else 0.0)
+        return metrics
+
+    def _update(self, state, bars, signals, funding=None):
+        """One chunk through the fill model (BacktestEngine._level_block for one row, seeded with the previous bar)."""
+        close = np.asarray(bars['close'], dtype=np.float64)
+        n = len(close)
+        level = lambda name: np.full(n, np.nan) if signals.get(name) is None else np.asarray(signals[name], dtype=np.float64)
+        signal = np.nan_to_num(np.asarray(signals['position'], dtype=np.float64))
+        stops, tps = level('stop'), level('take_profit')
+
+        # Return bar k of the chunk holds the signal / levels set at bar k - 1
+        first = state['close'] is None # Bar 0 of the series has no return
+        prev_close = np.concatenate(([state['close']], close[:-1])) if not first else close[:-1]
+        held = np.concatenate(([state['signal']], signal[:-1])) if not first else signal[:-1]
+        stop = np.concatenate(([state['stop']], stops[:-1])) if not first else stops[:-1]
+        tp = np.concatenate(([state['tp']], tps[:-1])) if not first else tps[:-1]
+        skip = 1 if first else 0
+        open_, high, low = (np.asarray(bars[c], dtype=np.float64)[skip:] for c in ('open', 'high', 'low'))
+        price = close[skip:]
+        state.update(close=close[-1], signal=signal[-1], stop=stops[-1], tp=tps[-1])
+        if not len(held):
+            return
+
+        long, short = held > 0, held < 0
+        stop_hit = long & (low <= stop) | short & (high >= stop)
+        tp_hit = long & (high >= tp) | short & (low <= tp)
+        hit = stop_hit | tp_hit
+
+        # Trade runs; the run open at the chunk start carries its earlier hits
+        m = len(held)
+        changed = np.ones(m, dtype=bool)
+        np.not_equal(held[1:], held[:-1], out=changed[1:])
+        continuing = not first and held[0] == state['held']
+        changed[0] = not continuing
+        trade_start = np.maximum.accumulate(np.where(changed, np.arange(m), 0))
+        hits_before = np.cumsum(hit) - hit
+        hits_before -= hits_before[trade_start]
+        if continuing:
+            hits_before[trade_start == 0] += state['run_hits']
+        live = hits_before == 0
+        position = np.where(live, held, 0.0)
+        exit_here = hit & live
+        state['held'] = held[-1]
+        state['run_hits'] = int(hits_before[-1] + hit[-1])
+
+        both = exit_here & stop_hit & tp_hit
+        if self.ambiguity == 'tp':
+            tp_first = both
+        elif self.ambiguity == 'open':
+            tp_first = both & (np.abs(tp - open_) < np.abs(stop - open_))
+        else:
+            tp_first = np.zeros_like(both)
+        use_tp = exit_here & tp_hit & (~stop_hit | tp_first)
+
+        stop_fill = np.where(long, np.minimum(open_, stop), np.maximum(open_, stop))
+        tp_fill = np.where(long, np.maximum(open_, tp), np.minimum(open_, tp))
+        exit_return = np.where(use_tp, tp_fill, stop_fill) / prev_close - 1
+        market = price / prev_close
+        if funding is not None:
+            market = market * (1 - funding[skip:]) # Settled over the bar; level exits close before it
+        bar_return = np.where(exit_here, exit_return, market - 1)
+
+        closing = np.where(exit_here, 0.0, position)
+        carried = state['closing']
+        turnover = np.empty(m)
+        turnover[0] = abs(position[0] - carried)
+        np.subtract(position[1:], closing[:-1], out=turnover[1:])
+        np.abs(turnover, out=turnover)
+        turnover += np.where(exit_here, np.abs(position), 0.0)
+        state['closing'] = closing[-1]
+
+        net_return = position * bar_return
+        net_return *= self.leverage
+        net_return -= turnover * (self.fee + self.slippage) * self.leverage
+        self._accumulate(state, net_return, position, turnover, closing, carried)
+
+    def _accumulate(self, state, net_return, position, turnover, closing, carried):
+        state['n'] += len(net_return)
+        state['sum'] += net_return.sum()
+        state['sumsq'] += np.dot(net_return, net_return)
+        downside = np.minimum(net_return, 0.0)
+        state['downsq'] += np.dot(downside, downside)
+        state['wins'] += np.count_nonzero(net_return > 0)
+        state['losses'] += np.count_nonzero(net_return < 0)
+        state['exposure'] += np.count_nonzero(position)
+        state['turnover'] += turnover.sum()
+
+        growth = net_return + 1
+        equity = np.cumprod(growth) * state['equity']
+        peak = np.maximum(np.maximum.accumulate(equity), state['peak'])
+        state['max_drawdown'] = min(state['max_drawdown'], ((equity - peak) / peak).min())
+        state['equity'], state['peak'] = equity[-1], peak[-1]
+
+        # Trades: runs of the same non-zero position; the run touching the chunk end stays open
+        cost = (self.fee + self.slippage) * self.leverage
+        starts, ends = _run_bounds(position[None, :])
+        open_pos, open_growth, open_bars = state['open_trade']
+        closed = open_pos != 0 and (not len(starts) or starts[0] != 0 or position[0] != open_pos)
+        if closed:
+            # Its exit cost is on this chunk's first bar (see _exit_costs)
+            exit_cost = min(abs(carried), abs(position[0] - carried)) * cost
+            growth[0] += exit_cost
+        pnl_growth = _trade_pnl(growth, starts, ends, _exit_costs(position[None, :], closing[None, :], ends, cost)) + 1
+        bars = ends - starts + 1
+        if closed:
+            self._close_trade(state, open_growth * (1 - exit_cost), open_bars) # Ended exactly at the chunk boundary
+        elif open_pos != 0:
+            pnl_growth[0] *= open_growth
+            bars[0] += open_bars
+        if len(starts) and ends[-1] == len(position) - 1:
+            state['open_trade'] = (position[-1], pnl_growth[-1], bars[-1])
+            pnl_growth, bars = pnl_growth[:-1], bars[:-1]
+        else:
+            state['open_trade'] = (0.0, 1.0, 0)
+        for g, b in zip(pnl_growth.tolist(), bars.tolist()):
+            self._close_trade(state, g, b)
+
+    def _close_trade(self, state, growth, bars):
+        pnl = growth - 1
+        state['trades'] += 1
+        state['trade_wins'] += pnl > 0
+        state['gross_profit'] += max(pnl, 0.0)
+        state['gross_loss'] += max(-pnl, 0.0)
+        state['bars_held'] += bars
+
+    def _finish(self, state, periods):
+        if state['open_trade'][0] != 0:
+            self._close_trade(state, *state['open_trade'][1:])
+        n = state['n']
+        if not n:
+            return {key: 0.0 for key in ('total_return', 'win_rate', 'max_drawdown', 'sharpe', 'sortino', 'profit_factor',
+                                         'trades', 'trade_win_rate', 'avg_bars_held', 'exposure', 'turnover',
+                                         'annual_return', 'calmar')}
+        mean = state['sum'] / n
+        std = np.sqrt(max(state['sumsq'] / n - mean * mean, 0.0))
+        downside = np.sqrt(state['downsq'] / n)
+        decided = state['wins'] + state['losses']
+        trades = state['trades']
+        years = n / periods
+        gross_profit, gross_loss = state['gross_profit'], state['gross_loss']
+        metrics = {
+            'total_return': state['equity'] / self.initial_capital - 1,
+            'win_rate': state['wins'] / decided if decided else 0.0,
+            'max_drawdown': state['max_drawdown'],
+            'sharpe': mean / std * np.sqrt(periods) if std > 0 else 0.0,
+            'sortino': mean / downside * np.sqrt(periods) if downside > 0 else 0.0,
+            'profit_factor': gross_profit / gross_loss if gross_loss > 0 else (np.inf if gross_profit > 0 else 0.0),
+            'trades': trades,
+            'trade_win_rate': state['trade_wins'] / trades if trades else 0.0,
+            'avg_bars_held': state['bars_held'] / trades if trades else 0.0,
+            'exposure': state['exposure'] / n,
+            'turnover': state['turnover'] / years if years > 0 else state['turnover']
+        }
+        calmar = add_calmar({'total_return': np.array([metrics['total_return']]), 'max_drawdown': np.array([metrics['max_drawdown']])}, n, periods)
+        metrics['annual_return'] = float(calmar['annual_return'][0])
+        metrics['calmar'] = float(calmar['calmar'][0])
+        return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked backtest over market-store series or aggTrades CSVs")
+    parser.add_argument('symbols', nargs='*', help="Market store symbols (e.g. ETHUSDT BTCUSDT)")
+    parser.add_argument('--timeframe', default='1m', help="Stored base timeframe, or the bar size built from --trades")
+    parser.add_argument('--trades', nargs='*', default=[], metavar='CSV', help="aggTrades CSVs to aggregate into bars instead")
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help="Bars (or trades) per chunk")
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--params', default='{}', help="TrendPullbackStream params as a dict literal")
+    parser.add_argument('--leverage', type=float, default=1.0)
+    parser.add_argument('--store', default=None, help="Market store root (default data/store)")
+    parser.add_argument('--funding', action='store_true', help="Pay the stored funding settlements (tools/funding.py)")
+    args = parser.parse_args()
+
+    params = ast.literal_eval(args.params)
+    store = MarketStore(args.store) if args.store else MarketStore()
+    funded = lambda s: funding_events(store, s) if args.funding and store.has_events(s, FUNDING) else None
+    jobs = [(s, lambda s=s: store_chunks(store, s, args.timeframe, args.chunk, args.start, args.end), funded(s)) for s in args.symbols]
+    jobs += [(os.path.basename(p), lambda p=p: trade_bars(trade_chunks(p, args.chunk), args.timeframe), None) for p in args.trades]
+    if not jobs:
+        parser.error("nothing to backtest: give store symbols and/or --trades files")
+
+    rows = []
+    for name, chunks, funding in jobs:
+        if args.funding and funding is None:
+            print(f"⚠️ {name}: no stored funding, running without it")
+        metrics = StreamingBacktest(leverage=args.leverage).run(chunks(), TrendPullbackStream(params), args.timeframe, funding=funding)
+        print(f"⚡ {name}: {metrics['bars']:,} bars in {metrics['chunks']} chunks, {metrics['seconds']:.1f}s "
+              f"({metrics['bars_per_sec']:,.0f} bars/s)")
+        rows.append({'series': name, **{k: metrics[k] for k in ('total_return', 'max_drawdown', 'sharpe', 'trades', 'bars', 'bars_per_sec')}})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
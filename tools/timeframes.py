@@ -0,0 +1,152 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root so `tools` is importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.market_store import MarketStore, COLUMNS
+
+# --- DERIVED TIMEFRAMES ---
+# Higher timeframes are built once from the finest stored series (5m or 1m) instead of being
+# downloaded separately or resampled inside every strategy call. Buckets are exchange-aligned:
+# minute / hour / day bars start on multiples of their width since the Unix epoch (Binance's
+# 4h bars open at 00/04/08/... UTC), weekly bars on Monday 00:00 UTC. A bucket's bars are
+# aggregated with one reduceat per column (open first, high max, low min, close last,
+# volume sum), matching df.resample(rule).agg(AGG_DICT).dropna() for these widths.
+#
+# Derived datasets live in the market store next to the base with `derived_from` in the
+# manifest. derive() is incremental: only the last stored (possibly still forming) bucket
+# onward is rebuilt from the new base bars and merged in.
+
+TIMEFRAME_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+WEEK_OFFSET_MS = 4 * 86_400_000 # 1970-01-01 was a Thursday; weeks open on Monday
+DEFAULT_TARGETS = ('15m', '1h', '4h')
+
+def timeframe_ms(timeframe):
+    if timeframe[-1] not in TIMEFRAME_MS:
+        raise ValueError(f"Unsupported timeframe {timeframe!r} (fixed-width m / h / d / w only)")
+    return int(timeframe[:-1]) * TIMEFRAME_MS[timeframe[-1]]
+
+def bucket_offset_ms(timeframe):
+    return WEEK_OFFSET_MS if timeframe.endswith('w') else 0
+
+def pandas_rules(timeframe):
+    """resample() rule strings strategies use for this timeframe ('15m' -> '15m', '15min'), day-divisor widths only."""
+    width = timeframe_ms(timeframe)
+    if timeframe.endswith('w') or 86_400_000 % width != 0:
+        return [] # pandas' default origin (start of the first day) only lines up with the epoch grid for these
+    unit = {'m': 'min', 'h': 'h', 'd': 'D'}[timeframe[-1]]
+    return sorted({timeframe, f"{timeframe[:-1]}{unit}"})
+
+def resample_arrays(ts, values, timeframe):
+    """
+    (ts int64 ns, values (5, n)) base bars, sorted -> the same for `timeframe` buckets.
+    Empty buckets are skipped (like resample().dropna()); a trailing partial bucket is kept.
+    """
+    width = timeframe_ms(timeframe) * 1_000_000
+    offset = bucket_offset_ms(timeframe) * 1_000_000
+    ts = np.asarray(ts, dtype=np.int64)
+    if not len(ts):
+        return ts, np.empty((len(COLUMNS), 0))
+    bucket = (ts - offset) // width * width + offset
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    out = np.empty((len(COLUMNS), len(starts)))
+    out[0] = values[0, starts]
+    out[1] = np.maximum.reduceat(values[1], starts)
+    out[2] = np.minimum.reduceat(values[2], starts)
+    out[3] = values[3, ends]
+    out[4] = np.add.reduceat(values[4], starts)
+    return bucket[starts], out
+
+def _frame(ts, values):
+    index = pd.DatetimeIndex(np.asarray(ts, dtype=np.int64).view('datetime64[ns]'), name='timestamp')
+    return pd.DataFrame(np.asarray(values).T, index=index, columns=COLUMNS)
+
+def _check_target(base, target):
+    base_ms, target_ms = timeframe_ms(base), timeframe_ms(target)
+    if target_ms <= base_ms or target_ms % base_ms != 0:
+        raise ValueError(f"{target} can't be built from {base} bars (needs a larger multiple)")
+
+
+def derive(store, symbol, base='5m', targets=DEFAULT_TARGETS, full=False):
+    """
+    Builds / updates `targets` from the stored `base` series. Returns {timeframe: 'full' | 'incremental' | 'current'}.
+    A target is rebuilt in full when it wasn't derived from this base, or the base gained older bars.
+    """
+    info = store.info(symbol, base)
+    if info is None:
+        raise KeyError(f"No {symbol} {base} base series in {store.root}")
+    modes = {}
+    for target in targets:
+        _check_target(base, target)
+        derived = (store.info(symbol, target) or {}).get('derived_from') or {}
+        current = derived.get('timeframe') == base and derived.get('base_start') == info['start'] and not full
+        if current and derived.get('base_end') == info['end']:
+            modes[target] = 'current'
+            continue
+        if current:
+            # Rebuild from the last stored bucket: it may have been partial when it was written
+            last = store.last_timestamp(symbol, target)
+            arrays, frame = store.columnar(symbol, base, start=pd.Timestamp(last))
+            ts, values = resample_arrays(frame.index.asi8, np.vstack([arrays[c] for c in COLUMNS]), target)
+            store.append(symbol, target, _frame(ts, values))
+            modes[target] = 'incremental'
+        else:
+            arrays, frame = store.columnar(symbol, base)
+            ts, values = resample_arrays(frame.index.asi8, np.vstack([arrays[c] for c in COLUMNS]), target)
+            store.write(symbol, target, _frame(ts, values))
+            modes[target] = 'full'
+        store.set_meta(symbol, target, derived_from={'timeframe': base, 'base_start': info['start'], 'base_end': info['end']})
+    return modes
+
+
+def seed_resamples(cache, df, store, symbol, base):
+    """
+    Hands the store's derived bars to an IndicatorCache as the 'resample' results for df (the
+    full `base` series), so multi-timeframe indicators read them instead of resampling.
+    Only datasets derived from exactly this base range are used. Returns the seeded timeframes.
+    """
+    info = store.info(symbol, base)
+    if info is None or not len(df):
+        return []
+    seeded = []
+    for entry in store.manifest['datasets'].values():
+        derived = entry.get('derived_from') or {}
+        if entry['symbol'] != info['symbol'] or derived.get('timeframe') != base:
+            continue
+        if derived.get('base_start') != info['start'] or derived.get('base_end') != info['end']:
+            continue # Stale: the base moved on since it was derived
+        rules = pandas_rules(entry['timeframe'])
+        if not rules:
+            continue
+        bars = store.load(symbol, entry['timeframe'])
+        for rule in rules:
+            cache.seed(df, 'resample', bars, rule=rule)
+        seeded.append(entry['timeframe'])
+    return seeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive higher timeframes from a stored base series")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--base', default='5m')
+    parser.add_argument('--targets', nargs='+', default=list(DEFAULT_TARGETS))
+    parser.add_argument('--full', action='store_true', help="Rebuild instead of updating incrementally")
+    parser.add_argument('--store', default=None, help="Market store root (default data/store)")
+    args = parser.parse_args()
+
+    store = MarketStore(args.store) if args.store else MarketStore()
+    for symbol in args.symbols:
+        t0 = time.perf_counter()
+        modes = derive(store, symbol, args.base, args.targets, full=args.full)
+        summary = ', '.join(f"{tf} {mode} ({store.info(symbol, tf)['rows']:,} bars)" for tf, mode in modes.items())
+        print(f"📐 {symbol} from {args.base}: {summary} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,91 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
+import hashlib
+import inspect
+from functools import lru_cache
 from itertools import product
 from copy import deepcopy
+from .indicator_cache import CACHE, format_report
+from .market_store import MarketStore, load_ohlcv
+from .timeframes import seed_resamples
+from .metrics import grid_metrics, add_calmar, trade_ledger, periods_per_year, objective_score, EXTENDED_OBJECTIVES
+
+# Working-set cap for one run_grid block (combinations x bars float64 buffers)
+GRID_BLOCK_BYTES = 128 * 1024 * 1024
+
+# Which level fills when a bar's range touches both the stop and the take-profit:
+# 'stop' (worst case), 'tp' (best case), 'open' (the level nearer the bar's open),
+# 'path' (first touch on the finer bars of an IntrabarPath, else 'stop')
+AMBIGUITY_POLICIES = ('stop', 'tp', 'open', 'path')
+
+def columnar_frame(df):
+    """
+    Copies df's numeric columns once into a single read-only (n_cols, n_rows) float64 block and
+    returns (arrays, frame): per-column contiguous views and a DataFrame backed by them (no copy).
+    Window slices (iloc) of the frame are views too, and strategies can add columns to their
+    shallow copy but can't write into the shared series.
+    """
+    columns = [c for c in df.columns if np.issubdtype(df[c].dtype, np.number)]
+    values = np.empty((len(columns), len(df)), dtype=np.float64)
+    for k, col in enumerate(columns):
+        values[k] = df[col].to_numpy(dtype=np.float64)
+    values.flags.writeable = False
+    frame = pd.DataFrame(values.T, index=df.index, columns=columns, copy=False)
+    return {col: values[k] for k, col in enumerate(columns)}, frame
+
+def split_signals(output):
+    """
+    generate_signals() output -> (position, stop, take_profit) float arrays.
+    Strategies return a position Series, or a DataFrame with a 'position' column and optional
+    'stop' / 'take_profit' price columns (row i = the level resting over bar i+1, NaN = none).
+    """
+    if isinstance(output, pd.DataFrame):
+        column = lambda name: output[name].to_numpy(dtype=np.float64) if name in output else None
+        return column('position'), column('stop'), column('take_profit')
+    return np.asarray(output, dtype=np.float64), None, None
+
+class IntrabarPath:
+    """
+    Finer bars inside each backtest bar (e.g. 5m inside 1h) for the 'path' ambiguity policy.
+    High/low are laid out as (n_bars, k) tables padded with -inf/+inf, so the first fine bar
+    touching a level is one vectorised comparison + argmax per lookup instead of a row loop.
+    """
+    def __init__(self, fine, index):
+        # fine: OHLC frame (DatetimeIndex or timestamp column); index: open times of the backtest bars
+        if 'timestamp' in fine.columns:
+            fine = fine.set_index(pd.DatetimeIndex(pd.to_datetime(fine['timestamp'])))
+        fine = fine.sort_index()
+        self.index = pd.DatetimeIndex(index)
+        
+        bar = self.index.searchsorted(fine.index, 'right') - 1
+        keep = bar >= 0
+        bar = bar[keep]
+        counts = np.bincount(bar, minlength=len(self.index))
+        starts = np.cumsum(counts) - counts
+        slot = np.arange(len(bar)) - starts[bar]
+        width = max(int(counts.max()) if len(counts) else 0, 1)
+        
+        self.high = np.full((len(self.index), width), -np.inf)
+        self.low = np.full((len(self.index), width), np.inf)
+        self.high[bar, slot] = fine['high'].to_numpy(dtype=np.float64)[keep]
+        self.low[bar, slot] = fine['low'].to_numpy(dtype=np.float64)[keep]
+        self.width = width
+    
+    def rows(self, index):
+        """Table row for each bar of `index` (-1 where the path has no such bar)."""
+        return self.index.get_indexer(pd.DatetimeIndex(index))
+    
+    def first_touch(self, rows, level, from_below):
+        """
+        Fine-bar offset of the first touch of `level` in each bar `rows` (width if never / unknown).
+        from_below: touched when high >= level (else when low <= level).
+        """
+        known = rows >= 0
+        table = self.high[rows] if from_below else self.low[rows]
+        hit = table >= level[:, None] if from_below else table <= level[:, None]
+        hit &= known[:, None]
+        return np.where(hit.any(axis=1), hit.argmax(axis=1), self.width)
 
 class Strategy:
     def __init__(self, params):
@@ -10,56 +93,267 @@ class Strategy:
         
     def generate_signals(self, df):
         raise NotImplementedError("Should implement generate_signals")
+    
+    def indicator(self, df, name, **params):
+        """Cached indicator for df's rows (see tools/indicator_cache.py)."""
+        return CACHE.get(df, name, **params)
 
 class BacktestEngine:
-    def __init__(self, initial_capital=10000, fee=0.0004, slippage=0.0002, leverage=1.0):
+    def __init__(self, initial_capital=10000, fee=0.0004, slippage=0.0002, leverage=1.0, ambiguity='stop', path=None):
         self.initial_capital = initial_capital
         self.fee = fee # 0.04% Futures Taker Fee
         self.slippage = slippage # 0.02% Tight spread on ETH Futures
         self.leverage = leverage
+        if ambiguity not in AMBIGUITY_POLICIES:
+            raise ValueError(f"ambiguity must be one of {AMBIGUITY_POLICIES}, got {ambiguity!r}")
+        self.ambiguity = ambiguity # Stop and TP touched in the same bar (see AMBIGUITY_POLICIES)
+        self.path = path # IntrabarPath for ambiguity='path'
         
     def run(self, df, strategy):
-        signals = strategy.generate_signals(df.copy())
+        # Shallow copy: strategies may add columns / reset the index, but no data is copied
+        position, stop, take_profit = split_signals(strategy.generate_signals(df.copy(deep=False)))
         
-        df = df.copy()
-        df['signal'] = signals
+        levels = lambda x: None if x is None else x[None, :]
+        grid = self.run_grid(df, position[None, :], keep_equity=True, stop_matrix=levels(stop), tp_matrix=levels(take_profit),
+                             extended=True)
         
-        # Shift signal by 1 to trade on next open
-        df['position'] = df['signal'].shift(1).fillna(0)
+        equity = grid['equity'][0]
+        returns = np.zeros(len(equity))
+        returns[1:] = equity[1:] / equity[:-1] - 1
         
-        df['pct_change'] = df['close'].pct_change()
+        metrics = {k: v[0] for k, v in grid.items() if k not in ('equity', 'position', 'closing')}
+        metrics['equity_curve'] = pd.Series(equity, index=df.index)
+        metrics['trade_ledger'] = trade_ledger(grid['position'][0], returns, df.index, cost=(self.fee + self.slippage) * self.leverage,
+                                               closing=grid['closing'][0])
+        return metrics
+    
+    def block_rows(self, n_bars, buffers=5):
+        """Combinations per run_grid block so a block's working set stays under GRID_BLOCK_BYTES."""
+        # ~5 (rows, bars) float64 buffers are live per block: signals, turnover and the drawdown temporaries
+        # (~16 with stop/TP levels: the level copies, hit masks and trade bookkeeping)
+        return max(1, int(GRID_BLOCK_BYTES // (buffers * 8 * max(n_bars, 1))))
+    
+    def run_grid(self, df, signal_matrix, keep_equity=False, stop_matrix=None, tp_matrix=None, extended=False):
+        """
+        Backtests many signal vectors over the same bars in one NumPy pass.
+        `signal_matrix` is (n_params, n_bars), one row per parameter combination.
+        Returns arrays of length n_params (plus the (n_params, n_bars) equity if keep_equity).
+        Same semantics as run(): signals trade on the next bar, costs on every unit of turnover,
+        and a 'funding' column (tools/funding.py) is paid by the position held over each bar.
+        Rows are processed in blocks (block_rows) so long 1m series don't blow up peak memory.
         
-        # Strategy Return = Position * Market Change * Leverage
-        df['strategy_return'] = df['position'] * df['pct_change'] * self.leverage
+        Optional `stop_matrix` / `tp_matrix` (same shape, NaN = no level) are exit prices resting
+        over the next bar: a position whose bar high/low reaches one is filled there (or at the
+        open if it gapped through), stays flat until its signal changes, and pays the exit cost.
         
-        # Trade Count: Entry (0->1) or Exit (1->0) or Flip (1->-1 implies 2 trades)
-        df['trade_count'] = df['position'].diff().abs().fillna(0)
+        `extended` adds the tools/metrics.py statistics (Sharpe, Sortino, Calmar, profit factor,
+        trade count / win rate / holding time, exposure, turnover) from the same buffers.
+        keep_equity also returns the (n_params, n_bars) position actually held over each bar,
+        and 'closing': the position carried out of each bar (0 where a stop / take-profit filled).
+        """
+        close = np.asarray(df['close'].values, dtype=np.float64)
+        signal_matrix = np.asarray(signal_matrix, dtype=np.float64)
+        if signal_matrix.ndim == 1:
+            signal_matrix = signal_matrix[None, :]
+        n_params, n_bars = signal_matrix.shape
         
-        # Cost is applied on NOTIONAL value (Capital * Leverage)
-        # Total cost per turnover = (Fee + Slippage) * Leverage
-        total_cost_pct = (self.fee + self.slippage) * self.leverage
+        if n_bars < 2:
+            zeros = np.zeros(n_params)
+            out = {'total_return': zeros, 'win_rate': zeros.copy(), 'max_drawdown': zeros.copy()}
+            if extended:
+                for key in ('sharpe', 'sortino', 'profit_factor', 'trades', 'trade_win_rate', 'avg_bars_held',
+                            'exposure', 'turnover', 'annual_return', 'calmar'):
+                    out[key] = zeros.copy()
+            if keep_equity:
+                out['equity'] = np.full((n_params, n_bars), float(self.initial_capital))
+                out['position'] = np.zeros((n_params, n_bars))
+                out['closing'] = np.zeros((n_params, n_bars))
+            return out
+        
+        out = {
+            'total_return': np.empty(n_params),
+            'win_rate': np.empty(n_params),
+            'max_drawdown': np.empty(n_params)
+        }
+        if keep_equity:
+            out['equity'] = np.empty((n_params, n_bars))
+            out['equity'][:, 0] = self.initial_capital
+            out['position'] = np.zeros((n_params, n_bars))
+            out['closing'] = np.zeros((n_params, n_bars))
+        # Extended stats keep a copy of the held positions and their own temporaries per block
+        periods = periods_per_year(df.index) if extended else None
+        extra = 4 if extended else 0
         
-        df['costs'] = df['trade_count'] * total_cost_pct
+        pct_change = close[1:] / close[:-1] - 1
+        if 'funding' in df:
+            # Funding settled over the bar (tools/funding.py) on the notional at its close:
+            # position * ((1 + r)(1 - f) - 1). Level exits close before the settlement and skip it.
+            funding = np.nan_to_num(np.asarray(df['funding'].values, dtype=np.float64)[1:])
+            pct_change = (pct_change + 1) * (1 - funding) - 1
+        if stop_matrix is None and tp_matrix is None:
+            step = self.block_rows(n_bars, buffers=5 + extra)
+            for start in range(0, n_params, step):
+                rows = slice(start, min(start + step, n_params))
+                self._grid_block(signal_matrix[rows], pct_change, out, rows, keep_equity, periods)
+            return add_calmar(out, n_bars - 1, periods) if extended else out
+        
+        bars = self._bar_arrays(df, close)
+        levels = lambda m: np.full(signal_matrix.shape, np.nan) if m is None else np.asarray(m, dtype=np.float64).reshape(signal_matrix.shape)
+        stop_matrix, tp_matrix = levels(stop_matrix), levels(tp_matrix)
+        step = self.block_rows(n_bars, buffers=16 + extra)
+        for start in range(0, n_params, step):
+            rows = slice(start, min(start + step, n_params))
+            self._level_block(signal_matrix[rows], stop_matrix[rows], tp_matrix[rows], pct_change, bars, out, rows, keep_equity, periods)
+        return add_calmar(out, n_bars - 1, periods) if extended else out
+    
+    def _bar_arrays(self, df, close):
+        """Bars 1..n-1 as seen by the fill model: open, high, low, previous close (+ path rows)."""
+        column = lambda name, fallback: np.asarray(df[name].values, dtype=np.float64)[1:] if name in df else fallback
+        bars = {
+            'prev_close': close[:-1],
+            'open': column('open', close[:-1]), # No open column: the bar starts at the last close
+            'high': column('high', close[1:]),
+            'low': column('low', close[1:])
+        }
+        if self.ambiguity == 'path' and self.path is not None:
+            bars['path_rows'] = self.path.rows(df.index)[1:]
+        return bars
+    
+    def _grid_block(self, block, pct_change, out, rows, keep_equity, periods=None):
+        # Own copy of the block (NaN -> 0); every later step works in this buffer or `turnover`
+        signals = np.nan_to_num(block)
         
-        df['net_return'] = df['strategy_return'] - df['costs']
+        # Bar 0 has no return (pct_change is NaN), so work on bars 1..n-1:
+        # position[t] = signal[t-1] and the first position starts from flat
+        position = signals[:, :-1]
         
-        # Cumulative Return
-        df['equity'] = self.initial_capital * (1 + df['net_return']).cumprod()
+        turnover = np.empty_like(position)
+        np.abs(position[:, 0], out=turnover[:, 0])
+        np.subtract(position[:, 1:], position[:, :-1], out=turnover[:, 1:])
+        np.abs(turnover[:, 1:], out=turnover[:, 1:])
+        held = self._held(position, turnover, out, rows, keep_equity, periods)
         
-        return self.calculate_metrics(df)
+        # Net Return = Position * Market Change * Leverage - Turnover * (Fee + Slippage) * Leverage
+        # (computed in place over the position rows: turnover no longer needs them)
+        net_return = np.multiply(position, pct_change, out=position)
+        net_return *= self.leverage
+        turnover *= (self.fee + self.slippage) * self.leverage
+        net_return -= turnover
+        self._block_metrics(net_return, turnover, out, rows, keep_equity, held, periods)
+    
+    def _level_block(self, block, stops, tps, pct_change, bars, out, rows, keep_equity, periods=None):
+        """_grid_block with intrabar stop / take-profit fills (bar j of the buffers is bar j+1 of df)."""
+        signal = np.nan_to_num(block)[:, :-1]
+        stop, tp = stops[:, :-1], tps[:, :-1]
+        high, low, open_, prev_close = bars['high'], bars['low'], bars['open'], bars['prev_close']
+        long, short = signal > 0, signal < 0
+        
+        # NaN levels never compare true
+        stop_hit = long & (low <= stop) | short & (high >= stop)
+        tp_hit = long & (high >= tp) | short & (low <= tp)
+        hit = stop_hit | tp_hit
+        
+        # A trade is a run of the same signal; only its first touch fills, later bars of the run are flat
+        n_bars = signal.shape[1]
+        changed = np.ones(signal.shape, dtype=bool)
+        np.not_equal(signal[:, 1:], signal[:, :-1], out=changed[:, 1:])
+        trade_start = np.maximum.accumulate(np.where(changed, np.arange(n_bars), 0), axis=1)
+        hits_before = np.cumsum(hit, axis=1) - hit
+        hits_before -= np.take_along_axis(hits_before, trade_start, axis=1)
+        live = hits_before == 0
+        position = np.where(live, signal, 0.0)
+        exit_here = hit & live
+        
+        # Both touched in one bar: does the take-profit fill instead of the stop?
+        both = exit_here & stop_hit & tp_hit
+        if self.ambiguity == 'tp':
+            tp_first = both
+        elif self.ambiguity == 'open':
+            tp_first = both & (np.abs(tp - open_) < np.abs(stop - open_))
+        elif self.ambiguity == 'path' and 'path_rows' in bars:
+            tp_first = np.zeros_like(both)
+            r, c = np.nonzero(both)
+            if len(r):
+                path_rows, up = bars['path_rows'][c], long[r, c]
+                # Long: stop is touched from above (low), TP from below (high); mirrored for shorts
+                stop_at = np.where(up, self.path.first_touch(path_rows, stop[r, c], False), self.path.first_touch(path_rows, stop[r, c], True))
+                tp_at = np.where(up, self.path.first_touch(path_rows, tp[r, c], True), self.path.first_touch(path_rows, tp[r, c], False))
+                tp_first[r, c] = tp_at < stop_at # Same fine bar or unknown: stop first
+        else:
+            tp_first = np.zeros_like(both)
+        use_tp = exit_here & tp_hit & (~stop_hit | tp_first)
+        
+        # Fill at the level, or at the open when the bar gapped through it
+        stop_fill = np.where(long, np.minimum(open_, stop), np.maximum(open_, stop))
+        tp_fill = np.where(long, np.maximum(open_, tp), np.minimum(open_, tp))
+        exit_return = np.where(use_tp, tp_fill, stop_fill) / prev_close - 1
+        bar_return = np.where(exit_here, exit_return, pct_change)
+        
+        # Turnover: entries / changes against the previous bar's closing position, plus the level exit itself
+        closing = np.where(exit_here, 0.0, position)
+        turnover = np.empty_like(position)
+        np.abs(position[:, 0], out=turnover[:, 0])
+        np.subtract(position[:, 1:], closing[:, :-1], out=turnover[:, 1:])
+        np.abs(turnover, out=turnover)
+        turnover += np.where(exit_here, np.abs(position), 0.0)
+        held = self._held(position, turnover, out, rows, keep_equity, periods, closing)
+        
+        net_return = position * bar_return
+        net_return *= self.leverage
+        turnover *= (self.fee + self.slippage) * self.leverage
+        net_return -= turnover
+        self._block_metrics(net_return, turnover, out, rows, keep_equity, held, periods)
+    
+    def _held(self, position, turnover, out, rows, keep_equity, periods, closing=None):
+        """Saves what the metrics need from the position / unscaled turnover buffers before they are reused."""
+        if keep_equity:
+            out['position'][rows, 1:] = position
+            out['closing'][rows, 1:] = position if closing is None else closing
+        if periods is None:
+            return None
+        return position.copy(), turnover.sum(axis=1), closing
+    
+    def _block_metrics(self, net_return, scratch, out, rows, keep_equity, held=None, periods=None):
+        """Win rate, equity and drawdown of a block of net returns (both buffers are overwritten)."""
+        if held is not None:
+            n_params = len(out['total_return'])
+            for key, values in grid_metrics(net_return, held[0], held[1], periods, (self.fee + self.slippage) * self.leverage,
+                                            held[2]).items():
+                out.setdefault(key, np.empty(n_params))[rows] = values
+        
+        # Win Rate (bars with a positive / negative net return)
+        wins = np.count_nonzero(net_return > 0, axis=1)
+        losses = np.count_nonzero(net_return < 0, axis=1)
+        decided = wins + losses
+        out['win_rate'][rows] = np.divide(wins, decided, out=np.zeros(len(wins)), where=decided > 0)
+        
+        # Equity (reuses the net_return buffer)
+        net_return += 1
+        equity = np.cumprod(net_return, axis=1, out=net_return)
+        equity *= self.initial_capital
+        out['total_return'][rows] = equity[:, -1] / self.initial_capital - 1
+        
+        # Drawdown (running max reuses the turnover buffer)
+        rolling_max = np.maximum.accumulate(equity, axis=1, out=scratch)
+        out['max_drawdown'][rows] = ((equity - rolling_max) / rolling_max).min(axis=1)
+        
+        if keep_equity:
+            out['equity'][rows, 1:] = equity
     
     def calculate_metrics(self, df):
-        total_return = (df['equity'].iloc[-1] / self.initial_capital) - 1
+        # Legacy DataFrame pipeline (equity / net_return columns); counts on the arrays, no filtered copies
+        equity = df['equity'].to_numpy(dtype=np.float64)
+        net_return = df['net_return'].to_numpy(dtype=np.float64)
+        total_return = (equity[-1] / self.initial_capital) - 1
         
-        # Win Rate
-        winning_trades = df[df['net_return'] > 0]
-        losing_trades = df[df['net_return'] < 0]
-        win_rate = len(winning_trades) / (len(winning_trades) + len(losing_trades)) if (len(winning_trades) + len(losing_trades)) > 0 else 0
+        # Win Rate (bars)
+        wins = np.count_nonzero(net_return > 0)
+        decided = wins + np.count_nonzero(net_return < 0)
+        win_rate = wins / decided if decided > 0 else 0
         
         # Drawdown
-        rolling_max = df['equity'].cummax()
-        drawdown = (df['equity'] - rolling_max) / rolling_max
-        max_drawdown = drawdown.min()
+        rolling_max = np.maximum.accumulate(equity)
+        max_drawdown = ((equity - rolling_max) / rolling_max).min()
         
         return {
             'total_return': total_return,
@@ -68,81 +362,244 @@ class BacktestEngine:
             'equity_curve': df['equity']
         }
 
+def score_metrics(metrics, objective='return_dd'):
+    """
+    Optimization Goal (default): Maximize Return / Abs(MaxDrawdown). Works on scalars or grid arrays.
+    Other objectives (tools/metrics.py OBJECTIVES): 'sharpe', 'sortino', 'calmar', 'profit_factor'.
+    """
+    return objective_score(metrics, objective)
+
+def param_combinations(param_grid):
+    keys, values = zip(*param_grid.items())
+    return [dict(zip(keys, v)) for v in product(*values)]
+
+@lru_cache(maxsize=1)
+def engine_version():
+    """Hash of the engine, position kernel and metrics source: editing any of them invalidates stored scores."""
+    from . import kernels, metrics
+    try:
+        source = ''.join(inspect.getsource(obj) for obj in (IntrabarPath, BacktestEngine, score_metrics, kernels, metrics))
+    except (OSError, TypeError):
+        source = ''
+    return hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+
+def engine_settings(leverage=1.0, objective='return_dd'):
+    """Everything about the engine that changes a score (part of the result-store keys)."""
+    settings = dict(vars(BacktestEngine(leverage=leverage)))
+    settings.pop('path')
+    settings['version'] = engine_version()
+    if objective != 'return_dd':
+        # Only non-default objectives are keyed, so existing cached scores stay valid
+        settings['objective'] = objective
+    return settings
+
+def score_combinations(train_data, strategy_cls, combinations, leverage=1.0, store=None, objective='return_dd'):
+    """
+    Train-window scores for each combination. With a ResultStore (tools/result_store.py),
+    previously evaluated combinations are read back and only the rest are backtested.
+    """
+    if store is None:
+        return _score_grid(train_data, strategy_cls, combinations, leverage, objective)
+    
+    keys = store.evaluation_keys(train_data, strategy_cls, combinations, engine_settings(leverage, objective))
+    cached = store.get_scores(keys)
+    scores = np.array([cached.get(key, np.nan) for key in keys], dtype=np.float64)
+    missing = [k for k, key in enumerate(keys) if key not in cached]
+    if missing:
+        new = _score_grid(train_data, strategy_cls, [combinations[k] for k in missing], leverage, objective)
+        scores[missing] = new
+        store.put_scores(zip([keys[k] for k in missing], new))
+    return scores
+
+def _score_grid(train_data, strategy_cls, combinations, leverage=1.0, objective='return_dd'):
+    """One signal row per combination, scored a block of rows at a time (one matrix pass per block)."""
+    engine = BacktestEngine(leverage=leverage)
+    extended = objective in EXTENDED_OBJECTIVES
+    step = engine.block_rows(len(train_data))
+    signal_matrix = np.empty((min(step, len(combinations)), len(train_data)), dtype=np.float64)
+    level_matrices = None # (stop, take_profit), allocated once a strategy returns levels
+    scores = np.empty(len(combinations))
+    
+    for start in range(0, len(combinations), step):
+        block = combinations[start:start + step]
+        for row, params in enumerate(block):
+            strat = strategy_cls(params)
+            # ML Support: Train if method exists
+            if hasattr(strat, 'train'):
+                strat.train(train_data)
+            position, stop, take_profit = split_signals(strat.generate_signals(train_data.copy(deep=False)))
+            signal_matrix[row] = position
+            if level_matrices is None and (stop is not None or take_profit is not None):
+                level_matrices = (np.full(signal_matrix.shape, np.nan), np.full(signal_matrix.shape, np.nan))
+            if level_matrices is not None:
+                level_matrices[0][row] = np.nan if stop is None else stop
+                level_matrices[1][row] = np.nan if take_profit is None else take_profit
+        stops, tps = (m[:len(block)] for m in level_matrices) if level_matrices is not None else (None, None)
+        metrics = engine.run_grid(train_data, signal_matrix[:len(block)], stop_matrix=stops, tp_matrix=tps, extended=extended)
+        scores[start:start + len(block)] = score_metrics(metrics, objective)
+    return scores
+
+def select_best(scores, combinations):
+    """First combination wins ties (same as the sequential search). None if nothing scored."""
+    valid = scores > -np.inf
+    if not valid.any():
+        return None
+    return combinations[int(np.argmax(np.where(valid, scores, -np.inf)))]
+
+def test_window(train_data, test_data, strategy_cls, best_params, leverage=1.0):
+    # Out-of-Sample Test
+    best_strat = strategy_cls(best_params)
+    # ML Support: Re-train best model on Train Data before testing on Test Data
+    if hasattr(best_strat, 'train'):
+        best_strat.train(train_data)
+        
+    test_engine = BacktestEngine(leverage=leverage)
+    test_metrics = test_engine.run(test_data, best_strat)
+    
+    # Calculate Buy & Hold Return for this period (Unleveraged Benchmark)
+    bnh_return = (test_data['close'].iloc[-1] / test_data['close'].iloc[0]) - 1
+    
+    return {
+        'params': best_params,
+        'return': test_metrics['total_return'],
+        'drawdown': test_metrics['max_drawdown'],
+        'sharpe': test_metrics['sharpe'],
+        'profit_factor': test_metrics['profit_factor'],
+        'trades': int(test_metrics['trades']),
+        'bnh_return': bnh_return
+    }
+
 class WFOOptimizer:
-    def __init__(self, data_path, train_window_days=60, test_window_days=20):
-        self.df = pd.read_csv(data_path)
-        self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
-        self.df.set_index('timestamp', inplace=True)
+    def __init__(self, data_path, train_window_days=60, test_window_days=20, market_store=None, funding=False):
+        # data_path: CSV path, (symbol, timeframe) in the market store (tools/market_store.py,
+        # market_store=None -> data/store), or an already-loaded OHLCV frame (timestamp column or index)
+        # funding: join the stored funding / mark-price series (tools/funding.py) so the engine
+        # pays funding and strategies can read 'funding_rate' / 'mark_basis'
+        self.market_store = market_store or MarketStore()
+        self.dataset = None # (symbol, timeframe) when the series comes from the market store
+        if isinstance(data_path, pd.DataFrame):
+            self.arrays, raw = None, data_path
+            self.data_path = None
+        else:
+            # Store datasets (and CSVs imported into the store) come back memory-mapped, no parsing
+            self.dataset = self.market_store.resolve(data_path)
+            self.arrays, raw = load_ohlcv(data_path, self.market_store)
+            self.data_path = data_path
+        
+        if self.arrays is not None:
+            self.df = raw
+        else:
+            if 'timestamp' in raw.columns:
+                raw = raw.set_index(pd.DatetimeIndex(pd.to_datetime(raw['timestamp']), name='timestamp')).drop(columns='timestamp')
+            # The series lives once in contiguous read-only arrays; self.df and every window are views of them
+            self.arrays, self.df = columnar_frame(raw)
+        del raw
+        if funding:
+            self._join_funding()
         self.train_window = pd.Timedelta(days=train_window_days)
         self.test_window = pd.Timedelta(days=test_window_days)
+        self._windows = None
         
-    def optimize(self, strategy_cls, param_grid, leverage=1.0):
-        current_start = self.df.index.min()
-        results = []
-        
-        print(f"Starting WFO for {strategy_cls.__name__} (Lev: {leverage}x)...")
+        # Windows are slices of self.df, so indicators are computed once on the full series
+        CACHE.register(self.df)
+        # Higher timeframes derived in the store replace the per-dataset resample (tools/timeframes.py)
+        if self.dataset is not None:
+            seeded = seed_resamples(CACHE, self.df, self.market_store, *self.dataset)
+            if seeded:
+                print(f"📐 Using stored {'/'.join(seeded)} bars for {self.dataset[0]} {self.dataset[1]}")
+    
+    def _join_funding(self):
+        from .funding import FUNDING, with_funding
+        if self.dataset is None or not self.market_store.has_events(self.dataset[0], FUNDING):
+            raise ValueError(f"funding=True needs a market-store dataset with downloaded funding (python tools/funding.py), got {self.data_path!r}")
+        # One more copy of the series: the stored columns are read-only mappings without room for new ones
+        self.arrays, self.df = columnar_frame(with_funding(self.df, self.market_store, *self.dataset))
+    
+    def windows(self):
+        """
+        Walk-forward windows as (train_end, test_end, train_slice, test_slice).
+        Slices are positional (iloc) and match label slicing df[start:end] (both ends inclusive).
+        Boundaries are found with searchsorted once and reused by every optimize() call.
+        """
+        if self._windows is None:
+            self._windows = self._compute_windows()
+        return list(self._windows)
+    
+    def _compute_windows(self):
+        index = self.df.index
+        current_start = index.min()
+        windows = []
         
         while True:
             train_end = current_start + self.train_window
             test_end = train_end + self.test_window
             
-            if test_end > self.df.index.max():
+            if test_end > index.max():
                 break
-                
-            train_data = self.df[current_start:train_end]
-            test_data = self.df[train_end:test_end]
-            
-            if len(train_data) < 100 or len(test_data) < 10:
-                current_start += self.test_window
-                continue
-            
-            # Optimization Step
-            best_params = None
-            best_score = -np.inf
             
-            # Grid Search
-            keys, values = zip(*param_grid.items())
-            combinations = [dict(zip(keys, v)) for v in product(*values)]
+            train_slice = slice(index.searchsorted(current_start, 'left'), index.searchsorted(train_end, 'right'))
+            test_slice = slice(index.searchsorted(train_end, 'left'), index.searchsorted(test_end, 'right'))
             
-            for params in combinations:
-                strat = strategy_cls(params)
-                # ML Support: Train if method exists
-                if hasattr(strat, 'train'):
-                    strat.train(train_data)
-                    
-                engine = BacktestEngine(leverage=leverage)
-                metrics = engine.run(train_data, strat)
-                
-                # Optimization Goal: Maximize Return / Abs(MaxDrawdown)
-                score = metrics['total_return']
-                if metrics['max_drawdown'] != 0:
-                     score = metrics['total_return'] / abs(metrics['max_drawdown'])
-                
-                if score > best_score:
-                    best_score = score
-                    best_params = params
+            if (train_slice.stop - train_slice.start) >= 100 and (test_slice.stop - test_slice.start) >= 10:
+                windows.append((train_end, test_end, train_slice, test_slice))
             
-            # Out-of-Sample Test
-            best_strat = strategy_cls(best_params)
-            # ML Support: Re-train best model on Train Data before testing on Test Data
-            if hasattr(best_strat, 'train'):
-                best_strat.train(train_data)
-                
-            test_engine = BacktestEngine(leverage=leverage)
-            test_metrics = test_engine.run(test_data, best_strat)
-            
-            # Calculate Buy & Hold Return for this period (Unleveraged Benchmark)
-            bnh_return = (test_data['close'].iloc[-1] / test_data['close'].iloc[0]) - 1
+            current_start += self.test_window
+        
+        return windows
+        
+    def optimize(self, strategy_cls, param_grid, leverage=1.0, workers=1, search=None, store=None, objective='return_dd'):
+        """
+        Walk-forward grid search. `workers` > 1 fans (window, combination) jobs out to a
+        process pool (tools/parallel_wfo.py); results are identical to the serial run.
+        `search` swaps the exhaustive grid for a budgeted search (tools/search.py:
+        RandomSearch, SuccessiveHalving, TPESearch) over the same param_grid values.
+        `store` (tools/result_store.py ResultStore) reuses cached evaluations, checkpoints each
+        finished window so an interrupted run resumes, and writes provenance to results/.
+        `objective` picks the train-window score (tools/metrics.py OBJECTIVES, default return / |drawdown|).
+        """
+        if workers != 1:
+            from .parallel_wfo import ParallelWFO
+            with ParallelWFO(self, workers=workers) as executor:
+                return executor.optimize(strategy_cls, param_grid, leverage=leverage, search=search, store=store, objective=objective)
+        
+        from .result_store import RunCheckpoint
+        if search is not None:
+            from .search import search_window, format_search_report, SearchSpace
+        
+        results = []
+        combinations = param_combinations(param_grid) if search is None else None
+        search_infos = []
+        cache_stats = CACHE.snapshot()
+        store_stats = dict(store.stats) if store is not None else {}
+        checkpoint = RunCheckpoint(store, self, strategy_cls, param_grid, engine_settings(leverage, objective), search)
+        
+        print(f"Starting WFO for {strategy_cls.__name__} (Lev: {leverage}x)...")
+        
+        for w, (train_end, test_end, train_slice, test_slice) in enumerate(self.windows()):
+            if w in checkpoint.done:
+                results.append(checkpoint.done[w])
+                continue
             
-            results.append({
-                'period_start': train_end,
-                'period_end': test_end,
-                'params': best_params,
-                'return': test_metrics['total_return'],
-                'drawdown': test_metrics['max_drawdown'],
-                'bnh_return': bnh_return
-            })
+            train_data = self.df.iloc[train_slice]
+            test_data = self.df.iloc[test_slice]
             
-            current_start += self.test_window
+            # Optimization Step
+            if search is None:
+                scores = score_combinations(train_data, strategy_cls, combinations, leverage, store, objective)
+                best_params = select_best(scores, combinations)
+            else:
+                best_params, info = search_window(train_data, strategy_cls, param_grid, search, leverage, window=w, store=store,
+                                                  objective=objective)
+                search_infos.append(info)
             
+            result = {'period_start': train_end, 'period_end': test_end}
+            result.update(test_window(train_data, test_data, strategy_cls, best_params, leverage))
+            checkpoint.record(w, result)
+            results.append(result)
+        
+        if search is not None:
+            print(format_search_report(search, search_infos, SearchSpace(param_grid).size))
+        print(format_report(CACHE.delta(cache_stats)))
+        if store is not None:
+            checkpoint.finish(results, {k: store.stats[k] - store_stats.get(k, 0) for k in store.stats})
         return results